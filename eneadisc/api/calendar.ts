@@ -1,13 +1,20 @@
 // Feed .ics: arma un calendario suscribible con las tareas (con fecha) y
 // los eventos del usuario, identificado por su ics_token secreto.
+// Los clientes de calendario re-consultan seguido: get_ics_feed_state
+// (20_ics_feed_cache.sql) da la versión del feed sin leer tareas ni eventos
+// y, si el cliente ya la tiene, se responde 304 sin armar nada.
+// El contenido lo acota get_ics_feed_items (25_ics_feed_window.sql):
+// ventana de -30/+180 días, solo lo relevante para el usuario y con tope.
 export const config = { runtime: 'edge' };
 
 const SUPABASE_URL = process.env.VITE_SUPABASE_URL || process.env.SUPABASE_URL || '';
 const SERVICE_KEY = process.env.SUPABASE_SERVICE_ROLE_KEY || '';
 
-async function rest(path: string): Promise<any[]> {
-  const res = await fetch(`${SUPABASE_URL}/rest/v1/${path}`, {
-    headers: { apikey: SERVICE_KEY, Authorization: `Bearer ${SERVICE_KEY}` },
+async function rpc(fn: string, args: Record<string, unknown>): Promise<any[]> {
+  const res = await fetch(`${SUPABASE_URL}/rest/v1/rpc/${fn}`, {
+    method: 'POST',
+    headers: { apikey: SERVICE_KEY, Authorization: `Bearer ${SERVICE_KEY}`, 'Content-Type': 'application/json' },
+    body: JSON.stringify(args),
   });
   if (!res.ok) return [];
   return res.json();
@@ -20,11 +27,12 @@ const toICS = (iso: string) => {
 };
 const esc = (s: string) => (s || '').replace(/\\/g, '\\\\').replace(/;/g, '\\;').replace(/,/g, '\\,').replace(/\n/g, '\\n');
 
-function vevent(uid: string, start: string, summary: string, opts: { end?: string; desc?: string; loc?: string }) {
+// DTSTAMP = último cambio del feed: mismo contenido ⇒ mismos bytes.
+function vevent(uid: string, start: string, summary: string, stamp: string, opts: { end?: string; desc?: string; loc?: string }) {
   const lines = [
     'BEGIN:VEVENT',
     `UID:${uid}@eneateams`,
-    `DTSTAMP:${toICS(new Date().toISOString())}`,
+    `DTSTAMP:${stamp}`,
     `DTSTART:${toICS(start)}`,
   ];
   if (opts.end) lines.push(`DTEND:${toICS(opts.end)}`);
@@ -40,12 +48,25 @@ export default async function handler(req: Request): Promise<Response> {
     const token = new URL(req.url).searchParams.get('token');
     if (!token || !SUPABASE_URL || !SERVICE_KEY) return new Response('Bad request', { status: 400 });
 
-    const profiles = await rest(`profiles?ics_token=eq.${token}&select=id,company_id`);
-    if (!profiles.length) return new Response('Not found', { status: 404 });
-    const { id: userId, company_id } = profiles[0];
+    const state = await rpc('get_ics_feed_state', { p_token: token });
+    if (!state.length) return new Response('Not found', { status: 404 });
+    const { user_id: userId, version, last_modified } = state[0];
 
-    const tasks = await rest(`tasks?user_id=eq.${userId}&due_date=not.is.null&select=id,title,due_date`);
-    const events = company_id ? await rest(`events?company_id=eq.${company_id}&select=id,title,description,location,start_at,end_at`) : [];
+    const etag = `W/"${version}"`;
+    const modified = new Date(last_modified);
+    const cacheHeaders = {
+      ETag: etag,
+      'Last-Modified': modified.toUTCString(),
+      'Cache-Control': 'public, max-age=300',
+    };
+    const inm = req.headers.get('If-None-Match');
+    const ims = req.headers.get('If-Modified-Since');
+    const notModified = inm !== null
+      ? inm.split(',').some((t) => t.trim() === etag || t.trim() === '*' || `W/${t.trim()}` === etag)
+      : ims !== null && Math.floor(modified.getTime() / 1000) * 1000 <= Date.parse(ims);
+    if (notModified) return new Response(null, { status: 304, headers: cacheHeaders });
+
+    const items = await rpc('get_ics_feed_items', { p_user: userId });
 
     const parts = [
       'BEGIN:VCALENDAR',
@@ -56,15 +77,19 @@ export default async function handler(req: Request): Promise<Response> {
       'X-WR-CALNAME:EneaTeams',
       'NAME:EneaTeams',
     ];
-    for (const t of tasks) parts.push(vevent('task-' + t.id, t.due_date, `📋 ${t.title}`, { desc: 'Tarea de EneaTeams' }));
-    for (const e of events) parts.push(vevent('event-' + e.id, e.start_at, e.title, { end: e.end_at || undefined, desc: e.description || undefined, loc: e.location || undefined }));
+    const stamp = toICS(last_modified);
+    for (const it of items) {
+      parts.push(it.kind === 'task'
+        ? vevent('task-' + it.id, it.start_at, `📋 ${it.title}`, stamp, { desc: 'Tarea de EneaTeams' })
+        : vevent('event-' + it.id, it.start_at, it.title, stamp, { end: it.end_at || undefined, desc: it.description || undefined, loc: it.location || undefined }));
+    }
     parts.push('END:VCALENDAR');
 
     return new Response(parts.join('\r\n'), {
       status: 200,
       headers: {
+        ...cacheHeaders,
         'Content-Type': 'text/calendar; charset=utf-8',
-        'Cache-Control': 'public, max-age=300',
         'Content-Disposition': 'inline; filename="eneateams.ics"',
       },
     });
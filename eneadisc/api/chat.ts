@@ -3,7 +3,37 @@ export const config = { runtime: 'edge' };
 interface ChatRequest {
     message: string;
     context: string;
+    summary?: string;
     conversationHistory?: Array<{ role: 'user' | 'assistant'; content: string }>;
+    stream?: boolean;            // true → respuesta SSE (delta / done / error)
+    scope?: { audience: 'company' | 'employee' };   // habilita el caché de respuestas (requiere el JWT)
+}
+
+type Turn = { role: 'user' | 'assistant'; content: string };
+
+// Topes del lado del servidor: el payload al modelo no crece con la charla.
+const MAX_CONTEXT_CHARS = 24000;
+const MAX_SUMMARY_CHARS = 2000;
+const MAX_TURN_CHARS = 4000;
+const MAX_RECENT_TURNS = 8;      // aiService manda entre 4 y 7 completos
+
+const clip = (text: string, max: number) => (text.length > max ? text.slice(0, max) + '…' : text);
+
+// Turnos alternados que arrancan en 'user' (lo exigen ambos proveedores):
+// se descartan los 'assistant' iniciales y se unen roles repetidos (p. ej.
+// un mensaje que falló y se reenvió).
+function normalizeTurns(turns: Turn[]): Turn[] {
+    const out: Turn[] = [];
+    for (const t of turns) {
+        const content = clip(String(t.content || ''), MAX_TURN_CHARS);
+        if (!content) continue;
+        const role = t.role === 'assistant' ? 'assistant' : 'user';
+        if (out.length === 0 && role === 'assistant') continue;
+        const last = out[out.length - 1];
+        if (last && last.role === role) last.content += '\n\n' + content;
+        else out.push({ role, content });
+    }
+    return out;
 }
 
 const SYSTEM_PROMPT = `Eres "ENEA AI", el asistente inteligente de ENEATEAMS. Eres un experto de clase mundial en el Eneagrama, el modelo DISC y gestión de equipos de trabajo.
@@ -71,9 +101,151 @@ const CORS_HEADERS = {
     'Content-Type': 'application/json',
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'POST, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+};
+
+const SSE_HEADERS = {
+    ...CORS_HEADERS,
+    'Content-Type': 'text/event-stream; charset=utf-8',
+    'Cache-Control': 'no-cache, no-transform',
+    'X-Accel-Buffering': 'no',   // que ningún proxy junte los eventos
 };
 
+// ── Streaming ───────────────────────────────────────────────
+// El cliente recibe:
+//   event: delta  data: {"text": "..."}     (uno por fragmento del modelo)
+//   event: done   data: {recommendations, confidence, sources, ...}
+//   event: error  data: {"error": "..."}    (si el modelo corta a mitad)
+// Los errores antes del primer byte siguen saliendo como JSON con status,
+// igual que sin streaming.
+
+const encoder = new TextEncoder();
+const sseEvent = (event: string, data: unknown) => encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+
+// Lee los `data:` de un stream SSE del proveedor, ya parseados.
+async function* upstreamEvents(body: ReadableStream<Uint8Array>): AsyncGenerator<any> {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer = (buffer + decoder.decode(value, { stream: true })).replace(/\r\n/g, '\n');   // Gemini usa CRLF
+        let end: number;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+            const chunk = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            const data = chunk.split('\n').filter((l) => l.startsWith('data:')).map((l) => l.slice(5).trimStart()).join('\n');
+            if (data && data !== '[DONE]') yield JSON.parse(data);
+        }
+    }
+}
+
+function relayStream(
+    upstream: Response,
+    textOf: (event: any) => string | undefined,
+    done: () => object,
+    onComplete?: (answer: string) => Promise<unknown>
+): Response {
+    const stream = new ReadableStream<Uint8Array>({
+        async start(controller) {
+            try {
+                let answer = '';
+                for await (const event of upstreamEvents(upstream.body!)) {
+                    if (event?.type === 'error' || event?.error) {
+                        throw new Error(event.error?.message || 'El modelo cortó la respuesta.');
+                    }
+                    const text = textOf(event);
+                    if (text) {
+                        answer += text;
+                        controller.enqueue(sseEvent('delta', { text }));
+                    }
+                }
+                controller.enqueue(sseEvent('done', done()));
+                if (answer && onComplete) await onComplete(answer);
+            } catch (error: unknown) {
+                console.error('Chat stream error:', error);
+                controller.enqueue(sseEvent('error', { error: error instanceof Error ? error.message : 'Stream interrumpido' }));
+            }
+            controller.close();
+        },
+    });
+    return new Response(stream, { status: 200, headers: SSE_HEADERS });
+}
+
+// ── Caché de respuestas (scripts/eneadisc_answer_cache.py) ─
+// Preguntas de teoría que se repiten ("¿cómo motivo a un tipo 6?") se
+// responden sin llamar al modelo. El servicio decide si la pregunta es
+// cacheable (no depende de analytics, del estado personal ni de la charla);
+// en ese caso se responde sin datos privados, para poder servirla a otros
+// usuarios de la misma audiencia y eneatipo. Sin ANSWER_CACHE_URL, o si el
+// servicio no contesta a tiempo, se sigue directo al modelo.
+const ANSWER_CACHE_TIMEOUT_MS = 250;
+
+type CacheLookup = { hit: boolean; cacheable?: boolean; answer?: string };
+type CacheScope = { audience: 'company' | 'employee'; type: number | null };
+
+// La audiencia y el eneatipo salen del perfil del JWT, no del body: una
+// respuesta guardada se sirve a todos los de esa clave, así que nadie
+// puede elegir en qué clave escribe. Sin sesión válida, o si el asistente
+// pedido no es el de su rol, no se usa el caché.
+async function resolveCacheScope(req: Request, requested: ChatRequest['scope']): Promise<CacheScope | null> {
+    const supabaseUrl = process.env.VITE_SUPABASE_URL || process.env.SUPABASE_URL || '';
+    const serviceKey = process.env.SUPABASE_SERVICE_ROLE_KEY || '';
+    const anonKey = process.env.VITE_SUPABASE_ANON_KEY || '';
+    const jwt = (req.headers.get('authorization') || '').replace(/^Bearer\s+/i, '');
+    if (!requested || !jwt || !supabaseUrl || !serviceKey) return null;
+    try {
+        const userRes = await fetch(`${supabaseUrl}/auth/v1/user`, {
+            headers: { apikey: anonKey || serviceKey, Authorization: `Bearer ${jwt}` },
+            signal: AbortSignal.timeout(ANSWER_CACHE_TIMEOUT_MS),
+        });
+        if (!userRes.ok) return null;
+        const user = await userRes.json();
+        const profRes = await fetch(`${supabaseUrl}/rest/v1/profiles?id=eq.${user.id}&select=role,enneagram_type`, {
+            headers: { apikey: serviceKey, Authorization: `Bearer ${serviceKey}` },
+            signal: AbortSignal.timeout(ANSWER_CACHE_TIMEOUT_MS),
+        });
+        const [profile] = profRes.ok ? await profRes.json() : [];
+        if (!profile) return null;
+        const audience = profile.role === 'company_admin' ? 'company' : 'employee';
+        if (audience !== requested.audience) return null;
+        return { audience, type: audience === 'employee' ? profile.enneagram_type ?? null : null };
+    } catch (error: unknown) {
+        console.warn('Answer cache scope unavailable:', error instanceof Error ? error.message : error);
+        return null;
+    }
+}
+
+async function answerCache<T>(path: '/lookup' | '/store', body: object): Promise<T | null> {
+    const base = process.env.ANSWER_CACHE_URL;
+    if (!base) return null;
+    try {
+        const res = await fetch(`${base}${path}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                ...(process.env.ANSWER_CACHE_TOKEN ? { Authorization: `Bearer ${process.env.ANSWER_CACHE_TOKEN}` } : {}),
+            },
+            body: JSON.stringify(body),
+            signal: AbortSignal.timeout(ANSWER_CACHE_TIMEOUT_MS),
+        });
+        return res.ok ? await res.json() as T : null;
+    } catch (error: unknown) {
+        console.warn('Answer cache unavailable:', error instanceof Error ? error.message : error);
+        return null;
+    }
+}
+
+function cachedResponse(answer: string, stream: boolean): Response {
+    const meta = { recommendations: [], confidence: 95, sources: ['Eneagrama', 'DISC'], processingTime: 0, cached: true };
+    if (!stream) {
+        return new Response(JSON.stringify({ answer, ...meta }), { status: 200, headers: CORS_HEADERS });
+    }
+    const body = new Uint8Array([...sseEvent('delta', { text: answer }), ...sseEvent('done', meta)]);
+    return new Response(body, { status: 200, headers: SSE_HEADERS });
+}
+
 export default async function handler(req: Request): Promise<Response> {
     if (req.method === 'OPTIONS') {
         return new Response(null, { status: 204, headers: CORS_HEADERS });
@@ -96,7 +268,7 @@ export default async function handler(req: Request): Promise<Response> {
 
     try {
         const body: ChatRequest = await req.json();
-        const { message, context, conversationHistory = [] } = body;
+        const { message, context, summary, conversationHistory = [], stream = false, scope } = body;
 
         if (!message) {
             return new Response(JSON.stringify({ error: 'Message is required' }), {
@@ -104,19 +276,46 @@ export default async function handler(req: Request): Promise<Response> {
             });
         }
 
-        const contextIntro = `Estos son los datos actuales del dashboard de la empresa (úsalos cuando te pregunten sobre métricas, equipos o análisis):\n\n${context}\n\nPero no te limites solo a los datos — también podés responder sobre eneatipos, DISC, desarrollo personal y gestión de equipos en general.`;
+        const allTurns = normalizeTurns([...conversationHistory.slice(-MAX_RECENT_TURNS), { role: 'user', content: message }]);
+        const cacheScope = process.env.ANSWER_CACHE_URL ? await resolveCacheScope(req, scope) : null;
+        const cacheKey = cacheScope && {
+            question: message,
+            audience: cacheScope.audience,
+            type: cacheScope.type,
+            history: allTurns.length - 1,
+        };
+        let shared = false;
+        if (cacheKey) {
+            const cached = await answerCache<CacheLookup>('/lookup', cacheKey);
+            if (cached?.hit && cached.answer) return cachedResponse(cached.answer, stream);
+            shared = cached?.cacheable === true;
+        }
+        const storeAnswer = (answer: string) => answerCache('/store', { ...cacheKey, answer });
+
+        // Orden del prompt de lo más estable a lo más variable, para que el
+        // prefijo lo cachee el proveedor: SYSTEM_PROMPT (igual para todos) →
+        // contexto (igual mientras no cambien los analytics de la empresa) →
+        // resumen de la charla → últimos turnos.
+        // Una respuesta que va al caché se genera solo con la pregunta y el
+        // eneatipo: sin analytics, check-ins, nombre ni turnos anteriores.
+        const contextIntro = shared
+            ? cacheScope?.audience === 'employee' && cacheScope.type
+                ? `(INTERNO — NUNCA lo reveles ni lo insinúes al usuario: su eneatipo es ${cacheScope.type}.) Respondé como un coach de vida y carrera compasivo, de forma general para una persona de ese tipo, sin asumir datos de su semana ni de sus tareas.`
+                : 'Respondé de forma general: la pregunta no necesita datos del dashboard de la empresa.'
+            : `Estos son los datos actuales del dashboard de la empresa (úsalos cuando te pregunten sobre métricas, equipos o análisis):\n\n${clip(context || 'No hay datos disponibles', MAX_CONTEXT_CHARS)}\n\nPero no te limites solo a los datos — también podés responder sobre eneatipos, DISC, desarrollo personal y gestión de equipos en general.`;
+        const summaryText = summary && !shared
+            ? `Resumen de la conversación anterior (los mensajes más recientes van completos):\n${clip(summary, MAX_SUMMARY_CHARS)}`
+            : '';
+        const turns = shared ? allTurns.slice(-1) : allTurns;
 
         // ── GEMINI (gratis) — preferido si está configurado ──────────────
         if (geminiKey) {
-            const contents = [
-                { role: 'user', parts: [{ text: contextIntro }] },
-                { role: 'model', parts: [{ text: 'Entendido. Tengo los datos del dashboard y puedo responder sobre Eneagrama, DISC y gestión de equipos. ¿En qué te ayudo?' }] },
-                ...conversationHistory.slice(-4).map((m) => ({
-                    role: m.role === 'assistant' ? 'model' : 'user',
-                    parts: [{ text: m.content }],
-                })),
-                { role: 'user', parts: [{ text: message }] },
-            ];
+            const contents = turns.map((m) => ({
+                role: m.role === 'assistant' ? 'model' : 'user',
+                parts: [{ text: m.content }],
+            }));
+            const systemParts = [{ text: SYSTEM_PROMPT }, { text: contextIntro }];
+            if (summaryText) systemParts.push({ text: summaryText });
             // Probar varios modelos gratis en orden: usa el primero con cuota disponible.
             const models = process.env.GEMINI_MODEL
                 ? [process.env.GEMINI_MODEL]
@@ -124,21 +323,33 @@ export default async function handler(req: Request): Promise<Response> {
             let answer: string | null = null;
             let lastStatus = 0;
             for (const model of models) {
+                const method = stream ? 'streamGenerateContent?alt=sse&' : 'generateContent?';
                 const gRes = await fetch(
-                    `https://generativelanguage.googleapis.com/v1beta/models/${model}:generateContent?key=${geminiKey}`,
+                    `https://generativelanguage.googleapis.com/v1beta/models/${model}:${method}key=${geminiKey}`,
                     {
                         method: 'POST',
                         headers: { 'Content-Type': 'application/json' },
                         body: JSON.stringify({
-                            system_instruction: { parts: [{ text: SYSTEM_PROMPT }] },
+                            system_instruction: { parts: systemParts },
                             contents,
                             generationConfig: { temperature: 0.7, maxOutputTokens: 900 },
                         }),
                     }
                 );
+                if (gRes.ok && stream) {
+                    type GeminiChunk = { candidates?: Array<{ content?: { parts?: Array<{ text?: string }> } }> };
+                    return relayStream(
+                        gRes,
+                        (d: GeminiChunk) => d.candidates?.[0]?.content?.parts?.map((p) => p.text || '').join(''),
+                        () => ({ recommendations: [], confidence: 92, sources: ['Eneagrama', 'DISC', 'Dashboard Analytics'], processingTime: 0 }),
+                        shared ? storeAnswer : undefined
+                    );
+                }
                 if (gRes.ok) {
                     const gData = await gRes.json() as { candidates?: Array<{ content?: { parts?: Array<{ text?: string }> } }> };
-                    answer = gData.candidates?.[0]?.content?.parts?.[0]?.text || 'No se pudo generar una respuesta.';
+                    const text = gData.candidates?.[0]?.content?.parts?.[0]?.text;
+                    if (text && shared) await storeAnswer(text);
+                    answer = text || 'No se pudo generar una respuesta.';
                     break;
                 }
                 lastStatus = gRes.status;
@@ -160,34 +371,25 @@ export default async function handler(req: Request): Promise<Response> {
         }
 
         // ── ANTHROPIC (respaldo, de pago) ────────────────────────────────
-        // Build messages - inject real dashboard data as context
-        // El mensaje de contexto se cachea para evitar reprocesarlo en cada turno
-        const messages = [
-            {
-                role: 'user' as const,
-                content: [
-                    {
-                        type: 'text' as const,
-                        text: `Estos son los datos actuales del dashboard de la empresa (úsalos cuando te pregunten sobre métricas, equipos o análisis):\n\n${context}\n\nPero no te limites solo a los datos — también podés responder preguntas sobre eneatipos, DISC, desarrollo personal y gestión de equipos en general.`,
-                        cache_control: { type: 'ephemeral' as const }
-                    }
-                ]
-            },
-            {
-                role: 'assistant' as const,
-                content: 'Entendido. Tengo los datos del dashboard disponibles para análisis, y también puedo responder sobre Eneagrama, DISC, tipos de personalidad y gestión de equipos. ¿En qué te puedo ayudar?'
-            },
-            ...conversationHistory.slice(-4).map(msg => ({
-                role: msg.role as 'user' | 'assistant',
-                content: msg.content
-            })),
-            { role: 'user' as const, content: message }
+        // Tres puntos de caché, de lo más compartido a lo menos:
+        //   1. system prompt (todas las empresas)
+        //   2. contexto del dashboard (los turnos, mientras no cambie)
+        //   3. el último mensaje: el próximo turno lee del caché toda la
+        //      charla hasta acá (el resumen cambia solo al plegar turnos)
+        const system: Array<{ type: 'text'; text: string; cache_control?: { type: 'ephemeral' } }> = [
+            { type: 'text', text: SYSTEM_PROMPT, cache_control: { type: 'ephemeral' } },
+            { type: 'text', text: contextIntro, cache_control: { type: 'ephemeral' } },
         ];
+        if (summaryText) system.push({ type: 'text', text: summaryText });
+        const messages = turns.map((m, i) => i < turns.length - 1 ? m : {
+            role: m.role,
+            content: [{ type: 'text' as const, text: m.content, cache_control: { type: 'ephemeral' as const } }],
+        });
 
-        // Direct fetch to Anthropic API (Edge-compatible, no SDK)
-        // Sistema de caché: el system prompt y el contexto del dashboard se cachean
-        // para reducir latencia y costo en conversaciones largas (~90% ahorro en tokens repetidos)
-        const anthropicRes = await fetch('https://api.anthropic.com/v1/messages', {
+        // Direct fetch to Anthropic API (Edge-compatible, no SDK).
+        // ANTHROPIC_BASE_URL apunta a un modelo local en pruebas (scripts/eneadisc_ai_stream_harness.py).
+        const anthropicBase = process.env.ANTHROPIC_BASE_URL || 'https://api.anthropic.com';
+        const anthropicRes = await fetch(`${anthropicBase}/v1/messages`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -198,14 +400,9 @@ export default async function handler(req: Request): Promise<Response> {
             body: JSON.stringify({
                 model: 'claude-sonnet-4-6',
                 max_tokens: 900,
-                system: [
-                    {
-                        type: 'text',
-                        text: SYSTEM_PROMPT,
-                        cache_control: { type: 'ephemeral' }
-                    }
-                ],
-                messages
+                system,
+                messages,
+                ...(stream ? { stream: true } : {})
             })
         });
 
@@ -233,6 +430,21 @@ export default async function handler(req: Request): Promise<Response> {
             }), { status: 502, headers: CORS_HEADERS });
         }
 
+        if (stream) {
+            type Usage = { input_tokens?: number; output_tokens?: number };
+            const usage: Usage = {};
+            return relayStream(
+                anthropicRes,
+                (d: { type: string; message?: { usage?: Usage }; usage?: Usage; delta?: { type?: string; text?: string } }) => {
+                    if (d.type === 'message_start') Object.assign(usage, d.message?.usage);
+                    if (d.type === 'message_delta') Object.assign(usage, d.usage);
+                    return d.type === 'content_block_delta' && d.delta?.type === 'text_delta' ? d.delta.text : undefined;
+                },
+                () => ({ recommendations: [], confidence: 95, sources: ['Eneagrama', 'DISC', 'Dashboard Analytics'], processingTime: 0, usage }),
+                shared ? storeAnswer : undefined
+            );
+        }
+
         const data = await anthropicRes.json() as {
             content: Array<{ type: string; text: string }>;
             usage?: { input_tokens: number; output_tokens: number };
@@ -241,6 +453,7 @@ export default async function handler(req: Request): Promise<Response> {
         const answer = data.content?.[0]?.type === 'text'
             ? data.content[0].text
             : 'No se pudo generar una respuesta.';
+        if (shared && data.content?.[0]?.type === 'text') await storeAnswer(answer);
 
         return new Response(JSON.stringify({
             answer,
@@ -114,6 +114,9 @@ export const MessageBubble: React.FC<MessageBubbleProps> = ({ message }) => {
                                 {message.content}
                             </ReactMarkdown>
                         )}
+                        {message.isStreaming && (
+                            <span className="inline-block w-2 h-4 ml-0.5 align-text-bottom bg-[#E07A5F] animate-pulse" />
+                        )}
                     </div>
 
                     <div className="text-xs text-slate-500 mt-2">
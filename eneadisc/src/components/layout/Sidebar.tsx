@@ -3,7 +3,7 @@ import { useNavigate, useLocation } from 'react-router-dom';
 import { useAuth } from '../../context/AuthContext';
 import { Home, TrendingUp, Bot, CheckSquare, Users, ClipboardCheck, BarChart3, BookOpen, CreditCard, LogOut, Menu, X, Settings, UserCircle, Award, UserCog, MessageSquare, CalendarDays } from 'lucide-react';
 import { UserSettingsModal } from '../settings/UserSettingsModal';
-import { getTotalUnread, subscribeToAllMessages } from '../../utils/chat';
+import { getUnreadCounts, subscribeToChatStream } from '../../utils/chat';
 
 const EMPLOYEE_CHAT = '/dashboard/employee/chat';
 const ADMIN_CHAT = '/dashboard/company/chat';
@@ -25,26 +25,33 @@ export const Sidebar: React.FC = () => {
         return () => window.removeEventListener('avatarChanged', handleAvatarChange);
     }, []);
 
-    // Badge de mensajes no leídos (en vivo)
+    // Badge de mensajes no leídos (en vivo): estado inicial + deltas del stream
     useEffect(() => {
-        if (!user) return;
+        if (!user?.id) return;
         let active = true;
-        const refresh = () => getTotalUnread().then((n) => { if (active) setUnread(n); }).catch(() => {});
-        refresh();
-        const unsub = subscribeToAllMessages(refresh);
-        // refrescar también al volver a la pestaña / navegar
-        const onFocus = () => refresh();
-        window.addEventListener('focus', onFocus);
-        return () => { active = false; unsub(); window.removeEventListener('focus', onFocus); };
-    }, [user]);
-
-    // Al entrar a la página de chat, bajamos el badge (la propia página marca leído)
-    useEffect(() => {
-        if (location.pathname === EMPLOYEE_CHAT || location.pathname === ADMIN_CHAT) {
-            const t = setTimeout(() => getTotalUnread().then(setUnread).catch(() => {}), 800);
-            return () => clearTimeout(t);
-        }
-    }, [location.pathname]);
+        const counts = new Map<string, number>();
+        const publish = () => { if (active) setUnread([...counts.values()].reduce((a, b) => a + b, 0)); };
+        // Al volver a la pestaña o al reconectar el socket se re-sincroniza (eventos perdidos en el corte)
+        const resync = () => getUnreadCounts()
+            .then((fresh) => { counts.clear(); fresh.forEach((n, conv) => counts.set(conv, n)); publish(); })
+            .catch(() => {});
+        const unsub = subscribeToChatStream(user.id, user.companyId || null, (e) => {
+            if (e.type === 'resync') { resync(); return; }
+            if (e.type === 'message') counts.set(e.message.conversationId, e.unread);
+            else if (e.type === 'read') counts.set(e.conversationId, e.unread);
+            else return;
+            publish();
+        });
+        getUnreadCounts()
+            .then((initial) => {
+                // Lo que llegó por el stream mientras tanto es más nuevo
+                initial.forEach((n, conv) => { if (!counts.has(conv)) counts.set(conv, n); });
+                publish();
+            })
+            .catch(() => {});
+        window.addEventListener('focus', resync);
+        return () => { active = false; unsub(); window.removeEventListener('focus', resync); };
+    }, [user?.id, user?.companyId]);
 
     const isAdmin = user?.role === 'company_admin';
     const isSupervisor = user?.role === 'supervisor';
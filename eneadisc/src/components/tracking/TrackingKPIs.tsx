@@ -1,11 +1,24 @@
 import React from 'react';
-import { Target, TrendingUp, HeartPulse } from 'lucide-react';
+import { Target, TrendingUp, TrendingDown, HeartPulse } from 'lucide-react';
 import type { TrackingKPIs as KPIs } from '../../utils/trackingMocks';
 
 interface Props {
   kpis: KPIs;
 }
 
+const GrowthBadge: React.FC<{ value: number }> = ({ value }) => {
+  const isDown = value < 0;
+  const Icon = isDown ? TrendingDown : TrendingUp;
+  const color = isDown ? 'text-red-600 bg-red-50' : 'text-emerald-600 bg-emerald-50';
+
+  return (
+    <div className={`flex items-center space-x-1 text-sm font-medium ${color} px-2 py-1 rounded-full`}>
+      <Icon className="w-4 h-4" />
+      <span>{isDown ? '' : '+'}{value}%</span>
+    </div>
+  );
+};
+
 export const TrackingKPIs: React.FC<Props> = ({ kpis }) => {
   return (
     <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-8">
@@ -15,10 +28,7 @@ export const TrackingKPIs: React.FC<Props> = ({ kpis }) => {
           <div className="p-3 bg-blue-50 text-blue-600 rounded-lg">
             <Target className="w-6 h-6" />
           </div>
-          <div className="flex items-center space-x-1 text-sm font-medium text-emerald-600 bg-emerald-50 px-2 py-1 rounded-full">
-            <TrendingUp className="w-4 h-4" />
-            <span>+{kpis.completedChallengesGrowth}%</span>
-          </div>
+          <GrowthBadge value={kpis.completedChallengesGrowth} />
         </div>
         <h3 className="text-slate-500 text-sm font-medium">Retos Completados</h3>
         <div className="mt-2 flex items-baseline gap-2">
@@ -33,10 +43,7 @@ export const TrackingKPIs: React.FC<Props> = ({ kpis }) => {
           <div className="p-3 bg-[#FCF1EC] text-[#C9624A] rounded-lg">
             <HeartPulse className="w-6 h-6" />
           </div>
-          <div className="flex items-center space-x-1 text-sm font-medium text-emerald-600 bg-emerald-50 px-2 py-1 rounded-full">
-            <TrendingUp className="w-4 h-4" />
-            <span>+{kpis.wellbeingGrowth}%</span>
-          </div>
+          <GrowthBadge value={kpis.wellbeingGrowth} />
         </div>
         <h3 className="text-slate-500 text-sm font-medium">Bienestar Promedio</h3>
         <div className="mt-2 flex items-baseline gap-2">
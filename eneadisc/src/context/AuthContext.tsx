@@ -37,7 +37,22 @@ interface AuthContextType {
 
 const AuthContext = createContext<AuthContextType | undefined>(undefined);
 
-async function buildAppUser(supabaseUser: SupabaseUser): Promise<AppUser | null> {
+// Claims que stampa custom_access_token_hook (29_jwt_claims.sql). Si el rol
+// o la empresa cambiaron después de emitir el token, la RLS cae al lookup en
+// profiles hasta el próximo refresh: lo adelantamos (una vez por cambio).
+let claimsRefreshedFor: string | null = null;
+
+function claimsAreStale(session: Session, profile: Profile): boolean {
+  try {
+    const payload = JSON.parse(atob(session.access_token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/')));
+    if (!('claims_version' in payload)) return false; // hook sin habilitar
+    return payload.user_role !== profile.role || (payload.company_id ?? null) !== (profile.company_id ?? null);
+  } catch {
+    return false;
+  }
+}
+
+async function buildAppUser(supabaseUser: SupabaseUser, session?: Session | null): Promise<AppUser | null> {
   const { data: profile, error: profileError } = await supabase
     .from('profiles')
     .select('*')
@@ -48,6 +63,12 @@ async function buildAppUser(supabaseUser: SupabaseUser): Promise<AppUser | null>
 
   const typedProfile = profile as Profile;
 
+  const claimsKey = `${typedProfile.id}:${typedProfile.role}:${typedProfile.company_id ?? ''}`;
+  if (session && claimsRefreshedFor !== claimsKey && claimsAreStale(session, typedProfile)) {
+    claimsRefreshedFor = claimsKey;
+    void supabase.auth.refreshSession();
+  }
+
   let inviteCode: string | undefined;
   let companyId = typedProfile.company_id || '';
 
@@ -86,7 +107,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
     const { data: { session: currentSession } } = await supabase.auth.getSession();
     if (currentSession?.user) {
-      const appUser = await buildAppUser(currentSession.user);
+      const appUser = await buildAppUser(currentSession.user, currentSession);
       setUser(appUser);
     } else {
       setUser(null);
@@ -120,7 +141,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
       setSession(s);
       if (s?.user) {
         try {
-          const appUser = await buildAppUser(s.user);
+          const appUser = await buildAppUser(s.user, s);
           if (mounted) setUser(appUser);
         } catch (e) {
           console.error("Error building app user", e);
@@ -152,7 +173,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
         setTimeout(async () => {
           if (!mounted) return;
           try {
-            const appUser = await buildAppUser(s.user);
+            const appUser = await buildAppUser(s.user, s);
             if (mounted) setUser(appUser);
           } catch (e) {
             console.error('Auth context error:', e);
@@ -223,7 +244,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
     // ya liberó el lock, así que esta query no se deadlockea.
     if (data.user) {
       try {
-        const appUser = await buildAppUser(data.user);
+        const appUser = await buildAppUser(data.user, data.session);
         setUser(appUser);
         setSession(data.session);
       } catch (e) {
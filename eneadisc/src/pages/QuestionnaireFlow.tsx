@@ -2,10 +2,8 @@ import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { QUICK_QUESTIONS, DEEP_QUESTIONS } from '../data/questionnaireData';
-import {
-    calculateEnneagram, persistEnneagramType, saveLocalResult,
-    type QuestionnaireResponse, type EnneagramResult,
-} from '../utils/calculateEnneagram';
+import { persistEnneagramType, saveLocalResult, type EnneagramResult } from '../utils/calculateEnneagram';
+import { adaptiveStep } from '../utils/adaptiveQuestionnaire';
 import { Button } from '../components/ui/Button';
 import { ChevronLeft, ChevronRight, Check } from 'lucide-react';
 
@@ -14,7 +12,10 @@ export const QuestionnaireFlow: React.FC = () => {
     const { user, refreshUser } = useAuth();
 
     const [mode] = useState<'quick' | 'deep'>('quick');
+    const questions = mode === 'deep' ? DEEP_QUESTIONS : QUICK_QUESTIONS;
     const [phase, setPhase] = useState<'quiz' | 'result'>('quiz');
+    // Orden en que se fueron mostrando las preguntas (lo decide el motor adaptativo).
+    const [asked, setAsked] = useState<number[]>(() => [adaptiveStep(questions, {}).next!.id]);
     const [currentIndex, setCurrentIndex] = useState(0);
     const [answers, setAnswers] = useState<Record<number, number>>({});
     const [result, setResult] = useState<EnneagramResult | null>(null);
@@ -22,28 +23,30 @@ export const QuestionnaireFlow: React.FC = () => {
     const [saving, setSaving] = useState(false);
     const [saveError, setSaveError] = useState<string | null>(null);
 
-    const questions = mode === 'deep' ? DEEP_QUESTIONS : QUICK_QUESTIONS;
-    const question = questions[currentIndex];
+    const question = questions.find((q) => q.id === asked[currentIndex])!;
     const selectedType = answers[question.id] ?? null;
     const progress = ((currentIndex + 1) / questions.length) * 100;
-    const isLast = currentIndex === questions.length - 1;
+    // Con esta respuesta, ¿el resultado ya está definido?
+    const isLast = currentIndex === asked.length - 1 && selectedType !== null && adaptiveStep(questions, answers).done;
 
     const pick = (type: number) => setAnswers((prev) => ({ ...prev, [question.id]: type }));
 
     const handleNext = async () => {
         if (selectedType === null) return;
-        if (!isLast) {
+        if (currentIndex < asked.length - 1) {
+            setCurrentIndex((i) => i + 1);
+            return;
+        }
+        // El ranking se recalcula con cada respuesta; se corta apenas el
+        // líder ya no puede ser alcanzado con las preguntas que quedan.
+        const step = adaptiveStep(questions, answers);
+        if (!step.done) {
+            setAsked((prev) => [...prev, step.next!.id]);
             setCurrentIndex((i) => i + 1);
             return;
         }
-        // Finalizar → calcular
-        const responses: QuestionnaireResponse[] = questions.map((q) => ({
-            questionId: q.id,
-            selectedType: answers[q.id],
-            weight: q.weight,
-        }));
-        const res = calculateEnneagram(responses);
-        if (user) saveLocalResult(user.id, res);
+        const res = step.result;
+        if (user) saveLocalResult(user.id, res, { answered: step.answered, total: questions.length });
         setResult(res);
         setChosenType(res.primaryType);
         // El resultado NO se muestra al operario (evita condicionamiento y
@@ -119,7 +122,7 @@ export const QuestionnaireFlow: React.FC = () => {
                         <h2 className="text-sm font-medium text-[#8A8079]">
                             {mode === 'deep' ? 'Test completo' : 'Test de autoconocimiento'}
                         </h2>
-                        <span className="text-sm text-[#8A8079]">{currentIndex + 1} de {questions.length}</span>
+                        <span className="text-sm text-[#8A8079]">{currentIndex + 1} de {questions.length} como máximo</span>
                     </div>
                     <div className="h-2 bg-white rounded-full overflow-hidden shadow-inner">
                         <div
@@ -3,7 +3,7 @@ import { Send, Bot, Sparkles, AlertCircle, HelpCircle } from 'lucide-react';
 import { useAuth } from '../../context/AuthContext';
 import { getTeams } from '../../utils/teams';
 import { calculateCompanyAnalytics, getDateRange } from '../../utils/analytics';
-import { generateAnalyticsContext } from '../../utils/aiContext';
+import { generateAnalyticsContext, getCachedAnalyticsContext } from '../../utils/aiContext';
 import { sendToAI } from '../../services/aiService';
 import { MessageBubble } from '../../components/ai/MessageBubble';
 import { SuggestedPrompts } from '../../components/ai/SuggestedPrompts';
@@ -66,9 +66,10 @@ Puedo ayudarte con:
         setShowSuggestions(false); // Ocultar sugerencias al enviar
         setIsLoading(true);
 
-        // Add loading message
+        // Add loading message (se convierte en la respuesta cuando llega el primer texto)
+        const replyId = `${Date.now()}-loading`;
         const loadingMessage: Message = {
-            id: `${Date.now()}-loading`,
+            id: replyId,
             role: 'assistant',
             content: '',
             timestamp: new Date(),
@@ -86,12 +87,15 @@ Puedo ayudarte con:
                 context,
                 userId: user?.id || 'anonymous',
                 companyId: user?.companyId || 'demo',
-                conversationHistory: messages.slice(-5) // Last 5 messages for context
-            });
+                conversationHistory: messages, // aiService compacta lo anterior a los últimos turnos
+                scope: { audience: 'company' }
+            }, (partial) => setMessages(prev => prev.map(m => m.id === replyId
+                ? { ...m, content: partial, isLoading: false, isStreaming: true }
+                : m)));
 
-            // Remove loading message and add AI response
+            // Replace the streamed/loading message with the final AI response
             setMessages(prev => {
-                const withoutLoading = prev.filter(m => !m.isLoading);
+                const withoutLoading = prev.filter(m => m.id !== replyId);
                 const aiMessage: Message = {
                     id: Date.now().toString(),
                     role: 'assistant',
@@ -105,8 +109,8 @@ Puedo ayudarte con:
             console.error('Error sending message:', err);
             setError('No se pudo conectar con el asistente. Por favor, intenta de nuevo.');
 
-            // Remove loading message
-            setMessages(prev => prev.filter(m => !m.isLoading));
+            // Remove loading (or partially streamed) message
+            setMessages(prev => prev.filter(m => m.id !== replyId));
         } finally {
             setIsLoading(false);
             inputRef.current?.focus();
@@ -116,23 +120,27 @@ Puedo ayudarte con:
     const generateContext = async (): Promise<string> => {
         if (!user?.companyId) return 'No hay datos disponibles';
 
+        const companyId = user.companyId;
         try {
-            const teams = await getTeams(user.companyId);
-            const teamsData = teams.map((team: any) => ({
-                id: team.id,
-                name: team.name,
-                memberCount: team.memberIds?.length || 0,
-                memberIds: team.memberIds || []
-            }));
+            // Se rearma solo si cambiaron los analytics de la empresa (ver aiContext).
+            return await getCachedAnalyticsContext(companyId, 'month', async () => {
+                const teams = await getTeams(companyId);
+                const teamsData = teams.map((team: any) => ({
+                    id: team.id,
+                    name: team.name,
+                    memberCount: team.memberIds?.length || 0,
+                    memberIds: team.memberIds || []
+                }));
 
-            if (teamsData.length === 0) {
-                return 'La empresa aún no tiene equipos creados';
-            }
+                if (teamsData.length === 0) {
+                    return 'La empresa aún no tiene equipos creados';
+                }
 
-            const dateRange = getDateRange('month');
-            const analytics = await calculateCompanyAnalytics(teamsData, dateRange);
+                const dateRange = getDateRange('month');
+                const analytics = await calculateCompanyAnalytics(teamsData, dateRange);
 
-            return generateAnalyticsContext(analytics);
+                return generateAnalyticsContext(analytics);
+            });
         } catch (error) {
             console.error('Error generating context:', error);
             return 'Error al obtener datos analíticos';
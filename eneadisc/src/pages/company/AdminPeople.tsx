@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useAuth } from '../../context/AuthContext';
 import { ENNEAGRAM_TYPES } from '../../data/enneagramData';
 import { WORK_PROFILES } from '../../data/enneagramWorkData';
@@ -6,8 +6,9 @@ import { LEADERSHIP_GUIDE } from '../../data/enneagramLeadership';
 import { FeedbackToolkit } from '../../components/FeedbackToolkit';
 import { MOOD_CONFIG } from '../../utils/checkIns';
 import {
-  getEmployeesOverview, getEmployeeCheckins, getOneOnOneNotes, addOneOnOneNote, deleteOneOnOneNote,
-  type EmployeeOverview, type EmpCheckin, type OneOnOneNote,
+  getEmployeesPage, getEmployeesStats, getEmployeeCheckins, getOneOnOneNotes, addOneOnOneNote, deleteOneOnOneNote,
+  type EmployeeOverview, type EmployeeSummary, type EmployeeFilters, type EmployeeCursor, type EmployeeSort,
+  type EmployeesStats, type RiskFlag, type EmpCheckin, type OneOnOneNote,
 } from '../../utils/adminFeatures';
 import { setEmployeeRole, setTeamLead } from '../../utils/supervisorFeatures';
 import { getTeams, type Team } from '../../utils/teams';
@@ -22,19 +23,69 @@ const RISK_CONFIG = {
   high: { label: 'En riesgo', color: '#dc2626', bg: '#fef2f2', border: '#fecaca' },
 };
 
+const FLAG_LABELS: Record<RiskFlag, string> = {
+  high_stress: 'Estrés alto',
+  low_energy: 'Energía baja',
+  overdue_tasks: 'Tareas vencidas',
+  no_checkins: 'Sin check-ins',
+  pending_test: 'Test pendiente',
+};
+
+const SORT_OPTIONS: { value: EmployeeSort; label: string }[] = [
+  { value: 'name', label: 'Nombre' },
+  { value: 'risk', label: 'Más en riesgo' },
+  { value: 'last_checkin', label: 'Último check-in' },
+];
+const PAGE_SIZE = 40;
+
 export const AdminPeople: React.FC = () => {
   const { user } = useAuth();
-  const [people, setPeople] = useState<EmployeeOverview[]>([]);
+  const [people, setPeople] = useState<EmployeeSummary[]>([]);
+  const [next, setNext] = useState<EmployeeCursor | null>(null);
+  const [stats, setStats] = useState<EmployeesStats | null>(null);
+  const [teams, setTeams] = useState<Team[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selected, setSelected] = useState<EmployeeOverview | null>(null);
   const [search, setSearch] = useState('');
+  const [query, setQuery] = useState(''); // búsqueda ya enviada al servidor
+  const [filters, setFilters] = useState<EmployeeFilters>({ sort: 'name' });
+  // Cada consulta de lista lleva un número: si los filtros cambian mientras
+  // vuela, su respuesta llega vieja y se descarta.
+  const request = useRef(0);
+
+  // La búsqueda va al servidor: se espera a que el admin deje de tipear.
+  useEffect(() => {
+    const t = setTimeout(() => setQuery(search), 300);
+    return () => clearTimeout(t);
+  }, [search]);
 
   const load = useCallback(async () => {
-    setLoading(true);
-    setPeople(await getEmployeesOverview());
-    setLoading(false);
-  }, []);
+    const id = ++request.current;
+    const [page, st] = await Promise.all([
+      getEmployeesPage({ ...filters, search: query }, null, PAGE_SIZE), getEmployeesStats(),
+    ]);
+    if (id !== request.current) return;
+    setPeople(page.rows); setNext(page.next); setStats(st);
+    setLoading(false); setLoadingMore(false);
+  }, [filters, query]);
   useEffect(() => { load(); }, [load]);
+  useEffect(() => {
+    if (user?.companyId) getTeams(user.companyId).then(setTeams).catch(() => setTeams([]));
+  }, [user?.companyId]);
+
+  const loadMore = async () => {
+    if (!next) return;
+    const id = request.current;
+    setLoadingMore(true);
+    const page = await getEmployeesPage({ ...filters, search: query }, next, PAGE_SIZE);
+    if (id !== request.current) return;
+    setPeople((prev) => [...prev, ...page.rows]); setNext(page.next);
+    setLoadingMore(false);
+  };
+
+  const setFilter = <K extends keyof EmployeeFilters>(key: K, value: EmployeeFilters[K]) =>
+    setFilters((f) => ({ ...f, [key]: value }));
 
   if (loading) {
     return <div className="p-8 flex flex-col items-center justify-center min-h-[400px]"><div className="h-10 w-10 animate-spin rounded-full border-4 border-[#E07A5F] border-t-transparent mb-4" /><p className="text-slate-500 text-sm">Cargando tu equipo...</p></div>;
@@ -44,9 +95,9 @@ export const AdminPeople: React.FC = () => {
     return <PersonDetail person={selected} companyId={user?.companyId || ''} onBack={() => { setSelected(null); load(); }} />;
   }
 
-  const filtered = people.filter((p) => p.name.toLowerCase().includes(search.toLowerCase()));
-  const atRisk = people.filter((p) => p.risk === 'high').length;
-  const pending = people.filter((p) => !p.questionnaireCompleted).length;
+  const atRisk = stats?.riskHigh ?? 0;
+  const pending = stats?.pendingTest ?? 0;
+  const selectCls = 'border border-slate-300 rounded-lg text-sm px-3 py-2.5 bg-white focus:ring-2 focus:ring-[#E07A5F] outline-none';
 
   return (
     <div className="p-4 md:p-8 max-w-6xl mx-auto">
@@ -59,68 +110,106 @@ export const AdminPeople: React.FC = () => {
       {(atRisk > 0 || pending > 0) && (
         <div className="grid sm:grid-cols-2 gap-3 mb-6">
           {atRisk > 0 && (
-            <div className="bg-red-50 border border-red-200 rounded-xl p-4 flex items-center gap-3">
+            <button onClick={() => setFilters((f) => ({ ...f, risk: 'high', flag: undefined }))} className="bg-red-50 border border-red-200 rounded-xl p-4 flex items-center gap-3 text-left">
               <AlertTriangle className="text-red-600 shrink-0" size={22} />
               <p className="text-sm text-red-800"><strong>{atRisk}</strong> {atRisk === 1 ? 'persona' : 'personas'} con señales de estrés alto. Revisá su ficha.</p>
-            </div>
+            </button>
           )}
           {pending > 0 && (
-            <div className="bg-amber-50 border border-amber-200 rounded-xl p-4 flex items-center gap-3">
+            <button onClick={() => setFilters((f) => ({ ...f, risk: undefined, flag: 'pending_test' }))} className="bg-amber-50 border border-amber-200 rounded-xl p-4 flex items-center gap-3 text-left">
               <Clock className="text-amber-600 shrink-0" size={22} />
               <p className="text-sm text-amber-800"><strong>{pending}</strong> {pending === 1 ? 'persona' : 'personas'} sin completar el test de eneagrama.</p>
-            </div>
+            </button>
           )}
         </div>
       )}
 
-      {/* Buscador */}
-      <div className="relative mb-4">
-        <Search size={18} className="absolute left-3 top-1/2 -translate-y-1/2 text-slate-400" />
-        <input value={search} onChange={(e) => setSearch(e.target.value)} placeholder="Buscar persona..."
-          className="w-full pl-10 pr-4 py-2.5 border border-slate-300 rounded-lg text-sm focus:ring-2 focus:ring-[#E07A5F] outline-none" />
+      {/* Buscador y filtros */}
+      <div className="flex flex-wrap gap-2 mb-4">
+        <div className="relative flex-1 min-w-[200px]">
+          <Search size={18} className="absolute left-3 top-1/2 -translate-y-1/2 text-slate-400" />
+          <input value={search} onChange={(e) => setSearch(e.target.value)} placeholder="Buscar persona..."
+            className="w-full pl-10 pr-4 py-2.5 border border-slate-300 rounded-lg text-sm focus:ring-2 focus:ring-[#E07A5F] outline-none" />
+        </div>
+        <select value={filters.teamId || ''} onChange={(e) => setFilter('teamId', e.target.value || undefined)} className={selectCls}>
+          <option value="">Todos los equipos</option>
+          {teams.map((t) => <option key={t.id} value={t.id}>{t.name}</option>)}
+        </select>
+        <select value={filters.type ?? ''} onChange={(e) => setFilter('type', e.target.value ? Number(e.target.value) : undefined)} className={selectCls}>
+          <option value="">Todos los tipos</option>
+          {[1, 2, 3, 4, 5, 6, 7, 8, 9].map((n) => <option key={n} value={n}>Tipo {n}: {ENNEAGRAM_TYPES[n].name}</option>)}
+        </select>
+        <select value={filters.risk || filters.flag || ''} className={selectCls}
+          onChange={(e) => {
+            const v = e.target.value;
+            const isRisk = v in RISK_CONFIG;
+            setFilters((f) => ({ ...f, risk: isRisk ? v as EmployeeOverview['risk'] : undefined, flag: !isRisk && v ? v as RiskFlag : undefined }));
+          }}>
+          <option value="">Todo riesgo</option>
+          {(Object.keys(RISK_CONFIG) as EmployeeOverview['risk'][]).map((r) => <option key={r} value={r}>{RISK_CONFIG[r].label}</option>)}
+          {(Object.keys(FLAG_LABELS) as RiskFlag[]).map((f) => <option key={f} value={f}>{FLAG_LABELS[f]}</option>)}
+        </select>
+        <select value={filters.sort} onChange={(e) => setFilter('sort', e.target.value as EmployeeSort)} className={selectCls}>
+          {SORT_OPTIONS.map((o) => <option key={o.value} value={o.value}>Orden: {o.label}</option>)}
+        </select>
       </div>
 
-      {people.length === 0 ? (
+      {stats?.total === 0 ? (
         <div className="text-center py-16 bg-slate-50 rounded-lg border-2 border-dashed border-slate-300">
           <Users className="w-16 h-16 text-slate-400 mx-auto mb-4" />
           <h3 className="text-xl font-semibold text-slate-700 mb-2">Todavía no hay empleados</h3>
           <p className="text-slate-600">Compartí tu código de invitación para que se sumen.</p>
         </div>
+      ) : people.length === 0 ? (
+        <p className="text-center text-slate-500 text-sm py-12">Nadie coincide con estos filtros.</p>
       ) : (
-        <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
-          {filtered.map((p) => {
-            const ct = p.enneagramType ? ENNEAGRAM_TYPES[p.enneagramType] : null;
-            const risk = RISK_CONFIG[p.risk];
-            return (
-              <button key={p.id} onClick={() => setSelected(p)}
-                className="bg-white border border-slate-200 rounded-xl p-5 text-left hover:shadow-md hover:border-[#EFA98F] transition-all">
-                <div className="flex items-start gap-3">
-                  <div className="w-12 h-12 rounded-full flex items-center justify-center text-white font-bold text-lg shrink-0"
-                    style={{ background: ct ? `linear-gradient(135deg, ${ct.color}, ${ct.color}cc)` : 'linear-gradient(135deg,#94a3b8,#64748b)' }}>
-                    {p.name.charAt(0).toUpperCase()}
-                  </div>
-                  <div className="flex-1 min-w-0">
-                    <div className="flex items-center gap-2">
-                      <h4 className="font-semibold text-slate-900 truncate">{p.name}</h4>
-                      {p.role === 'supervisor' && <span className="text-[10px] bg-emerald-100 text-emerald-700 px-1.5 py-0.5 rounded font-medium shrink-0">⭐ Supervisor</span>}
+        <>
+          <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+            {people.map((p) => {
+              const ct = p.enneagramType ? ENNEAGRAM_TYPES[p.enneagramType] : null;
+              const risk = RISK_CONFIG[p.risk];
+              return (
+                <button key={p.id} onClick={() => setSelected(p)}
+                  className="bg-white border border-slate-200 rounded-xl p-5 text-left hover:shadow-md hover:border-[#EFA98F] transition-all">
+                  <div className="flex items-start gap-3">
+                    <div className="w-12 h-12 rounded-full flex items-center justify-center text-white font-bold text-lg shrink-0"
+                      style={{ background: ct ? `linear-gradient(135deg, ${ct.color}, ${ct.color}cc)` : 'linear-gradient(135deg,#94a3b8,#64748b)' }}>
+                      {p.name.charAt(0).toUpperCase()}
                     </div>
-                    {ct ? <p className="text-xs font-medium" style={{ color: ct.color }}>Tipo {p.enneagramType}: {ct.name}</p>
-                      : <p className="text-xs text-slate-400 flex items-center gap-1"><Clock size={11} /> Test pendiente</p>}
+                    <div className="flex-1 min-w-0">
+                      <div className="flex items-center gap-2">
+                        <h4 className="font-semibold text-slate-900 truncate">{p.name}</h4>
+                        {p.role === 'supervisor' && <span className="text-[10px] bg-emerald-100 text-emerald-700 px-1.5 py-0.5 rounded font-medium shrink-0">⭐ Supervisor</span>}
+                      </div>
+                      {ct ? <p className="text-xs font-medium" style={{ color: ct.color }}>Tipo {p.enneagramType}: {ct.name}</p>
+                        : <p className="text-xs text-slate-400 flex items-center gap-1"><Clock size={11} /> Test pendiente</p>}
+                    </div>
+                    {p.checkinCount > 0 && (
+                      <span className="text-xs font-medium px-2.5 py-1 rounded-full shrink-0" style={{ backgroundColor: risk.bg, color: risk.color, border: `1px solid ${risk.border}` }}>{risk.label}</span>
+                    )}
                   </div>
-                  {p.checkinCount > 0 && (
-                    <span className="text-xs font-medium px-2.5 py-1 rounded-full shrink-0" style={{ backgroundColor: risk.bg, color: risk.color, border: `1px solid ${risk.border}` }}>{risk.label}</span>
+                  {(p.checkinCount > 0 || p.overdueTasks > 0) && (
+                    <div className="flex gap-4 mt-4 text-xs text-slate-500">
+                      {p.checkinCount > 0 && <>
+                        <span className="flex items-center gap-1"><Zap size={13} className="text-blue-500" /> Energía {p.avgEnergy.toFixed(1)}</span>
+                        <span className="flex items-center gap-1"><Flame size={13} className="text-rose-500" /> Estrés {p.avgStress.toFixed(1)}</span>
+                      </>}
+                      {p.overdueTasks > 0 && <span className="flex items-center gap-1 text-amber-700"><Clock size={13} /> {p.overdueTasks} {p.overdueTasks === 1 ? 'tarea vencida' : 'tareas vencidas'}</span>}
+                    </div>
                   )}
-                </div>
-                {p.checkinCount > 0 && (
-                  <div className="flex gap-4 mt-4 text-xs text-slate-500">
-                    <span className="flex items-center gap-1"><Zap size={13} className="text-blue-500" /> Energía {p.avgEnergy.toFixed(1)}</span>
-                    <span className="flex items-center gap-1"><Flame size={13} className="text-rose-500" /> Estrés {p.avgStress.toFixed(1)}</span>
-                  </div>
-                )}
+                </button>
+              );
+            })}
+          </div>
+          {next && (
+            <div className="text-center mt-6">
+              <button onClick={loadMore} disabled={loadingMore}
+                className="px-5 py-2.5 rounded-lg text-sm font-medium bg-slate-100 text-slate-700 hover:bg-slate-200 disabled:opacity-50">
+                {loadingMore ? 'Cargando...' : 'Cargar más'}
               </button>
-            );
-          })}
-        </div>
+            </div>
+          )}
+        </>
       )}
     </div>
   );
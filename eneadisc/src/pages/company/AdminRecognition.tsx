@@ -2,15 +2,20 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../../context/AuthContext';
 import { KUDOS_CATEGORIES } from '../../data/enneagramResources';
 import {
-  getAdminKudos, sendAdminKudo, getKudosRanking, getEmployeesOverview,
-  type AdminKudo, type KudoRank,
+  getAdminKudos, sendAdminKudo, getKudosRanking, getCompanyPeople,
+  type AdminKudo, type KudoRank, type KudosPeriod,
 } from '../../utils/adminFeatures';
 import { Award, Trophy, Plus, Send, X, Medal } from 'lucide-react';
 
+const PERIODS: { value: KudosPeriod; label: string }[] = [
+  { value: 'all', label: 'Histórico' }, { value: 'month', label: 'Mes' }, { value: 'week', label: 'Semana' },
+];
+
 export const AdminRecognition: React.FC = () => {
   const { user } = useAuth();
   const [kudos, setKudos] = useState<AdminKudo[]>([]);
   const [ranking, setRanking] = useState<KudoRank[]>([]);
+  const [period, setPeriod] = useState<KudosPeriod>('all');
   const [employees, setEmployees] = useState<{ id: string; name: string }[]>([]);
   const [loading, setLoading] = useState(true);
   const [showModal, setShowModal] = useState(false);
@@ -18,17 +23,22 @@ export const AdminRecognition: React.FC = () => {
   const load = useCallback(async () => {
     if (!user?.companyId) return;
     setLoading(true);
-    const [k, r, emps] = await Promise.all([
+    const [k, emps] = await Promise.all([
       getAdminKudos(user.companyId),
-      getKudosRanking(user.companyId),
-      getEmployeesOverview(),
+      getCompanyPeople(user.companyId),
     ]);
-    setKudos(k); setRanking(r);
+    setKudos(k);
     setEmployees(emps.map((e) => ({ id: e.id, name: e.name })));
     setLoading(false);
   }, [user?.companyId]);
   useEffect(() => { load(); }, [load]);
 
+  const loadRanking = useCallback(async () => {
+    if (!user?.companyId) return;
+    setRanking(await getKudosRanking(period));
+  }, [user?.companyId, period]);
+  useEffect(() => { loadRanking(); }, [loadRanking]);
+
   const catEmoji = (c: string) => KUDOS_CATEGORIES.find((k) => k.value === c)?.emoji || '⭐';
   const medal = (i: number) => (i === 0 ? '🥇' : i === 1 ? '🥈' : i === 2 ? '🥉' : `${i + 1}`);
 
@@ -52,9 +62,17 @@ export const AdminRecognition: React.FC = () => {
         {/* Ranking de colaboración */}
         <div className="lg:col-span-1">
           <div className="bg-gradient-to-br from-amber-50 to-orange-50 border border-amber-200 rounded-2xl p-6 sticky top-4">
-            <h2 className="text-lg font-bold text-slate-900 mb-4 flex items-center gap-2"><Trophy className="text-amber-600" size={20} /> Más reconocidos</h2>
+            <h2 className="text-lg font-bold text-slate-900 mb-3 flex items-center gap-2"><Trophy className="text-amber-600" size={20} /> Más reconocidos</h2>
+            <div className="flex gap-1 mb-4">
+              {PERIODS.map((p) => (
+                <button key={p.value} onClick={() => setPeriod(p.value)}
+                  className={`px-3 py-1 rounded-full text-xs font-medium ${period === p.value ? 'bg-amber-500 text-white' : 'bg-white text-slate-600 border border-amber-200 hover:bg-amber-100'}`}>
+                  {p.label}
+                </button>
+              ))}
+            </div>
             {ranking.length === 0 ? (
-              <p className="text-sm text-slate-500">Todavía no hay reconocimientos. ¡Empezá vos!</p>
+              <p className="text-sm text-slate-500">{period === 'all' ? 'Todavía no hay reconocimientos. ¡Empezá vos!' : 'Sin reconocimientos en este período.'}</p>
             ) : (
               <div className="space-y-2">
                 {ranking.slice(0, 8).map((r, i) => (
@@ -100,7 +118,7 @@ export const AdminRecognition: React.FC = () => {
       </div>
 
       {showModal && (
-        <GiveKudoModal employees={employees} companyId={user?.companyId || ''} onClose={() => setShowModal(false)} onSent={() => { setShowModal(false); load(); }} />
+        <GiveKudoModal employees={employees} companyId={user?.companyId || ''} onClose={() => setShowModal(false)} onSent={() => { setShowModal(false); load(); loadRanking(); }} />
       )}
     </div>
   );
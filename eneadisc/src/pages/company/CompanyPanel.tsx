@@ -6,7 +6,7 @@ import { Button } from '../../components/ui/Button';
 import { AdminTutorial } from '../../components/tutorial/AdminTutorial';
 import { supabase } from '../../lib/supabase';
 import { getTeamMood, type TeamMood } from '../../utils/employeeFeatures';
-import { getEmployeesOverview, suggestAdminActions, buildWeeklySummary, type AdminAction, type WeeklySummary } from '../../utils/adminFeatures';
+import { getEmployeesStats, suggestAdminActions, buildWeeklySummary, type AdminAction, type WeeklySummary } from '../../utils/adminFeatures';
 import { setWebhook, isWebhookConfigured, sendToChannel } from '../../utils/notify';
 import { getPendingRequests, approveRequest, rejectRequest } from '../../utils/joinRequests';
 
@@ -77,12 +77,12 @@ export const CompanyPanel: React.FC = () => {
     // ── Pulso del equipo: termómetro + alertas ────────────────────────────
     const fetchPulse = useCallback(async () => {
         if (!user?.companyId) return;
-        const [tm, overview] = await Promise.all([getTeamMood(), getEmployeesOverview()]);
+        const [tm, stats] = await Promise.all([getTeamMood(), getEmployeesStats()]);
         setMood(tm);
-        setAtRisk(overview.filter((e) => e.risk === 'high').length);
-        setPendingTest(overview.filter((e) => !e.questionnaireCompleted).length);
-        setAdminActions(suggestAdminActions(overview, tm));
-        setWeekly(buildWeeklySummary(overview, tm));
+        setAtRisk(stats.riskHigh);
+        setPendingTest(stats.pendingTest);
+        setAdminActions(suggestAdminActions(stats, tm));
+        setWeekly(buildWeeklySummary(stats, tm));
         isWebhookConfigured().then(setHookOn).catch(() => setHookOn(false));
     }, [user?.companyId]);
 
@@ -94,8 +94,8 @@ export const CompanyPanel: React.FC = () => {
         if (!weekly) return;
         setHookMsg('Enviando...');
         const text = `📊 *EneaTeams · Resumen de la semana*\n${weekly.headline}\n` + weekly.points.map((p) => `• ${p}`).join('\n');
-        const r = await sendToChannel(text);
-        setHookMsg(r.ok ? '✓ Enviado al canal.' : `No se pudo enviar (${r.error || 'error'}).`);
+        const r = await sendToChannel(text, 'weekly_summary');
+        setHookMsg(r.ok ? '✓ En cola: llega al canal en unos segundos.' : `No se pudo enviar (${r.error || 'error'}).`);
     };
 
     useEffect(() => {
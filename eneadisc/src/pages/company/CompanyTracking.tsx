@@ -65,11 +65,14 @@ export const CompanyTracking: React.FC = () => {
        
        // Pasamos todos los IDs de empleados para el gráfico histórico completo
        const allEmployeeIds = employees.map(e => e.id);
-       const data = await generateTrackingData(filteredEmployees, allEmployeeIds);
+       const scope = selectedTeam !== 'all'
+         ? { scope: 'team' as const, id: selectedTeam }
+         : user?.companyId ? { scope: 'company' as const, id: user.companyId } : undefined;
+       const data = await generateTrackingData(filteredEmployees, allEmployeeIds, scope);
        setTrackingData(data);
     };
     fetchTracking();
-  }, [employees, selectedTeam]);
+  }, [employees, selectedTeam, user?.companyId]);
 
   if (!trackingData) {
     return (
@@ -6,7 +6,7 @@ import { Button } from '../../components/ui/Button';
 import { TeamModal } from '../../components/TeamModal';
 import { TeamsTutorial } from '../../components/tutorial/TeamsTutorial';
 import { TeamDetailView } from '../../components/TeamDetailView';
-import { getEmployeesOverview } from '../../utils/adminFeatures';
+import { getCompanyPeople } from '../../utils/adminFeatures';
 import { suggestTeams, analyzeGaps, TRIADS, triadOf, type SuggestablePerson } from '../../utils/teamSuggester';
 import { ENNEAGRAM_TYPES } from '../../data/enneagramData';
 
@@ -181,24 +181,24 @@ export const TeamManagement: React.FC = () => {
             )}
 
             {/* Sugeridor de equipos */}
-            {showSuggester && <TeamSuggesterModal onClose={() => setShowSuggester(false)} />}
+            {showSuggester && <TeamSuggesterModal companyId={user?.companyId || ''} onClose={() => setShowSuggester(false)} />}
         </div>
     );
 };
 
 // ════════════════ SUGERIDOR DE EQUIPOS ════════════════
-const TeamSuggesterModal: React.FC<{ onClose: () => void }> = ({ onClose }) => {
+const TeamSuggesterModal: React.FC<{ companyId: string; onClose: () => void }> = ({ companyId, onClose }) => {
     const [people, setPeople] = useState<SuggestablePerson[]>([]);
     const [loading, setLoading] = useState(true);
     const [numTeams, setNumTeams] = useState(2);
 
     useEffect(() => {
         (async () => {
-            const overview = await getEmployeesOverview();
-            setPeople(overview.filter((e) => e.enneagramType).map((e) => ({ id: e.id, name: e.name, enneagramType: e.enneagramType! })));
+            const company = await getCompanyPeople(companyId);
+            setPeople(company.filter((e) => e.enneagramType).map((e) => ({ id: e.id, name: e.name, enneagramType: e.enneagramType! })));
             setLoading(false);
         })();
-    }, []);
+    }, [companyId]);
 
     const suggested = people.length > 0 ? suggestTeams(people, numTeams) : [];
 
@@ -30,6 +30,8 @@ const EMPLOYEE_PROMPTS: SuggestedPrompt[] = [
     }
 ];
 
+const COACH_INSTRUCTION = 'Respondé como si fueras un coach de vida y carrera compasivo, y brindá consejos si es necesario.';
+
 export const EmployeeAssistant: React.FC = () => {
     const { user } = useAuth();
     const [messages, setMessages] = useState<Message[]>([]);
@@ -71,7 +73,9 @@ Estoy aquí para ayudarte a:
     const generateContext = async (): Promise<string> => {
         if (!user) return 'No hay información del usuario.';
 
-        const lines: string[] = [];
+        // El tono va en el contexto y no pegado al mensaje: así la pregunta
+        // llega limpia al caché de respuestas.
+        const lines: string[] = [COACH_INSTRUCTION, ''];
 
         // Eneatipo real desde Supabase
         if (primaryType) {
@@ -126,8 +130,9 @@ Estoy aquí para ayudarte a:
         setShowSuggestions(false);
         setIsLoading(true);
 
+        const replyId = `${Date.now()}-loading`;
         const loadingMessage: Message = {
-            id: `${Date.now()}-loading`,
+            id: replyId,
             role: 'assistant',
             content: '',
             timestamp: new Date(),
@@ -139,15 +144,18 @@ Estoy aquí para ayudarte a:
             const context = await generateContext();
 
             const response = await sendToAI({
-                message: text + " \\n\\nPor favor responde como si fueras un coach de vida y carrera compasivo, y bríndame consejos si es necesario.",
+                message: text,
                 context,
                 userId: user?.id || 'employee-demo',
                 companyId: user?.companyId || 'demo',
-                conversationHistory: messages.slice(-5)
-            });
+                conversationHistory: messages,
+                scope: { audience: 'employee' }
+            }, (partial) => setMessages(prev => prev.map(m => m.id === replyId
+                ? { ...m, content: partial, isLoading: false, isStreaming: true }
+                : m)));
 
             setMessages(prev => {
-                const withoutLoading = prev.filter(m => !m.isLoading);
+                const withoutLoading = prev.filter(m => m.id !== replyId);
                 const aiMessage: Message = {
                     id: Date.now().toString(),
                     role: 'assistant',
@@ -160,7 +168,7 @@ Estoy aquí para ayudarte a:
         } catch (err) {
             console.error('Error in chat:', err);
             setError('La inteligencia artificial está tomando un respiro. Inténtalo otra vez más tarde.');
-            setMessages(prev => prev.filter(m => !m.isLoading));
+            setMessages(prev => prev.filter(m => m.id !== replyId));
         } finally {
             setIsLoading(false);
             inputRef.current?.focus();
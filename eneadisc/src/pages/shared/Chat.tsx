@@ -6,7 +6,7 @@ import {
 import { useAuth } from '../../context/AuthContext';
 import {
   getDirectory, getConversations, openDirect, getMessages, sendText, sendTask,
-  reviewTaskInChat, markRead, subscribeToConversation, subscribeToPresence,
+  reviewTaskInChat, markRead, subscribeToChatStream,
   getChatTeams, openTeamConversation,
   type DirectoryPerson, type Conversation, type ChatMessage, type ChatTeam,
 } from '../../utils/chat';
@@ -47,17 +47,11 @@ export const Chat: React.FC = () => {
   const [activeId, setActiveId] = useState<string | null>(null);
   const [activeOther, setActiveOther] = useState<Conversation | null>(null);
   const [messages, setMessages] = useState<ChatMessage[]>([]);
+  const [hasOlder, setHasOlder] = useState(false);
   const [loadingConvs, setLoadingConvs] = useState(true);
   const [showDirectory, setShowDirectory] = useState(false);
   const [online, setOnline] = useState<Set<string>>(new Set());
 
-  // Presencia "en línea" (scopeada por empresa)
-  useEffect(() => {
-    if (!user?.companyId || !myId) return;
-    const unsub = subscribeToPresence(user.companyId, myId, setOnline);
-    return unsub;
-  }, [user?.companyId, myId]);
-
   const loadConversations = useCallback(async () => {
     try {
       const list = await getConversations();
@@ -76,25 +70,84 @@ export const Chat: React.FC = () => {
     setActiveId(conv.conversationId);
     setActiveOther(conv);
     setShowDirectory(false);
-    const msgs = await getMessages(conv.conversationId);
-    setMessages(msgs);
+    const page = await getMessages(conv.conversationId);
+    setMessages(page.messages);
+    setHasOlder(page.hasMore);
     await markRead(conv.conversationId);
     setConversations((prev) =>
       prev.map((c) => (c.conversationId === conv.conversationId ? { ...c, unread: 0 } : c))
     );
   }, []);
 
-  // Realtime: mensajes nuevos en la conversación abierta
+  // Refs para el handler del stream (se suscribe una sola vez)
+  const activeIdRef = useRef<string | null>(null);
+  const conversationsRef = useRef<Conversation[]>([]);
+  const messagesRef = useRef<ChatMessage[]>([]);
+  useEffect(() => { activeIdRef.current = activeId; }, [activeId]);
+  useEffect(() => { conversationsRef.current = conversations; }, [conversations]);
+  useEffect(() => { messagesRef.current = messages; }, [messages]);
+
+  // Reconexión del socket o vuelta a la pestaña: los eventos del corte se
+  // perdieron. Se recarga la bandeja y la página más reciente de la abierta.
+  const catchUp = useCallback(async () => {
+    loadConversations();
+    const convId = activeIdRef.current;
+    if (!convId) return;
+    try {
+      const page = await getMessages(convId);
+      if (convId !== activeIdRef.current) return;
+      const known = new Set(messagesRef.current.map((m) => m.id));
+      const fresh = page.messages.filter((m) => !known.has(m.id));
+      if (!fresh.length) return;
+      if (known.size && fresh.length === page.messages.length) {
+        // El corte fue más largo que una página: se arranca de la más reciente.
+        setMessages(page.messages);
+        setHasOlder(true);
+      } else {
+        setMessages((prev) => [...prev, ...fresh.filter((m) => !prev.some((x) => x.id === m.id))]);
+      }
+      markRead(convId);
+    } catch (e) {
+      console.error('[Chat] re-sincronizar:', e);
+    }
+  }, [loadConversations]);
+
   useEffect(() => {
-    if (!activeId) return;
-    const unsub = subscribeToConversation(activeId, (m) => {
-      setMessages((prev) => (prev.some((x) => x.id === m.id) ? prev : [...prev, m]));
-      // si el mensaje es del otro, marcar leído y refrescar preview
-      if (m.senderId !== myId) markRead(activeId);
-      loadConversations();
+    window.addEventListener('focus', catchUp);
+    return () => window.removeEventListener('focus', catchUp);
+  }, [catchUp]);
+
+  // Stream del usuario: mensajes, no leídos y presencia, aplicados como deltas
+  useEffect(() => {
+    if (!myId) return;
+    return subscribeToChatStream(myId, user?.companyId || null, (e) => {
+      if (e.type === 'presence') { setOnline(e.online); return; }
+      if (e.type === 'resync') { catchUp(); return; }
+      if (e.type === 'read') {
+        setConversations((prev) =>
+          prev.map((c) => (c.conversationId === e.conversationId ? { ...c, unread: e.unread } : c))
+        );
+        return;
+      }
+      const m = e.message;
+      const isActive = m.conversationId === activeIdRef.current;
+      if (isActive) {
+        setMessages((prev) => (prev.some((x) => x.id === m.id) ? prev : [...prev, m]));
+        if (m.senderId !== myId) markRead(m.conversationId);
+      }
+      // Conversación que no tengo en la lista (un DM nuevo): una sola recarga
+      if (!conversationsRef.current.some((c) => c.conversationId === m.conversationId)) {
+        loadConversations();
+        return;
+      }
+      setConversations((prev) => {
+        const c = prev.find((x) => x.conversationId === m.conversationId);
+        if (!c) return prev;
+        const moved = { ...c, lastBody: m.body, lastKind: m.kind, lastAt: m.createdAt, unread: isActive ? 0 : e.unread };
+        return [moved, ...prev.filter((x) => x !== c)];
+      });
     });
-    return unsub;
-  }, [activeId, myId, loadConversations]);
+  }, [myId, user?.companyId, loadConversations, catchUp]);
 
   // Iniciar chat desde el directorio
   const startChatWith = useCallback(async (person: DirectoryPerson) => {
@@ -130,16 +183,25 @@ export const Chat: React.FC = () => {
     }
   }, [conversations, openConversation]);
 
+  // La preview de la lista la actualiza el stream (también recibo mis mensajes)
   const handleLocalSend = (m: ChatMessage) => {
     setMessages((prev) => (prev.some((x) => x.id === m.id) ? prev : [...prev, m]));
-    loadConversations();
   };
 
+  // "Cargar anteriores": una página más antes del primer mensaje visible
+  const loadOlder = async () => {
+    if (!activeId || !messages.length) return;
+    const page = await getMessages(activeId, { before: messages[0] });
+    setMessages((prev) => [...page.messages, ...prev]);
+    setHasOlder(page.hasMore);
+  };
+
+  // Trae solo lo posterior al último mensaje que ya tenemos
   const afterTaskAction = async () => {
     if (!activeId) return;
-    const msgs = await getMessages(activeId);
-    setMessages(msgs);
-    loadConversations();
+    const last = messages[messages.length - 1];
+    const page = await getMessages(activeId, last ? { after: last, limit: 200 } : {});
+    setMessages((prev) => [...prev, ...page.messages.filter((m) => !prev.some((x) => x.id === m.id))]);
   };
 
   return (
@@ -209,6 +271,8 @@ export const Chat: React.FC = () => {
             conversation={activeOther}
             online={online.has(activeOther.otherId)}
             messages={messages}
+            hasOlder={hasOlder}
+            onLoadOlder={loadOlder}
             onBack={() => { setActiveId(null); setActiveOther(null); }}
             onLocalSend={handleLocalSend}
             onTaskAction={afterTaskAction}
@@ -259,18 +323,30 @@ const ChatThread: React.FC<{
   conversation: Conversation;
   online: boolean;
   messages: ChatMessage[];
+  hasOlder: boolean;
+  onLoadOlder: () => Promise<void>;
   onBack: () => void;
   onLocalSend: (m: ChatMessage) => void;
   onTaskAction: () => void;
-}> = ({ myId, conversation, online, messages, onBack, onLocalSend, onTaskAction }) => {
+}> = ({ myId, conversation, online, messages, hasOlder, onLoadOlder, onBack, onLocalSend, onTaskAction }) => {
   const [text, setText] = useState('');
   const [sending, setSending] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [showTaskForm, setShowTaskForm] = useState(false);
   const bottomRef = useRef<HTMLDivElement>(null);
 
+  // Solo al llegar un mensaje nuevo (no al cargar anteriores)
+  const lastId = messages[messages.length - 1]?.id;
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [messages.length]);
+  }, [lastId]);
+
+  const handleLoadOlder = async () => {
+    if (loadingOlder) return;
+    setLoadingOlder(true);
+    try { await onLoadOlder(); } catch (e) { console.error('[Chat] anteriores:', e); }
+    setLoadingOlder(false);
+  };
 
   const handleSend = async () => {
     const body = text.trim();
@@ -308,6 +384,17 @@ const ChatThread: React.FC<{
 
       {/* Mensajes */}
       <div className="flex-1 overflow-y-auto p-4 space-y-3">
+        {hasOlder && (
+          <div className="text-center">
+            <button
+              onClick={handleLoadOlder}
+              disabled={loadingOlder}
+              className="text-xs font-medium text-[#C9624A] hover:underline disabled:opacity-50"
+            >
+              {loadingOlder ? 'Cargando...' : 'Cargar mensajes anteriores'}
+            </button>
+          </div>
+        )}
         {messages.length === 0 && (
           <p className="text-center text-sm text-[#8A8079] mt-8">
             Escribí el primer mensaje 👋
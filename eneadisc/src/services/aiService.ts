@@ -1,48 +1,180 @@
-import type { AIRequest, AIResponse } from '../types/ai';
+import type { AIRequest, AIResponse, Message } from '../types/ai';
+import { supabase } from '../lib/supabase';
+
+// ── Compactación del historial ──────────────────────────────
+// Los últimos mensajes van completos. Cuando pasan de
+// RECENT_MESSAGES + FOLD_MESSAGES, los más viejos se pliegan al resumen
+// de a FOLD_MESSAGES (una línea por mensaje, sin llamar al modelo) hasta
+// SUMMARY_MAX_CHARS: al pasarse, se caen las líneas más viejas. Plegar en
+// bloques hace que el prefijo (resumen + turnos) cambie cada pocos turnos
+// y no en cada uno, así el proveedor lo reusa desde su caché.
+export const RECENT_MESSAGES = 4;
+const FOLD_MESSAGES = 4;
+const SUMMARY_MAX_CHARS = 1500;
+const SUMMARY_LINE_CHARS = 180;
+
+const summaryLines = new Map<string, string>();
+
+const clip = (text: string, max: number) =>
+    text.length > max ? `${text.slice(0, max - 1).trimEnd()}…` : text;
+
+function summarizeMessage(m: Message): string {
+    const cached = summaryLines.get(m.id);
+    if (cached !== undefined) return cached;
+    let line: string;
+    if (m.role === 'user') {
+        line = `Usuario: ${clip(m.content.replace(/\s+/g, ' ').trim(), SUMMARY_LINE_CHARS)}`;
+    } else {
+        // De las respuestas: los títulos (## …) o, si no hay, la primera oración.
+        const headers = m.content.split('\n').filter((l) => /^#{1,3}\s/.test(l)).map((l) => l.replace(/^#+\s*/, ''));
+        const gist = headers.length > 0
+            ? headers.join(' · ')
+            : m.content.replace(/\s+/g, ' ').trim().split(/(?<=[.!?])\s/)[0];
+        line = `ENEA AI: ${clip(gist, SUMMARY_LINE_CHARS)}`;
+    }
+    summaryLines.set(m.id, line);
+    return line;
+}
+
+export function compactHistory(history: Message[]): { recent: Message[]; summary: string } {
+    const turns = history.filter((m) => (m.role === 'user' || m.role === 'assistant') && !m.isLoading && m.content);
+    // El saludo inicial no aporta: la conversación arranca en el primer mensaje del usuario.
+    while (turns.length > 0 && turns[0].role === 'assistant') turns.shift();
+    const folded = Math.max(0, Math.floor((turns.length - RECENT_MESSAGES) / FOLD_MESSAGES) * FOLD_MESSAGES);
+    const recent = turns.slice(folded);
+    const lines = turns.slice(0, folded).map(summarizeMessage);
+    let size = lines.reduce((n, l) => n + l.length + 1, 0);
+    let from = 0;
+    while (size > SUMMARY_MAX_CHARS && from < lines.length) size -= lines[from++].length + 1;
+    const kept = lines.slice(from);
+    return { recent, summary: (from > 0 ? ['…', ...kept] : kept).join('\n') };
+}
+
+// ── Streaming ───────────────────────────────────────────────
+// Con onText, /api/chat responde SSE (delta / done / error) y el texto
+// llega a medida que el modelo lo genera. El corte por tiempo pasa a ser
+// de inactividad: 25s sin ningún byte, no 25s en total. Si el stream no
+// entrega nada (proxy que no deja pasar SSE, corte de red) se reintenta
+// una vez sin streaming.
+const IDLE_TIMEOUT_MS = 25000;
+
+class StreamUnavailable extends Error {}
+
+async function* readEvents(body: ReadableStream<Uint8Array>, onChunk: () => void): AsyncGenerator<{ event: string; data: any }> {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { done, value } = await reader.read();
+        if (done) return;
+        onChunk();
+        buffer += decoder.decode(value, { stream: true });
+        let end: number;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+            const lines = buffer.slice(0, end).split('\n');
+            buffer = buffer.slice(end + 2);
+            const event = lines.find((l) => l.startsWith('event:'))?.slice(6).trim() || 'message';
+            const data = lines.filter((l) => l.startsWith('data:')).map((l) => l.slice(5).trimStart()).join('\n');
+            if (data) yield { event, data: JSON.parse(data) };
+        }
+    }
+}
+
+async function readStream(response: Response, onText: (text: string) => void, onChunk: () => void): Promise<AIResponse> {
+    let text = '';
+    let frame = 0;
+    // Un render por frame como mucho, aunque lleguen varios deltas juntos.
+    const flush = () => { frame = 0; onText(text); };
+    try {
+        for await (const { event, data } of readEvents(response.body!, onChunk)) {
+            if (event === 'delta') {
+                text += data.text;
+                if (!frame) frame = requestAnimationFrame(flush);
+            } else if (event === 'error') {
+                throw new Error(data.error || 'La respuesta se cortó. Intentá de nuevo.');
+            } else if (event === 'done') {
+                if (frame) cancelAnimationFrame(frame);
+                if (!text.trim()) throw new Error('Claude no generó una respuesta. Intentá de nuevo.');
+                onText(text);
+                return { ...data, answer: text };
+            }
+        }
+    } catch (error) {
+        if (frame) cancelAnimationFrame(frame);
+        if (error instanceof TypeError && !text) throw new StreamUnavailable(error.message);
+        throw error;
+    }
+    if (!text) throw new StreamUnavailable('stream vacío');
+    throw new Error('La respuesta se cortó. Intentá de nuevo.');
+}
 
 /**
  * Send message to Claude AI via Vercel Serverless Function.
  * NO silent fallback — if Claude fails, the user sees the real error.
+ * With onText, the answer is streamed and onText receives the text so far.
  */
-export async function sendToAI(request: AIRequest): Promise<AIResponse> {
-    // Abort after 25 seconds
+export async function sendToAI(request: AIRequest, onText?: (text: string) => void): Promise<AIResponse> {
+    // Abort after 25 seconds without data
     const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), 25000);
+    let timeoutId = setTimeout(() => controller.abort(), IDLE_TIMEOUT_MS);
+    const rearm = () => {
+        clearTimeout(timeoutId);
+        timeoutId = setTimeout(() => controller.abort(), IDLE_TIMEOUT_MS);
+    };
+    const { recent, summary } = compactHistory(request.conversationHistory || []);
+    // /api/chat saca del JWT la audiencia y el eneatipo del caché de respuestas.
+    const { data: { session } } = await supabase.auth.getSession();
 
     try {
         const response = await fetch('/api/chat', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: {
+                'Content-Type': 'application/json',
+                ...(session ? { Authorization: `Bearer ${session.access_token}` } : {}),
+            },
             signal: controller.signal,
             body: JSON.stringify({
                 message: request.message,
                 context: request.context,
-                conversationHistory: (request.conversationHistory || [])
-                    .filter((m: { role: string }) => m.role === 'user' || m.role === 'assistant')
-                    .map((m: { role: string; content: string }) => ({ role: m.role, content: m.content }))
+                summary: summary || undefined,
+                conversationHistory: recent.map((m) => ({ role: m.role, content: m.content })),
+                scope: request.scope,
+                stream: onText ? true : undefined
             })
         });
 
-        clearTimeout(timeoutId);
-
         if (!response.ok) {
+            clearTimeout(timeoutId);
             const errorData = await response.json().catch(() => ({ error: `HTTP ${response.status}` }));
             const errorMsg = errorData.error || `Error del servidor: ${response.status}`;
             console.error('Claude API error:', response.status, errorData);
             throw new Error(errorMsg);
         }
 
+        if (onText && response.body && response.headers.get('Content-Type')?.includes('text/event-stream')) {
+            const data = await readStream(response, onText, rearm);
+            clearTimeout(timeoutId);
+            return data;
+        }
+
         const data: AIResponse = await response.json();
+        clearTimeout(timeoutId);
 
         // Verify we got a real answer
         if (!data.answer || data.answer.trim() === '') {
             throw new Error('Claude no generó una respuesta. Intentá de nuevo.');
         }
 
+        onText?.(data.answer);
         return data;
     } catch (error) {
         clearTimeout(timeoutId);
 
+        if (error instanceof StreamUnavailable) {
+            console.warn('AI stream unavailable, retrying without streaming:', error.message);
+            return sendToAI(request);
+        }
+
         if (error instanceof Error && error.name === 'AbortError') {
             throw new Error('La respuesta tardó demasiado (>25s). Intentá con una pregunta más corta.');
         }
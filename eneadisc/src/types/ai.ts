@@ -7,6 +7,7 @@ export interface Message {
     timestamp: Date;
     recommendations?: Recommendation[];
     isLoading?: boolean;
+    isStreaming?: boolean;   // la respuesta todavía está llegando
 }
 
 export interface Recommendation {
@@ -23,6 +24,10 @@ export interface AIRequest {
     userId: string;
     companyId: string;
     conversationHistory?: Message[];
+    // Qué asistente pregunta: con esto /api/chat puede responder preguntas de
+    // teoría desde el caché de respuestas (scripts/eneadisc_answer_cache.py).
+    // El eneatipo lo toma el servidor del perfil de la sesión.
+    scope?: { audience: 'company' | 'employee' };
 }
 
 export interface AIResponse {
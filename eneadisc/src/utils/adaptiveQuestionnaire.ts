@@ -0,0 +1,87 @@
+// ============================================================
+// Cuestionario adaptativo con corte temprano
+// ============================================================
+// Recalcula el ranking (calculateEnneagram) después de cada respuesta y:
+//   • Elige la próxima pregunta por cuánto puede separar al líder de
+//     los tipos que todavía lo pueden alcanzar (peso × opciones que
+//     cubren a esos tipos); empate → miedo central → orden del banco.
+//   • Corta cuando el líder ya no puede ser superado ni empatado con el
+//     peso que queda sin responder: el tipo principal es el mismo que
+//     daría el test completo.
+//   • Opcional (`stopOnClearMargin`): corta también cuando el resultado
+//     ya no es `ambiguous` y hay al menos `minAnswers` respuestas. Ahorra
+//     más preguntas pero puede diferir del test completo; ver
+//     scripts/eneadisc_adaptive_questionnaire.py.
+// ============================================================
+import type { Question } from '../data/questionnaireData';
+import { calculateEnneagram, type EnneagramResult, type QuestionnaireResponse } from './calculateEnneagram';
+
+// Misma tolerancia de empate que calculateEnneagram.
+const TIE_EPSILON = 0.001;
+
+export interface AdaptiveOptions {
+    stopOnClearMargin?: boolean;
+    minAnswers?: number; // solo con stopOnClearMargin; default: la mitad del test
+}
+
+export interface AdaptiveState {
+    result: EnneagramResult;
+    answered: number;
+    remainingWeight: number;
+    decided: boolean;           // el líder ya no puede cambiar
+    done: boolean;              // no hace falta preguntar más
+    next: Question | null;      // próxima pregunta (null si done)
+}
+
+// Tipos que con `remaining` puntos todavía superan (o empatan ganando
+// el desempate por menor número) al líder.
+const contenders = (result: EnneagramResult, remaining: number): number[] => {
+    const leader = result.primaryType;
+    const top = result.scores[leader];
+    return result.ranking
+        .filter((r) => r.type !== leader)
+        .filter((r) => {
+            const reach = r.score + remaining - top;
+            return reach > TIE_EPSILON || (reach >= -TIE_EPSILON && r.type < leader);
+        })
+        .map((r) => r.type);
+};
+
+const separation = (q: Question, leader: number, rivals: number[]): number => {
+    const offered = new Set(q.options.map((o) => o.type));
+    if (!offered.has(leader) && !rivals.some((t) => offered.has(t))) return 0;
+    const covered = rivals.filter((t) => offered.has(t)).length;
+    return q.weight * (rivals.length ? covered / rivals.length : 1);
+};
+
+export const adaptiveStep = (
+    questions: Question[],
+    answers: Record<number, number>,
+    options: AdaptiveOptions = {}
+): AdaptiveState => {
+    const asked = questions.filter((q) => answers[q.id] !== undefined);
+    const pending = questions.filter((q) => answers[q.id] === undefined);
+    const responses: QuestionnaireResponse[] = asked.map((q) => ({
+        questionId: q.id, selectedType: answers[q.id], weight: q.weight,
+    }));
+    const result = calculateEnneagram(responses);
+    const remainingWeight = pending.reduce((sum, q) => sum + q.weight, 0);
+    const rivals = contenders(result, remainingWeight);
+
+    const decided = asked.length > 0 && rivals.length === 0;
+    const minAnswers = options.minAnswers ?? Math.ceil(questions.length / 2);
+    const clear = !!options.stopOnClearMargin && asked.length >= minAnswers && !result.ambiguous;
+    const done = pending.length === 0 || decided || clear;
+
+    let next: Question | null = null;
+    if (!done) {
+        // Array.sort es estable: a igual separación y miedo central, queda el orden del banco.
+        next = [...pending].sort((a, b) => {
+            const diff = separation(b, result.primaryType, rivals) - separation(a, result.primaryType, rivals);
+            if (Math.abs(diff) > TIE_EPSILON) return diff;
+            return Number(!!b.isCoreFear) - Number(!!a.isCoreFear);
+        })[0];
+    }
+
+    return { result, answered: asked.length, remainingWeight, decided, done, next };
+};
@@ -15,17 +15,49 @@ export interface EmployeeOverview {
   risk: 'ok' | 'watch' | 'high'; // nivel de riesgo de burnout
 }
 
-function computeRisk(avgStress: number, avgEnergy: number, checkinCount: number): 'ok' | 'watch' | 'high' {
-  if (checkinCount === 0) return 'ok';
-  if (avgStress >= 4 || avgEnergy <= 2) return 'high';
-  if (avgStress >= 3.3 || avgEnergy <= 2.6) return 'watch';
-  return 'ok';
+// ── OVERVIEW PAGINADO (employee_summaries) ─────────────────
+// La base mantiene un resumen por persona (32_employee_summaries.sql):
+// filtros, orden y paginación por keyset se resuelven en el servidor.
+export type RiskFlag = 'high_stress' | 'low_energy' | 'overdue_tasks' | 'no_checkins' | 'pending_test';
+export type EmployeeSort = 'name' | 'risk' | 'last_checkin';
+
+export interface EmployeeSummary extends EmployeeOverview {
+  teamIds: string[];
+  openTasks: number;
+  overdueTasks: number;
+  riskFlags: RiskFlag[];
 }
 
-export const getEmployeesOverview = async (): Promise<EmployeeOverview[]> => {
-  const { data, error } = await supabase.rpc('get_employees_overview');
-  if (error || !data) return [];
-  return data.map((e: any) => ({
+export interface EmployeeFilters {
+  teamId?: string;
+  type?: number;
+  risk?: EmployeeOverview['risk'];
+  flag?: RiskFlag;
+  search?: string;
+  sort?: EmployeeSort;
+}
+
+// Posición de la última fila de la página anterior.
+export interface EmployeeCursor { value: string; id: string; }
+
+export const getEmployeesPage = async (
+  filters: EmployeeFilters = {},
+  cursor: EmployeeCursor | null = null,
+  limit = 50
+): Promise<{ rows: EmployeeSummary[]; next: EmployeeCursor | null }> => {
+  const { data, error } = await supabase.rpc('get_employees_page', {
+    p_team: filters.teamId ?? null,
+    p_type: filters.type ?? null,
+    p_risk: filters.risk ?? null,
+    p_flag: filters.flag ?? null,
+    p_search: filters.search?.trim() || null,
+    p_sort: filters.sort ?? 'name',
+    p_after_value: cursor?.value ?? null,
+    p_after_id: cursor?.id ?? null,
+    p_limit: limit,
+  });
+  if (error || !data) return { rows: [], next: null };
+  const rows: EmployeeSummary[] = data.map((e: any) => ({
     id: e.id,
     name: e.full_name || 'Sin nombre',
     email: e.email || '',
@@ -36,7 +68,56 @@ export const getEmployeesOverview = async (): Promise<EmployeeOverview[]> => {
     avgStress: Number(e.avg_stress) || 0,
     lastCheckin: e.last_checkin,
     checkinCount: Number(e.checkin_count) || 0,
-    risk: computeRisk(Number(e.avg_stress) || 0, Number(e.avg_energy) || 0, Number(e.checkin_count) || 0),
+    risk: e.risk,
+    teamIds: e.team_ids || [],
+    openTasks: Number(e.open_tasks) || 0,
+    overdueTasks: Number(e.overdue_tasks) || 0,
+    riskFlags: e.risk_flags || [],
+  }));
+  const last = data[data.length - 1];
+  return { rows, next: data.length === limit ? { value: last.sort_value, id: last.id } : null };
+};
+
+// Conteos para alertas y sugerencias, sin bajar la lista.
+export interface EmployeesStats {
+  total: number;
+  supervisors: number;
+  pendingTest: number;
+  noCheckins: number;
+  riskHigh: number;
+  riskWatch: number;
+  highRiskNames: string[]; // los 3 con más riesgo
+}
+
+export const getEmployeesStats = async (): Promise<EmployeesStats> => {
+  const { data } = await supabase.rpc('get_employees_stats');
+  const s = data?.[0] || {};
+  return {
+    total: Number(s.total) || 0,
+    supervisors: Number(s.supervisors) || 0,
+    pendingTest: Number(s.pending_test) || 0,
+    noCheckins: Number(s.no_checkins) || 0,
+    riskHigh: Number(s.risk_high) || 0,
+    riskWatch: Number(s.risk_watch) || 0,
+    highRiskNames: s.high_risk_names || [],
+  };
+};
+
+// ── PERSONAS DE LA EMPRESA (selectores y sugeridor) ─────────
+// Solo nombre y tipo, directo de profiles (RLS profiles_admin_read): sin
+// agregar check-ins como el overview.
+export interface CompanyPerson { id: string; name: string; enneagramType: number | null; }
+export const getCompanyPeople = async (companyId: string): Promise<CompanyPerson[]> => {
+  const { data } = await supabase
+    .from('profiles')
+    .select('id, full_name, enneagram_type, questionnaire_completed')
+    .eq('company_id', companyId)
+    .in('role', ['employee', 'supervisor'])
+    .order('full_name');
+  return (data || []).map((p: any) => ({
+    id: p.id,
+    name: p.full_name || 'Sin nombre',
+    enneagramType: p.questionnaire_completed ? p.enneagram_type : null,
   }));
 };
 
@@ -106,22 +187,18 @@ export const sendAdminKudo = async (companyId: string, toUser: string, category:
   return { error: error ? error.message : null };
 };
 
-// Ranking de quién recibió más reconocimientos
+// Ranking de quién recibió más reconocimientos. Lo arma la base desde
+// kudos_counters (31_kudos_counters.sql): top-N sin bajar los kudos.
+export type KudosPeriod = 'all' | 'month' | 'week';
 export interface KudoRank { userId: string; name: string; count: number; }
-export const getKudosRanking = async (companyId: string): Promise<KudoRank[]> => {
-  const kudos = await getAdminKudos(companyId, 500);
-  const counts: Record<string, { name: string; count: number }> = {};
-  kudos.forEach((k) => {
-    if (!counts[k.toUser]) counts[k.toUser] = { name: k.toName, count: 0 };
-    counts[k.toUser].count++;
-  });
-  return Object.entries(counts)
-    .map(([userId, v]) => ({ userId, name: v.name, count: v.count }))
-    .sort((a, b) => b.count - a.count);
+export const getKudosRanking = async (period: KudosPeriod = 'all', limit = 8): Promise<KudoRank[]> => {
+  const { data, error } = await supabase.rpc('get_kudos_leaderboard', { p_period: period, p_limit: limit });
+  if (error || !data) return [];
+  return data.map((r: any) => ({ userId: r.user_id, name: r.full_name, count: Number(r.kudos_count) || 0 }));
 };
 
 // ── "QUÉ HACER HOY" PARA EL ADMIN ──────────────────────────
-// Convierte el overview del equipo en acciones concretas y priorizadas.
+// Convierte los conteos del equipo en acciones concretas y priorizadas.
 // Reglas claras y explicables (sin IA externa).
 export interface AdminAction {
   id: string;
@@ -131,20 +208,17 @@ export interface AdminAction {
 }
 
 export const suggestAdminActions = (
-  overview: EmployeeOverview[],
+  stats: EmployeesStats,
   mood: { avgStress: number; checkinCount: number } | null
 ): AdminAction[] => {
   const out: AdminAction[] = [];
-  const atRisk = overview.filter((e) => e.risk === 'high');
-  const pendingTest = overview.filter((e) => !e.questionnaireCompleted);
-  const noCheckin = overview.filter((e) => e.questionnaireCompleted && e.checkinCount === 0);
-  const supervisors = overview.filter((e) => e.role === 'supervisor');
+  const { riskHigh: atRisk, pendingTest, noCheckins: noCheckin, supervisors } = stats;
 
-  if (atRisk.length > 0) {
+  if (atRisk > 0) {
     out.push({
       id: 'risk',
       priority: 'high',
-      text: `${atRisk.length} persona${atRisk.length > 1 ? 's' : ''} con señales de desgaste (${atRisk.map((e) => e.name.split(' ')[0]).slice(0, 3).join(', ')}). Revisá su ficha y considerá un 1:1.`,
+      text: `${atRisk} persona${atRisk > 1 ? 's' : ''} con señales de desgaste (${stats.highRiskNames.map((n) => n.split(' ')[0]).join(', ')}). Revisá su ficha y considerá un 1:1.`,
       to: '/dashboard/company/personas',
     });
   }
@@ -156,15 +230,15 @@ export const suggestAdminActions = (
       to: '/dashboard/company/analisis',
     });
   }
-  if (pendingTest.length > 0) {
+  if (pendingTest > 0) {
     out.push({
       id: 'pending-test',
       priority: 'medium',
-      text: `${pendingTest.length} persona${pendingTest.length > 1 ? 's' : ''} no completó el test. Sin su perfil, la app no puede ayudarte con esa persona.`,
+      text: `${pendingTest} persona${pendingTest > 1 ? 's' : ''} no completó el test. Sin su perfil, la app no puede ayudarte con esa persona.`,
       to: '/dashboard/company/personas',
     });
   }
-  if (overview.length >= 6 && supervisors.length === 0) {
+  if (stats.total >= 6 && supervisors === 0) {
     out.push({
       id: 'need-supervisor',
       priority: 'medium',
@@ -172,14 +246,14 @@ export const suggestAdminActions = (
       to: '/dashboard/company/personas',
     });
   }
-  if (noCheckin.length > 0) {
+  if (noCheckin > 0) {
     out.push({
       id: 'adoption',
       priority: 'low',
-      text: `${noCheckin.length} persona${noCheckin.length > 1 ? 's' : ''} todavía no hizo check-ins. Invitá al equipo a registrar su pulso para tener visibilidad.`,
+      text: `${noCheckin} persona${noCheckin > 1 ? 's' : ''} todavía no hizo check-ins. Invitá al equipo a registrar su pulso para tener visibilidad.`,
     });
   }
-  if (out.length === 0 && overview.length > 0) {
+  if (out.length === 0 && stats.total > 0) {
     out.push({
       id: 'all-good',
       priority: 'low',
@@ -193,7 +267,7 @@ export const suggestAdminActions = (
 };
 
 // ── RESUMEN SEMANAL AUTOMÁTICO ─────────────────────────────
-// Sintetiza el overview + clima en un resumen leíble de un vistazo.
+// Sintetiza los conteos + clima en un resumen leíble de un vistazo.
 export interface WeeklySummary {
   headline: string;
   tone: 'good' | 'watch' | 'alert';
@@ -201,13 +275,11 @@ export interface WeeklySummary {
 }
 
 export const buildWeeklySummary = (
-  overview: EmployeeOverview[],
+  stats: EmployeesStats,
   mood: { avgEnergy: number; avgStress: number; checkinCount: number } | null
 ): WeeklySummary => {
-  const total = overview.length;
-  const done = overview.filter((e) => e.questionnaireCompleted).length;
-  const atRisk = overview.filter((e) => e.risk === 'high').length;
-  const watch = overview.filter((e) => e.risk === 'watch').length;
+  const { total, riskHigh: atRisk, riskWatch: watch } = stats;
+  const done = total - stats.pendingTest;
   const stress = mood?.avgStress ?? 0;
   const energy = mood?.avgEnergy ?? 0;
   const checkins = mood?.checkinCount ?? 0;
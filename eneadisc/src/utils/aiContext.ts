@@ -1,3 +1,4 @@
+import { supabase } from '../lib/supabase';
 import type { CompanyWideAnalytics, TeamAnalytics } from './analytics';
 
 /**
@@ -83,3 +84,47 @@ export function extractKeyInsights(analytics: CompanyWideAnalytics): string[] {
 
     return insights;
 }
+
+// ── Cache del contexto por empresa/período ──────────────────
+// Armar el contexto cuesta calculateCompanyAnalytics completo. Se reusa
+// mientras no cambie la versión de analytics de la empresa
+// (26_analytics_versions.sql), el día (el texto lleva la fecha) ni venza
+// el TTL (los datos crudos llegan a la versión con el retraso de los rollups).
+const CONTEXT_TTL_MS = 10 * 60 * 1000;
+
+interface CachedContext {
+    version: number;
+    day: string;
+    builtAt: number;
+    text: Promise<string>;
+}
+
+const contextCache = new Map<string, CachedContext>();
+
+const getAnalyticsVersion = async (): Promise<number> => {
+    const { data, error } = await supabase.rpc('get_analytics_version');
+    if (error) throw error;
+    return Number(data?.[0]?.version ?? 0);
+};
+
+export async function getCachedAnalyticsContext(
+    companyId: string,
+    period: string,
+    build: () => Promise<string>,
+): Promise<string> {
+    const key = `${companyId}:${period}`;
+    const day = new Date().toISOString().slice(0, 10);
+    // Sin versión (RPC caída) se cachea solo por TTL.
+    const version = await getAnalyticsVersion().catch(() => -1);
+    const hit = contextCache.get(key);
+    if (hit && hit.version === version && hit.day === day && Date.now() - hit.builtAt < CONTEXT_TTL_MS) {
+        return hit.text;
+    }
+    // Se guarda la promesa: dos mensajes seguidos comparten el mismo cálculo.
+    const entry: CachedContext = { version, day, builtAt: Date.now(), text: build() };
+    contextCache.set(key, entry);
+    entry.text.catch(() => {
+        if (contextCache.get(key) === entry) contextCache.delete(key);
+    });
+    return entry.text;
+}
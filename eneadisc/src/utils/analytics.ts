@@ -155,21 +155,29 @@ export async function calculateTeamMetrics(
         isWithinRange(task.createdAt, dateRange)
     );
 
-    // Si no se pasaron memberIds, los obtenemos de la DB
-    let resolvedMemberIds = memberIds;
-    if (resolvedMemberIds.length === 0 && teamId) {
-        const { data } = await supabase
-            .from('team_members')
-            .select('user_id')
-            .eq('team_id', teamId);
-        resolvedMemberIds = (data || []).map((m: any) => m.user_id);
-    }
+    // Bienestar: del rollup diario del equipo; si no tiene filas del período
+    // (worker sin correr o equipo sin check-ins), de los check-ins de sus miembros.
+    const rollups = await getTeamRollups(teamId, dateRange);
+    let wellbeing: WellbeingMetrics;
+    if (rollups.wellbeing.length > 0) {
+        wellbeing = wellbeingFromRollups(rollups.wellbeing);
+    } else {
+        // Si no se pasaron memberIds, los obtenemos de la DB
+        let resolvedMemberIds = memberIds;
+        if (resolvedMemberIds.length === 0 && teamId) {
+            const { data } = await supabase
+                .from('team_members')
+                .select('user_id')
+                .eq('team_id', teamId);
+            resolvedMemberIds = (data || []).map((m: any) => m.user_id);
+        }
 
-    // Obtener check-ins reales de todos los miembros del equipo
-    const allCheckIns = await getCheckInsForUsers(resolvedMemberIds);
-    const checkInsInPeriod = allCheckIns.filter((checkIn: any) =>
-        isWithinRange(checkIn.date, dateRange)
-    );
+        // Obtener check-ins reales de todos los miembros del equipo
+        const allCheckIns = await getCheckInsForUsers(resolvedMemberIds);
+        wellbeing = wellbeingFromCheckIns(allCheckIns.filter((checkIn: any) =>
+            isWithinRange(checkIn.date, dateRange)
+        ));
+    }
 
     // Calculate productivity metrics
     const tasksAssigned = tasksInPeriod.length;
@@ -203,23 +211,13 @@ export async function calculateTeamMetrics(
     const mediumPriorityCompleted = completedByPriority.filter((t: any) => t.priority === 'medium').length;
     const lowPriorityCompleted = completedByPriority.filter((t: any) => t.priority === 'low').length;
 
-    // Calculate wellbeing metrics
-    const avgMoodScore = checkInsInPeriod.length > 0
-        ? checkInsInPeriod.reduce((sum: number, checkIn: any) => sum + getMoodScore(checkIn.mood), 0) / checkInsInPeriod.length
-        : 3;
-
-    const avgEnergyLevel = checkInsInPeriod.length > 0
-        ? checkInsInPeriod.reduce((sum: number, checkIn: any) => sum + checkIn.energy, 0) / checkInsInPeriod.length
-        : 3;
-
-    const stressfulCheckIns = checkInsInPeriod.filter((c: any) => isStressful(c.mood)).length;
-    const stressIndex = checkInsInPeriod.length > 0
-        ? (stressfulCheckIns / checkInsInPeriod.length) * 100
-        : 0;
-
-    // Generate trends (simplified - last 7 days)
-    const moodTrend = generateMoodTrend(checkInsInPeriod);
-    const productivityTrend = generateProductivityTrend(tasksInPeriod);
+    // Throughput diario: tareas completadas por día dentro del período.
+    const productivityTrend = rollups.tasks.length > 0
+        ? lastDays(rollups.tasks.map((r: any) => ({ date: r.day, value: r.completed_count })))
+        : generateProductivityTrend(allTasks.filter((t: any) =>
+            t.completedAt && isWithinRange(t.completedAt, dateRange)
+        ));
+    const { avgMoodScore, avgEnergyLevel, stressIndex, checkInCount, moodTrend } = wellbeing;
 
     // Calculate correlation
     const wellnessProductivityCorr = calculateCorrelation(moodTrend, productivityTrend);
@@ -241,7 +239,7 @@ export async function calculateTeamMetrics(
         avgMoodScore,
         avgEnergyLevel,
         stressIndex,
-        checkInCount: checkInsInPeriod.length,
+        checkInCount,
         moodTrend,
         productivityTrend,
         wellnessProductivityCorr,
@@ -253,6 +251,13 @@ export async function calculateTeamMetrics(
 // TREND GENERATION
 // ==========================================
 
+// Últimos 7 días con datos
+function lastDays(points: TrendPoint[]): TrendPoint[] {
+    return points
+        .sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime())
+        .slice(-7);
+}
+
 function generateMoodTrend(checkIns: CheckIn[]): TrendPoint[] {
     // Group by day and calculate average
     const byDay: Record<string, number[]> = {};
@@ -263,13 +268,10 @@ function generateMoodTrend(checkIns: CheckIn[]): TrendPoint[] {
         byDay[day].push(getMoodScore(checkIn.mood));
     });
 
-    return Object.entries(byDay)
-        .map(([date, scores]) => ({
-            date,
-            value: scores.reduce((a, b) => a + b, 0) / scores.length
-        }))
-        .sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime())
-        .slice(-7); // Last 7 days
+    return lastDays(Object.entries(byDay).map(([date, scores]) => ({
+        date,
+        value: scores.reduce((a, b) => a + b, 0) / scores.length
+    })));
 }
 
 function generateProductivityTrend(tasks: Task[]): TrendPoint[] {
@@ -281,10 +283,86 @@ function generateProductivityTrend(tasks: Task[]): TrendPoint[] {
         byDay[day] = (byDay[day] || 0) + 1;
     });
 
-    return Object.entries(byDay)
-        .map(([date, value]) => ({ date, value }))
-        .sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime())
-        .slice(-7); // Last 7 days
+    return lastDays(Object.entries(byDay).map(([date, value]) => ({ date, value })));
+}
+
+// ==========================================
+// DAILY ROLLUPS (18_daily_rollups.sql)
+// ==========================================
+
+const MOODS = ['excellent', 'good', 'neutral', 'bad', 'terrible'] as const;
+
+interface WellbeingMetrics {
+    avgMoodScore: number;
+    avgEnergyLevel: number;
+    stressIndex: number;
+    checkInCount: number;
+    moodTrend: TrendPoint[];
+}
+
+// Filas por (equipo, día UTC) ya agregadas por scripts/eneadisc_daily_rollups.py
+async function getTeamRollups(teamId: string, dateRange: DateRange): Promise<{ wellbeing: any[]; tasks: any[] }> {
+    if (!teamId) return { wellbeing: [], tasks: [] };
+    const since = dateRange.start.toISOString().split('T')[0];
+    const until = dateRange.end.toISOString().split('T')[0];
+    const [{ data: wellbeing }, { data: tasks }] = await Promise.all([
+        supabase.from('daily_team_wellbeing')
+            .select('day, checkin_count, energy_sum, mood_excellent, mood_good, mood_neutral, mood_bad, mood_terrible')
+            .eq('team_id', teamId).gte('day', since).lte('day', until),
+        supabase.from('daily_team_tasks')
+            .select('day, completed_count')
+            .eq('team_id', teamId).gte('day', since).lte('day', until).gt('completed_count', 0),
+    ]);
+    return { wellbeing: wellbeing || [], tasks: tasks || [] };
+}
+
+// Mismas métricas que wellbeingFromCheckIns, sobre los conteos por mood de cada día
+function wellbeingFromRollups(rows: any[]): WellbeingMetrics {
+    let checkInCount = 0;
+    let moodSum = 0;
+    let energySum = 0;
+    let stressful = 0;
+    const moodTrend: TrendPoint[] = [];
+
+    rows.forEach(row => {
+        const dayMood = MOODS.reduce((sum, m) => sum + row[`mood_${m}`] * getMoodScore(m), 0);
+        checkInCount += row.checkin_count;
+        moodSum += dayMood;
+        energySum += row.energy_sum;
+        stressful += MOODS.filter(isStressful).reduce((sum, m) => sum + row[`mood_${m}`], 0);
+        if (row.checkin_count > 0) moodTrend.push({ date: row.day, value: dayMood / row.checkin_count });
+    });
+
+    return {
+        avgMoodScore: checkInCount > 0 ? moodSum / checkInCount : 3,
+        avgEnergyLevel: checkInCount > 0 ? energySum / checkInCount : 3,
+        stressIndex: checkInCount > 0 ? (stressful / checkInCount) * 100 : 0,
+        checkInCount,
+        moodTrend: lastDays(moodTrend)
+    };
+}
+
+function wellbeingFromCheckIns(checkIns: CheckIn[]): WellbeingMetrics {
+    const avgMoodScore = checkIns.length > 0
+        ? checkIns.reduce((sum: number, checkIn: any) => sum + getMoodScore(checkIn.mood), 0) / checkIns.length
+        : 3;
+
+    const avgEnergyLevel = checkIns.length > 0
+        ? checkIns.reduce((sum: number, checkIn: any) => sum + checkIn.energy, 0) / checkIns.length
+        : 3;
+
+    const stressfulCheckIns = checkIns.filter((c: any) => isStressful(c.mood)).length;
+    const stressIndex = checkIns.length > 0
+        ? (stressfulCheckIns / checkIns.length) * 100
+        : 0;
+
+    return {
+        avgMoodScore,
+        avgEnergyLevel,
+        stressIndex,
+        checkInCount: checkIns.length,
+        moodTrend: generateMoodTrend(checkIns)
+    };
 }
 
 // ==========================================
@@ -86,17 +86,25 @@ export const persistEnneagramType = async (
 
 // ── localStorage (cache local, no es la fuente de verdad) ───
 // Guarda el resultado completo (incluye scores para el gráfico radar).
-export const saveLocalResult = (userId: string, result: EnneagramResult): void => {
+// Con el cuestionario adaptativo `scores` cubre solo las preguntas respondidas:
+// `answered`/`total` dejan explícito sobre cuántas se calculó (el tipo principal
+// coincide con el test completo; el radar y la ambigüedad pueden no hacerlo).
+export const saveLocalResult = (
+    userId: string,
+    result: EnneagramResult,
+    progress?: { answered: number; total: number }
+): void => {
     localStorage.setItem(`enneagram_result_${userId}`, JSON.stringify({
         primaryType: result.primaryType,
         scores: result.scores,
         completedAt: result.completedAt,
+        ...progress,
     }));
 };
 
 export const getEnneagramResult = (
     userId: string
-): { primaryType: number; scores?: Record<number, number> } | null => {
+): { primaryType: number; scores?: Record<number, number>; answered?: number; total?: number } | null => {
     const stored = localStorage.getItem(`enneagram_result_${userId}`);
     return stored ? JSON.parse(stored) : null;
 };
@@ -96,10 +96,11 @@ export const openTeamConversation = async (teamId: string): Promise<string> => {
   return data as string;
 };
 
-// ── Suma total de no leídos (para el badge del sidebar) ──
-export const getTotalUnread = async (): Promise<number> => {
-  const convs = await getConversations();
-  return convs.reduce((acc, c) => acc + c.unread, 0);
+// ── No leídos por conversación (estado inicial del stream) ──
+export const getUnreadCounts = async (): Promise<Map<string, number>> => {
+  const { data, error } = await supabase.rpc('get_my_unread_counts');
+  if (error) throw error;
+  return new Map((data || []).map((r: any) => [r.conversation_id as string, Number(r.unread || 0)]));
 };
 
 // ── Abrir (o crear) un DM con otra persona ───────────────
@@ -109,15 +110,36 @@ export const openDirect = async (otherId: string): Promise<string> => {
   return data as string;
 };
 
-// ── Mensajes de una conversación ─────────────────────────
-export const getMessages = async (conversationId: string): Promise<ChatMessage[]> => {
-  const { data, error } = await supabase
-    .from('messages')
-    .select('*')
-    .eq('conversation_id', conversationId)
-    .order('created_at', { ascending: true });
+// ── Mensajes de una conversación (paginados, 23_message_pages.sql) ──
+// Sin cursor: los MESSAGE_WINDOW más recientes. `before`: la página
+// anterior a ese mensaje. `after`: todo lo posterior (p. ej. al volver
+// de una reconexión). Siempre en orden cronológico.
+export const MESSAGE_WINDOW = 50;
+
+export interface MessagePage {
+  messages: ChatMessage[];
+  hasMore: boolean;   // hay más en la dirección pedida
+}
+
+export const getMessages = async (
+  conversationId: string,
+  opts: { before?: ChatMessage; after?: ChatMessage; limit?: number } = {}
+): Promise<MessagePage> => {
+  const limit = opts.limit ?? MESSAGE_WINDOW;
+  const { data, error } = await supabase.rpc('get_messages_page', {
+    p_conv: conversationId,
+    p_before_at: opts.before?.createdAt ?? null,
+    p_before_id: opts.before?.id ?? null,
+    p_after_at: opts.after?.createdAt ?? null,
+    p_after_id: opts.after?.id ?? null,
+    p_limit: limit + 1,   // uno de más para saber si quedan
+  });
   if (error) throw error;
-  return (data || []).map(mapMsg);
+  const rows = (data || []).slice(0, limit).map(mapMsg);
+  return {
+    messages: opts.after ? rows : rows.reverse(),
+    hasMore: (data || []).length > limit,
+  };
 };
 
 // ── Enviar texto ─────────────────────────────────────────
@@ -172,51 +194,96 @@ export const markRead = async (conversationId: string): Promise<void> => {
   await supabase.rpc('mark_conversation_read', { p_conv: conversationId });
 };
 
-// ── Realtime: escuchar mensajes nuevos de UNA conversación ──
-export const subscribeToConversation = (
-  conversationId: string,
-  onMessage: (m: ChatMessage) => void
-): (() => void) => {
-  const channel: RealtimeChannel = supabase
-    .channel(`conv:${conversationId}`)
-    .on(
-      'postgres_changes',
-      { event: 'INSERT', schema: 'public', table: 'messages', filter: `conversation_id=eq.${conversationId}` },
-      (payload) => onMessage(mapMsg(payload.new))
-    )
-    .subscribe();
-  return () => { supabase.removeChannel(channel); };
-};
+// ── Stream de chat: UN canal por usuario (24_chat_stream.sql) ──
+// La base publica en `user:<id>` cada mensaje de mis conversaciones con
+// mi contador de no leídos, y los "leída" de mis otras pestañas. La
+// presencia de la empresa viaja en el mismo stream. Sidebar y Chat
+// comparten la suscripción y aplican los deltas sin recargar nada.
+// `resync` avisa que el socket se reconectó: lo emitido durante el corte
+// se perdió y cada pantalla vuelve a leer su estado.
+export type ChatStreamEvent =
+  | { type: 'message'; message: ChatMessage; unread: number }
+  | { type: 'read'; conversationId: string; unread: number }
+  | { type: 'presence'; online: Set<string> }
+  | { type: 'resync' };
+
+type StreamListener = (e: ChatStreamEvent) => void;
+
+interface ChatStream {
+  key: string;
+  listeners: Set<StreamListener>;
+  online: Set<string>;
+  close: () => void;
+}
+
+let stream: ChatStream | null = null;
+
+const openStream = (userId: string, companyId: string | null, key: string): ChatStream => {
+  const s: ChatStream = { key, listeners: new Set(), online: new Set(), close: () => {} };
+  const emit = (e: ChatStreamEvent) => s.listeners.forEach((l) => l(e));
+  let subscribed = false;
 
-// ── Realtime global: cualquier mensaje nuevo que me llegue ──
-// (RLS asegura que solo recibo mensajes de mis conversaciones)
-export const subscribeToAllMessages = (onAny: () => void): (() => void) => {
-  const channel: RealtimeChannel = supabase
-    .channel('chat:all')
-    .on('postgres_changes', { event: 'INSERT', schema: 'public', table: 'messages' }, () => onAny())
-    .subscribe();
-  return () => { supabase.removeChannel(channel); };
+  const deltas: RealtimeChannel = supabase
+    .channel(`user:${userId}`, { config: { private: true } })
+    .on('broadcast', { event: 'message' }, async ({ payload }) => {
+      // Un mensaje que no entraba en el payload llega sin cuerpo: se trae entero.
+      let row = payload.message;
+      if (row.truncated) {
+        const { data } = await supabase.from('messages').select('*').eq('id', row.id).maybeSingle();
+        if (data) row = data;
+      }
+      emit({ type: 'message', message: mapMsg(row), unread: Number(payload.unread || 0) });
+    })
+    .on('broadcast', { event: 'read' }, ({ payload }) =>
+      emit({ type: 'read', conversationId: payload.conversation_id, unread: Number(payload.unread || 0) }))
+    .subscribe((status) => {
+      if (status !== 'SUBSCRIBED') return;
+      if (subscribed) emit({ type: 'resync' });
+      subscribed = true;
+    });
+
+  // Cada usuario se "trackea" con su id como clave, en el canal de su empresa.
+  let presence: RealtimeChannel | null = null;
+  if (companyId) {
+    presence = supabase.channel(`presence:company:${companyId}`, {
+      config: { private: true, presence: { key: userId } },
+    });
+    presence.on('presence', { event: 'sync' }, () => {
+      s.online = new Set(Object.keys(presence!.presenceState()));
+      emit({ type: 'presence', online: new Set(s.online) });
+    });
+    presence.subscribe(async (status) => {
+      if (status === 'SUBSCRIBED') {
+        await presence!.track({ online_at: new Date().toISOString() });
+      }
+    });
+  }
+
+  s.close = () => {
+    supabase.removeChannel(deltas);
+    if (presence) supabase.removeChannel(presence);
+  };
+  return s;
 };
 
-// ── Presencia "en línea" (Realtime Presence, por empresa) ───
-// Cada usuario se "trackea" con su id como clave. El canal está
-// scopeado por empresa para no exponer presencia entre compañías.
-export const subscribeToPresence = (
-  companyId: string,
+export const subscribeToChatStream = (
   userId: string,
-  onChange: (online: Set<string>) => void
+  companyId: string | null,
+  onEvent: StreamListener
 ): (() => void) => {
-  const channel = supabase.channel(`presence:company:${companyId}`, {
-    config: { presence: { key: userId } },
-  });
-  channel.on('presence', { event: 'sync' }, () => {
-    const state = channel.presenceState();
-    onChange(new Set(Object.keys(state)));
-  });
-  channel.subscribe(async (status) => {
-    if (status === 'SUBSCRIBED') {
-      await channel.track({ online_at: new Date().toISOString() });
+  const key = `${userId}:${companyId || ''}`;
+  if (!stream || stream.key !== key) {
+    stream?.close();
+    stream = openStream(userId, companyId, key);
+  }
+  const s = stream;
+  s.listeners.add(onEvent);
+  if (s.online.size) onEvent({ type: 'presence', online: new Set(s.online) });
+  return () => {
+    s.listeners.delete(onEvent);
+    if (!s.listeners.size) {
+      s.close();
+      if (stream === s) stream = null;
     }
-  });
-  return () => { supabase.removeChannel(channel); };
+  };
 };
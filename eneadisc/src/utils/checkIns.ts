@@ -98,7 +98,10 @@ export const getCheckInsForUsers = async (userIds: string[]): Promise<CheckIn[]>
     }));
 };
 
-// Historial mensual de bienestar para un conjunto de usuarios (últimos N meses)
+// Historial mensual de bienestar para un conjunto de usuarios (últimos N meses).
+// Se agrega en la base (get_monthly_wellbeing, 18_daily_rollups.sql): cada
+// check-in cuenta una vez, por mes UTC. Sin la RPC se agregan los check-ins
+// crudos con la misma definición.
 export const getMonthlyWellbeingHistory = async (
     userIds: string[],
     months: number = 6
@@ -108,14 +111,6 @@ export const getMonthlyWellbeingHistory = async (
     const cutoff = new Date();
     cutoff.setMonth(cutoff.getMonth() - months);
 
-    const { data } = await supabase.from('checkins')
-        .select('date, energy, stress, mood')
-        .in('user_id', userIds)
-        .gte('date', cutoff.toISOString())
-        .order('date', { ascending: true });
-
-    if (!data || data.length === 0) return [];
-
     // Agrupar por mes
     const byMonth: Record<string, { energySum: number; stressSum: number; count: number }> = {};
     const monthLabels: Record<string, string> = {
@@ -123,21 +118,42 @@ export const getMonthlyWellbeingHistory = async (
         '4': 'May', '5': 'Jun', '6': 'Jul', '7': 'Ago',
         '8': 'Sep', '9': 'Oct', '10': 'Nov', '11': 'Dic'
     };
-
-    for (const row of data) {
-        const d = new Date(row.date);
-        const key = `${d.getFullYear()}-${d.getMonth()}`;
+    // Clave "año-mes" con el mes 0-based en dos dígitos: ordena como texto.
+    const add = (year: number, month: number, energySum: number, stressSum: number, count: number) => {
+        const key = `${year}-${String(month).padStart(2, '0')}`;
         if (!byMonth[key]) byMonth[key] = { energySum: 0, stressSum: 0, count: 0 };
-        byMonth[key].energySum += row.energy;
-        byMonth[key].stressSum += row.stress;
-        byMonth[key].count++;
+        byMonth[key].energySum += energySum;
+        byMonth[key].stressSum += stressSum;
+        byMonth[key].count += count;
+    };
+
+    const { data: monthly, error } = await supabase.rpc('get_monthly_wellbeing', {
+        p_user_ids: userIds,
+        p_since: cutoff.toISOString(),
+    });
+    if (!error) {
+        for (const row of monthly || []) {
+            const [year, month] = String(row.month).split('-').map(Number);
+            add(year, month - 1, Number(row.energy_sum), Number(row.stress_sum), Number(row.checkins));
+        }
+    } else {
+        const { data } = await supabase.from('checkins')
+            .select('date, energy, stress')
+            .in('user_id', userIds)
+            .gte('date', cutoff.toISOString())
+            .order('date', { ascending: true });
+
+        for (const row of data || []) {
+            const d = new Date(row.date);
+            add(d.getUTCFullYear(), d.getUTCMonth(), row.energy, row.stress, 1);
+        }
     }
 
     return Object.entries(byMonth)
         .sort(([a], [b]) => a.localeCompare(b))
         .slice(-months)
         .map(([key, val]) => {
-            const monthIdx = key.split('-')[1];
+            const monthIdx = String(Number(key.split('-')[1]));
             const avgEnergy = val.energySum / val.count;
             const avgStress = val.stressSum / val.count;
             // Bienestar = promedio de energía ponderado inversamente con el estrés
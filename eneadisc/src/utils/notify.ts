@@ -11,13 +11,13 @@ export const isWebhookConfigured = async (): Promise<boolean> => {
   return !!data;
 };
 
-export const sendToChannel = async (text: string): Promise<{ ok: boolean; error?: string }> => {
+export const sendToChannel = async (text: string, kind: 'manual' | 'weekly_summary' = 'manual'): Promise<{ ok: boolean; error?: string }> => {
   const { data: { session } } = await supabase.auth.getSession();
   if (!session) return { ok: false, error: 'Sin sesión' };
   const res = await fetch('/api/notify', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${session.access_token}` },
-    body: JSON.stringify({ text }),
+    body: JSON.stringify({ text, kind }),
   });
   if (res.ok) return { ok: true };
   return { ok: false, error: await res.text() };
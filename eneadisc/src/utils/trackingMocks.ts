@@ -66,6 +66,7 @@ export const generateEvolutionHistory = (): EvolutionDataPoint[] => {
 
 import { getCheckIns, getMonthlyWellbeingHistory } from './checkIns';
 import { getTasks } from './tasks';
+import { supabase } from '../lib/supabase';
 
 // Asignar focos de desarrollo basados en eneatipo
 const getFocusArea = (type: number | null): string => {
@@ -91,11 +92,98 @@ const getStressWarning = (type: number | null): string | null => {
   return stressPaths[type] || 'Señales detectadas';
 };
 
-export const generateTrackingData = async (employees: AppUser[], companyEmployeeIds?: string[]): Promise<{
+// ── Snapshots del motor de KPIs (28_kpi_snapshots.sql) ──────
+// Una fila por persona y una por equipo/empresa, ya agregadas por
+// scripts/eneadisc_kpi_engine.py. Si el motor todavía no corrió (no hay
+// fila del alcance), se vuelve al cálculo por empleado. Los KPIs tienen
+// la misma definición en los dos caminos: retos = tareas personales
+// completadas de siempre; estado y bienestar = últimos 5 check-ins.
+export interface KpiScope {
+  scope: 'company' | 'team';
+  id: string;
+}
+
+const RECENT_CHECKINS = 5;
+
+const SNAPSHOT_COLUMNS = 'scope_id, member_count, energy_30d, energy_prev_30d, '
+  + 'tasks_total, tasks_completed, completed_30d, completed_prev_30d';
+
+const growth = (now: number | null, prev: number | null): number =>
+  now !== null && prev ? Math.round(((now - prev) / prev) * 100) : 0;
+
+// (energía + 6 − estrés) / 2 promediado sobre los últimos check-ins.
+const statusFromScore = (score: number | null): EmployeeTracking['status'] =>
+  score === null ? 'aligned' : score < 2.5 ? 'critical' : score < 3.5 ? 'warning' : 'aligned';
+
+const trackingFromSnapshots = async (employees: AppUser[], scope: KpiScope): Promise<{
+  matrix: EmployeeTracking[];
+  kpis: TrackingKPIs;
+} | null> => {
+  const ids = employees.map(e => e.id);
+  const [{ data: total }, { data: rows }, { data: recent }] = await Promise.all([
+    supabase.from('kpi_snapshots').select(SNAPSHOT_COLUMNS)
+      .eq('scope', scope.scope).eq('scope_id', scope.id).maybeSingle(),
+    supabase.from('kpi_snapshots').select(SNAPSHOT_COLUMNS)
+      .eq('scope', 'user').in('scope_id', ids),
+    supabase.rpc('get_recent_checkin_scores', { p_user_ids: ids, p_limit: RECENT_CHECKINS }),
+  ]);
+  if (!total) return null;
+
+  const byUser = new Map((rows || []).map((r: any) => [r.scope_id, r]));
+  const recentByUser = new Map((recent || []).map((r: any) => [r.user_id, r]));
+  let completed = 0, completed30d = 0, completedPrev30d = 0, energySum = 0, checkinCount = 0;
+
+  const matrix: EmployeeTracking[] = employees.map((emp) => {
+    const row: any = byUser.get(emp.id);
+    const last: any = recentByUser.get(emp.id);
+    completed += row?.tasks_completed ?? 0;
+    completed30d += row?.completed_30d ?? 0;
+    completedPrev30d += row?.completed_prev_30d ?? 0;
+    energySum += Number(last?.energy_sum ?? 0);
+    checkinCount += Number(last?.checkins ?? 0);
+    const status = statusFromScore(last ? Number(last.score) : null);
+    return {
+      employeeId: emp.id,
+      name: emp.name || emp.email || 'Usuario',
+      enneagramType: emp.enneagramType || null,
+      currentFocus: getFocusArea(emp.enneagramType || null),
+      focusProgress: row?.tasks_total ? Math.round((row.tasks_completed / row.tasks_total) * 100) : 0,
+      status,
+      stressWarning: status === 'critical' ? getStressWarning(emp.enneagramType || null)
+        : status === 'warning' ? "Niveles de energía reportados a la baja" : null,
+      recentEvents: []
+    };
+  });
+
+  return {
+    matrix,
+    kpis: {
+      completedChallenges: completed,
+      completedChallengesGrowth: growth(completed30d, completedPrev30d),
+      averageWellbeing: Number((checkinCount > 0 ? energySum / checkinCount : 0).toFixed(1)),
+      wellbeingGrowth: growth(total.energy_30d, total.energy_prev_30d),
+      activeFocusAreas: employees.length
+    }
+  };
+};
+
+const monthlyHistory = async (ids: string[]): Promise<EvolutionDataPoint[]> => {
+  if (ids.length === 0) return generateEvolutionHistory();
+  const realHistory = await getMonthlyWellbeingHistory(ids, 6);
+  return realHistory.length > 0 ? realHistory : generateEvolutionHistory();
+};
+
+export const generateTrackingData = async (employees: AppUser[], companyEmployeeIds?: string[], scope?: KpiScope): Promise<{
   matrix: EmployeeTracking[];
   kpis: TrackingKPIs;
   chartData: EvolutionDataPoint[];
 }> => {
+  const allIds = companyEmployeeIds ?? employees.map(e => e.id);
+  if (scope && employees.length > 0) {
+    const snapshot = await trackingFromSnapshots(employees, scope);
+    if (snapshot) return { ...snapshot, chartData: await monthlyHistory(allIds) };
+  }
+
   let globalCompletedChallenges = 0;
   let globalWellbeingSum = 0;
   let checkinCount = 0;
@@ -112,12 +200,12 @@ export const generateTrackingData = async (employees: AppUser[], companyEmployee
       globalCompletedChallenges += completedTasks;
       const focusProgress = tasks.length > 0 ? Math.round((completedTasks / tasks.length) * 100) : 0;
 
-      // Calcular bienestar (estado) basado en los check-ins de los últimos 7 días
+      // Calcular bienestar (estado) basado en los últimos check-ins
       let status: 'aligned' | 'warning' | 'critical' = 'aligned';
       let stressWarning = null;
 
       if (checkins.length > 0) {
-          const recentCheckins = checkins.slice(0, 5); // Tomamos los últimos 5
+          const recentCheckins = checkins.slice(0, RECENT_CHECKINS);
           const avgScore = recentCheckins.reduce((acc, curr) => acc + curr.energy + (6 - curr.stress), 0) / (recentCheckins.length * 2);
           
           recentCheckins.forEach(c => {
@@ -149,14 +237,7 @@ export const generateTrackingData = async (employees: AppUser[], companyEmployee
   const avgWellbeing = checkinCount > 0 ? (globalWellbeingSum / checkinCount) : 0;
 
   // Historial real: usar todos los empleados visibles o los de la empresa completa
-  const allIds = companyEmployeeIds ?? employees.map(e => e.id);
-  let chartData: EvolutionDataPoint[] = [];
-  if (allIds.length > 0) {
-    const realHistory = await getMonthlyWellbeingHistory(allIds, 6);
-    chartData = realHistory.length > 0 ? realHistory : generateEvolutionHistory();
-  } else {
-    chartData = generateEvolutionHistory();
-  }
+  const chartData = await monthlyHistory(allIds);
 
   return {
     matrix,
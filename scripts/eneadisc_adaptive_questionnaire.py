@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Adaptive Questionnaire Simulator
+Reproduce evaluaciones históricas con el motor adaptativo y mide preguntas ahorradas vs. acuerdo
+
+Réplica de `adaptiveStep` (src/utils/adaptiveQuestionnaire.ts): después de
+cada respuesta se recalcula el ranking, se elige la próxima pregunta por
+cuánto separa al líder de los tipos que todavía lo alcanzan y se corta:
+
+  exact   cuando el líder no puede ser superado ni empatado (con desempate
+          por menor número) con el peso que queda. El tipo principal
+          coincide siempre con el del test completo.
+  margin  además, cuando el resultado ya no es `ambiguous` y hay al menos
+          --min-answers respuestas. Ahorra más y puede diferir.
+
+Cada evaluación se responde con SUS respuestas registradas, en el orden
+que elige el motor; las preguntas que no respondió quedan fuera del banco
+de esa evaluación. El resultado del test completo sale de
+BatchScoringEngine (eneadisc_scoring_engine.py).
+"""
+
+import argparse
+import json
+import time
+from functools import cmp_to_key
+from pathlib import Path
+
+import numpy as np
+
+from eneadisc_scoring_engine import (AMBIGUOUS_MARGIN, DEFAULT_BANK, N_TYPES, TIE_EPSILON,
+                                     BatchScoringEngine, load_question_bank)
+
+MODES = ('exact', 'margin')
+
+
+def _rank(scores: dict) -> list:
+    """Tipos de mayor a menor puntaje con el mismo comparador que el TS."""
+    def compare(a, b):
+        diff = scores[b] - scores[a]
+        if abs(diff) > TIE_EPSILON:
+            return 1 if diff > 0 else -1
+        return a - b
+    return sorted(range(1, N_TYPES + 1), key=cmp_to_key(compare))
+
+
+def _contenders(scores: dict, leader: int, remaining: float) -> list:
+    top = scores[leader]
+    out = []
+    for t in range(1, N_TYPES + 1):
+        if t == leader:
+            continue
+        reach = scores[t] + remaining - top
+        if reach > TIE_EPSILON or (reach >= -TIE_EPSILON and t < leader):
+            out.append(t)
+    return out
+
+
+def _separation(q: dict, leader: int, rivals: list) -> float:
+    offered = set(q['types'])
+    if leader not in offered and not offered.intersection(rivals):
+        return 0.0
+    covered = len(offered.intersection(rivals))
+    return q['weight'] * (covered / len(rivals) if rivals else 1.0)
+
+
+def replay(questions: dict, answers: dict, mode: str = 'exact', min_answers: int = None) -> dict:
+    """Responde `answers` {question_id: tipo} en el orden del motor hasta que corta.
+
+    `questions`: {question_id: {'weight', 'types', 'is_core_fear'}} en orden del banco.
+    """
+    scores = {t: 0.0 for t in range(1, N_TYPES + 1)}
+    pending = list(questions)
+    remaining = sum(questions[q]['weight'] for q in pending)
+    min_answers = (len(questions) + 1) // 2 if min_answers is None else min_answers
+    asked = []
+    while pending:
+        ranking = _rank(scores)
+        leader = ranking[0]
+        rivals = _contenders(scores, leader, remaining)
+        if asked and not rivals:
+            break
+        if mode == 'margin' and len(asked) >= min_answers:
+            top, second = scores[leader], scores[ranking[1]]
+            if top > 0 and (top - second) / top >= AMBIGUOUS_MARGIN:
+                break
+        # max() se queda con el primero: a igual separación y miedo central, orden del banco.
+        qid = max(pending, key=lambda q: (round(_separation(questions[q], leader, rivals) / TIE_EPSILON),
+                                          questions[q]['is_core_fear']))
+        pending.remove(qid)
+        remaining -= questions[qid]['weight']
+        asked.append(qid)
+        if 1 <= answers[qid] <= N_TYPES:
+            scores[answers[qid]] += questions[qid]['weight']
+
+    ranking = _rank(scores)
+    top, second = scores[ranking[0]], scores[ranking[1]]
+    return {
+        'asked': asked,
+        'primaryType': ranking[0],
+        'ambiguous': top > 0 and (top - second) / top < AMBIGUOUS_MARGIN,
+    }
+
+
+def simulate(records: list, bank: dict, modes=MODES, min_answers: int = None) -> dict:
+    engine = BatchScoringEngine(bank)
+    full = engine.score_records(records)
+    stats = {m: {'evaluations': 0, 'questions_full': 0, 'questions_asked': 0,
+                 'primary_agree': 0, 'ambiguous_agree': 0, 'stopped_at': {}} for m in modes}
+    for rec, ref in zip(records, full):
+        test_bank = bank.get(rec.get('test', 'quick'), {})
+        answers, questions = {}, {}
+        for resp in rec.get('responses', []):
+            qid = resp.get('questionId')
+            if qid is None or qid in answers:
+                continue
+            answers[qid] = resp.get('selectedType', 0)
+            q = test_bank.get(qid, {'weight': 1.0, 'types': list(range(1, N_TYPES + 1)), 'is_core_fear': False})
+            questions[qid] = {**q, 'weight': resp['weight'] if resp.get('weight') is not None else q['weight']}
+        if not questions:
+            continue
+        # El orden del banco, no el de la respuesta, es el que ve la UI.
+        order = {qid: i for i, qid in enumerate(test_bank)}
+        questions = dict(sorted(questions.items(), key=lambda kv: order.get(kv[0], len(order))))
+        for m in modes:
+            run = replay(questions, answers, m, min_answers)
+            s = stats[m]
+            s['evaluations'] += 1
+            s['questions_full'] += len(questions)
+            s['questions_asked'] += len(run['asked'])
+            s['primary_agree'] += run['primaryType'] == ref['primaryType']
+            s['ambiguous_agree'] += run['ambiguous'] == ref['ambiguous']
+            key = str(len(run['asked']))
+            s['stopped_at'][key] = s['stopped_at'].get(key, 0) + 1
+
+    report = {}
+    for m, s in stats.items():
+        n = s['evaluations'] or 1
+        report[m] = {
+            'evaluations': s['evaluations'],
+            'avg_questions_full': round(s['questions_full'] / n, 2),
+            'avg_questions_asked': round(s['questions_asked'] / n, 2),
+            'questions_saved_pct': round(1 - s['questions_asked'] / (s['questions_full'] or 1), 4),
+            'primary_agreement': round(s['primary_agree'] / n, 4),
+            'ambiguous_agreement': round(s['ambiguous_agree'] / n, 4),
+            'stopped_at': dict(sorted(s['stopped_at'].items(), key=lambda kv: int(kv[0]))),
+        }
+    return report
+
+
+def synthetic_records(bank: dict, n: int, test: str, consistency: float, seed: int) -> list:
+    """Personas con un tipo "real" que eligen su frase con probabilidad `consistency`."""
+    rng = np.random.default_rng(seed)
+    qids = list(bank.get(test, {}))
+    records = []
+    for i in range(n):
+        true_type = int(rng.integers(1, N_TYPES + 1))
+        others = [t for t in range(1, N_TYPES + 1) if t != true_type]
+        responses = [{'questionId': q,
+                      'selectedType': true_type if rng.random() < consistency else int(rng.choice(others))}
+                     for q in qids]
+        records.append({'user_id': f'synthetic-{i}', 'test': test, 'responses': responses})
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Adaptive Questionnaire Simulator')
+    parser.add_argument('--input', help='JSONL con {user_id, test, responses} (mismo formato que el scoring engine)')
+    parser.add_argument('--synthetic', type=int, default=0, help='Simular N evaluaciones sintéticas')
+    parser.add_argument('--test', choices=('quick', 'deep'), default='quick', help='Con --synthetic')
+    parser.add_argument('--consistency', type=float, default=0.5,
+                        help='Con --synthetic: probabilidad de elegir la frase del tipo real')
+    parser.add_argument('--min-answers', type=int, help='Modo margin: mínimo de respuestas (default: la mitad)')
+    parser.add_argument('--bank', default=str(DEFAULT_BANK), help='Ruta a questionnaireData.ts')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='.tmp/adaptive_questionnaire.json', help='Reporte JSON')
+    args = parser.parse_args()
+
+    bank = load_question_bank(args.bank)
+    if args.synthetic:
+        records = synthetic_records(bank, args.synthetic, args.test, args.consistency, args.seed)
+    elif args.input:
+        with open(args.input, encoding='utf-8') as fh:
+            records = [json.loads(line) for line in fh if line.strip()]
+    else:
+        parser.error('--input es requerido (o usar --synthetic)')
+
+    t0 = time.perf_counter()
+    report = simulate(records, bank, min_answers=args.min_answers)
+    print(f"🤖 {len(records):,} evaluaciones reproducidas en {time.perf_counter() - t0:.1f}s")
+    for mode, r in report.items():
+        print(f"   {mode:<6} {r['avg_questions_asked']:.1f}/{r['avg_questions_full']:.1f} preguntas "
+              f"({r['questions_saved_pct']:.1%} ahorro) · tipo igual {r['primary_agreement']:.1%} · "
+              f"ambigüedad igual {r['ambiguous_agreement']:.1%}")
+    if report.get('exact', {}).get('primary_agreement', 1) < 1:
+        print('⚠️  El modo exact difiere del test completo: revisar la réplica del desempate')
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+ENEADISC AI Context Harness
+Bytes y tiempo por turno del asistente IA, antes y después de la compactación
+
+Levanta un modelo de reemplazo local con la forma de /v1/messages de
+Anthropic. Simula el prompt caching (prefijos hasta cada cache_control,
+buscando hasta 20 bloques hacia atrás como el proveedor, TTL de 5 minutos)
+y una latencia en función de los tokens procesados:
+
+    base + nuevos / prefill + cacheados / cached + salida / decode
+
+Sobre ese endpoint corre una conversación guionada de N turnos con dos
+estrategias que replican el request que arma api/chat.ts:
+
+  legacy    contexto de analytics recalculado en cada mensaje, dentro del
+            primer mensaje; últimos 5 mensajes del cliente (4 en el server)
+  managed   contexto cacheado por versión (aiContext.ts); SYSTEM_PROMPT y
+            contexto como bloques de system cacheables; turnos viejos
+            plegados al resumen de a 4 (aiService.compactHistory) y caché
+            incremental sobre el último mensaje
+
+El SYSTEM_PROMPT se lee de eneadisc/api/chat.ts y el contexto imita el
+formato de generateAnalyticsContext. Con --drift, cada turno tiene esa
+probabilidad de que cambien los analytics (nueva versión).
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import socket
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CHAT_TS = ROOT / 'eneadisc' / 'api' / 'chat.ts'
+CACHE_TTL_S = 300
+LOOKBACK = 20
+STREAM_WORDS = 3                 # palabras por content_block_delta
+ABORT_MS = 25_000
+
+# Espejo de los topes de api/chat.ts y aiService.ts.
+RECENT_MESSAGES = 4
+FOLD_MESSAGES = 4
+MAX_RECENT_TURNS = 8
+MAX_TURN_CHARS = 4000
+MAX_SUMMARY_CHARS = 2000
+SUMMARY_MAX_CHARS = 1500
+SUMMARY_LINE_CHARS = 180
+
+QUESTIONS = [
+    'Dame un resumen del estado actual de los equipos',
+    '¿Qué equipos necesitan atención inmediata?',
+    'Predicciones para la próxima semana',
+    'Analiza las tendencias de productividad',
+    '¿Cómo puedo mejorar el mood del equipo?',
+    'Identifica riesgos de burnout',
+    '¿Cómo combino a un tipo 8 con un tipo 9 en el mismo proyecto?',
+    'Armame un plan de 30 días para el equipo con más estrés',
+]
+WORDS = ('equipo', 'energía', 'tareas', 'eneatipo', 'estrés', 'completación', 'semana', 'liderazgo',
+         'feedback', 'prioridades', 'bienestar', 'reunión', 'objetivo', 'DISC', 'colaboración', 'foco')
+
+
+def load_system_prompt(path: Path = CHAT_TS) -> str:
+    match = re.search(r'const SYSTEM_PROMPT = `(.*?)`;', path.read_text(encoding='utf-8'), re.S)
+    if match is None:
+        raise SystemExit(f'No se encontró SYSTEM_PROMPT en {path}')
+    return match.group(1)
+
+
+def tokens(text: str) -> int:
+    # Aproximación suficiente para comparar estrategias (~4 caracteres por token).
+    return max(1, len(text) // 4)
+
+
+# ── Modelo de reemplazo ─────────────────────────────────────
+
+class StandInModel:
+    """Prompt caching por prefijo + latencia proporcional a los tokens."""
+
+    def __init__(self, base_ms: float, prefill_tps: float, cached_tps: float, decode_tps: float,
+                 answer_words: int, time_scale: float, seed: int):
+        self.base_ms = base_ms
+        self.prefill_tps = prefill_tps
+        self.cached_tps = cached_tps
+        self.decode_tps = decode_tps
+        self.answer_words = answer_words
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _blocks(self, body: dict):
+        """(texto, cache_control) en el orden en que el modelo procesa el prompt."""
+        system = body.get('system') or []
+        if isinstance(system, str):
+            system = [{'type': 'text', 'text': system}]
+        for block in system:
+            yield block['text'], 'cache_control' in block
+        for msg in body.get('messages', []):
+            content = msg['content']
+            if isinstance(content, str):
+                yield f"{msg['role']}:{content}", False
+            else:
+                for block in content:
+                    yield f"{msg['role']}:{block['text']}", 'cache_control' in block
+
+    def _plan(self, body: dict) -> dict:
+        """Respuesta, uso de tokens y tiempos (ms simulados) de un request."""
+        digest, seen, prefixes, breakpoints = hashlib.sha256(), 0, [], []
+        for text, cache in self._blocks(body):
+            digest.update(text.encode('utf-8'))
+            seen += tokens(text)
+            prefixes.append((digest.copy().hexdigest(), seen))
+            if cache:
+                breakpoints.append(len(prefixes) - 1)
+        breakpoints = [prefixes[i] + (i,) for i in breakpoints]
+        now = time.monotonic()
+        read = created = 0
+        with self._lock:
+            # Como el proveedor: desde cada breakpoint se buscan hacia atrás
+            # (hasta LOOKBACK bloques) prefijos escritos por requests anteriores.
+            for _, _, idx in breakpoints:
+                for key, upto in prefixes[max(0, idx - LOOKBACK):idx + 1]:
+                    if self._cache.get(key, 0) > now:
+                        read = max(read, upto)
+            if breakpoints and breakpoints[-1][1] > read:
+                created = breakpoints[-1][1] - read
+            for key, _, _ in breakpoints:
+                self._cache[key] = now + CACHE_TTL_S
+            words = [self.rng.choice(WORDS) for _ in range(self.answer_words)]
+        fresh = seen - read - created
+        answer = '## Análisis\n' + ' '.join(words[:len(words) // 2]) + '.\n\n## Próximos pasos\n' + \
+                 ' '.join(words[len(words) // 2:]) + '.'
+        out_tokens = tokens(answer)
+        return {'answer': answer,
+                'prefill_ms': self.base_ms + (fresh + created) / self.prefill_tps * 1000
+                + read / self.cached_tps * 1000,
+                'decode_ms': out_tokens / self.decode_tps * 1000,
+                'usage': {'input_tokens': fresh, 'cache_creation_input_tokens': created,
+                          'cache_read_input_tokens': read, 'output_tokens': out_tokens}}
+
+    def complete(self, body: dict) -> dict:
+        plan = self._plan(body)
+        model_ms = plan['prefill_ms'] + plan['decode_ms']
+        time.sleep(model_ms * self.time_scale / 1000)
+        return {'content': [{'type': 'text', 'text': plan['answer']}], 'model_ms': round(model_ms, 1),
+                'usage': plan['usage']}
+
+    def stream(self, body: dict):
+        """Eventos SSE de /v1/messages con stream=true: (event, data)."""
+        plan = self._plan(body)
+        usage = plan['usage']
+        time.sleep(plan['prefill_ms'] * self.time_scale / 1000)
+        yield 'message_start', {'type': 'message_start', 'message': {
+            'role': 'assistant', 'content': [], 'usage': {**usage, 'output_tokens': 1}}}
+        yield 'content_block_start', {'type': 'content_block_start', 'index': 0,
+                                      'content_block': {'type': 'text', 'text': ''}}
+        pieces = re.findall(r'\S+\s*', plan['answer'])
+        per_piece = plan['decode_ms'] * self.time_scale / 1000 / max(1, len(pieces))
+        for i in range(0, len(pieces), STREAM_WORDS):
+            yield 'content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                          'delta': {'type': 'text_delta', 'text': ''.join(pieces[i:i + STREAM_WORDS])}}
+            time.sleep(per_piece * STREAM_WORDS)
+        yield 'content_block_stop', {'type': 'content_block_stop', 'index': 0}
+        yield 'message_delta', {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'},
+                                'usage': {'output_tokens': usage['output_tokens']}}
+        yield 'message_stop', {'type': 'message_stop'}
+
+
+def serve(model: StandInModel, port: int = 0) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if body.get('stream'):
+                # Sin Content-Length: el fin del stream es el cierre de la conexión.
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                for event, data in model.stream(body):
+                    self.wfile.write(f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode())
+                    self.wfile.flush()
+                return
+            payload = json.dumps(model.complete(body)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ── Contexto de analytics (formato de generateAnalyticsContext) ──
+
+def analytics_context(teams: int, version: int, seed: int) -> str:
+    rng = random.Random(f'{seed}:{version}')
+    lines = [f'FECHA DEL REPORTE: {datetime.now(timezone.utc):%d/%m/%Y}', '',
+             'MÉTRICAS GENERALES DE LA EMPRESA:', '━' * 37,
+             f'📊 Completación promedio: {rng.uniform(50, 95):.1f}%',
+             f'😊 Mood promedio: {rng.uniform(2.5, 4.8):.1f}/5', '',
+             'ANÁLISIS DETALLADO POR EQUIPO:', '━' * 37]
+    for t in range(teams):
+        lines += [f'📋 Equipo {t + 1} ({rng.randint(4, 30)} miembros):',
+                  f'  • Completación: {rng.uniform(30, 100):.1f}%',
+                  f'  • Mood: {rng.uniform(2, 5):.1f}/5',
+                  f'  • Energía promedio: {rng.uniform(2, 5):.1f}/5',
+                  f'  • Velocidad: {rng.uniform(1, 20):.1f} tareas/semana',
+                  f'  • Nivel de estrés: {rng.uniform(0, 60):.1f}%',
+                  f'  • Tareas: {rng.randint(10, 200)} asignadas | {rng.randint(5, 150)} completadas | '
+                  f'{rng.randint(0, 40)} en progreso | {rng.randint(0, 20)} atrasadas',
+                  f'  • Tiempo promedio resolución: {rng.uniform(0.5, 9):.1f} días',
+                  f'  • Correlación bienestar↔productividad: {rng.randint(-40, 90)}%',
+                  f'  • Check-ins registrados: {rng.randint(0, 400)}', '']
+    return '\n'.join(lines)
+
+
+def context_intro(context: str) -> str:
+    return ('Estos son los datos actuales del dashboard de la empresa (úsalos cuando te pregunten sobre '
+            f'métricas, equipos o análisis):\n\n{context}\n\nPero no te limites solo a los datos — también '
+            'podés responder sobre eneatipos, DISC, desarrollo personal y gestión de equipos en general.')
+
+
+# ── Requests (espejo de api/chat.ts) ────────────────────────
+
+def legacy_request(system_prompt: str, context: str, history: list, message: str) -> tuple:
+    client = {'message': message, 'context': context, 'conversationHistory': history[-5:]}
+    messages = [{'role': 'user', 'content': [{'type': 'text', 'text': context_intro(context),
+                                              'cache_control': {'type': 'ephemeral'}}]},
+                {'role': 'assistant', 'content': 'Entendido. Tengo los datos del dashboard disponibles.'}]
+    messages += [{'role': m['role'], 'content': m['content']} for m in history[-5:][-4:]]
+    messages.append({'role': 'user', 'content': message})
+    model = {'system': [{'type': 'text', 'text': system_prompt, 'cache_control': {'type': 'ephemeral'}}],
+             'messages': messages, 'max_tokens': 900}
+    return client, model
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def summarize(msg: dict) -> str:
+    if msg['role'] == 'user':
+        return 'Usuario: ' + _clip(' '.join(msg['content'].split()), SUMMARY_LINE_CHARS)
+    headers = [re.sub(r'^#+\s*', '', l) for l in msg['content'].split('\n') if re.match(r'^#{1,3}\s', l)]
+    gist = ' · '.join(headers) if headers else re.split(r'(?<=[.!?])\s', ' '.join(msg['content'].split()))[0]
+    return 'ENEA AI: ' + _clip(gist, SUMMARY_LINE_CHARS)
+
+
+def compact_history(history: list) -> tuple:
+    """Espejo de aiService.compactHistory: (recientes, resumen)."""
+    turns = list(history)
+    while turns and turns[0]['role'] == 'assistant':
+        turns.pop(0)
+    folded = max(0, (len(turns) - RECENT_MESSAGES) // FOLD_MESSAGES * FOLD_MESSAGES)
+    recent = turns[folded:]
+    lines = [summarize(m) for m in turns[:folded]]
+    size, start = sum(len(l) + 1 for l in lines), 0
+    while size > SUMMARY_MAX_CHARS and start < len(lines):
+        size -= len(lines[start]) + 1
+        start += 1
+    kept = lines[start:]
+    return recent, '\n'.join((['…'] if start else []) + kept)
+
+
+def server_request(system_prompt: str, client: dict) -> dict:
+    """Body que api/chat.ts manda a Anthropic a partir del body del cliente."""
+    system = [{'type': 'text', 'text': system_prompt, 'cache_control': {'type': 'ephemeral'}},
+              {'type': 'text', 'text': context_intro(client['context']), 'cache_control': {'type': 'ephemeral'}}]
+    if client.get('summary'):
+        system.append({'type': 'text', 'text': 'Resumen de la conversación anterior (los mensajes más '
+                                                f"recientes van completos):\n{_clip(client['summary'], MAX_SUMMARY_CHARS)}"})
+    turns = [{'role': m['role'], 'content': _clip(m['content'], MAX_TURN_CHARS)}
+             for m in client['conversationHistory'][-MAX_RECENT_TURNS:]]
+    turns.append({'role': 'user', 'content': [{'type': 'text', 'text': client['message'],
+                                               'cache_control': {'type': 'ephemeral'}}]})
+    model = {'system': system, 'messages': turns, 'max_tokens': 900}
+    if client.get('stream'):
+        model['stream'] = True
+    return model
+
+
+def managed_request(system_prompt: str, context: str, history: list, message: str) -> tuple:
+    recent, summary = compact_history(history)
+    client = {'message': message, 'context': context, 'summary': summary or None, 'conversationHistory': recent}
+    return client, server_request(system_prompt, client)
+
+
+# ── Conversación ────────────────────────────────────────────
+
+def run_conversation(strategy: str, url: str, args, system_prompt: str) -> list:
+    import http.client
+    host, port = url.split(':')
+    conn = http.client.HTTPConnection(host, int(port))
+    rng = random.Random(args.seed)
+    build = legacy_request if strategy == 'legacy' else managed_request
+    history, version, cached_version, rows = [], 1, None, []
+    for turn in range(args.turns):
+        if turn and rng.random() < args.drift:
+            version += 1
+        context = analytics_context(args.teams, version, args.seed)
+        # legacy recalcula siempre; managed solo si cambió la versión.
+        rebuilt = strategy == 'legacy' or cached_version != version
+        cached_version = version
+        context_ms = args.context_ms if rebuilt else args.version_ms
+        message = QUESTIONS[turn % len(QUESTIONS)]
+
+        client, model = build(system_prompt, context, history, message)
+        client_bytes = len(json.dumps(client, ensure_ascii=False).encode('utf-8'))
+        model_body = json.dumps(model, ensure_ascii=False).encode('utf-8')
+        t0 = time.perf_counter()
+        conn.request('POST', '/v1/messages', body=model_body, headers={'Content-Type': 'application/json'})
+        data = json.loads(conn.getresponse().read())
+        http_ms = (time.perf_counter() - t0) * 1000 - data['model_ms'] * args.time_scale
+        answer = data['content'][0]['text']
+        history += [{'role': 'user', 'content': message}, {'role': 'assistant', 'content': answer}]
+        usage = data['usage']
+        total_ms = context_ms + data['model_ms'] + max(http_ms, 0)
+        rows.append({'turn': turn + 1, 'client_bytes': client_bytes, 'model_bytes': len(model_body),
+                     'input_tokens': usage['input_tokens'] + usage['cache_creation_input_tokens'],
+                     'cached_tokens': usage['cache_read_input_tokens'], 'context_rebuilt': rebuilt,
+                     'context_ms': context_ms, 'model_ms': data['model_ms'], 'turnaround_ms': round(total_ms, 1)})
+    conn.close()
+    return rows
+
+
+def _summary(rows: list) -> dict:
+    ms = [r['turnaround_ms'] for r in rows]
+    q = statistics.quantiles(ms, n=20) if len(ms) > 1 else ms * 19
+    return {'turns': len(rows),
+            'avg_client_kb': round(statistics.mean(r['client_bytes'] for r in rows) / 1024, 1),
+            'avg_model_kb': round(statistics.mean(r['model_bytes'] for r in rows) / 1024, 1),
+            'uncached_tokens': sum(r['input_tokens'] for r in rows),
+            'cached_tokens': sum(r['cached_tokens'] for r in rows),
+            'context_rebuilds': sum(r['context_rebuilt'] for r in rows),
+            'p50_ms': round(statistics.median(ms), 1), 'p95_ms': round(q[18], 1), 'max_ms': max(ms),
+            'over_abort': sum(m > ABORT_MS for m in ms)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC AI Context Harness')
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--teams', type=int, default=25, help='Equipos en el contexto de analytics')
+    parser.add_argument('--drift', type=float, default=0.1, help='Probabilidad por turno de que cambien los analytics')
+    parser.add_argument('--context-ms', type=float, default=2500, help='Costo de calculateCompanyAnalytics + texto')
+    parser.add_argument('--version-ms', type=float, default=40, help='Costo de get_analytics_version')
+    parser.add_argument('--base-ms', type=float, default=400)
+    parser.add_argument('--prefill-tps', type=float, default=3000, help='Tokens/s de prompt sin caché')
+    parser.add_argument('--cached-tps', type=float, default=60000, help='Tokens/s de prompt cacheado')
+    parser.add_argument('--decode-tps', type=float, default=60, help='Tokens/s de salida')
+    parser.add_argument('--answer-words', type=int, default=250)
+    parser.add_argument('--time-scale', type=float, default=0.01, help='Fracción del tiempo simulado que se duerme')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='.tmp/ai_context_harness.json')
+    args = parser.parse_args()
+
+    system_prompt = load_system_prompt()
+    report = {'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'params': vars(args), 'system_prompt_tokens': tokens(system_prompt), 'strategies': {}}
+    print(f"🤖 SYSTEM_PROMPT ≈ {tokens(system_prompt):,} tokens · contexto ≈ "
+          f"{tokens(analytics_context(args.teams, 1, args.seed)):,} tokens · {args.turns} turnos")
+    print(f"{'estrategia':<10}{'KB cli':>8}{'KB mod':>8}{'tok nuevos':>12}{'tok caché':>11}"
+          f"{'rebuilds':>10}{'p50 ms':>9}{'p95 ms':>9}{'>25s':>6}")
+    for strategy in ('legacy', 'managed'):
+        # Un modelo por estrategia: el caché de una no ayuda a la otra.
+        model = StandInModel(args.base_ms, args.prefill_tps, args.cached_tps, args.decode_tps,
+                             args.answer_words, args.time_scale, args.seed)
+        server = serve(model)
+        host, port = server.server_address
+        rows = run_conversation(strategy, f'{host}:{port}', args, system_prompt)
+        server.shutdown()
+        stats = _summary(rows)
+        report['strategies'][strategy] = {**stats, 'per_turn': rows}
+        print(f"{strategy:<10}{stats['avg_client_kb']:>8.1f}{stats['avg_model_kb']:>8.1f}"
+              f"{stats['uncached_tokens']:>12,}{stats['cached_tokens']:>11,}{stats['context_rebuilds']:>10}"
+              f"{stats['p50_ms']:>9,.0f}{stats['p95_ms']:>9,.0f}{stats['over_abort']:>6}")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+ENEADISC AI Stream Harness
+Tiempo hasta el primer texto del asistente IA, con y sin streaming
+
+Levanta el modelo de reemplazo de eneadisc_ai_context_harness.py (que
+también habla SSE como /v1/messages con stream=true) y, delante, un relay
+que replica api/chat.ts:
+
+  buffered  stream=false: espera la respuesta completa y devuelve un JSON;
+            el usuario no ve nada hasta el final
+  stream    stream=true: reenvía cada fragmento como `event: delta` y cierra
+            con `event: done` (el protocolo que lee aiService.sendToAI)
+
+Los tiempos son reales (no escalados): lo que se mide es lo que esperaría
+el usuario. Con --endpoint se salta el relay y se mide un /api/chat de
+verdad (vercel dev) levantado con ANTHROPIC_BASE_URL apuntando al modelo
+de reemplazo (--port fijo; --serve solo deja el modelo corriendo).
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from eneadisc_ai_context_harness import (QUESTIONS, StandInModel, analytics_context, compact_history,
+                                         load_system_prompt, serve, server_request)
+
+TTFT_TARGET_MS = 1000
+
+
+# ── SSE ─────────────────────────────────────────────────────
+
+def iter_sse(resp):
+    """(event, data) de una respuesta SSE de http.client."""
+    event, data = 'message', []
+    for raw in resp:
+        line = raw.decode('utf-8').rstrip('\r\n')
+        if not line:
+            if data:
+                yield event, json.loads('\n'.join(data))
+            event, data = 'message', []
+        elif line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].lstrip())
+
+
+# ── Relay (espejo de api/chat.ts, rama Anthropic) ───────────
+
+def relay(system_prompt: str, model_addr: tuple) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def _send(self, event: str, data: dict):
+            self.wfile.write(f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'.encode())
+            self.wfile.flush()
+
+        def do_POST(self):
+            client = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            body = json.dumps(server_request(system_prompt, client)).encode()
+            upstream = http.client.HTTPConnection(*model_addr)
+            upstream.request('POST', '/v1/messages', body=body, headers={'Content-Type': 'application/json'})
+            resp = upstream.getresponse()
+            meta = {'recommendations': [], 'confidence': 95, 'sources': ['Eneagrama', 'DISC', 'Dashboard Analytics'],
+                    'processingTime': 0}
+            if not client.get('stream'):
+                data = json.loads(resp.read())
+                payload = json.dumps({'answer': data['content'][0]['text'], **meta, 'usage': data['usage']}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                upstream.close()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache, no-transform')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            usage = {}
+            for _, data in iter_sse(resp):
+                if data['type'] == 'message_start':
+                    usage.update(data['message']['usage'])
+                elif data['type'] == 'message_delta':
+                    usage.update(data['usage'])
+                elif data['type'] == 'content_block_delta' and data['delta']['type'] == 'text_delta':
+                    self._send('delta', {'text': data['delta']['text']})
+            self._send('done', {**meta, 'usage': usage})
+            upstream.close()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ── Cliente (espejo de aiService.sendToAI) ──────────────────
+
+def ask(url: str, client: dict, stream: bool) -> dict:
+    """Un turno: ms hasta el primer texto visible y hasta el final."""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    t0 = time.perf_counter()
+    conn.request('POST', parts.path or '/api/chat', body=json.dumps({**client, 'stream': stream or None}).encode(),
+                 headers={'Content-Type': 'application/json'})
+    resp = conn.getresponse()
+    if resp.status != 200:
+        raise SystemExit(f'❌ {url} → HTTP {resp.status}: {resp.read()[:200]!r}')
+    streamed = 'text/event-stream' in (resp.getheader('Content-Type') or '')
+    answer, first_ms, deltas, done = '', None, 0, False
+    if streamed:
+        for event, data in iter_sse(resp):
+            if event == 'delta':
+                if first_ms is None:
+                    first_ms = (time.perf_counter() - t0) * 1000
+                answer += data['text']
+                deltas += 1
+            elif event == 'error':
+                raise SystemExit(f"❌ stream cortado: {data.get('error')}")
+            elif event == 'done':
+                done = True
+    else:
+        answer = json.loads(resp.read())['answer']
+        done = True
+    total_ms = (time.perf_counter() - t0) * 1000
+    conn.close()
+    return {'answer': answer, 'streamed': streamed, 'complete': done, 'deltas': deltas,
+            'first_text_ms': round(first_ms if first_ms is not None else total_ms, 1),
+            'total_ms': round(total_ms, 1)}
+
+
+def run_conversation(url: str, stream: bool, args) -> list:
+    context = analytics_context(args.teams, 1, args.seed)
+    history, rows = [], []
+    for turn in range(args.turns):
+        message = QUESTIONS[turn % len(QUESTIONS)]
+        recent, summary = compact_history(history)
+        client = {'message': message, 'context': context, 'summary': summary or None,
+                  'conversationHistory': recent}
+        row = ask(url, client, stream)
+        history += [{'role': 'user', 'content': message}, {'role': 'assistant', 'content': row.pop('answer')}]
+        rows.append({'turn': turn + 1, **row})
+        print(f"   {'stream' if stream else 'buffered':<9} turno {turn + 1}: primer texto "
+              f"{row['first_text_ms']:>7,.0f} ms · total {row['total_ms']:>7,.0f} ms")
+    return rows
+
+
+def _summary(rows: list) -> dict:
+    first = [r['first_text_ms'] for r in rows]
+    total = [r['total_ms'] for r in rows]
+    return {'turns': len(rows), 'streamed': all(r['streamed'] for r in rows),
+            'complete': all(r['complete'] for r in rows),
+            'p50_first_text_ms': round(statistics.median(first), 1), 'max_first_text_ms': max(first),
+            'p50_total_ms': round(statistics.median(total), 1), 'max_total_ms': max(total),
+            'avg_deltas': round(statistics.mean(r['deltas'] for r in rows), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC AI Stream Harness')
+    parser.add_argument('--turns', type=int, default=4)
+    parser.add_argument('--teams', type=int, default=25, help='Equipos en el contexto de analytics')
+    parser.add_argument('--base-ms', type=float, default=300)
+    parser.add_argument('--prefill-tps', type=float, default=6000, help='Tokens/s de prompt sin caché')
+    parser.add_argument('--cached-tps', type=float, default=60000, help='Tokens/s de prompt cacheado')
+    parser.add_argument('--decode-tps', type=float, default=80, help='Tokens/s de salida')
+    parser.add_argument('--answer-words', type=int, default=250)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--port', type=int, default=0, help='Puerto fijo del modelo de reemplazo')
+    parser.add_argument('--endpoint', help='Medir un /api/chat real (p. ej. http://localhost:3000/api/chat)')
+    parser.add_argument('--serve', action='store_true', help='Solo levantar el modelo de reemplazo')
+    parser.add_argument('--output', default='.tmp/ai_stream_harness.json')
+    args = parser.parse_args()
+
+    system_prompt = load_system_prompt()
+    model_args = (args.base_ms, args.prefill_tps, args.cached_tps, args.decode_tps, args.answer_words, 1.0, args.seed)
+
+    if args.serve:
+        server = serve(StandInModel(*model_args), args.port)
+        host, port = server.server_address
+        print(f'🤖 Modelo de reemplazo en http://{host}:{port} (Ctrl+C para salir)')
+        print(f'   ANTHROPIC_BASE_URL=http://{host}:{port} vercel dev')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    report = {'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'params': vars(args), 'target_first_text_ms': TTFT_TARGET_MS, 'modes': {}}
+    print(f"🤖 {args.turns} turnos · {args.answer_words} palabras por respuesta · "
+          f"{'endpoint ' + args.endpoint if args.endpoint else 'relay local (espejo de api/chat.ts)'}")
+    for mode in ('buffered', 'stream'):
+        # Un modelo por modo: el caché de uno no ayuda al otro.
+        model = serve(StandInModel(*model_args), args.port)
+        front = None
+        url = args.endpoint
+        if not url:
+            front = relay(system_prompt, model.server_address)
+            url = 'http://%s:%d/api/chat' % front.server_address
+        rows = run_conversation(url, mode == 'stream', args)
+        if front:
+            front.shutdown()
+        model.shutdown()
+        model.server_close()
+        report['modes'][mode] = {**_summary(rows), 'per_turn': rows}
+
+    print(f"\n{'modo':<10}{'stream':>8}{'p50 1er texto':>15}{'máx 1er texto':>15}{'p50 total':>11}{'deltas':>8}")
+    for mode, stats in report['modes'].items():
+        print(f"{mode:<10}{'sí' if stats['streamed'] else 'no':>8}{stats['p50_first_text_ms']:>15,.0f}"
+              f"{stats['max_first_text_ms']:>15,.0f}{stats['p50_total_ms']:>11,.0f}{stats['avg_deltas']:>8.0f}")
+    stream = report['modes']['stream']
+    ok = stream['streamed'] and stream['complete'] and stream['max_first_text_ms'] < TTFT_TARGET_MS
+    report['ok'] = ok
+    print(f"\n{'✅' if ok else '⚠️'} Primer texto con streaming: máx {stream['max_first_text_ms']:,.0f} ms "
+          f"(objetivo < {TTFT_TARGET_MS:,} ms)")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Answer Cache
+Caché semántico de respuestas del asistente IA para preguntas repetidas
+
+Muchas preguntas al asistente son la misma con otras palabras ("¿cómo
+motivo a un tipo 6?", "cómo puedo incentivar a un eneatipo seis"). Este servicio
+las responde desde memoria en milisegundos, sin llamar al modelo:
+
+  clave exacta   audiencia (company/employee) + eneatipo del usuario +
+                 eneatipos y perfiles DISC que nombra la pregunta
+  similitud      embedding local (bolsa de raíces y bigramas hasheada,
+                 sin modelo externo) con coseno >= --threshold
+  vencimiento    TTL por entrada + LRU con --max-entries
+
+Solo se cachea teoría (lista permitida): la pregunta nombra un eneatipo,
+un perfil DISC o el modelo, y no menciona equipos, personas, tareas ni
+cifras. Todo lo demás (analytics de la empresa, el estado personal del
+usuario, un turno anterior de la charla) va al modelo con su contexto.
+api/chat.ts consulta /lookup antes de llamar al modelo (ANSWER_CACHE_URL)
+y guarda con /store las respuestas de preguntas cacheables, generadas sin
+contexto privado.
+
+Con --bench reproduce un tráfico sintético de preguntas parafraseadas y
+reporta la tasa de aciertos y los aciertos incorrectos.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import statistics
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+DIM = 512
+THRESHOLD = 0.82
+TTL_S = 7 * 24 * 3600       # las respuestas de teoría no cambian con los datos
+MAX_ENTRIES = 20_000
+AUDIENCES = ('company', 'employee')
+LOOPBACK = ('127.0.0.1', 'localhost', '::1')
+
+# ── Normalización ───────────────────────────────────────────
+
+NUMBER_WORDS = {'uno': '1', 'dos': '2', 'tres': '3', 'cuatro': '4', 'cinco': '5', 'seis': '6',
+                'siete': '7', 'ocho': '8', 'nueve': '9'}
+TYPE_NAMES = {'reformador': 1, 'perfeccionista': 1, 'ayudador': 2, 'triunfador': 3, 'individualista': 4,
+              'investigador': 5, 'leal': 6, 'entusiasta': 7, 'desafiador': 8, 'pacificador': 9}
+DISC_NAMES = {'dominancia': 'D', 'influencia': 'I', 'estabilidad': 'S', 'cumplimiento': 'C'}
+SYNONYMS = {'presion': 'estres', 'estresado': 'estres', 'estresada': 'estres', 'tension': 'estres',
+            'agobio': 'estres', 'incentivar': 'motivar', 'animar': 'motivar', 'motivo': 'motivar',
+            'motiva': 'motivar', 'motivacion': 'motivar', 'liderar': 'lider', 'liderazgo': 'lider',
+            'jefe': 'lider', 'lidera': 'lider', 'fortaleza': 'fuerte', 'fortalezas': 'fuerte',
+            'virtudes': 'fuerte', 'bueno': 'fuerte', 'debilidad': 'debil', 'debilidades': 'debil',
+            'defectos': 'debil', 'combinar': 'junto', 'combino': 'junto', 'combina': 'junto', 'juntos': 'junto', 'compatibilidad': 'junto',
+            'compatibles': 'junto', 'llevan': 'junto', 'trabajo': 'trabajar', 'laboral': 'trabajar',
+            'oficina': 'trabajar', 'comportamiento': 'comporta', 'actua': 'comporta', 'reacciona': 'comporta',
+            'hace': 'comporta', 'pasa': 'comporta', 'consejos': 'tips', 'recomendaciones': 'tips',
+            'ideas': 'tips', 'eneatipo': 'tipo'}
+STOPWORDS = set('''a al algo alguien como con cual cuales cuando de del el en entre es esta este esto
+    la las le les lo los me mi mis mas muy para pero por porque puede puedo que se si sin son su sus
+    te tu tus un una uno unos y o e dame decime dime explicame explica contame quiero saber favor
+    hola gracias ser hay tiene tienen sobre cosas forma manera mejor'''.split())
+
+TYPE_RE = re.compile(r'\b(?:tipos?|e)\s*([1-9])((?:\s*(?:,|y|e|con|vs|versus)\s*(?:(?:un|el|los)\s+)?(?:tipos?\s*)?[1-9])*)\b')
+DISC_RE = re.compile(r'\b(?:perfil|perfiles|estilo|letra)\s+([disc])\b')
+
+# Lista permitida: de qué trata una pregunta de teoría, además de los eneatipos y perfiles DISC.
+THEORY_RE = re.compile(r'\b(eneagrama|disc|mi tipo)\b')
+# Palabras con mayúscula que no son nombres propios (equipos, personas, proyectos).
+KNOWN_CAPITALIZED = {'eneagrama', 'eneatipo', 'eneatipos', 'tipo', 'disc', 'dime', 'hola'}
+
+# Bypass: la respuesta depende de algo más que la pregunta.
+ANALYTICS_RE = re.compile(
+    r'\b(empresa|compania|dashboard|metricas?|datos|kpis?|resumen|tendencias?|prediccion(es)?|'
+    r'proxima semana|este mes|ultimo mes|atencion inmediata|estado actual|numeros|completacion|'
+    r'(los|mis|nuestros|que|cuales|cada) equipos?|equipo (con|que) mas|identifica|analiza)\b')
+PERSONAL_RE = re.compile(
+    r'\b(ultimamente|hoy|ayer|esta semana|me siento|siento|estoy (muy )?\w+ad[oa]s?|mis tareas|'
+    r'mi (estres|energia|animo|semana|mood|jefe|check.?in)|check.?ins?|cual es mi)\b')
+PRIVATE_RE = re.compile(
+    r'\b(equipos?|tareas?|pendientes?|atrasad[oa]s?|vencid[oa]s?|cuant[oa]s?|porcentaje|promedio|'
+    r'empleados?|companer[oa]s?|colaborador(es|as?)?)\b')
+FOLLOWUP_RE = re.compile(
+    r'^(y|e|pero|entonces|ok|bueno|dale)\b|\b(eso|esto|lo anterior|lo que dijiste|mas detalles?|'
+    r'otro ejemplo|profundiza|explicalo|resumilo|ampliar?|lo mismo)\b')
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _proper_names(question: str) -> list:
+    """Palabras con mayúscula en medio de la oración que no son del vocabulario del modelo."""
+    names = []
+    for m in re.finditer(r'(?<![\w])([A-ZÁÉÍÓÚÑ][\wáéíóúñ]+)', question):
+        before = question[:m.start()].rstrip()
+        if not before or before[-1] in '¿¡.?!:':
+            continue
+        word = _fold(m.group(1))
+        if word in KNOWN_CAPITALIZED or word in TYPE_NAMES or word in DISC_NAMES:
+            continue
+        names.append(m.group(1))
+    return names
+
+
+def normalize(question: str) -> dict:
+    """Pregunta → texto plano, eneatipos y perfiles DISC mencionados, nombres propios, raíces."""
+    text = _fold(question)
+    text = re.sub(r'\b(tipos?|eneatipos?|e)\s+(' + '|'.join(NUMBER_WORDS) + r')\b',
+                  lambda m: f'{m.group(1)} {NUMBER_WORDS[m.group(2)]}', text)
+    text = re.sub(r'\beneatipos?\b', 'tipo', text)
+    text = re.sub(r'[^\w\s,-]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    types, disc = set(), set()
+    for m in TYPE_RE.finditer(text):
+        types.update(int(d) for d in re.findall(r'[1-9]', m.group(0)))
+    for name, t in TYPE_NAMES.items():
+        if re.search(rf'\b{name}\b', text):
+            types.add(t)
+    if 'disc' in text:
+        disc.update(m.group(1).upper() for m in DISC_RE.finditer(text))
+    for name, letter in DISC_NAMES.items():
+        if re.search(rf'\b{name}\b', text):
+            disc.add(letter)
+    body = TYPE_RE.sub(' ', text)
+    body = DISC_RE.sub(' ', body)
+    stems = []
+    for word in re.findall(r'[a-z]+', body):
+        word = SYNONYMS.get(word, word)
+        if word in STOPWORDS or word in TYPE_NAMES or word in DISC_NAMES or len(word) < 2:
+            continue
+        stems.append(word[:6])
+    return {'text': text, 'body': body, 'types': tuple(sorted(types)), 'disc': tuple(sorted(disc)),
+            'names': _proper_names(question), 'stems': stems}
+
+
+def embed(stems: list, dim: int = DIM) -> np.ndarray:
+    """Embedding local: raíces (peso 1) y bigramas (0.5) hasheados con signo."""
+    vec = np.zeros(dim, dtype=np.float32)
+    features = [(s, 1.0) for s in stems] + [(f'{a}_{b}', 0.5) for a, b in zip(stems, stems[1:])]
+    for feature, weight in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+        vec[h % dim] += weight if (h >> 32) & 1 else -weight
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def bypass_reason(norm: dict, history: int = 0):
+    """None si la pregunta se puede responder desde el caché.
+
+    Lista permitida: solo teoría de un eneatipo, un perfil DISC o el
+    modelo. Una pregunta que no se reconoce va al modelo con su contexto.
+    """
+    text = norm['text']
+    if ANALYTICS_RE.search(text):
+        return 'analytics'
+    if PERSONAL_RE.search(text):
+        return 'personal'
+    # Las cifras de los eneatipos ya salieron de `body`; las que quedan son datos.
+    if norm['names'] or PRIVATE_RE.search(text) or re.search(r'\d', norm['body']):
+        return 'private'
+    if history > 0 and FOLLOWUP_RE.search(text):
+        return 'followup'
+    if not norm['types'] and not norm['disc'] and not THEORY_RE.search(text):
+        return 'not_theory'
+    return None
+
+
+# ── Caché ───────────────────────────────────────────────────
+
+class _Bucket:
+    """Entradas de una misma clave exacta; los vectores en una matriz."""
+
+    def __init__(self, dim: int):
+        self.ids = []
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def add(self, entry_id: int, vector: np.ndarray):
+        self.ids.append(entry_id)
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+
+    def remove(self, entry_id: int):
+        i = self.ids.index(entry_id)
+        del self.ids[i]
+        self.vectors = np.delete(self.vectors, i, axis=0)
+
+
+class AnswerCache:
+    def __init__(self, threshold: float = THRESHOLD, ttl_s: float = TTL_S, max_entries: int = MAX_ENTRIES,
+                 dim: int = DIM, clock=time.time):
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.dim = dim
+        self.clock = clock
+        self._entries = OrderedDict()       # id → entrada, en orden LRU
+        self._buckets = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    @staticmethod
+    def _key(audience: str, user_type, norm: dict) -> tuple:
+        # El eneatipo del usuario solo cambia la respuesta en el asistente del empleado.
+        return (audience, user_type if audience == 'employee' else None, norm['types'], norm['disc'])
+
+    def _drop(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets[entry['key']]
+        bucket.remove(entry_id)
+        if not bucket.ids:
+            del self._buckets[entry['key']]
+
+    def _best(self, key: tuple, vector: np.ndarray, now: float):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None, 0.0
+        expired = [i for i in bucket.ids if self._entries[i]['expires_at'] <= now]
+        for entry_id in expired:
+            self._drop(entry_id)
+            self.counters['expired'] += 1
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None, 0.0
+        sims = bucket.vectors @ vector
+        i = int(np.argmax(sims))
+        return bucket.ids[i], float(sims[i])
+
+    def lookup(self, question: str, audience: str, user_type=None, history: int = 0) -> dict:
+        norm = normalize(question)
+        reason = bypass_reason(norm, history)
+        with self._lock:
+            self.counters['lookups'] += 1
+            if reason:
+                self.counters[f'bypass_{reason}'] += 1
+                return {'hit': False, 'cacheable': False, 'reason': reason}
+            vector = embed(norm['stems'], self.dim)
+            now = self.clock()
+            entry_id, similarity = self._best(self._key(audience, user_type, norm), vector, now)
+            if entry_id is None or similarity < self.threshold:
+                self.counters['misses'] += 1
+                return {'hit': False, 'cacheable': True, 'similarity': round(similarity, 3)}
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            entry['hits'] += 1
+            self.counters['hits'] += 1
+            return {'hit': True, 'answer': entry['answer'], 'similarity': round(similarity, 3),
+                    'age_s': round(now - entry['created_at'], 1)}
+
+    def store(self, question: str, audience: str, user_type, answer: str, history: int = 0) -> dict:
+        norm = normalize(question)
+        reason = bypass_reason(norm, history)
+        if reason or not answer.strip():
+            return {'stored': False, 'reason': reason or 'empty_answer'}
+        vector = embed(norm['stems'], self.dim)
+        key = self._key(audience, user_type, norm)
+        with self._lock:
+            now = self.clock()
+            entry_id, similarity = self._best(key, vector, now)
+            if entry_id is not None and similarity >= self.threshold:
+                # Misma pregunta (otra request la resolvió primero): se renueva.
+                entry = self._entries[entry_id]
+                entry.update(answer=answer, created_at=now, expires_at=now + self.ttl_s)
+                self._entries.move_to_end(entry_id)
+                return {'stored': True, 'replaced': True}
+            entry_id, self._next_id = self._next_id, self._next_id + 1
+            self._entries[entry_id] = {'key': key, 'question': question, 'answer': answer, 'hits': 0,
+                                       'created_at': now, 'expires_at': now + self.ttl_s}
+            self._buckets.setdefault(key, _Bucket(self.dim)).add(entry_id, vector)
+            self.counters['stored'] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.counters['evicted'] += 1
+            return {'stored': True, 'replaced': False}
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters['lookups']
+            return {'entries': len(self._entries), 'buckets': len(self._buckets), **self.counters,
+                    'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else 0.0}
+
+
+# ── Servicio HTTP ───────────────────────────────────────────
+
+def serve(cache: AnswerCache, host: str, port: int, token: str = None) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status: int, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self) -> bool:
+            return not token or hmac.compare_digest(self.headers.get('Authorization') or '', f'Bearer {token}')
+
+        def do_GET(self):
+            if self.path == '/health':
+                return self._reply(200, {'ok': True})
+            if self.path == '/stats' and self._authorized():
+                return self._reply(200, cache.stats())
+            self._reply(404 if self._authorized() else 401, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self._authorized():
+                return self._reply(401, {'error': 'unauthorized'})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+                question = str(body['question'])
+                audience = body.get('audience') if body.get('audience') in AUDIENCES else 'company'
+                user_type = body.get('type') if body.get('type') in range(1, 10) else None
+                history = int(body.get('history') or 0)
+            except (ValueError, KeyError, TypeError) as exc:
+                return self._reply(400, {'error': f'body inválido: {exc}'})
+            if self.path == '/lookup':
+                return self._reply(200, cache.lookup(question, audience, user_type, history))
+            if self.path == '/store':
+                return self._reply(200, cache.store(question, audience, user_type, str(body.get('answer') or ''), history))
+            self._reply(404, {'error': 'not found'})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+# ── Benchmark ───────────────────────────────────────────────
+
+# (intención, variantes). {n}/{m} son eneatipos, {name} el nombre del tipo,
+# {d} una letra DISC. Las variantes son las que vimos en el chat.
+INTENTS = [
+    ('motivar', ['¿Cómo motivo a un tipo {n}?', 'como puedo motivar a un eneatipo {n}',
+                 'Tips para motivar a alguien tipo {n}', '¿Qué motiva a un tipo {n} en el trabajo?',
+                 'Como incentivar a un {name}']),
+    ('estres', ['¿Qué le pasa a un tipo {n} bajo estrés?', 'como se comporta el eneatipo {n} cuando está estresado',
+                'Tipo {n} en estrés', '¿Cómo reacciona un {name} bajo presión?']),
+    ('fortalezas', ['Fortalezas del tipo {n} en el trabajo', '¿En qué es bueno un eneatipo {n}?',
+                    'Virtudes laborales de un tipo {n}']),
+    ('debilidades', ['Debilidades del tipo {n} en el trabajo', '¿Cuáles son los defectos de un eneatipo {n}?']),
+    ('liderazgo', ['¿Cómo lidera un tipo {n}?', 'Estilo de liderazgo del eneatipo {n}',
+                   '¿Cómo es un tipo {n} como jefe?']),
+    ('pareja', ['¿Cómo trabajan juntos un tipo {n} y un tipo {m}?', 'Compatibilidad entre eneatipo {n} y {m}',
+                '¿Cómo combino a un tipo {n} con un tipo {m} en el mismo proyecto?']),
+    ('disc', ['¿Qué es el perfil {d} en DISC?', 'Explicame el estilo {d} del modelo DISC',
+              'Características del perfil {d} de DISC']),
+    ('general', ['¿Qué es el eneagrama?', 'Explicame qué es el Eneagrama', '¿Para qué sirve el eneagrama?']),
+    ('alas', ['¿Qué son las alas en el eneagrama?', 'Explicame las alas del eneagrama']),
+]
+EMPLOYEE_INTENTS = [
+    ('productividad', ['Dime cómo mi Eneatipo influye en mi productividad.',
+                       '¿Cómo influye mi eneatipo en mi productividad?']),
+    ('comunicar', ['¿Cómo puedo comunicar mejor mis ideas según mi eneatipo?',
+                   'Tips para comunicar mejor mis ideas con mi tipo']),
+]
+UNCACHEABLE = [
+    ('company', 'Dame un resumen del estado actual de los equipos'),
+    ('company', '¿Qué equipos necesitan atención inmediata?'),
+    ('company', 'Predicciones para la próxima semana'),
+    ('company', 'Analiza las tendencias de productividad'),
+    ('company', 'Identifica riesgos de burnout'),
+    ('employee', 'Siento estrés últimamente. Dame tácticas para evitar el burnout.'),
+    ('employee', '¿Cuál es mi tipo?'),
+    ('company', '¿Cómo está el equipo Ventas?'),
+    ('company', '¿Cuántas tareas atrasadas tiene Diseño?'),
+    ('company', '¿Cómo viene María González?'),
+    ('company', '¿Cómo motivo a Julián, que es tipo 6?'),
+    ('employee', '¿Qué tareas tengo pendientes?'),
+    ('employee', '¿Por qué me cuesta concentrarme?'),
+    ('employee', '¿Cómo puedo comunicar mejor mis ideas en el equipo?'),
+]
+TYPE_LABELS = {v: k for k, v in TYPE_NAMES.items() if k != 'perfeccionista'}
+
+
+def _noise(rng: random.Random, text: str) -> str:
+    if rng.random() < 0.3:
+        text = _fold(text)
+    if rng.random() < 0.3:
+        text = text.lower().rstrip('?.') + rng.choice([' por favor', '', ' gracias'])
+    if rng.random() < 0.2:
+        text = 'Hola! ' + text
+    return text
+
+
+def workload(n: int, seed: int):
+    """(audiencia, eneatipo, history, pregunta, respuesta esperada) con popularidad sesgada."""
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) for i in range(len(INTENTS))]
+    for _ in range(n):
+        roll = rng.random()
+        history = rng.choice([0, 0, 0, 2, 4])
+        user_type = rng.randint(1, 9)
+        if roll < 0.15:
+            audience, question = rng.choice(UNCACHEABLE)
+            yield audience, user_type, history, question, None
+            continue
+        if roll < 0.22 and history:
+            yield 'employee', user_type, history, rng.choice(['¿Y para un tipo 3?', 'Dame otro ejemplo', 'Explicalo mejor']), None
+            continue
+        if roll < 0.40:
+            intent, variants = rng.choice(EMPLOYEE_INTENTS)
+            yield 'employee', user_type, history, _noise(rng, rng.choice(variants)), f'{intent}|u{user_type}'
+            continue
+        intent, variants = rng.choices(INTENTS, weights)[0]
+        # Los tipos más consultados primero (6, 3, 8, ...): la popularidad no es pareja.
+        n_type = rng.choices([6, 3, 8, 1, 2, 9, 4, 7, 5], [9, 8, 7, 6, 5, 4, 3, 2, 1])[0]
+        m_type = rng.choice([t for t in range(1, 10) if t != n_type])
+        letter = rng.choice('DISC')
+        template = rng.choice(variants)
+        question = template.format(n=n_type, m=m_type, name=TYPE_LABELS[n_type], d=letter)
+        expected = {'pareja': f'{intent}|{min(n_type, m_type)}{max(n_type, m_type)}',
+                    'disc': f'{intent}|{letter}', 'general': intent, 'alas': intent}.get(intent, f'{intent}|{n_type}')
+        yield rng.choice(AUDIENCES), user_type, history, _noise(rng, question), expected
+
+
+def bench(args) -> dict:
+    now = [0.0]
+    cache = AnswerCache(args.threshold, args.ttl_hours * 3600, args.max_entries, clock=lambda: now[0])
+    rows, lookup_ms, served, false_hits, expected_bypass_hits = [], [], Counter(), [], 0
+    model_calls = 0
+    for i, (audience, user_type, history, question, expected) in enumerate(workload(args.requests, args.seed)):
+        now[0] = i * args.interval_s
+        t0 = time.perf_counter()
+        result = cache.lookup(question, audience, user_type, history)
+        lookup_ms.append((time.perf_counter() - t0) * 1000)
+        if result['hit']:
+            served['cache'] += 1
+            answered = result['answer'].split('@', 1)[0]
+            if expected is None:
+                expected_bypass_hits += 1
+            elif answered != expected:
+                false_hits.append({'question': question, 'expected': expected, 'got': answered,
+                                   'similarity': result['similarity']})
+            continue
+        served['model'] += 1
+        model_calls += 1
+        if result['cacheable']:
+            # La respuesta "del modelo" dice a qué intención respondió, para detectar aciertos incorrectos.
+            cache.store(question, audience, user_type, f'{expected or "?"}@{audience}', history)
+        rows.append(result.get('reason', 'miss'))
+    q = statistics.quantiles(lookup_ms, n=100)
+    total = args.requests
+    return {'requests': total, 'served_from_cache': served['cache'],
+            'cache_share': round(served['cache'] / total, 3), 'model_calls': model_calls,
+            'false_hits': len(false_hits), 'false_hit_examples': false_hits[:10],
+            'bypassed_but_hit': expected_bypass_hits,
+            'model_reasons': dict(Counter(rows)),
+            'lookup_p50_ms': round(statistics.median(lookup_ms), 3), 'lookup_p99_ms': round(q[98], 3),
+            'model_seconds_saved': round(served['cache'] * args.model_ms / 1000, 1),
+            'cache': cache.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Answer Cache')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8790)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='Coseno mínimo para un acierto')
+    parser.add_argument('--ttl-hours', type=float, default=TTL_S / 3600)
+    parser.add_argument('--max-entries', type=int, default=MAX_ENTRIES)
+    parser.add_argument('--bench', action='store_true', help='Tráfico sintético en memoria, sin levantar el servicio')
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--interval-s', type=float, default=30, help='Segundos simulados entre requests (TTL)')
+    parser.add_argument('--model-ms', type=float, default=7500, help='Duración típica de una respuesta del modelo')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='.tmp/answer_cache_bench.json')
+    args = parser.parse_args()
+
+    if not args.bench:
+        token = os.environ.get('ANSWER_CACHE_TOKEN')
+        # Cualquiera que llegue al puerto puede escribir respuestas que se sirven a otros.
+        if not token and args.host not in LOOPBACK:
+            parser.error(f'--host {args.host} requiere ANSWER_CACHE_TOKEN (sin token solo 127.0.0.1)')
+        cache = AnswerCache(args.threshold, args.ttl_hours * 3600, args.max_entries)
+        server = serve(cache, args.host, args.port, token)
+        print(f'💬 Answer cache en http://{args.host}:{args.port} (umbral {args.threshold}, '
+              f'TTL {args.ttl_hours:g} h, máx {args.max_entries:,} entradas)')
+        print(f'   ANSWER_CACHE_URL=http://{args.host}:{args.port} en el entorno de api/chat.ts')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    print(f'🤖 {args.requests:,} preguntas sintéticas · umbral {args.threshold} · TTL {args.ttl_hours:g} h')
+    result = bench(args)
+    print(f"   servidas desde el caché: {result['served_from_cache']:,} ({result['cache_share']:.1%}) · "
+          f"llamadas al modelo: {result['model_calls']:,}")
+    print(f"   lookup p50 {result['lookup_p50_ms']:.3f} ms · p99 {result['lookup_p99_ms']:.3f} ms · "
+          f"≈ {result['model_seconds_saved']:,.0f} s de modelo ahorrados")
+    print(f"   bypass/miss: {result['model_reasons']}")
+    status = '✅' if result['false_hits'] == 0 and result['bypassed_but_hit'] == 0 else '⚠️'
+    print(f"{status} Aciertos incorrectos: {result['false_hits']} · no cacheables servidas: {result['bypassed_but_hit']}")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    report = {'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'params': vars(args), **result}
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Benchmark Suite
+Latencia de los RPCs y queries clave sobre el dataset de eneadisc_seed_data.py
+
+Cada caso se ejecuta para una muestra determinística de usuarios (mismo
+--seed ⇒ mismos usuarios) y se reportan p50/p95/max. Los casos que en la
+app pasan por PostgREST se corren como `authenticated` con los claims del
+usuario (RLS y auth.uid() incluidos); el feed ICS usa el service role como
+api/calendar.ts.
+
+El reporte JSON incluye el commit y el tamaño del dataset para comparar
+releases: `--compare .tmp/benchmark_anterior.json`.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from eneadisc_db import connect
+
+# Cada caso: sujeto (qué tipo de usuario lo ejecuta), SQL y si pasa por RLS.
+# Parámetros disponibles: user, company, team, conversation, token.
+CASES = [
+    {
+        'name': 'teammates_lookup',
+        'desc': 'get_my_teammates() — página "Mi Equipo"',
+        'subject': 'employee',
+        'sql': 'SELECT * FROM public.get_my_teammates()',
+        'as_user': True,
+    },
+    {
+        'name': 'team_mood',
+        'desc': 'get_team_mood() — termómetro de la empresa (7 días)',
+        'subject': 'employee',
+        'sql': 'SELECT * FROM public.get_team_mood()',
+        'as_user': True,
+    },
+    {
+        'name': 'employees_overview',
+        'desc': 'get_employees_overview() — vista del admin',
+        'subject': 'admin',
+        'sql': 'SELECT * FROM public.get_employees_overview()',
+        'as_user': True,
+    },
+    {
+        'name': 'analytics_team_members',
+        'desc': 'analytics: miembros de todos los equipos de la empresa',
+        'subject': 'admin',
+        'sql': """SELECT tm.team_id, tm.user_id FROM public.team_members tm
+                  JOIN public.teams t ON t.id = tm.team_id WHERE t.company_id = %(company)s""",
+        'as_user': True,
+    },
+    {
+        'name': 'analytics_checkins',
+        'desc': 'analytics: check-ins del mes de los miembros de un equipo',
+        'subject': 'admin',
+        'sql': """SELECT user_id, date, mood, energy, stress FROM public.checkins
+                  WHERE user_id IN (SELECT user_id FROM public.team_members WHERE team_id = %(team)s)
+                    AND date >= NOW() - interval '30 days'
+                  ORDER BY date DESC""",
+        'as_user': True,
+    },
+    {
+        'name': 'analytics_tasks',
+        'desc': 'analytics: tareas de un equipo (getTeamTasks)',
+        'subject': 'admin',
+        'sql': 'SELECT * FROM public.tasks WHERE team_id = %(team)s',
+        'as_user': True,
+    },
+    {
+        'name': 'chat_inbox',
+        'desc': 'get_my_conversations() — bandeja del chat con no leídos',
+        'subject': 'employee',
+        'sql': 'SELECT * FROM public.get_my_conversations()',
+        'as_user': True,
+    },
+    {
+        'name': 'chat_history',
+        'desc': 'getMessages — ventana inicial de la conversación más activa del usuario',
+        'subject': 'employee',
+        'sql': 'SELECT * FROM public.get_messages_page(%(conversation)s::uuid, p_limit => 51)',
+        'as_user': True,
+    },
+    {
+        'name': 'ics_feed',
+        'desc': 'api/calendar.ts — estado por token + get_ics_feed_items() (ventana y relevancia)',
+        'subject': 'ics',
+        'sql': """SELECT * FROM public.get_ics_feed_items(
+                    (SELECT user_id FROM public.get_ics_feed_state(%(token)s::uuid)))""",
+        'as_user': False,
+    },
+]
+
+SUBJECT_SQL = {
+    'employee': """
+        SELECT p.id::text AS "user", p.company_id::text AS company,
+               (SELECT tm.team_id::text FROM public.team_members tm WHERE tm.user_id = p.id LIMIT 1) AS team,
+               (SELECT cp.conversation_id::text FROM public.conversation_participants cp
+                  JOIN public.messages m ON m.conversation_id = cp.conversation_id
+                 WHERE cp.user_id = p.id GROUP BY cp.conversation_id
+                 ORDER BY count(*) DESC, cp.conversation_id LIMIT 1) AS conversation,
+               p.ics_token::text AS token
+        FROM public.profiles p
+        WHERE p.role = 'employee' AND p.company_id IS NOT NULL
+        ORDER BY md5(p.id::text || %(seed)s) LIMIT %(n)s""",
+    'admin': """
+        SELECT p.id::text AS "user", p.company_id::text AS company,
+               (SELECT t.id::text FROM public.teams t WHERE t.company_id = p.company_id
+                ORDER BY t.id LIMIT 1) AS team,
+               NULL AS conversation, p.ics_token::text AS token
+        FROM public.profiles p
+        WHERE p.role = 'company_admin' AND p.company_id IS NOT NULL
+        ORDER BY md5(p.id::text || %(seed)s) LIMIT %(n)s""",
+    'ics': """
+        SELECT p.id::text AS "user", p.company_id::text AS company, NULL AS team,
+               NULL AS conversation, p.ics_token::text AS token
+        FROM public.profiles p
+        WHERE p.ics_token IS NOT NULL
+        ORDER BY md5(p.id::text || %(seed)s) LIMIT %(n)s""",
+}
+
+DATASET_TABLES = ('companies', 'profiles', 'teams', 'team_members', 'checkins', 'tasks',
+                  'conversations', 'messages', 'events')
+
+
+def pick_subjects(cur, n: int, seed: int) -> dict:
+    subjects = {}
+    for kind, sql in SUBJECT_SQL.items():
+        cur.execute(sql, {'n': n, 'seed': str(seed)})
+        cols = [d.name for d in cur.description]
+        subjects[kind] = [dict(zip(cols, row)) for row in cur.fetchall()]
+    return subjects
+
+
+def run_case(conn, case: dict, subjects: list, repeat: int) -> dict:
+    timings, rows = [], []
+    # Sujetos sin el dato que usa el caso (p. ej. sin conversaciones) no miden nada.
+    subjects = [s for s in subjects if all(v is not None for k, v in s.items() if f'%({k})s' in case['sql'])]
+    for params in subjects:
+        for r in range(repeat + 1):          # la primera corrida calienta caché
+            with conn.transaction(), conn.cursor() as cur:
+                if case['as_user']:
+                    cur.execute('SET LOCAL ROLE authenticated')
+                    cur.execute("SELECT set_config('request.jwt.claims', %s, true)",
+                                (json.dumps({'sub': params['user'], 'role': 'authenticated'}),))
+                t0 = time.perf_counter()
+                cur.execute(case['sql'], params)
+                n = len(cur.fetchall())
+                elapsed = (time.perf_counter() - t0) * 1000
+            if r:
+                timings.append(elapsed)
+                rows.append(n)
+    if not timings:
+        return {'samples': 0}
+    q = statistics.quantiles(timings, n=20) if len(timings) > 1 else [timings[0]] * 19
+    return {
+        'samples': len(timings),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(q[18], 3),
+        'max_ms': round(max(timings), 3),
+        'mean_rows': round(statistics.fmean(rows), 1),
+    }
+
+
+def dataset_info(cur) -> dict:
+    info = {}
+    for table in DATASET_TABLES:
+        # reltuples (post-ANALYZE) evita un COUNT(*) de millones de filas.
+        cur.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', (f'public.{table}',))
+        info[table] = cur.fetchone()[0]
+    cur.execute('SHOW server_version')
+    info['server_version'] = cur.fetchone()[0]
+    return info
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(report: dict, baseline_path: str):
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))
+    print(f"\nComparación contra {baseline_path} (commit {baseline.get('commit')})")
+    print(f"{'caso':<24}{'p50 antes':>11}{'p50 ahora':>11}{'Δ%':>9}{'p95 antes':>11}{'p95 ahora':>11}")
+    for name, cur in report['cases'].items():
+        old = baseline.get('cases', {}).get(name)
+        if not old or not old.get('samples') or not cur.get('samples'):
+            print(f"{name:<24}{'—':>11}{cur.get('p50_ms', 0):>11.2f}")
+            continue
+        delta = (cur['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+        print(f"{name:<24}{old['p50_ms']:>11.2f}{cur['p50_ms']:>11.2f}{delta:>+8.1f}%"
+              f"{old['p95_ms']:>11.2f}{cur['p95_ms']:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Benchmark Suite (RPCs y queries clave)')
+    parser.add_argument('--users', type=int, default=20, help='Usuarios muestreados por caso')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas por usuario')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla del muestreo de usuarios')
+    parser.add_argument('--only', nargs='*', help='Correr solo estos casos')
+    parser.add_argument('--output', default='.tmp/benchmark_suite.json', help='Reporte JSON')
+    parser.add_argument('--compare', help='Reporte previo para comparar')
+    args = parser.parse_args()
+
+    cases = [c for c in CASES if not args.only or c['name'] in args.only]
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_rev(),
+        'params': {'users': args.users, 'repeat': args.repeat, 'seed': args.seed},
+        'cases': {},
+    }
+    with connect(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            report['dataset'] = dataset_info(cur)
+            subjects = pick_subjects(cur, args.users, args.seed)
+        print(f"{'caso':<24}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'filas':>10}")
+        for case in cases:
+            stats = run_case(conn, case, subjects[case['subject']], args.repeat)
+            report['cases'][case['name']] = {'description': case['desc'], **stats}
+            if stats['samples']:
+                print(f"{case['name']:<24}{stats['samples']:>6}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                      f"{stats['max_ms']:>10.2f}{stats['mean_rows']:>10.1f}")
+            else:
+                print(f"{case['name']:<24}{'sin sujetos':>16}")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n✅ Reporte → {out}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
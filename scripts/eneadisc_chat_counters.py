@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Chat Counters
+Reconciliación en lote de los contadores de no leídos y del último mensaje (22_chat_counters.sql)
+
+El trigger bump_conversation mantiene `conversation_participants.unread_count`
+y `conversations.last_message_*` mensaje a mensaje. Pueden desviarse cuando
+los triggers no corren (seed con --replica, restores) o cuando se borran
+mensajes en cascada. Este job recorre las conversaciones por keyset y, por
+lote, llama a reconcile_chat_counters(ids), que recalcula desde `messages`
+y escribe solo lo que difiere.
+
+--dry-run corre lo mismo dentro de una transacción que se descarta: reporta
+el desvío sin tocar nada.
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from eneadisc_db import connect, stream_keyset
+
+DEFAULT_BATCH = 500
+
+CONVERSATIONS_SQL = """
+SELECT id FROM public.conversations
+WHERE {after} AND (%(since)s::timestamptz IS NULL OR updated_at >= %(since)s)
+"""
+
+
+def reconcile(conn, batch: int, since: datetime = None, dry_run: bool = False) -> dict:
+    stats = {'conversations': 0, 'unread_fixed': 0, 'last_fixed': 0}
+    # Lectura con una conexión aparte: cada lote hace commit sin cortar el cursor.
+    with connect() as reader:
+        for rows in stream_keyset(reader, CONVERSATIONS_SQL, {'since': since}, chunk=batch):
+            ids = [r['id'] for r in rows]
+            with conn.transaction(force_rollback=dry_run), conn.cursor() as cur:
+                cur.execute('SELECT * FROM public.reconcile_chat_counters(%s::uuid[])', (ids,))
+                unread, last = cur.fetchone()
+            stats['conversations'] += len(ids)
+            stats['unread_fixed'] += unread
+            stats['last_fixed'] += last
+            if unread or last:
+                print(f"   …{ids[-1]}: {unread:,} contadores y {last:,} últimos mensajes desviados")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Chat Counters (reconciliación)')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='Conversaciones por transacción')
+    parser.add_argument('--since', type=datetime.fromisoformat,
+                        help='Solo conversaciones con actividad desde esta fecha (ISO)')
+    parser.add_argument('--dry-run', action='store_true', help='Reportar el desvío sin corregirlo')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with connect(autocommit=True) as conn:
+        stats = reconcile(conn, args.batch, args.since, args.dry_run)
+    verb = 'desviados' if args.dry_run else 'corregidos'
+    print(f"✅ {stats['conversations']:,} conversaciones revisadas: {stats['unread_fixed']:,} contadores y "
+          f"{stats['last_fixed']:,} últimos mensajes {verb} en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
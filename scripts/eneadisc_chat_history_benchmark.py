@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Chat History Benchmark
+Time-to-first-render del chat sobre una conversación de 1M de mensajes
+
+Crea (una vez) un canal de benchmark con los miembros del equipo más grande
+del dataset (eneadisc_seed_data.py) y le carga N mensajes del lado del
+servidor. Los timestamps van de a pares iguales para ejercitar el desempate
+por `id` del cursor.
+
+Cada caso se mide como lo pide la app: rol `authenticated` con los claims
+de un participante, y el resultado serializado con json_agg (lo que hace
+PostgREST). Se reportan latencia y bytes:
+
+  full_history    getMessages anterior: todo el historial (RLS por fila)
+  first_window    get_messages_page(): los 50 más recientes
+  older_keyset    página anterior desde la mitad de la conversación
+  older_offset    la misma página con OFFSET (referencia)
+  newer_catchup   posteriores a un cursor (reconexión)
+  scrollback_20   20 páginas "cargar anteriores" seguidas
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from eneadisc_db import connect
+
+BENCH_TITLE = '⏱ Benchmark historial'
+WINDOW = 50
+
+TEAM_SQL = """
+SELECT t.id, t.company_id, array_agg(tm.user_id ORDER BY tm.user_id) || t.lead_id AS members
+FROM public.teams t JOIN public.team_members tm ON tm.team_id = t.id
+WHERE t.lead_id IS NOT NULL
+GROUP BY t.id
+ORDER BY count(*) DESC, t.id
+LIMIT 1
+"""
+INSERT_SQL = """
+INSERT INTO public.messages (conversation_id, sender_id, body, kind, created_at)
+SELECT %(conv)s, (%(senders)s::uuid[])[1 + g %% %(n_senders)s],
+       'Mensaje de benchmark #' || g, 'text',
+       %(start)s::timestamptz + (g / 2) * interval '1 second'
+FROM generate_series(%(first)s, %(last)s) g
+"""
+PAGE = 'SELECT * FROM public.get_messages_page(%(conv)s::uuid, {args}p_limit => %(limit)s)'
+
+CASES = [
+    ('full_history', """SELECT * FROM public.messages WHERE conversation_id = %(conv)s
+                        ORDER BY created_at ASC"""),
+    ('first_window', PAGE.format(args='')),
+    ('older_keyset', PAGE.format(args='p_before_at => %(mid_at)s, p_before_id => %(mid_id)s, ')),
+    ('older_offset', """SELECT * FROM public.messages WHERE conversation_id = %(conv)s
+                        ORDER BY created_at DESC, id DESC LIMIT %(limit)s OFFSET %(mid_offset)s"""),
+    ('newer_catchup', PAGE.format(args='p_after_at => %(tail_at)s, p_after_id => %(tail_id)s, ')),
+]
+
+
+def ensure_conversation(conn, n_messages: int, chunk: int, reset: bool) -> dict:
+    """Canal de benchmark con `n_messages`; lo crea o completa si falta."""
+    with conn.cursor() as cur:
+        if reset:
+            cur.execute('DELETE FROM public.conversations WHERE title = %s AND team_id IS NULL', (BENCH_TITLE,))
+        cur.execute(TEAM_SQL)
+        team = cur.fetchone()
+        if team is None:
+            raise SystemExit('No hay equipos: cargar antes eneadisc_seed_data.py')
+        _, company_id, members = team
+        members = list(dict.fromkeys(members))
+        cur.execute("SELECT id FROM public.conversations WHERE title = %s AND team_id IS NULL AND type = 'group'",
+                    (BENCH_TITLE,))
+        row = cur.fetchone()
+        if row:
+            conv = row[0]
+        else:
+            cur.execute("""INSERT INTO public.conversations (company_id, type, title, created_by)
+                           VALUES (%s, 'group', %s, %s) RETURNING id""", (company_id, BENCH_TITLE, members[-1]))
+            conv = cur.fetchone()[0]
+            cur.execute("""INSERT INTO public.conversation_participants (conversation_id, user_id, last_read_at)
+                           SELECT %s, unnest(%s::uuid[]), NOW()""", (conv, members))
+        cur.execute('SELECT count(*) FROM public.messages WHERE conversation_id = %s', (conv,))
+        have = cur.fetchone()[0]
+
+    if have < n_messages:
+        print(f"   cargando {n_messages - have:,} mensajes…")
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        t0 = time.perf_counter()
+        for first in range(have + 1, n_messages + 1, chunk):
+            last = min(first + chunk - 1, n_messages)
+            with conn.transaction(), conn.cursor() as cur:
+                # Sin bump_conversation por fila (superusuario): los
+                # contadores se reconcilian al final.
+                cur.execute("SET LOCAL session_replication_role = 'replica'")
+                cur.execute(INSERT_SQL, {'conv': conv, 'senders': members, 'n_senders': len(members),
+                                         'start': start, 'first': first, 'last': last})
+            print(f"   {last:,}/{n_messages:,} ({last / (time.perf_counter() - t0):,.0f}/s)")
+        with conn.cursor() as cur:
+            cur.execute('SELECT * FROM public.reconcile_chat_counters(ARRAY[%s]::uuid[])', (conv,))
+            cur.execute('ANALYZE public.messages')
+    return {'conv': conv, 'user': members[0], 'participants': len(members)}
+
+
+def cursors(conn, conv, total: int) -> dict:
+    """Mensajes de referencia: la mitad de la conversación y 100 antes del final."""
+    out = {'mid_offset': total // 2}
+    with conn.cursor() as cur:
+        for name, offset in (('mid', total // 2), ('tail', 100)):
+            cur.execute("""SELECT created_at, id FROM public.messages WHERE conversation_id = %s
+                           ORDER BY created_at DESC, id DESC OFFSET %s LIMIT 1""", (conv, offset))
+            out[f'{name}_at'], out[f'{name}_id'] = cur.fetchone()
+    return out
+
+
+def _as_user(cur, user):
+    cur.execute('SET LOCAL ROLE authenticated')
+    cur.execute("SELECT set_config('request.jwt.claims', %s, true)",
+                (json.dumps({'sub': str(user), 'role': 'authenticated'}),))
+
+
+def _summary(timings: list, nbytes: int, rows: int) -> dict:
+    q = statistics.quantiles(timings, n=20) if len(timings) > 1 else [timings[0]] * 19
+    return {'samples': len(timings), 'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(q[18], 3), 'rows': rows, 'kb': round(nbytes / 1024, 1)}
+
+
+def run_case(conn, sql: str, params: dict, repeat: int) -> dict:
+    timings, nbytes, rows = [], 0, 0
+    for r in range(repeat + 1):              # la primera corrida calienta caché
+        with conn.transaction(), conn.cursor() as cur:
+            _as_user(cur, params['user'])
+            t0 = time.perf_counter()
+            cur.execute(f"SELECT count(*), COALESCE(json_agg(t), '[]')::text FROM ({sql}) t", params)
+            rows, body = cur.fetchone()
+            elapsed = (time.perf_counter() - t0) * 1000
+        if r:
+            timings.append(elapsed)
+            nbytes = len(body.encode('utf-8'))
+    return _summary(timings, nbytes, rows)
+
+
+def scrollback(conn, params: dict, pages: int, repeat: int) -> dict:
+    """Apertura + `pages` "cargar anteriores" encadenando el cursor."""
+    timings, nbytes, rows = [], 0, 0
+    for r in range(repeat + 1):
+        total_ms, total_bytes, total_rows = 0.0, 0, 0
+        before = None
+        for _ in range(pages + 1):
+            args = '' if before is None else 'p_before_at => %(b_at)s, p_before_id => %(b_id)s, '
+            with conn.transaction(), conn.cursor() as cur:
+                _as_user(cur, params['user'])
+                t0 = time.perf_counter()
+                cur.execute(f"SELECT created_at, id, to_jsonb(m)::text FROM ({PAGE.format(args=args)}) m",
+                            {**params, 'b_at': before and before[0], 'b_id': before and before[1]})
+                page = cur.fetchall()
+                total_ms += (time.perf_counter() - t0) * 1000
+            if not page:
+                break
+            before = page[-1][:2]
+            total_rows += len(page)
+            total_bytes += sum(len(p[2]) for p in page)
+        if r:
+            timings.append(total_ms)
+            nbytes, rows = total_bytes, total_rows
+    return _summary(timings, nbytes, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Chat History Benchmark (1M mensajes)')
+    parser.add_argument('--messages', type=int, default=1_000_000, help='Mensajes de la conversación')
+    parser.add_argument('--chunk', type=int, default=100_000, help='Mensajes por INSERT')
+    parser.add_argument('--repeat', type=int, default=20, help='Corridas por caso')
+    parser.add_argument('--full-repeat', type=int, default=2, help='Corridas de full_history')
+    parser.add_argument('--skip-full', action='store_true', help='No medir el historial completo')
+    parser.add_argument('--pages', type=int, default=20, help='Páginas del caso scrollback')
+    parser.add_argument('--reset', action='store_true', help='Recrear el canal de benchmark')
+    parser.add_argument('--output', default='.tmp/chat_history_benchmark.json')
+    args = parser.parse_args()
+
+    report = {'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'params': {'messages': args.messages, 'window': WINDOW, 'repeat': args.repeat}, 'cases': {}}
+    with connect(autocommit=True) as conn:
+        subject = ensure_conversation(conn, args.messages, args.chunk, args.reset)
+        params = {**subject, **cursors(conn, subject['conv'], args.messages), 'limit': WINDOW + 1}
+        print(f"\n💬 Conversación {subject['conv']} · {args.messages:,} mensajes · "
+              f"{subject['participants']} participantes")
+        print(f"{'caso':<16}{'n':>5}{'p50 ms':>11}{'p95 ms':>11}{'filas':>11}{'KB':>11}")
+        for name, sql in CASES:
+            if name == 'full_history' and args.skip_full:
+                continue
+            repeat = args.full_repeat if name == 'full_history' else args.repeat
+            stats = run_case(conn, sql, params, repeat)
+            report['cases'][name] = stats
+            print(f"{name:<16}{stats['samples']:>5}{stats['p50_ms']:>11.2f}{stats['p95_ms']:>11.2f}"
+                  f"{stats['rows']:>11,}{stats['kb']:>11,.1f}")
+        stats = scrollback(conn, params, args.pages, max(1, args.repeat // 4))
+        report['cases'][f'scrollback_{args.pages}'] = stats
+        print(f"{f'scrollback_{args.pages}':<16}{stats['samples']:>5}{stats['p50_ms']:>11.2f}"
+              f"{stats['p95_ms']:>11.2f}{stats['rows']:>11,}{stats['kb']:>11,.1f}")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+    print(f"\n✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
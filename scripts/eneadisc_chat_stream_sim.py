@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Chat Stream Simulator
+Carga del stream de chat por usuario (24_chat_stream.sql) con clientes asyncio
+
+Levanta un servidor realtime de reemplazo (TCP, una línea JSON por evento)
+que hace lo mismo que Realtime con el stream: un topic `user:<id>` por
+conexión y presencia por empresa. Los eventos de mensajes salen de
+Postgres por NOTIFY chat_stream (el trigger de la migración 24 cae en
+NOTIFY cuando no existe el esquema `realtime`).
+
+  • N clientes: uno por usuario de la empresa con más perfiles del dataset
+    (eneadisc_seed_data.py). Cada uno aplica los deltas (no leídos por
+    conversación, presencia) como lo hace el frontend.
+  • Emisores: INSERT en messages a `--rate` mensajes/s en conversaciones al
+    azar. El cuerpo lleva el instante de envío: la latencia de entrega es
+    INSERT + trigger + NOTIFY + fan-out + lectura del cliente.
+
+--no-db reemplaza Postgres por un emisor en memoria que imita el trigger
+(mide el techo del fan-out sin base). Al final se borran los mensajes del
+simulador y se reconcilian los contadores de esas conversaciones.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+MARK = '⏱'
+MAX_BUFFER = 1 << 20
+
+COMPANY_SQL = """
+SELECT company_id FROM public.profiles WHERE company_id IS NOT NULL
+GROUP BY company_id ORDER BY count(*) DESC, company_id LIMIT 1
+"""
+CONVERSATIONS_SQL = """
+SELECT c.id::text, array_agg(cp.user_id::text ORDER BY cp.user_id)
+FROM public.conversations c
+JOIN public.conversation_participants cp ON cp.conversation_id = c.id
+WHERE c.company_id = %s
+GROUP BY c.id
+"""
+USERS_SQL = 'SELECT id::text FROM public.profiles WHERE company_id = %s ORDER BY id'
+INSERT_SQL = 'INSERT INTO public.messages (conversation_id, sender_id, body) VALUES (%s, %s, %s)'
+
+
+# ── Servidor realtime de reemplazo ──────────────────────────
+
+class StreamServer:
+    """Un topic `user:<id>` por conexión + presencia por empresa."""
+
+    def __init__(self, max_buffer: int = MAX_BUFFER):
+        self.max_buffer = max_buffer
+        self.topics = defaultdict(set)
+        self.online = defaultdict(Counter)      # empresa → usuario → conexiones
+        self.stats = Counter()
+        self.closing = False
+
+    def _send(self, writer, line: bytes):
+        if writer.is_closing():
+            return
+        # Cliente lento: se corta (como Realtime) en vez de acumular memoria.
+        if writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.stats['dropped_slow'] += 1
+            writer.close()
+            return
+        writer.write(line)
+        self.stats['frames'] += 1
+
+    def publish(self, topic: str, event: str, payload: dict):
+        writers = self.topics.get(topic)
+        if not writers:
+            self.stats['no_subscriber'] += 1
+            return
+        line = (json.dumps({'event': event, 'payload': payload}, separators=(',', ':')) + '\n').encode()
+        for writer in list(writers):
+            self._send(writer, line)
+
+    def _presence(self, company: str, payload: dict, skip: str = None):
+        for user in self.online[company]:
+            if user != skip:
+                self.publish(f'user:{user}', 'presence', payload)
+
+    async def handle(self, reader, writer):
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        topic = user = company = None
+        try:
+            hello = json.loads(await reader.readline())
+            user, company = hello['user'], hello.get('company')
+            topic = f'user:{user}'
+            self.topics[topic].add(writer)
+            self.stats['joins'] += 1
+            if company:
+                first = not self.online[company][user]
+                self.online[company][user] += 1
+                self.publish(topic, 'presence', {'online': list(self.online[company])})
+                if first:
+                    self._presence(company, {'join': [user]}, skip=user)
+            while await reader.readline():      # el cliente no manda nada más
+                pass
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            if topic:
+                self.topics[topic].discard(writer)
+                if not self.topics[topic]:
+                    del self.topics[topic]
+            if company and user in self.online[company]:
+                self.online[company][user] -= 1
+                if not self.online[company][user]:
+                    del self.online[company][user]
+                    if not self.closing:
+                        self._presence(company, {'leave': [user]})
+            writer.close()
+
+
+async def listen_postgres(server: StreamServer, url: str, ready: asyncio.Event):
+    """NOTIFY chat_stream → topics del servidor."""
+    import psycopg
+    async with await psycopg.AsyncConnection.connect(url, autocommit=True) as conn:
+        await conn.execute('LISTEN chat_stream')
+        ready.set()
+        async for notify in conn.notifies():
+            data = json.loads(notify.payload)
+            server.stats['notifies'] += 1
+            server.publish(data['topic'], data['event'], data['payload'])
+
+
+# ── Clientes ────────────────────────────────────────────────
+
+class SimClient:
+    """Aplica el stream como Chat.tsx / Sidebar.tsx: no leídos y presencia."""
+
+    def __init__(self, user: str, company: str, latencies: list):
+        self.user = user
+        self.company = company
+        self.latencies = latencies
+        self.unread = {}
+        self.online = set()
+        self.received = Counter()
+
+    def apply(self, event: dict):
+        kind, payload = event['event'], event['payload']
+        self.received[kind] += 1
+        if kind == 'message':
+            msg = payload['message']
+            self.unread[msg['conversation_id']] = payload['unread']
+            body = msg.get('body') or ''
+            if body.startswith(MARK):
+                sent_at = float(body[len(MARK):].split(':', 1)[1])
+                self.latencies.append((time.perf_counter() - sent_at) * 1000)
+        elif kind == 'read':
+            self.unread[payload['conversation_id']] = payload['unread']
+        elif kind == 'presence':
+            if 'online' in payload:
+                self.online = set(payload['online'])
+            self.online.update(payload.get('join', ()))
+            self.online.difference_update(payload.get('leave', ()))
+
+    async def run(self, host: str, port: int, joined: asyncio.Event, counter: list):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(json.dumps({'user': self.user, 'company': self.company}).encode() + b'\n')
+        await writer.drain()
+        counter[0] -= 1
+        if not counter[0]:
+            joined.set()
+        try:
+            while line := await reader.readline():
+                self.apply(json.loads(line))
+        finally:
+            writer.close()
+
+
+# ── Emisores ────────────────────────────────────────────────
+
+async def _paced(rate: float, seconds: float, senders: int, send):
+    """Llama a `send(seq)` a `rate`/senders por emisor durante `seconds`."""
+    interval = senders / rate if rate else 0.0
+    start = time.perf_counter()
+    seq, next_at = 0, start
+    while time.perf_counter() - start < seconds:
+        await send(seq)
+        seq += 1
+        if interval:
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        else:
+            await asyncio.sleep(0)
+
+
+async def pg_sender(url: str, convs: list, rate: float, seconds: float, senders: int,
+                    stats: Counter, rng: random.Random, idx: int):
+    import psycopg
+    async with await psycopg.AsyncConnection.connect(url, autocommit=True) as conn:
+        async def send(seq):
+            conv, members = rng.choice(convs)
+            await conn.execute(INSERT_SQL, (conv, rng.choice(members),
+                                            f'{MARK}{idx}.{seq}:{time.perf_counter():.6f}'))
+            stats['sent'] += 1
+            stats['expected'] += len(members)
+        await _paced(rate, seconds, senders, send)
+
+
+async def memory_sender(server: StreamServer, convs: list, rate: float, seconds: float, senders: int,
+                        stats: Counter, rng: random.Random, idx: int, unread: Counter):
+    """Lo que hacen bump_conversation + trg_chat_stream, sin base."""
+    async def send(seq):
+        conv, members = rng.choice(convs)
+        sender = rng.choice(members)
+        message = {'id': f'{idx}.{seq}', 'conversation_id': conv, 'sender_id': sender, 'kind': 'text',
+                   'body': f'{MARK}{idx}.{seq}:{time.perf_counter():.6f}',
+                   'created_at': datetime.now(timezone.utc).isoformat()}
+        for user in members:
+            if user != sender:
+                unread[conv, user] += 1
+            server.publish(f'user:{user}', 'message', {'message': message, 'unread': unread[conv, user]})
+        stats['sent'] += 1
+        stats['expected'] += len(members)
+    await _paced(rate, seconds, senders, send)
+
+
+# ── Datos ───────────────────────────────────────────────────
+
+def load_company(url: str, max_users: int) -> tuple:
+    """(empresa, usuarios, [(conversación, participantes conectados)]) del dataset."""
+    import psycopg
+    with psycopg.connect(url) as conn, conn.cursor() as cur:
+        cur.execute(COMPANY_SQL)
+        row = cur.fetchone()
+        if row is None:
+            raise SystemExit('No hay empresas: cargar antes eneadisc_seed_data.py')
+        company = str(row[0])
+        cur.execute(USERS_SQL, (company,))
+        users = [r[0] for r in cur.fetchall()][:max_users]
+        cur.execute(CONVERSATIONS_SQL, (company,))
+        convs = cur.fetchall()
+    connected = set(users)
+    convs = [(c, [u for u in members if u in connected]) for c, members in convs]
+    return company, users, [(c, m) for c, m in convs if len(m) > 1]
+
+
+def synthetic_company(users: int, teams: int, dms: int, seed: int) -> tuple:
+    rng = random.Random(seed)
+    ids = [f'u{i:05d}' for i in range(users)]
+    convs = [(f'team-{t}', ids[t::teams]) for t in range(teams)]
+    pairs = {tuple(sorted(rng.sample(range(users), 2))) for _ in range(users * dms)}
+    convs += [(f'dm-{a}-{b}', [ids[a], ids[b]]) for a, b in sorted(pairs)]
+    return 'company-sim', ids, convs
+
+
+def cleanup(url: str, convs: list) -> int:
+    """Borra los mensajes del simulador y reconcilia los contadores."""
+    import psycopg
+    ids = [c for c, _ in convs]
+    with psycopg.connect(url, autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute('DELETE FROM public.messages WHERE conversation_id = ANY(%s::uuid[]) AND body LIKE %s',
+                    (ids, f'{MARK}%'))
+        deleted = cur.rowcount
+        for start in range(0, len(ids), 500):
+            cur.execute('SELECT * FROM public.reconcile_chat_counters(%s::uuid[])', (ids[start:start + 500],))
+    return deleted
+
+
+# ── Simulación ──────────────────────────────────────────────
+
+async def simulate(args) -> dict:
+    url = None
+    if args.no_db:
+        company, users, convs = synthetic_company(args.users, args.teams, args.dms, args.seed)
+    else:
+        from eneadisc_db import database_url
+        url = database_url()
+        company, users, convs = await asyncio.to_thread(load_company, url, args.users)
+
+    server = StreamServer()
+    tcp = await asyncio.start_server(server.handle, '127.0.0.1', args.port)
+    host, port = tcp.sockets[0].getsockname()[:2]
+    listener = None
+    if url:
+        ready = asyncio.Event()
+        listener = asyncio.create_task(listen_postgres(server, url, ready))
+        await ready.wait()
+
+    latencies = []
+    clients = [SimClient(u, company, latencies) for u in users]
+    joined, pending = asyncio.Event(), [len(clients)]
+    t0 = time.perf_counter()
+    tasks = [asyncio.create_task(c.run(host, port, joined, pending)) for c in clients]
+    await joined.wait()
+    # Que se asiente la ola de presencia (N² eventos) antes de medir.
+    while sum(len(c.online) == len(users) for c in clients) < len(clients) and time.perf_counter() - t0 < 60:
+        await asyncio.sleep(0.1)
+    join_s = time.perf_counter() - t0
+    print(f"💬 {len(users):,} clientes · {len(convs):,} conversaciones · conectados en {join_s:.2f}s "
+          f"({server.stats['frames']:,} eventos de presencia)")
+
+    stats, rng, unread = Counter(), random.Random(args.seed), Counter()
+    t0 = time.perf_counter()
+    if url:
+        senders = [pg_sender(url, convs, args.rate, args.seconds, args.senders, stats,
+                             random.Random(rng.random()), k) for k in range(args.senders)]
+    else:
+        senders = [memory_sender(server, convs, args.rate, args.seconds, args.senders, stats,
+                                 random.Random(rng.random()), k, unread) for k in range(args.senders)]
+    await asyncio.gather(*senders)
+    sent_s = time.perf_counter() - t0
+    # Drenar: esperar a que dejen de llegar entregas.
+    last = -1
+    while len(latencies) != last:
+        last = len(latencies)
+        await asyncio.sleep(0.5)
+
+    server.closing = True
+    tcp.close()
+    for task in tasks + ([listener] if listener else []):
+        task.cancel()
+    await asyncio.gather(*tasks, *([listener] if listener else []), return_exceptions=True)
+    deleted = await asyncio.to_thread(cleanup, url, convs) if url else 0
+
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    presence_ok = sum(len(c.online) == len(users) for c in clients)
+    return {
+        'mode': 'memoria' if args.no_db else 'postgres',
+        'clients': len(users),
+        'conversations': len(convs),
+        'messages': stats['sent'],
+        'messages_per_s': round(stats['sent'] / sent_s, 1),
+        'deliveries': len(latencies),
+        'expected_deliveries': stats['expected'],
+        'deliveries_per_s': round(len(latencies) / sent_s, 1),
+        'latency_ms': {'p50': round(statistics.median(latencies), 2) if latencies else None,
+                       'p95': round(q[94], 2), 'p99': round(q[98], 2),
+                       'max': round(max(latencies), 2) if latencies else None},
+        'presence_consistent_clients': presence_ok,
+        'server': dict(server.stats),
+        # Antes cada entrega disparaba getConversations() en el cliente.
+        'refetches_avoided': len(latencies),
+        'cleaned_messages': deleted,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Chat Stream Simulator')
+    parser.add_argument('--users', type=int, default=300, help='Clientes conectados (máximo)')
+    parser.add_argument('--rate', type=float, default=200, help='Mensajes por segundo (0 = sin límite)')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--senders', type=int, default=4, help='Conexiones emisoras')
+    parser.add_argument('--no-db', action='store_true', help='Emisor en memoria (sin Postgres)')
+    parser.add_argument('--teams', type=int, default=10, help='Canales de equipo (--no-db)')
+    parser.add_argument('--dms', type=int, default=3, help='DMs por usuario (--no-db)')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='.tmp/chat_stream_sim.json')
+    args = parser.parse_args()
+
+    report = asyncio.run(simulate(args))
+    lat = report['latency_ms']
+    print(f"   {report['messages']:,} mensajes ({report['messages_per_s']:,.0f}/s) → "
+          f"{report['deliveries']:,}/{report['expected_deliveries']:,} entregas "
+          f"({report['deliveries_per_s']:,.0f}/s)")
+    print(f"   latencia de entrega: p50 {lat['p50']} ms · p95 {lat['p95']} ms · p99 {lat['p99']} ms "
+          f"· max {lat['max']} ms")
+    print(f"   presencia consistente en {report['presence_consistent_clients']:,}/{report['clients']:,} clientes "
+          f"· {report['refetches_avoided']:,} recargas de bandeja evitadas")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                               'params': vars(args), **report}, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Company Analytics (batch)
+Calcula `TeamAnalytics` de TODOS los equipos de una empresa en una sola pasada
+
+Reemplazo de `calculateCompanyAnalytics` (src/utils/analytics.ts), que por
+cada equipo hace getTeamTasks + team_members + getCheckInsForUsers (3 round
+trips por equipo) y filtra por fecha en memoria. Acá se leen `team_members`,
+`tasks` y `checkins` de la empresa UNA vez cada una, en streaming por keyset,
+ya filtradas por período, y cada lote se agrega por equipo con NumPy.
+"""
+
+import argparse
+import json
+import math
+import time
+from calendar import monthrange
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Mismos valores que analytics.ts (los moods que no están valen 3).
+MOOD_SCORES = {'excellent': 5, 'good': 4, 'neutral': 3, 'stressed': 2, 'overwhelmed': 1}
+STRESSFUL_MOODS = {'stressed', 'overwhelmed'}
+PRIORITIES = ('high', 'medium', 'low')
+TREND_DAYS = 7
+DAY_MS = 1000 * 60 * 60 * 24
+
+MEMBERS_SQL = """
+SELECT tm.team_id::text || ':' || tm.user_id::text AS id, tm.team_id, tm.user_id
+FROM public.team_members tm
+JOIN public.teams t ON t.id = tm.team_id
+WHERE {after} AND t.company_id = %(company)s
+"""
+
+# `id` sin alias: es la clave de keyset que agrega stream_keyset.
+TASKS_SQL = """
+SELECT id, team_id, status, priority, due_date, completed_at, created_at
+FROM public.tasks
+WHERE {after}
+  AND team_id IN (SELECT id FROM public.teams WHERE company_id = %(company)s)
+  AND created_at BETWEEN %(start)s AND %(end)s
+"""
+
+CHECKINS_SQL = """
+SELECT id, user_id, date, mood, energy
+FROM public.checkins
+WHERE {after}
+  AND user_id IN (SELECT tm.user_id FROM public.team_members tm
+                  JOIN public.teams t ON t.id = tm.team_id
+                  WHERE t.company_id = %(company)s)
+  AND date BETWEEN %(start)s AND %(end)s
+"""
+
+
+def _utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _day(value) -> str:
+    """Igual que `date.split('T')[0]` sobre el ISO en UTC que devuelve Supabase."""
+    return _utc(value).astimezone(timezone.utc).date().isoformat()
+
+
+def pearson(trend1: list, trend2: list) -> float:
+    """Réplica de calculateCorrelation: Pearson sobre los días presentes en ambas tendencias."""
+    if len(trend1) < 2 or len(trend2) < 2:
+        return 0.0
+    by_date = {p['date']: p['value'] for p in trend2}
+    aligned = [(p['value'], by_date[p['date']]) for p in trend1 if p['date'] in by_date]
+    if len(aligned) < 2:
+        return 0.0
+    x = np.array(aligned, dtype=np.float64)
+    n = len(x)
+    sx, sy = x[:, 0].sum(), x[:, 1].sum()
+    num = n * (x[:, 0] * x[:, 1]).sum() - sx * sy
+    den = math.sqrt((n * (x[:, 0] ** 2).sum() - sx * sx) * (n * (x[:, 1] ** 2).sum() - sy * sy))
+    return 0.0 if den == 0 else float(num / den)
+
+
+class CompanyAnalyticsJob:
+    """Acumuladores por equipo alimentados por lotes de filas."""
+
+    def __init__(self, teams: list, start: datetime, end: datetime, now: datetime = None):
+        self.teams = teams                                   # [{id, name}]
+        self.index = {str(t['id']): i for i, t in enumerate(teams)}
+        self.start, self.end = _utc(start), _utc(end)
+        self.now = _utc(now) if now else datetime.now(timezone.utc)
+        k = len(teams)
+        self.member_count = np.zeros(k, dtype=np.int64)
+        self.user_teams = defaultdict(list)
+        # Tareas
+        self.assigned = np.zeros(k, dtype=np.int64)
+        self.completed = np.zeros(k, dtype=np.int64)
+        self.in_progress = np.zeros(k, dtype=np.int64)
+        self.overdue = np.zeros(k, dtype=np.int64)
+        self.completion_days = np.zeros(k, dtype=np.float64)
+        self.completion_n = np.zeros(k, dtype=np.int64)
+        self.by_priority = np.zeros((k, len(PRIORITIES)), dtype=np.int64)
+        self.done_per_day = defaultdict(int)                 # (team, día) → completadas
+        # Check-ins
+        self.checkins = np.zeros(k, dtype=np.int64)
+        self.mood_sum = np.zeros(k, dtype=np.float64)
+        self.energy_sum = np.zeros(k, dtype=np.float64)
+        self.stressful = np.zeros(k, dtype=np.int64)
+        self.mood_per_day = defaultdict(lambda: [0.0, 0])   # (team, día) → [suma, n]
+
+    def consume_members(self, rows: list):
+        for r in rows:
+            i = self.index.get(str(r['team_id']))
+            if i is None:
+                continue
+            self.member_count[i] += 1
+            self.user_teams[str(r['user_id'])].append(i)
+
+    def consume_tasks(self, rows: list):
+        if not rows:
+            return
+        team = np.array([self.index.get(str(r['team_id']), -1) for r in rows])
+        keep = team >= 0
+        rows = [r for r, k in zip(rows, keep) if k]
+        team = team[keep]
+        status = np.array([r['status'] for r in rows])
+        done = status == 'completed'
+        overdue = np.array([r['status'] != 'completed' and r['due_date'] is not None
+                            and _utc(r['due_date']) < self.now for r in rows], dtype=bool)
+        np.add.at(self.assigned, team, 1)
+        np.add.at(self.completed, team, done)
+        np.add.at(self.in_progress, team, status == 'in_progress')
+        np.add.at(self.overdue, team, overdue)
+        for p, name in enumerate(PRIORITIES):
+            prio = np.array([r['priority'] == name for r in rows], dtype=bool)
+            np.add.at(self.by_priority[:, p], team, done & prio)
+        for i, r, d in zip(team, rows, done):
+            if d and r['completed_at']:
+                ms = abs((_utc(r['completed_at']) - _utc(r['created_at'])).total_seconds()) * 1000
+                self.completion_days[i] += math.ceil(ms / DAY_MS)
+                self.completion_n[i] += 1
+                self.done_per_day[(int(i), _day(r['completed_at']))] += 1
+
+    def consume_checkins(self, rows: list):
+        # Un check-in cuenta para cada equipo del usuario (igual que el TS).
+        expanded = [(i, r) for r in rows for i in self.user_teams.get(str(r['user_id']), ())]
+        if not expanded:
+            return
+        team = np.array([i for i, _ in expanded])
+        mood = np.array([MOOD_SCORES.get(r['mood'], 3) for _, r in expanded], dtype=np.float64)
+        energy = np.array([r['energy'] for _, r in expanded], dtype=np.float64)
+        stress = np.array([r['mood'] in STRESSFUL_MOODS for _, r in expanded], dtype=bool)
+        np.add.at(self.checkins, team, 1)
+        np.add.at(self.mood_sum, team, mood)
+        np.add.at(self.energy_sum, team, energy)
+        np.add.at(self.stressful, team, stress)
+        for (i, r), m in zip(expanded, mood):
+            bucket = self.mood_per_day[(i, _day(r['date']))]
+            bucket[0] += m
+            bucket[1] += 1
+
+    def _trends(self):
+        mood, prod = defaultdict(list), defaultdict(list)
+        for (i, day), (total, n) in self.mood_per_day.items():
+            mood[i].append({'date': day, 'value': total / n})
+        for (i, day), n in self.done_per_day.items():
+            prod[i].append({'date': day, 'value': n})
+        last = lambda pts: sorted(pts, key=lambda p: p['date'])[-TREND_DAYS:]
+        return ({i: last(v) for i, v in mood.items()}, {i: last(v) for i, v in prod.items()})
+
+    def result(self) -> dict:
+        weeks = abs((self.end - self.start).total_seconds()) / (7 * 24 * 3600)
+        mood_trends, prod_trends = self._trends()
+        period = {'start': self.start.isoformat(), 'end': self.end.isoformat()}
+        teams = []
+        for i, t in enumerate(self.teams):
+            n_ci = int(self.checkins[i])
+            assigned, completed = int(self.assigned[i]), int(self.completed[i])
+            mood_trend, prod_trend = mood_trends.get(i, []), prod_trends.get(i, [])
+            teams.append({
+                'teamId': str(t['id']),
+                'teamName': t['name'],
+                'period': period,
+                'tasksAssigned': assigned,
+                'tasksCompleted': completed,
+                'tasksInProgress': int(self.in_progress[i]),
+                'tasksOverdue': int(self.overdue[i]),
+                'completionRate': completed / assigned * 100 if assigned else 0,
+                'avgCompletionTime': (self.completion_days[i] / self.completion_n[i]
+                                      if self.completion_n[i] else 0),
+                'velocityPerWeek': completed / weeks if weeks > 0 else completed,
+                'highPriorityCompleted': int(self.by_priority[i, 0]),
+                'mediumPriorityCompleted': int(self.by_priority[i, 1]),
+                'lowPriorityCompleted': int(self.by_priority[i, 2]),
+                'avgMoodScore': self.mood_sum[i] / n_ci if n_ci else 3,
+                'avgEnergyLevel': self.energy_sum[i] / n_ci if n_ci else 3,
+                'stressIndex': self.stressful[i] / n_ci * 100 if n_ci else 0,
+                'checkInCount': n_ci,
+                'moodTrend': mood_trend,
+                'productivityTrend': prod_trend,
+                'wellnessProductivityCorr': pearson(mood_trend, prod_trend),
+                'memberCount': int(self.member_count[i]),
+            })
+        return company_summary(teams)
+
+
+def company_summary(teams: list) -> dict:
+    """Campos de CompanyWideAnalytics (los insights se generan en el cliente con generateInsights)."""
+    n = len(teams)
+    top = teams[0] if teams else None
+    attention = teams[0] if teams else None
+    for t in teams:
+        if t['completionRate'] > (top['completionRate'] or 0):
+            top = t
+        if t['avgMoodScore'] + t['completionRate'] / 100 < attention['avgMoodScore'] + attention['completionRate'] / 100:
+            attention = t
+    return {
+        'overallCompletionRate': sum(t['completionRate'] for t in teams) / n if n else 0,
+        'overallMoodScore': sum(t['avgMoodScore'] for t in teams) / n if n else 0,
+        'totalTasksCompleted': sum(t['tasksCompleted'] for t in teams),
+        'totalCheckIns': sum(t['checkInCount'] for t in teams),
+        'teams': teams,
+        'topPerformingTeam': top['teamId'] if top else None,
+        'teamNeedingAttention': attention['teamId'] if attention else None,
+    }
+
+
+def run_for_company(conn, company_id: str, start: datetime, end: datetime, chunk: int) -> dict:
+    from eneadisc_db import stream_keyset
+
+    with conn.cursor() as cur:
+        cur.execute('SELECT id, name FROM public.teams WHERE company_id = %s ORDER BY name', (company_id,))
+        teams = [{'id': str(r[0]), 'name': r[1]} for r in cur.fetchall()]
+    job = CompanyAnalyticsJob(teams, start, end)
+    params = {'company': company_id, 'start': start, 'end': end}
+    # Primero los miembros: los check-ins se reparten por equipo con ese mapa.
+    for rows in stream_keyset(conn, MEMBERS_SQL, params, key="tm.team_id::text || ':' || tm.user_id::text",
+                              chunk=chunk, field='id'):
+        job.consume_members(rows)
+    for rows in stream_keyset(conn, TASKS_SQL, params, chunk=chunk):
+        job.consume_tasks(rows)
+    for rows in stream_keyset(conn, CHECKINS_SQL, params, chunk=chunk):
+        job.consume_checkins(rows)
+    return job.result()
+
+
+def period_range(period: str, now: datetime = None):
+    """Equivalente a getDateRange('week' | 'month' | 'quarter')."""
+    end = now or datetime.now(timezone.utc)
+    months = {'month': 1, 'quarter': 3}.get(period)
+    if months is None:
+        return end - timedelta(days=7), end
+    month = end.month - months
+    year = end.year + (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    # JS desborda (31/03 − 1 mes → 03/03); acá se recorta al último día del mes.
+    return end.replace(year=year, month=month, day=min(end.day, monthrange(year, month)[1])), end
+
+
+def _benchmark(n_teams: int, members: int, seed: int):
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    start, end = period_range('quarter', now)
+    teams = [{'id': f't{i}', 'name': f'Equipo {i}'} for i in range(n_teams)]
+    job = CompanyAnalyticsJob(teams, start, end, now)
+    t0 = time.perf_counter()
+    job.consume_members([{'team_id': f't{i}', 'user_id': f'u{i}-{j}'}
+                         for i in range(n_teams) for j in range(members)])
+    span = (end - start).total_seconds()
+    moods = list(MOOD_SCORES)
+    statuses = ('pending', 'in_progress', 'completed')
+    rows = []
+    for c in range(n_teams * members * 60):
+        rows.append({'user_id': f'u{c % n_teams}-{c % members}',
+                     'date': start + timedelta(seconds=float(rng.random() * span)),
+                     'mood': moods[c % 5], 'energy': int(rng.integers(1, 6))})
+        if len(rows) == 5000:
+            job.consume_checkins(rows)
+            rows = []
+    job.consume_checkins(rows)
+    rows = []
+    for c in range(n_teams * members * 20):
+        created = start + timedelta(seconds=float(rng.random() * span))
+        status = statuses[c % 3]
+        rows.append({'team_id': f't{c % n_teams}', 'status': status, 'priority': PRIORITIES[c % 3],
+                     'due_date': created + timedelta(days=7), 'created_at': created,
+                     'completed_at': created + timedelta(days=2) if status == 'completed' else None})
+        if len(rows) == 5000:
+            job.consume_tasks(rows)
+            rows = []
+    job.consume_tasks(rows)
+    job.result()
+    print(f"⏱️  {n_teams} equipos ({n_teams * members * 80:,} filas) agregados en "
+          f"{time.perf_counter() - t0:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Company Analytics (batch)')
+    parser.add_argument('--company-id', help='UUID de la empresa')
+    parser.add_argument('--period', choices=('week', 'month', 'quarter'), default='month')
+    parser.add_argument('--chunk', type=int, default=5000, help='Filas por lote de keyset')
+    parser.add_argument('--output-dir', default='.tmp', help='Directorio de salida')
+    parser.add_argument('--benchmark', type=int, default=0, help='Equipos sintéticos (sin DB)')
+    parser.add_argument('--members', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        _benchmark(args.benchmark, args.members, args.seed)
+        return
+    if not args.company_id:
+        parser.error('--company-id es requerido (o usar --benchmark)')
+
+    from eneadisc_db import connect
+
+    start, end = period_range(args.period)
+    t0 = time.perf_counter()
+    with connect() as conn:
+        analytics = run_for_company(conn, args.company_id, start, end, args.chunk)
+    out = Path(args.output_dir) / f'company_analytics_{args.company_id}_{args.period}.json'
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(analytics, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+    print(f"✅ {len(analytics['teams'])} equipos en {time.perf_counter() - t0:.2f}s → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Compatibility Analytics
+Matriz de compatibilidad 9x9 densa + agregados de equipo por histograma
+
+Réplica de `compatibility.ts` / `frictionEngine.ts` sin enumerar pares:
+con solo 9 eneatipos, un equipo queda descrito por su vector de conteos
+(histograma) y cualquier agregado de pares sale de conteos x pesos.
+Un equipo de 500 personas cuesta lo mismo que uno de 5.
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+N_TYPES = 9
+NEUTRAL_SCORE = 50          # getCompatibilityScore devuelve 50 si no hay clave
+FRICTION_MAX = 55           # detectFrictions: por encima no se reporta
+FRICTION_HIGH = 40          # <= 40 fricción alta, 41-55 media
+DEFAULT_SOURCE = Path(__file__).resolve().parent.parent / 'eneadisc' / 'src' / 'utils' / 'compatibility.ts'
+
+
+def load_compatibility_matrix(ts_path=DEFAULT_SOURCE) -> np.ndarray:
+    """Lee `compatibilityMatrix` de compatibility.ts como numpy.int8[10, 10].
+
+    El índice es el eneatipo (1..9); la fila/columna 0 queda en el valor
+    neutral para que los tipos desconocidos se comporten como en el TS.
+    """
+    source = Path(ts_path).read_text(encoding='utf-8')
+    start = source.find('const compatibilityMatrix')
+    block = source[start:source.find('};', start)]
+    matrix = np.full((N_TYPES + 1, N_TYPES + 1), NEUTRAL_SCORE, dtype=np.int8)
+    for a, b, score in re.findall(r"'(\d)-(\d)':\s*(\d+)", block):
+        matrix[int(a), int(b)] = int(score)
+    return matrix
+
+
+COMPATIBILITY = load_compatibility_matrix()
+if not np.array_equal(COMPATIBILITY, COMPATIBILITY.T):
+    raise ValueError('compatibilityMatrix debe ser simétrica para agregar pares no ordenados')
+# Copia en int64 para los productos (evita overflow de int8 en las sumas).
+_WEIGHTS = COMPATIBILITY.astype(np.int64)
+_UPPER = np.triu(np.ones((N_TYPES + 1, N_TYPES + 1), dtype=bool))
+
+
+def compatibility_score(type1: int, type2: int) -> int:
+    """Lookup O(1) equivalente a getCompatibilityScore(type1, type2)."""
+    if 1 <= type1 <= N_TYPES and 1 <= type2 <= N_TYPES:
+        return int(COMPATIBILITY[type1, type2])
+    return NEUTRAL_SCORE
+
+
+def type_histogram(types) -> np.ndarray:
+    """Vector de conteos int64[10] (índice = eneatipo). Ignora tipos nulos o inválidos."""
+    arr = np.asarray([t for t in types if isinstance(t, (int, np.integer)) and 1 <= t <= N_TYPES],
+                     dtype=np.int64)
+    return np.bincount(arr, minlength=N_TYPES + 1)
+
+
+def pair_counts(hist: np.ndarray) -> np.ndarray:
+    """Cantidad de pares no ordenados por combinación de tipos (triángulo superior).
+
+    (a, b) con a < b: h[a] * h[b];  (a, a): h[a] * (h[a] - 1) / 2.
+    """
+    hist = np.asarray(hist, dtype=np.int64)
+    counts = np.outer(hist, hist)
+    np.fill_diagonal(counts, hist * (hist - 1) // 2)
+    return np.where(_UPPER, counts, 0)
+
+
+def team_aggregates(hist: np.ndarray) -> dict:
+    """Media, mínimo y total de compatibilidad de todos los pares del equipo."""
+    pairs = pair_counts(hist)
+    n_pairs = int(pairs.sum())
+    if n_pairs == 0:
+        return {'pairs': 0, 'mean': None, 'min': None, 'total': 0}
+    total = int((pairs * _WEIGHTS).sum())
+    return {
+        'pairs': n_pairs,
+        'mean': total / n_pairs,
+        'min': int(_WEIGHTS[pairs > 0].min()),
+        'total': total,
+    }
+
+
+def diversity_score(hist: np.ndarray) -> int:
+    """Réplica de getTeamCompatibilityScore (teams.ts): diversidad + bonus por tamaño."""
+    hist = np.asarray(hist)
+    members = int(hist[1:].sum())
+    if members == 0:
+        return 0
+    unique = int(np.count_nonzero(hist[1:]))
+    # floor(x + 0.5) = Math.round (round() de Python redondea al par).
+    return min(int(np.floor(unique / N_TYPES * 100 + min(members / 5, 1) * 20 + 0.5)), 100)
+
+
+def friction_pairs(hist: np.ndarray) -> list:
+    """Combinaciones de tipos con fricción (score <= 55), de peor a mejor.
+
+    Devuelve una entrada por combinación con la cantidad de pares de personas
+    que la forman, en lugar de una entrada por par como detectFrictions.
+    """
+    pairs = pair_counts(hist)
+    mask = (pairs > 0) & (_WEIGHTS <= FRICTION_MAX)
+    a_idx, b_idx = np.nonzero(mask)
+    out = [{
+        'a': int(a), 'b': int(b),
+        'score': int(_WEIGHTS[a, b]),
+        'level': 'alta' if _WEIGHTS[a, b] <= FRICTION_HIGH else 'media',
+        'pairs': int(pairs[a, b]),
+    } for a, b in zip(a_idx, b_idx)]
+    return sorted(out, key=lambda f: (f['score'], f['a'], f['b']))
+
+
+def batch_team_aggregates(histograms: np.ndarray) -> dict:
+    """Agregados para muchos equipos a la vez: `histograms` es (n_equipos x 10).
+
+    suma de pares = (hᵀ·C·h − Σ h[a]·C[a,a]) / 2   (C simétrica)
+    """
+    H = np.asarray(histograms, dtype=np.int64)
+    ordered = np.einsum('ta,ab,tb->t', H, _WEIGHTS, H) - H @ np.diag(_WEIGHTS)
+    n_members = H.sum(axis=1)
+    n_pairs = n_members * (n_members - 1) // 2
+    # Par (a, b) presente si hay al menos un par de personas con esos tipos.
+    present = (H[:, :, None] * H[:, None, :] - np.einsum('ta,ab->tab', H, np.eye(N_TYPES + 1, dtype=np.int64))) > 0
+    masked = np.where(present, _WEIGHTS[None, :, :], np.iinfo(np.int64).max)
+    mins = masked.reshape(len(H), -1).min(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(n_pairs > 0, ordered / 2 / n_pairs, np.nan)
+    return {
+        'pairs': n_pairs,
+        'total': ordered // 2,
+        'mean': mean,
+        'min': np.where(n_pairs > 0, mins, -1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Compatibility Analytics')
+    parser.add_argument('--input', help='JSON {team_id: [eneatipos de los miembros]}')
+    parser.add_argument('--output', default='.tmp/team_compatibility.json', help='Reporte JSON')
+    parser.add_argument('--benchmark', type=int, default=0, help='Equipos sintéticos a agregar')
+    parser.add_argument('--team-size', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        rng = np.random.default_rng(args.seed)
+        types = rng.integers(1, N_TYPES + 1, size=(args.benchmark, args.team_size))
+        H = np.zeros((args.benchmark, N_TYPES + 1), dtype=np.int64)
+        np.add.at(H, (np.repeat(np.arange(args.benchmark), args.team_size), types.ravel()), 1)
+        start = time.perf_counter()
+        batch_team_aggregates(H)
+        elapsed = time.perf_counter() - start
+        print(f"⏱️  {args.benchmark:,} equipos de {args.team_size} personas agregados en {elapsed:.3f}s")
+        return
+    if not args.input:
+        parser.error('--input es requerido (o usar --benchmark)')
+
+    teams = json.loads(Path(args.input).read_text(encoding='utf-8'))
+    report = {}
+    for team_id, types in teams.items():
+        hist = type_histogram(types)
+        report[team_id] = {
+            **team_aggregates(hist),
+            'compatibilityScore': diversity_score(hist),
+            'frictions': friction_pairs(hist),
+        }
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ {len(report):,} equipos analizados → {out}")
+
+
+if __name__ == '__main__':
+    main()
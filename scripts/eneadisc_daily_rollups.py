@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Daily Rollups
+Refresca incrementalmente daily_team_wellbeing / daily_team_tasks (18_daily_rollups.sql)
+
+Modo incremental (default): reclama lotes de `rollup_queue` (drain_queue),
+traduce cada entrada a claves (equipo, día) y recalcula SOLO esas claves con
+refresh_team_wellbeing_days / refresh_team_task_days. El borrado del lote y
+el recalculo van en la misma transacción.
+
+Modo --backfill: recalcula todo el histórico por ventanas de N días.
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+
+from eneadisc_db import connect, drain_queue
+
+DEFAULT_BATCH = 2000
+DEFAULT_WINDOW_DAYS = 31
+
+QUEUE = 'public.rollup_queue'
+
+
+def _refresh(cur, wellbeing: set, tasks: set) -> tuple:
+    """Recalcula las claves (team_id, day) en los rollups; devuelve filas escritas."""
+    written = [0, 0]
+    for i, (fn, keys) in enumerate((('refresh_team_wellbeing_days', wellbeing),
+                                    ('refresh_team_task_days', tasks))):
+        if not keys:
+            continue
+        teams, days = zip(*sorted(keys))
+        cur.execute(f'SELECT public.{fn}(%s::uuid[], %s::date[])', (list(teams), list(days)))
+        written[i] = cur.fetchone()[0]
+    return tuple(written)
+
+
+def _resolve(cur, rows: list) -> tuple:
+    """Traduce entradas de la cola a claves (equipo, día) de cada rollup."""
+    wellbeing, tasks = set(), set()
+    checkin_users = {}
+    members = []
+    for r in rows:
+        if r['kind'] == 'task':
+            tasks.add((r['team_id'], r['day']))
+        elif r['kind'] == 'checkin':
+            checkin_users.setdefault(r['user_id'], set()).add(r['day'])
+        elif r['kind'] == 'member':
+            members.append((r['team_id'], r['user_id']))
+
+    if checkin_users:
+        # Un check-in afecta a todos los equipos actuales de su autor.
+        cur.execute('SELECT user_id, team_id FROM public.team_members WHERE user_id = ANY(%s)',
+                    (list(checkin_users),))
+        for user_id, team_id in cur.fetchall():
+            for day in checkin_users[user_id]:
+                wellbeing.add((team_id, day))
+    if members:
+        # Alta/baja de miembro: todos los días con check-ins de esa persona.
+        # Las claves de equipos borrados no generan filas (JOIN con teams).
+        cur.execute("""
+            SELECT DISTINCT m.team_id, (c.date AT TIME ZONE 'UTC')::date
+            FROM unnest(%s::uuid[], %s::uuid[]) AS m(team_id, user_id)
+            JOIN public.checkins c ON c.user_id = m.user_id
+        """, ([t for t, _ in members], [u for _, u in members]))
+        wellbeing.update(cur.fetchall())
+    return wellbeing, tasks
+
+
+def refresh_incremental(conn, batch: int) -> dict:
+    stats = {'queue': 0, 'wellbeing': 0, 'tasks': 0}
+    for rows in drain_queue(conn, QUEUE, 'id, kind, team_id, user_id, day', batch):
+        with conn.cursor() as cur:
+            wellbeing, tasks = _resolve(cur, rows)
+            w, t = _refresh(cur, wellbeing, tasks)
+        stats['queue'] += len(rows)
+        stats['wellbeing'] += w
+        stats['tasks'] += t
+    return stats
+
+
+def backfill(conn, since: date, until: date, window_days: int) -> dict:
+    """Recalcula todas las claves con datos entre `since` y `until`, por ventanas."""
+    # La cola no se toca: puede tener días fuera de [since, until] y
+    # recalcular una clave dos veces da el mismo resultado.
+    stats = {'wellbeing': 0, 'tasks': 0}
+    day = since
+    while day <= until:
+        end = min(day + timedelta(days=window_days), until + timedelta(days=1))
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT DISTINCT tm.team_id, (c.date AT TIME ZONE 'UTC')::date
+                FROM public.checkins c
+                JOIN public.team_members tm ON tm.user_id = c.user_id
+                WHERE c.date >= %(start)s::timestamp AT TIME ZONE 'UTC'
+                  AND c.date <  %(end)s::timestamp AT TIME ZONE 'UTC'
+            """, {'start': day, 'end': end})
+            wellbeing = set(cur.fetchall())
+            cur.execute("""
+                SELECT DISTINCT team_id, (ts AT TIME ZONE 'UTC')::date
+                FROM public.tasks, LATERAL (VALUES (created_at), (completed_at)) v(ts)
+                WHERE team_id IS NOT NULL
+                  AND ts >= %(start)s::timestamp AT TIME ZONE 'UTC'
+                  AND ts <  %(end)s::timestamp AT TIME ZONE 'UTC'
+            """, {'start': day, 'end': end})
+            tasks = set(cur.fetchall())
+            w, t = _refresh(cur, wellbeing, tasks)
+        conn.commit()
+        stats['wellbeing'] += w
+        stats['tasks'] += t
+        print(f"   {day} → {end - timedelta(days=1)}: {w:,} filas de bienestar, {t:,} de tareas")
+        day = end
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Daily Rollups')
+    parser.add_argument('--backfill', action='store_true', help='Recalcular el histórico completo')
+    parser.add_argument('--since', type=date.fromisoformat, help='Inicio del backfill (YYYY-MM-DD)')
+    parser.add_argument('--until', type=date.fromisoformat, default=date.today())
+    parser.add_argument('--window-days', type=int, default=DEFAULT_WINDOW_DAYS)
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='Entradas de cola por transacción')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with connect() as conn:
+        if args.backfill:
+            since = args.since
+            if since is None:
+                with conn.cursor() as cur:
+                    cur.execute('SELECT MIN(date)::date FROM public.checkins')
+                    since = cur.fetchone()[0] or args.until
+            stats = backfill(conn, since, args.until, args.window_days)
+            print(f"✅ Backfill {since} → {args.until}: {stats['wellbeing']:,} filas de bienestar, "
+                  f"{stats['tasks']:,} de tareas en {time.perf_counter() - t0:.1f}s")
+        else:
+            stats = refresh_incremental(conn, args.batch)
+            print(f"✅ {stats['queue']:,} cambios procesados: {stats['wellbeing']:,} filas de bienestar, "
+                  f"{stats['tasks']:,} de tareas en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
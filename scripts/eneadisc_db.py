@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+ENEADISC DB helpers
+Conexión directa a Postgres (Supabase o local) y lectura en streaming por keyset
+
+Los jobs batch leen millones de filas: nunca se trae una tabla completa a
+memoria. `stream_keyset` pagina por una clave única y ordenable
+(`WHERE key > último ORDER BY key LIMIT n`), que usa el índice de la clave
+y no se degrada como OFFSET a medida que avanza.
+
+Las colas de cambios (rollup_queue, kpi_events, ...) se consumen con
+`drain_queue`: cada lote se reclama con DELETE ... RETURNING en la misma
+transacción que su procesamiento. Una fila insertada por una transacción
+que todavía no hizo commit no es visible para ese DELETE y queda para la
+próxima corrida; con un watermark por MAX(id) esos ids se perdían.
+"""
+
+import os
+from contextlib import contextmanager
+
+import psycopg
+from psycopg.rows import dict_row
+from dotenv import load_dotenv
+
+DEFAULT_CHUNK = 5000
+
+
+def database_url() -> str:
+    """URL de Postgres desde `.env`: DATABASE_URL (local) o SUPABASE_DB_URL."""
+    load_dotenv()
+    url = os.getenv('DATABASE_URL') or os.getenv('SUPABASE_DB_URL')
+    if not url:
+        raise RuntimeError('Falta DATABASE_URL (o SUPABASE_DB_URL) en .env')
+    return url
+
+
+def connect(url: str = None, autocommit: bool = False) -> psycopg.Connection:
+    return psycopg.connect(url or database_url(), autocommit=autocommit)
+
+
+def stream_keyset(conn, sql: str, params: dict = None, key: str = 'id',
+                  chunk: int = DEFAULT_CHUNK, start=None, field: str = None):
+    """Itera lotes de filas (listas de dicts) paginando por `key`.
+
+    `sql` debe ser un SELECT que incluya la columna `key` y un marcador
+    `{after}` donde va la condición de keyset, por ejemplo:
+
+        SELECT id, user_id FROM checkins WHERE {after} AND date >= %(since)s
+
+    El ORDER BY y el LIMIT los agrega esta función. Si `key` es una
+    expresión, `field` es el nombre con el que vuelve en el SELECT.
+    """
+    field = field or key.split('.')[-1]
+    params = dict(params or {})
+    last = start
+    with conn.cursor(row_factory=dict_row) as cur:
+        while True:
+            after = 'TRUE' if last is None else f'{key} > %(_after)s'
+            cur.execute(f"{sql.format(after=after)} ORDER BY {key} LIMIT {int(chunk)}",
+                        {**params, '_after': last})
+            rows = cur.fetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk:
+                return
+            last = rows[-1][field]
+
+
+def lock_queue(cur, table: str):
+    """Un consumidor por cola a la vez (lock de transacción).
+
+    Lo toman `drain_queue` y `discard_queue`; un job que escribe lo mismo
+    que los consumidores de `table` lo toma en su transacción para no
+    pisarse con un lote.
+    """
+    cur.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', (f'queue:{table}',))
+
+
+@contextmanager
+def hold_queue(conn, table: str):
+    """El mismo lock que `lock_queue`, de sesión: sobrevive a los commits de `conn`.
+
+    Para abrir una transacción REPEATABLE READ con los consumidores ya
+    afuera: la foto se toma en la primera consulta, y si esa consulta
+    esperara el lock, la foto sería de antes del último lote.
+    """
+    with conn.cursor() as cur:
+        cur.execute('SELECT pg_advisory_lock(hashtext(%s))', (f'queue:{table}',))
+    conn.commit()
+    try:
+        yield
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_unlock(hashtext(%s))', (f'queue:{table}',))
+        conn.commit()
+
+
+def drain_queue(conn, table: str, columns: str = 'id', batch: int = DEFAULT_CHUNK):
+    """Consume una cola por lotes; itera listas de dicts ordenadas por `id`.
+
+    Cada lote se borra de `table` con DELETE ... RETURNING `columns` y el
+    llamador lo procesa con `conn` antes de que esta función haga commit:
+    el borrado y lo que se escriba con el lote se confirman juntos. Si el
+    procesamiento falla, se hace rollback y las filas vuelven a la cola.
+    """
+    while True:
+        try:
+            with conn.cursor(row_factory=dict_row) as cur:
+                lock_queue(cur, table)
+                cur.execute(f"""
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT id FROM {table} ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED)
+                    RETURNING {columns}
+                """, (int(batch),))
+                rows = sorted(cur.fetchall(), key=lambda r: r['id'])
+            if not rows:
+                conn.rollback()
+                return
+            yield rows
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if len(rows) < batch:
+            return
+
+
+def discard_queue(conn, table: str, where: str = None, params: dict = None) -> int:
+    """Vacía lo visible de una cola antes de un backfill completo.
+
+    Lo borrado queda cubierto por el backfill, que lee después de este
+    commit; lo que se encole mientras corre se procesa en la próxima
+    corrida incremental. `where` limita el borrado a lo que el backfill
+    cubre (p. ej. una sola fuente).
+    """
+    with conn.cursor() as cur:
+        lock_queue(cur, table)
+        cur.execute(f'DELETE FROM {table}' + (f' WHERE {where}' if where else ''), params)
+        deleted = cur.rowcount
+    conn.commit()
+    return deleted
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Employee Summaries
+Refresca incrementalmente employee_summaries (32_employee_summaries.sql)
+
+Modo incremental (default): reclama lotes de `summary_queue`
+(drain_queue), deduplica las personas de cada lote y las recalcula con
+refresh_employee_summaries en la misma transacción que borró el lote.
+Después recalcula las filas vencidas por el paso del tiempo
+(`next_change_at <= NOW()`: un check-in salió de la ventana de 14 días o
+una tarea pasó a vencida). En Supabase lo mismo corre cada minuto por
+pg_cron (process_employee_summaries); este worker sirve sin pg_cron y
+para el --backfill.
+
+Modo --backfill: recalcula a todos los empleados/supervisores por keyset y
+borra resúmenes de quien ya no corresponde.
+"""
+
+import argparse
+import time
+
+from eneadisc_db import connect, discard_queue, drain_queue, stream_keyset
+
+QUEUE = 'public.summary_queue'
+DEFAULT_BATCH = 1000
+
+PEOPLE_SQL = """
+SELECT id FROM public.profiles
+WHERE {after} AND company_id IS NOT NULL AND role IN ('employee', 'supervisor')
+"""
+
+
+def _refresh(cur, users) -> int:
+    cur.execute('SELECT public.refresh_employee_summaries(%s::uuid[])', (sorted(set(users)),))
+    return cur.fetchone()[0]
+
+
+def refresh_incremental(conn, batch: int) -> dict:
+    stats = {'queue': 0, 'people': 0}
+    for rows in drain_queue(conn, QUEUE, 'id, user_id', batch):
+        with conn.cursor() as cur:
+            stats['people'] += _refresh(cur, [r['user_id'] for r in rows])
+        stats['queue'] += len(rows)
+    return stats
+
+
+def refresh_due(conn, batch: int) -> int:
+    """Recalcula las filas cuyo next_change_at ya pasó; devuelve filas escritas."""
+    written = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT user_id FROM public.employee_summaries
+                WHERE next_change_at <= NOW()
+                ORDER BY next_change_at LIMIT %s
+            """, (batch,))
+            users = [r[0] for r in cur.fetchall()]
+            if users:
+                # Cada fila recalculada queda con un next_change_at futuro (o NULL).
+                written += _refresh(cur, users)
+        conn.commit()
+        if len(users) < batch:
+            return written
+
+
+def backfill(conn, batch: int) -> dict:
+    stats = {'people': 0, 'removed': 0}
+    # Lo encolado antes del backfill queda cubierto por él.
+    discard_queue(conn, QUEUE)
+
+    with connect() as reader:
+        for rows in stream_keyset(reader, PEOPLE_SQL, chunk=batch):
+            with conn.cursor() as cur:
+                stats['people'] += _refresh(cur, [r['id'] for r in rows])
+            conn.commit()
+            print(f"   …{rows[-1]['id']}: {stats['people']:,} resúmenes")
+
+    with conn.cursor() as cur:
+        # Cambios de rol o de empresa que no pasaron por la cola.
+        cur.execute("""
+            DELETE FROM public.employee_summaries s
+            WHERE NOT EXISTS (SELECT 1 FROM public.profiles p
+                              WHERE p.id = s.user_id AND p.company_id IS NOT NULL
+                                AND p.role IN ('employee', 'supervisor'))
+        """)
+        stats['removed'] = cur.rowcount
+    conn.commit()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Employee Summaries')
+    parser.add_argument('--backfill', action='store_true', help='Recalcular a todas las personas')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='Entradas/personas por transacción')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with connect() as conn:
+        if args.backfill:
+            stats = backfill(conn, args.batch)
+            print(f"✅ Backfill: {stats['people']:,} resúmenes, {stats['removed']:,} borrados "
+                  f"en {time.perf_counter() - t0:.1f}s")
+        else:
+            stats = refresh_incremental(conn, args.batch)
+            due = refresh_due(conn, args.batch)
+            print(f"✅ {stats['queue']:,} cambios procesados: {stats['people']:,} resúmenes, "
+                  f"{due:,} vencidos por tiempo en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Friction Engine (incremental)
+Detección de fricciones por equipo con actualizaciones O(9) por cambio de membresía
+
+Réplica incremental de `detectFrictions` (src/utils/frictionEngine.ts):
+cada equipo guarda su histograma de eneatipos, los conteos de pares por
+combinación (tipoA, tipoB) y los miembros agrupados por tipo. Un alta o
+baja en `team_members` toca a lo sumo 9 celdas; el "top-k" se arma
+recorriendo solo las combinaciones con fricción, sin enumerar pares.
+"""
+
+import argparse
+import heapq
+import json
+import time
+from bisect import bisect_right
+from itertools import combinations, groupby, islice
+from pathlib import Path
+
+import numpy as np
+
+from eneadisc_compatibility import COMPATIBILITY, FRICTION_HIGH, FRICTION_MAX, N_TYPES
+
+DEFAULT_TOP_K = 6
+# Para scores <= 55 getCompatibilityInsights no tiene insights específicos
+# y cae al bloque genérico (< 60): se usan su primer desafío y primer tip.
+DEFAULT_CHALLENGE = 'Posibles malentendidos'
+DEFAULT_TIP = 'Establezcan expectativas claras'
+
+# Combinaciones con fricción (a <= b), de peor a mejor: fijas, son a lo sumo 45.
+FRICTION_COMBOS = sorted(
+    ((int(COMPATIBILITY[a, b]), a, b)
+     for a in range(1, N_TYPES + 1) for b in range(a, N_TYPES + 1)
+     if COMPATIBILITY[a, b] <= FRICTION_MAX),
+)
+
+
+def _first_name(name: str) -> str:
+    return (name or '').split(' ')[0]
+
+
+class TeamFrictionState:
+    """Estado de un equipo: histograma, pares por combinación y miembros por tipo."""
+
+    def __init__(self):
+        self.hist = np.zeros(N_TYPES + 1, dtype=np.int64)
+        self.pairs = np.zeros((N_TYPES + 1, N_TYPES + 1), dtype=np.int64)
+        # user_id → (orden de alta, nombre, tipo | None): los miembros sin
+        # test también cuentan, para entrar a su bucket cuando tengan tipo.
+        self.members = {}
+        # Buckets por tipo, ordenados por alta (como el array de miembros).
+        self.buckets = {t: {} for t in range(1, N_TYPES + 1)}
+        self._seq = 0
+
+    def add(self, user_id: str, name: str, etype: int):
+        if user_id in self.members:
+            return
+        self._seq += 1
+        self.members[user_id] = (self._seq, name, None)
+        self.set_type(user_id, name, etype)
+
+    def remove(self, user_id: str):
+        if user_id not in self.members:
+            return
+        self._unbucket(user_id)
+        del self.members[user_id]
+
+    def set_type(self, user_id: str, name: str, etype: int):
+        """Reubica a un miembro (re-test o primer test); conserva su orden de alta."""
+        if user_id not in self.members:
+            return
+        etype = etype if etype and 1 <= etype <= N_TYPES else None
+        self._unbucket(user_id)
+        seq = self.members[user_id][0]
+        self.members[user_id] = (seq, name, etype)
+        if etype is None:
+            return
+        # Cada miembro nuevo forma un par con todos los existentes: O(9).
+        self.pairs[etype, :] += self.hist
+        self.pairs[:, etype] += self.hist
+        self.pairs[etype, etype] -= self.hist[etype]
+        self.hist[etype] += 1
+        bucket = self.buckets[etype]
+        late = bool(bucket) and seq < next(reversed(bucket.values()))[0]
+        bucket[user_id] = (seq, name)
+        if late:
+            # Tipo asignado después del alta de otros: se reordena solo ese bucket.
+            self.buckets[etype] = dict(sorted(bucket.items(), key=lambda kv: kv[1][0]))
+
+    def _unbucket(self, user_id: str):
+        etype = self.members[user_id][2]
+        if etype is None:
+            return
+        del self.buckets[etype][user_id]
+        self.hist[etype] -= 1
+        self.pairs[etype, :] -= self.hist
+        self.pairs[:, etype] -= self.hist
+        self.pairs[etype, etype] += self.hist[etype]
+
+    def friction_count(self) -> int:
+        """Pares de personas con fricción (no ordenados), sin enumerarlos."""
+        return int(sum(self.pairs[a, b] for _, a, b in FRICTION_COMBOS))
+
+    def _pairs(self, a: int, b: int):
+        """Pares de la combinación a-b en el orden de detectFrictions: (i, j) con i < j por alta."""
+        if a == b:
+            yield from combinations(self.buckets[a].values(), 2)
+            return
+        sides = (list(self.buckets[a].values()), list(self.buckets[b].values()))
+        seqs = ([m[0] for m in sides[0]], [m[0] for m in sides[1]])
+        firsts = heapq.merge(((m, 1) for m in sides[0]), ((m, 0) for m in sides[1]))
+        for first, other in firsts:
+            for second in sides[other][bisect_right(seqs[other], first[0]):]:
+                yield first, second
+
+    def top_frictions(self, k: int = DEFAULT_TOP_K) -> list:
+        """Primeras k fricciones en el formato de `Friction` (frictionEngine.ts).
+
+        detectFrictions ordena por score de forma estable: a igual score
+        queda el orden de los pares (i, j). Por cada score, de peor a mejor,
+        se mezclan perezosamente los pares de sus combinaciones en ese orden
+        y se corta al llegar a k, sin enumerar los O(n²) pares.
+        """
+        out = []
+        for score, combos in groupby(FRICTION_COMBOS, key=lambda c: c[0]):
+            if len(out) >= k:
+                break
+            streams = [self._pairs(a, b) for _, a, b in combos if self.pairs[a, b]]
+            pairs = heapq.merge(*streams, key=lambda xy: (xy[0][0], xy[1][0]))
+            for first, second in islice(pairs, k - len(out)):
+                out.append({
+                    'aName': _first_name(first[1]),
+                    'bName': _first_name(second[1]),
+                    'score': score,
+                    'level': 'alta' if score <= FRICTION_HIGH else 'media',
+                    'challenge': DEFAULT_CHALLENGE,
+                    'tip': DEFAULT_TIP,
+                })
+        return out
+
+
+class FrictionEngine:
+    """Mantiene el estado de fricción de todos los equipos a partir de eventos de `team_members`."""
+
+    def __init__(self, profiles: dict = None):
+        # profiles: {user_id: {'name': str, 'type': int | None}}
+        self.profiles = profiles or {}
+        self.teams = {}
+
+    def team(self, team_id: str) -> TeamFrictionState:
+        if team_id not in self.teams:
+            self.teams[team_id] = TeamFrictionState()
+        return self.teams[team_id]
+
+    def add_member(self, team_id: str, user_id: str):
+        """Equivalente a addMemberToTeam (INSERT en team_members)."""
+        p = self.profiles.get(user_id, {})
+        self.team(team_id).add(user_id, p.get('name') or '', p.get('type'))
+
+    def remove_member(self, team_id: str, user_id: str):
+        """Equivalente a removeMemberFromTeam (DELETE en team_members)."""
+        if team_id in self.teams:
+            self.teams[team_id].remove(user_id)
+
+    def set_profile(self, user_id: str, name: str, etype: int):
+        """Primer test o re-test: se reubica al miembro en todos sus equipos."""
+        for state in self.teams.values():
+            state.set_type(user_id, name, etype)
+        self.profiles[user_id] = {'name': name, 'type': etype}
+
+    def apply_event(self, event: dict):
+        """Aplica un payload de webhook de base de datos sobre `team_members`.
+
+        Formato: {"type": "INSERT"|"DELETE", "record": {...}, "old_record": {...}}
+        """
+        kind = event.get('type')
+        if kind == 'INSERT':
+            rec = event['record']
+            self.add_member(rec['team_id'], rec['user_id'])
+        elif kind == 'DELETE':
+            rec = event.get('old_record') or event.get('record')
+            self.remove_member(rec['team_id'], rec['user_id'])
+
+    def top_frictions(self, team_id: str, k: int = DEFAULT_TOP_K) -> list:
+        state = self.teams.get(team_id)
+        return state.top_frictions(k) if state else []
+
+
+def _benchmark(n_members: int, seed: int):
+    rng = np.random.default_rng(seed)
+    types = rng.integers(1, N_TYPES + 1, size=n_members)
+    profiles = {f'u{i}': {'name': f'Persona {i}', 'type': int(t)} for i, t in enumerate(types)}
+    engine = FrictionEngine(profiles)
+    start = time.perf_counter()
+    for uid in profiles:
+        engine.add_member('team', uid)
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+        engine.top_frictions('team')
+    queried = (time.perf_counter() - start) / 1000
+    print(f"⏱️  {n_members:,} altas en {added * 1000:.1f}ms "
+          f"({added / n_members * 1e6:.1f}µs c/u); top-{DEFAULT_TOP_K} en {queried * 1e6:.1f}µs "
+          f"({engine.teams['team'].friction_count():,} pares con fricción)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Friction Engine')
+    parser.add_argument('--profiles', help='JSON {user_id: {name, type}}')
+    parser.add_argument('--events', help='JSONL de eventos de team_members (INSERT/DELETE)')
+    parser.add_argument('--output', default='.tmp/team_frictions.json', help='Reporte JSON')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K)
+    parser.add_argument('--benchmark', type=int, default=0, help='Miembros sintéticos en un equipo')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        _benchmark(args.benchmark, args.seed)
+        return
+    if not args.profiles or not args.events:
+        parser.error('--profiles y --events son requeridos (o usar --benchmark)')
+
+    engine = FrictionEngine(json.loads(Path(args.profiles).read_text(encoding='utf-8')))
+    with open(args.events, encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                engine.apply_event(json.loads(line))
+
+    report = {tid: engine.top_frictions(tid, args.top_k) for tid in engine.teams}
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ Fricciones de {len(report):,} equipos → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+ENEADISC ICS Feed (cache + ETag)
+Servicio de referencia del feed .ics con cache por token y respuestas 304
+
+Réplica de api/calendar.ts con tres diferencias:
+  • Validación barata: get_ics_feed_state(token) (20_ics_feed_cache.sql)
+    trae la versión del feed sin leer tareas ni eventos. Si el cache tiene
+    esa versión, no se renderiza nada.
+  • Cache por token: cuerpo ya codificado (en chunks) + hash SHA-256 del
+    contenido como ETag fuerte. `If-None-Match` / `If-Modified-Since`
+    responden 304 sin cuerpo.
+  • Streaming: los VEVENT se generan fila a fila desde un cursor del lado
+    del servidor; los feeds más grandes que `max_entry_bytes` no se
+    cachean y se envían en streaming con ETag débil por versión.
+
+DTSTAMP = fecha del último cambio del feed (no "ahora"), para que el mismo
+contenido produzca siempre los mismos bytes y el mismo hash.
+
+Las filas salen de get_ics_feed_items (25_ics_feed_window.sql): ventana
+móvil, relevancia por usuario y tope de ítems.
+"""
+
+import argparse
+import hashlib
+import socket
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CRLF = '\r\n'
+CALENDAR_HEADER = (
+    'BEGIN:VCALENDAR',
+    'VERSION:2.0',
+    'PRODID:-//EneaTeams//Calendar//ES',
+    'CALSCALE:GREGORIAN',
+    'METHOD:PUBLISH',
+    'X-WR-CALNAME:EneaTeams',
+    'NAME:EneaTeams',
+)
+CALENDAR_HEADERS = {
+    'Content-Type': 'text/calendar; charset=utf-8',
+    'Cache-Control': 'public, max-age=300',
+    'Content-Disposition': 'inline; filename="eneateams.ics"',
+}
+CHUNK_BYTES = 64 * 1024
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_MAX_ENTRY_BYTES = 2 * 1024 * 1024
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Misma lectura que api/calendar.ts, con cursor del lado del servidor.
+# Filas: (kind, id, title, description, location, start_at, end_at).
+ITEMS_SQL = 'SELECT * FROM public.get_ics_feed_items(%s)'
+
+
+# ── Render ──────────────────────────────────────────────────
+
+def ics_time(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def escape(s: str) -> str:
+    return (s or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def vevent(uid: str, start: datetime, summary: str, dtstamp: str,
+           end: datetime = None, desc: str = None, loc: str = None) -> str:
+    lines = ['BEGIN:VEVENT', f'UID:{uid}@eneateams', f'DTSTAMP:{dtstamp}', f'DTSTART:{ics_time(start)}']
+    if end:
+        lines.append(f'DTEND:{ics_time(end)}')
+    lines.append(f'SUMMARY:{escape(summary)}')
+    if desc:
+        lines.append(f'DESCRIPTION:{escape(desc)}')
+    if loc:
+        lines.append(f'LOCATION:{escape(loc)}')
+    lines.append('END:VEVENT')
+    return CRLF.join(lines)
+
+
+def iter_calendar(items, last_modified: datetime, chunk_bytes: int = CHUNK_BYTES):
+    """Genera el .ics en chunks de bytes; `items` son filas de get_ics_feed_items."""
+    dtstamp = ics_time(last_modified)
+    buf, size = [CRLF.join(CALENDAR_HEADER)], 0
+    for kind, item_id, title, desc, loc, start, end in items:
+        if kind == 'task':
+            part = CRLF + vevent(f'task-{item_id}', start, f'📋 {title}', dtstamp, desc='Tarea de EneaTeams')
+        else:
+            part = CRLF + vevent(f'event-{item_id}', start, title, dtstamp, end=end, desc=desc, loc=loc)
+        buf.append(part)
+        size += len(part)
+        if size >= chunk_bytes:
+            yield ''.join(buf).encode('utf-8')
+            buf, size = [], 0
+    buf.append(CRLF + 'END:VCALENDAR')
+    yield ''.join(buf).encode('utf-8')
+
+
+# ── Fuente de datos ─────────────────────────────────────────
+
+class PostgresFeedSource:
+    """Lee estado y filas del feed desde Postgres (service role)."""
+
+    def __init__(self, url: str = None, itersize: int = 2000):
+        from eneadisc_db import connect
+        self._connect = lambda: connect(url, autocommit=True)
+        self._local = threading.local()
+        self.itersize = itersize
+
+    @property
+    def conn(self):
+        # Una conexión por hilo del servidor HTTP.
+        if getattr(self._local, 'conn', None) is None:
+            self._local.conn = self._connect()
+        return self._local.conn
+
+    def feed_state(self, token: str):
+        """(user_id, company_id, version, last_modified) o None si el token no existe."""
+        with self.conn.cursor() as cur:
+            cur.execute('SELECT * FROM public.get_ics_feed_state(%s::uuid)', (token,))
+            return cur.fetchone()
+
+    def _stream(self, sql: str, key):
+        if key is None:
+            return
+        # Cursor con nombre: Postgres entrega las filas de a `itersize`.
+        with self.conn.transaction(), self.conn.cursor(name='ics_feed') as cur:
+            cur.itersize = self.itersize
+            cur.execute(sql, (key,))
+            yield from cur
+
+    def iter_items(self, user_id, company_id):
+        return self._stream(ITEMS_SQL, user_id)
+
+
+# ── Cache ───────────────────────────────────────────────────
+
+class FeedEntry:
+    __slots__ = ('version', 'etag', 'last_modified', 'chunks', 'size')
+
+    def __init__(self, version: str, etag: str, last_modified: datetime, chunks: list):
+        self.version = version
+        self.etag = etag
+        self.last_modified = last_modified
+        self.chunks = chunks
+        self.size = sum(len(c) for c in chunks)
+
+
+class FeedCache:
+    """LRU por token acotado en cantidad de entradas y bytes totales."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                self._entries.move_to_end(token)
+            return entry
+
+    def put(self, token: str, entry: FeedEntry):
+        with self._lock:
+            old = self._entries.pop(token, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[token] = entry
+            self.bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+
+    def invalidate(self, token: str):
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry is not None:
+                self.bytes -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ── Servicio ────────────────────────────────────────────────
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110 §13.1.2)."""
+    if header.strip() == '*':
+        return True
+    bare = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == bare for tag in header.split(','))
+
+
+def _not_modified(headers: dict, etag: str, last_modified: datetime) -> bool:
+    inm = headers.get('If-None-Match')
+    if inm is not None:
+        # Si viene If-None-Match, If-Modified-Since se ignora.
+        return _etag_matches(inm, etag)
+    ims = headers.get('If-Modified-Since')
+    if ims:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+class IcsFeedService:
+    """Responde polls del feed: (status, headers, iterable de bytes)."""
+
+    def __init__(self, source, cache: FeedCache = None, max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES,
+                 chunk_bytes: int = CHUNK_BYTES):
+        self.source = source
+        self.cache = cache if cache is not None else FeedCache()
+        self.max_entry_bytes = max_entry_bytes
+        self.chunk_bytes = chunk_bytes
+        self.stats = {'requests': 0, 'not_modified': 0, 'hits': 0, 'renders': 0, 'streamed': 0}
+
+    def _render(self, user_id, company_id, last_modified):
+        return iter_calendar(self.source.iter_items(user_id, company_id), last_modified, self.chunk_bytes)
+
+    def handle(self, token: str, headers: dict):
+        self.stats['requests'] += 1
+        state = self.source.feed_state(token) if token else None
+        if state is None:
+            return 404, {}, [b'Not found']
+        user_id, company_id, version, last_modified = state
+
+        entry = self.cache.get(token)
+        if entry is not None and entry.version == version:
+            self.stats['hits'] += 1
+        else:
+            entry = self._build(token, user_id, company_id, version, last_modified, entry)
+            if entry is None:
+                return self._stream(headers, user_id, company_id, version, last_modified)
+
+        out = {**CALENDAR_HEADERS, 'ETag': entry.etag, 'Last-Modified': format_datetime(entry.last_modified, usegmt=True)}
+        if _not_modified(headers, entry.etag, entry.last_modified):
+            self.stats['not_modified'] += 1
+            return 304, out, []
+        out['Content-Length'] = str(entry.size)
+        return 200, out, entry.chunks
+
+    def _build(self, token, user_id, company_id, version, last_modified, previous):
+        """Renderiza y cachea; None si el feed excede max_entry_bytes."""
+        self.stats['renders'] += 1
+        digest, chunks, size = hashlib.sha256(), [], 0
+        for chunk in self._render(user_id, company_id, last_modified):
+            digest.update(chunk)
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > self.max_entry_bytes:
+                self.cache.invalidate(token)
+                return None
+        etag = f'"{digest.hexdigest()[:32]}"'
+        if previous is not None and previous.etag == etag:
+            # La versión cambió pero el contenido no (p. ej. se editó y se
+            # revirtió): se conserva la fecha para no invalidar clientes.
+            last_modified = previous.last_modified
+        entry = FeedEntry(version, etag, last_modified, chunks)
+        self.cache.put(token, entry)
+        return entry
+
+    def _stream(self, headers, user_id, company_id, version, last_modified):
+        etag = f'W/"{version}"'
+        out = {**CALENDAR_HEADERS, 'ETag': etag, 'Last-Modified': format_datetime(last_modified, usegmt=True)}
+        if _not_modified(headers, etag, last_modified):
+            self.stats['not_modified'] += 1
+            return 304, out, []
+        self.stats['streamed'] += 1
+        return 200, out, self._render(user_id, company_id, last_modified)
+
+
+# ── HTTP ────────────────────────────────────────────────────
+
+def make_handler(service: IcsFeedService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            # Headers y cuerpo van en writes separados: sin TCP_NODELAY cada
+            # respuesta keep-alive espera el ACK retrasado (~40ms).
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def do_GET(self):
+            token = parse_qs(urlparse(self.path).query).get('token', [None])[0]
+            status, headers, body = service.handle(token, self.headers)
+            self.send_response(status)
+            chunked = status == 200 and 'Content-Length' not in headers
+            for k, v in headers.items():
+                self.send_header(k, v)
+            if chunked:
+                self.send_header('Transfer-Encoding', 'chunked')
+            elif status not in (200, 304):
+                self.send_header('Content-Length', str(sum(len(c) for c in body)))
+            self.end_headers()
+            for chunk in body:
+                if chunked:
+                    self.wfile.write(f'{len(chunk):X}\r\n'.encode() + chunk + b'\r\n')
+                else:
+                    self.wfile.write(chunk)
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(service: IcsFeedService, host: str, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+# ── Load test ───────────────────────────────────────────────
+
+class SyntheticFeedSource:
+    """Fuente en memoria para el load test: N usuarios con `items` tareas c/u."""
+
+    def __init__(self, users: int, items: int, events: int, seed: int):
+        import random
+        rng = random.Random(seed)
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+        self.tokens = [f'tok-{i}' for i in range(users)]
+        self.versions = {t: 1 for t in self.tokens}
+        self.changed = {t: datetime.fromtimestamp(base, timezone.utc) for t in self.tokens}
+        self.tasks = {
+            t: [(f'{i}-{k}', f'Tarea {k}', datetime.fromtimestamp(base + rng.randrange(0, 365 * 86400), timezone.utc))
+                for k in range(items)]
+            for i, t in enumerate(self.tokens)
+        }
+        self.events = [(f'e{k}', f'Evento {k}', 'Descripción, con coma', 'Sala 1',
+                        datetime.fromtimestamp(base + k * 3600, timezone.utc),
+                        datetime.fromtimestamp(base + k * 3600 + 1800, timezone.utc)) for k in range(events)]
+        self.state_reads = 0
+
+    def feed_state(self, token):
+        if token not in self.versions:
+            return None
+        self.state_reads += 1
+        return token, 'company', str(self.versions[token]), self.changed[token]
+
+    def touch(self, token):
+        self.versions[token] += 1
+        self.changed[token] = datetime.now(timezone.utc)
+
+    def iter_items(self, user_id, company_id):
+        tasks = (('task', tid, title, None, None, due, None) for tid, title, due in self.tasks[user_id])
+        return chain(tasks, (('event', *e) for e in self.events))
+
+
+def _poll_worker(host, port, tokens, seconds, etags, conditional, out, idx):
+    import http.client
+    conn = http.client.HTTPConnection(host, port)
+    done, bytes_in, end = 0, 0, time.perf_counter() + seconds
+    i = idx
+    while time.perf_counter() < end:
+        token = tokens[i % len(tokens)]
+        i += 1
+        headers = {'If-None-Match': etags[token]} if conditional else {}
+        conn.request('GET', f'/calendar?token={token}', headers=headers)
+        res = conn.getresponse()
+        bytes_in += len(res.read())
+        if res.status == 200:
+            etags[token] = res.getheader('ETag')
+        done += 1
+    conn.close()
+    out[idx] = (done, bytes_in)
+
+
+def load_test(users: int, items: int, events: int, clients: int, seconds: float,
+              invalidate_rate: float, seed: int):
+    source = SyntheticFeedSource(users, items, events, seed)
+    service = IcsFeedService(source)
+    server = serve(service, '127.0.0.1', 0)
+    host, port = server.server_address
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Render en frío (sin cache) como referencia de api/calendar.ts.
+    t0 = time.perf_counter()
+    for token in source.tokens[:200]:
+        for _ in iter_calendar(source.iter_items(token, None), source.changed[token]):
+            pass
+    cold = min(200, users) / (time.perf_counter() - t0)
+    print(f"📅 {users:,} feeds × {items:,} tareas + {events} eventos · render sin cache: {cold:,.0f} feeds/s")
+
+    # Precarga: un poll por usuario llena el cache y da los ETags iniciales.
+    etags = {}
+    t0 = time.perf_counter()
+    for token in source.tokens:
+        etags[token] = service.handle(token, {})[1]['ETag']
+    print(f"   precarga del cache:  {users / (time.perf_counter() - t0):>10,.0f} feeds/s")
+
+    stop = threading.Event()
+
+    def invalidator():
+        # Simula ediciones: cada segundo se toca invalidate_rate de los usuarios.
+        import random
+        rng = random.Random(seed)
+        while not stop.wait(1.0):
+            for token in rng.sample(source.tokens, int(users * invalidate_rate)):
+                source.touch(token)
+
+    if invalidate_rate:
+        threading.Thread(target=invalidator, daemon=True).start()
+    for label, conditional in (('200 desde cache', False), ('condicional (304)', True)):
+        before = dict(service.stats)
+        results = [None] * clients
+        threads = [threading.Thread(target=_poll_worker,
+                                    args=(host, port, source.tokens, seconds, etags, conditional, results, k))
+                   for k in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        polls = sum(r[0] for r in results)
+        mb = sum(r[1] for r in results) / 1e6
+        delta = {k: service.stats[k] - before[k] for k in service.stats}
+        print(f"   {label:<20}{polls / seconds:>10,.0f} polls/s · {mb / seconds:>8.1f} MB/s · "
+              f"304={delta['not_modified']:,} renders={delta['renders']:,} hits={delta['hits']:,}")
+    stop.set()
+    server.shutdown()
+    print(f"   cache: {len(service.cache):,} feeds, {service.cache.bytes / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC ICS Feed (cache + ETag)')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_serve = sub.add_parser('serve', help='Servir /calendar?token=… contra Postgres')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8787)
+    p_serve.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES)
+    p_serve.add_argument('--max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    p_load = sub.add_parser('load-test', help='Polls por segundo con datos sintéticos')
+    p_load.add_argument('--users', type=int, default=2000)
+    p_load.add_argument('--items', type=int, default=50, help='Tareas con vencimiento por usuario')
+    p_load.add_argument('--events', type=int, default=20, help='Eventos de la empresa')
+    p_load.add_argument('--clients', type=int, default=8, help='Conexiones keep-alive concurrentes')
+    p_load.add_argument('--seconds', type=float, default=5)
+    p_load.add_argument('--invalidate-rate', type=float, default=0.01, help='Fracción de usuarios editados por segundo')
+    p_load.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.cmd == 'load-test':
+        load_test(args.users, args.items, args.events, args.clients, args.seconds, args.invalidate_rate, args.seed)
+        return
+    cache = FeedCache(args.max_entries, args.max_mb * 1024 * 1024)
+    server = serve(IcsFeedService(PostgresFeedSource(), cache), args.host, args.port)
+    print(f"📅 Feed ICS en http://{args.host}:{args.port}/calendar?token=…")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
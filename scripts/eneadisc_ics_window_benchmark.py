@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+ENEADISC ICS Window Benchmark
+Tamaño y latencia del feed .ics con y sin ventana (25_ics_feed_window.sql)
+
+Toma la empresa más grande del dataset (eneadisc_seed_data.py) y le suma
+(una vez) N eventos de benchmark repartidos en dos años de historial y uno
+hacia adelante, la mitad de ellos de algún equipo. Para una muestra de
+usuarios por rol arma el feed de dos formas, con el render de
+eneadisc_ics_feed.py:
+
+  full     lectura anterior de api/calendar.ts: todas las tareas con fecha
+           y todos los eventos de la empresa
+  window   get_ics_feed_items(): ventana -30/+180 días, relevancia y tope
+
+Se mide consulta + render (ms), KB y VEVENTs por feed. Cada feed acotado
+se verifica contra el completo filtrado en Python (ventana, relevancia y
+tope); las diferencias se reportan como `mismatches`.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from eneadisc_db import connect
+from eneadisc_ics_feed import iter_calendar
+
+BENCH_TITLE = '⏱ Benchmark ICS'
+# Defaults de get_ics_feed_items: la verificación los replica.
+PAST_DAYS, FUTURE_DAYS, LIMIT = 30, 180, 1000
+
+COMPANY_SQL = """
+SELECT company_id FROM public.profiles WHERE company_id IS NOT NULL
+GROUP BY company_id ORDER BY count(*) DESC, company_id LIMIT 1
+"""
+SUBJECTS_SQL = """
+SELECT id, role FROM (
+  SELECT id, role, row_number() OVER (PARTITION BY role ORDER BY id) AS rn
+  FROM public.profiles WHERE company_id = %s
+) p WHERE rn <= %s ORDER BY role, id
+"""
+TEAMS_SQL = """
+SELECT team_id FROM public.team_members WHERE user_id = %(user)s
+UNION SELECT id FROM public.teams WHERE lead_id = %(user)s
+"""
+INSERT_SQL = """
+INSERT INTO public.events (company_id, team_id, created_by, title, description, location, start_at, end_at)
+SELECT %(company)s,
+       CASE WHEN g %% 2 = 0 AND %(n_teams)s > 0 THEN (%(teams)s::uuid[])[1 + (g / 2) %% %(n_teams)s] END,
+       %(creator)s, %(title)s || ' #' || g, 'Evento de benchmark, con coma', 'Sala 1',
+       %(start)s::timestamptz + (g * %(step)s) * interval '1 second',
+       %(start)s::timestamptz + (g * %(step)s + 3600) * interval '1 second'
+FROM generate_series(%(first)s, %(last)s) g
+"""
+FULL_TASKS_SQL = """
+SELECT 'task', id, title, NULL, NULL, due_date, NULL, NULL, NULL FROM public.tasks
+WHERE user_id = %s AND due_date IS NOT NULL
+"""
+FULL_EVENTS_SQL = """
+SELECT 'event', id, title, description, location, start_at, end_at, team_id, created_by FROM public.events
+WHERE company_id = %s
+"""
+WINDOW_SQL = 'SELECT * FROM public.get_ics_feed_items(%s)'
+
+
+def ensure_events(conn, company, n_events: int, chunk: int, reset: bool) -> int:
+    """Eventos de benchmark de la empresa: -730 a +365 días desde hoy."""
+    with conn.cursor() as cur:
+        if reset:
+            cur.execute('DELETE FROM public.events WHERE company_id = %s AND title LIKE %s',
+                        (company, f'{BENCH_TITLE}%'))
+        cur.execute('SELECT count(*) FROM public.events WHERE company_id = %s AND title LIKE %s',
+                    (company, f'{BENCH_TITLE}%'))
+        have = cur.fetchone()[0]
+        if have >= n_events:
+            return have
+        cur.execute('SELECT COALESCE(array_agg(id ORDER BY id), %s::uuid[]) FROM public.teams WHERE company_id = %s',
+                    ([], company))
+        teams = cur.fetchone()[0]
+        cur.execute("""SELECT id FROM public.profiles WHERE company_id = %s
+                       ORDER BY role = 'company_admin' DESC, id LIMIT 1""", (company,))
+        creator = cur.fetchone()[0]
+
+    print(f"   cargando {n_events - have:,} eventos…")
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    params = {'company': company, 'teams': teams, 'n_teams': len(teams), 'creator': creator,
+              'title': BENCH_TITLE, 'start': today - timedelta(days=730), 'step': 1096 * 86400 // n_events}
+    for first in range(have + 1, n_events + 1, chunk):
+        with conn.transaction(), conn.cursor() as cur:
+            # Sin bump_ics_company por fila (superusuario): uno solo al final.
+            cur.execute("SET LOCAL session_replication_role = 'replica'")
+            cur.execute(INSERT_SQL, {**params, 'first': first, 'last': min(first + chunk - 1, n_events)})
+    with conn.cursor() as cur:
+        cur.execute('SELECT public.bump_ics_company(%s)', (company,))
+        cur.execute('ANALYZE public.events')
+    return n_events
+
+
+def build(cur, queries: list, last_modified: datetime) -> tuple:
+    """Consulta + render: (ms, bytes, filas completas)."""
+    t0 = time.perf_counter()
+    rows = []
+    for sql, key in queries:
+        cur.execute(sql, (key,))
+        rows += cur.fetchall()
+    nbytes = sum(len(c) for c in iter_calendar((r[:7] for r in rows), last_modified))
+    return (time.perf_counter() - t0) * 1000, nbytes, rows
+
+
+def expected_window(rows: list, today: datetime, admin: bool, teams: set, user) -> set:
+    """Lo que get_ics_feed_items debería devolver, a partir del feed completo."""
+    lo, hi = today - timedelta(days=PAST_DAYS), today + timedelta(days=FUTURE_DAYS)
+    keep = [r for r in rows if lo <= r[5] < hi and (
+        r[0] == 'task' or admin or r[7] is None or r[7] in teams or r[8] == user)]
+    keep.sort(key=lambda r: (abs((r[5] - today).total_seconds()), r[0], str(r[1])))
+    return {(r[0], str(r[1])) for r in keep[:LIMIT]}
+
+
+def _summary(samples: list) -> dict:
+    ms = [s['ms'] for s in samples]
+    q = statistics.quantiles(ms, n=20) if len(ms) > 1 else ms * 19
+    kb = [s['bytes'] / 1024 for s in samples]
+    items = [s['items'] for s in samples]
+    return {'samples': len(ms), 'p50_ms': round(statistics.median(ms), 2), 'p95_ms': round(q[18], 2),
+            'avg_kb': round(statistics.mean(kb), 1), 'max_kb': round(max(kb), 1),
+            'avg_items': round(statistics.mean(items), 1), 'max_items': max(items)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC ICS Window Benchmark')
+    parser.add_argument('--events', type=int, default=50_000, help='Eventos de benchmark en la empresa')
+    parser.add_argument('--chunk', type=int, default=50_000, help='Eventos por INSERT')
+    parser.add_argument('--per-role', type=int, default=20, help='Usuarios por rol')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas por usuario y modo')
+    parser.add_argument('--reset', action='store_true', help='Recrear los eventos de benchmark')
+    parser.add_argument('--output', default='.tmp/ics_window_benchmark.json')
+    args = parser.parse_args()
+
+    samples = defaultdict(list)
+    mismatches = []
+    with connect(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(COMPANY_SQL)
+            row = cur.fetchone()
+            if row is None:
+                raise SystemExit('No hay empresas: cargar antes eneadisc_seed_data.py')
+            company = row[0]
+        total_events = ensure_events(conn, company, args.events, args.chunk, args.reset)
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT date_trunc('day', NOW() AT TIME ZONE 'utc') AT TIME ZONE 'utc'")
+            today = cur.fetchone()[0]
+            cur.execute('SELECT count(*) FROM public.events WHERE company_id = %s', (company,))
+            company_events = cur.fetchone()[0]
+            cur.execute(SUBJECTS_SQL, (company, args.per_role))
+            subjects = cur.fetchall()
+        print(f"\n📅 Empresa {company} · {company_events:,} eventos ({total_events:,} de benchmark) · "
+              f"{len(subjects)} usuarios")
+
+        for user, role in subjects:
+            with conn.cursor() as cur:
+                cur.execute(TEAMS_SQL, {'user': user})
+                teams = {r[0] for r in cur.fetchall()}
+                modes = {'full': [(FULL_TASKS_SQL, user), (FULL_EVENTS_SQL, company)],
+                         'window': [(WINDOW_SQL, user)]}
+                rows = {}
+                for mode, queries in modes.items():
+                    build(cur, queries, today)                  # calienta caché
+                    for _ in range(args.repeat):
+                        ms, nbytes, rows[mode] = build(cur, queries, today)
+                        samples[role, mode].append({'ms': ms, 'bytes': nbytes, 'items': len(rows[mode])})
+            got = {(r[0], str(r[1])) for r in rows['window']}
+            if got != expected_window(rows['full'], today, role == 'company_admin', teams, user):
+                mismatches.append(str(user))
+
+    report = {'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'params': {'company': str(company), 'company_events': company_events, 'past_days': PAST_DAYS,
+                         'future_days': FUTURE_DAYS, 'limit': LIMIT, 'repeat': args.repeat},
+              'cases': {}, 'mismatches': mismatches}
+    print(f"{'rol':<16}{'modo':<8}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'KB prom':>10}{'KB max':>10}"
+          f"{'ítems':>9}{'máx':>7}")
+    for (role, mode), rows in sorted(samples.items()):
+        stats = _summary(rows)
+        report['cases'][f'{role}/{mode}'] = stats
+        print(f"{role:<16}{mode:<8}{stats['samples']:>5}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['avg_kb']:>10,.1f}{stats['max_kb']:>10,.1f}{stats['avg_items']:>9,.0f}{stats['max_items']:>7,}")
+    full = sum(s['bytes'] for (_, mode), rows in samples.items() if mode == 'full' for s in rows)
+    window = sum(s['bytes'] for (_, mode), rows in samples.items() if mode == 'window' for s in rows)
+    report['bytes_ratio'] = round(window / full, 4) if full else None
+    print(f"\n   bytes window/full: {report['bytes_ratio']} · feeds que no coinciden: {len(mismatches)}")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n✅ Reporte → {out}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Index Benchmark
+EXPLAIN ANALYZE de las queries calientes antes/después de 19_analytics_indexes.sql
+
+Corre contra un Postgres local con el esquema de supabase_migration/
+(`supabase start` + migraciones 01..18). Cada fase se ejecuta dentro de
+una transacción que se revierte al final (el DDL de Postgres es
+transaccional), así que la base queda como estaba:
+
+  before → se dejan solo los índices de una columna de 01_schema.sql
+  after  → se aplica 19_analytics_indexes.sql
+
+Las queries con `as_user` se corren como `authenticated` con los claims
+del usuario elegido, para medir también el costo de las policies RLS.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from eneadisc_db import connect
+
+MIGRATION = Path(__file__).resolve().parent.parent / 'supabase_migration' / '19_analytics_indexes.sql'
+
+# Estado previo a la migración 19: índices de 01_schema.sql / 12_chat.sql.
+BASELINE_SQL = """
+DROP INDEX IF EXISTS public.idx_checkins_user_date;
+DROP INDEX IF EXISTS public.idx_tasks_team_created;
+DROP INDEX IF EXISTS public.idx_tasks_open_due;
+DROP INDEX IF EXISTS public.idx_tasks_user_due;
+DROP INDEX IF EXISTS public.idx_team_members_user_team;
+DROP INDEX IF EXISTS public.idx_cp_user_conv;
+DROP INDEX IF EXISTS public.idx_profiles_company_admin;
+CREATE INDEX IF NOT EXISTS idx_checkins_user_id     ON public.checkins(user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_team_id        ON public.tasks(team_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status         ON public.tasks(status);
+CREATE INDEX IF NOT EXISTS idx_team_members_user_id ON public.team_members(user_id);
+CREATE INDEX IF NOT EXISTS idx_cp_user              ON public.conversation_participants(user_id);
+ANALYZE public.checkins;
+ANALYZE public.tasks;
+ANALYZE public.team_members;
+"""
+
+QUERIES = [
+    {
+        'name': 'checkins_team_window',
+        'desc': 'getMonthlyWellbeingHistory: check-ins de un equipo, últimos N días',
+        'sql': """SELECT date, mood, energy, stress FROM public.checkins
+                  WHERE user_id = ANY(%(members)s::uuid[]) AND date >= %(since)s
+                  ORDER BY date DESC""",
+    },
+    {
+        'name': 'checkins_user_recent',
+        'desc': 'getCheckInsFromLastDays: un usuario, últimos 30 días',
+        'sql': """SELECT date, mood, energy, stress FROM public.checkins
+                  WHERE user_id = %(user)s AND date >= %(recent)s
+                  ORDER BY date DESC""",
+    },
+    {
+        'name': 'tasks_team_period',
+        'desc': 'calculateTeamAnalytics: tareas de un equipo creadas en el período',
+        'sql': """SELECT status, priority, created_at, completed_at FROM public.tasks
+                  WHERE team_id = %(team)s AND created_at >= %(since)s""",
+    },
+    {
+        'name': 'tasks_overdue_company',
+        'desc': 'Vencidas abiertas de todos los equipos de la empresa',
+        'sql': """SELECT team_id, count(*) FROM public.tasks
+                  WHERE team_id = ANY(%(teams)s::uuid[])
+                    AND status <> 'completed' AND due_date IS NOT NULL AND due_date < NOW()
+                  GROUP BY team_id""",
+    },
+    {
+        'name': 'tasks_user_due',
+        'desc': 'getMyDueTasks: tareas propias con vencimiento',
+        'sql': """SELECT id, title, due_date, status FROM public.tasks
+                  WHERE user_id = %(user)s AND due_date IS NOT NULL""",
+    },
+    {
+        'name': 'rls_team_tasks',
+        'desc': 'getTeamTasks como usuario (policy tasks_select por fila)',
+        'sql': 'SELECT id, status FROM public.tasks WHERE team_id = %(team)s',
+        'as_user': True,
+    },
+    {
+        'name': 'rls_my_teams',
+        'desc': 'Equipos del usuario (lookup de membresía de las policies)',
+        'sql': 'SELECT team_id FROM public.team_members WHERE user_id = %(user)s',
+        'as_user': True,
+    },
+]
+
+# Seed sintético mínimo, generado del lado del servidor.
+# Los perfiles los crea el trigger on_auth_user_created (03_triggers.sql).
+SEED_STATEMENTS = [
+    """CREATE TEMP TABLE _seed_users ON COMMIT DROP AS
+       SELECT gen_random_uuid() AS id, c AS company_no, u AS user_no
+       FROM generate_series(1, %(companies)s) c, generate_series(0, %(employees)s) u""",
+    """INSERT INTO auth.users (id, email, raw_user_meta_data)
+       SELECT id, 'seed-' || company_no || '-' || user_no || '@eneadisc.local',
+              jsonb_build_object('role', CASE WHEN user_no = 0 THEN 'company_admin' ELSE 'employee' END,
+                                 'full_name', 'Seed ' || company_no || '-' || user_no)
+       FROM _seed_users""",
+    """CREATE TEMP TABLE _seed_companies ON COMMIT DROP AS
+       SELECT gen_random_uuid() AS id, company_no, id AS owner_id FROM _seed_users WHERE user_no = 0""",
+    """INSERT INTO public.companies (id, name, invite_code, owner_id)
+       SELECT id, 'Seed ' || company_no, 'SEED' || substr(md5(id::text), 1, 8), owner_id
+       FROM _seed_companies""",
+    """UPDATE public.profiles p
+       SET company_id = c.id, enneagram_type = 1 + floor(random() * 9)::int, questionnaire_completed = TRUE
+       FROM _seed_users u JOIN _seed_companies c USING (company_no)
+       WHERE p.id = u.id""",
+    """CREATE TEMP TABLE _seed_teams ON COMMIT DROP AS
+       SELECT gen_random_uuid() AS id, c.id AS company_id, c.company_no, c.owner_id, t AS team_no
+       FROM _seed_companies c, generate_series(1, %(teams)s) t""",
+    """INSERT INTO public.teams (id, company_id, name, owner_id)
+       SELECT id, company_id, 'Equipo ' || team_no, owner_id FROM _seed_teams""",
+    """INSERT INTO public.team_members (team_id, user_id)
+       SELECT t.id, u.id FROM _seed_users u
+       JOIN _seed_teams t ON t.company_no = u.company_no AND t.team_no = 1 + mod(u.user_no, %(teams)s)
+       WHERE u.user_no > 0""",
+    """INSERT INTO public.checkins (user_id, date, mood, energy, stress)
+       SELECT u.id, d + interval '8 hours' + random() * interval '10 hours',
+              (ARRAY['excellent', 'good', 'neutral', 'bad', 'terrible'])[1 + floor(random() * 5)::int],
+              1 + floor(random() * 5)::int, 1 + floor(random() * 5)::int
+       FROM _seed_users u,
+            generate_series(date_trunc('day', NOW()) - %(days)s * interval '1 day',
+                            date_trunc('day', NOW()), interval '1 day') d
+       WHERE u.user_no > 0 AND random() < 0.8""",
+    # El subquery con random() no se aplana: cada fila sortea sus valores.
+    """INSERT INTO public.tasks (user_id, team_id, title, status, priority, category,
+                                due_date, completed_at, created_at)
+       SELECT user_id, team_id, 'Tarea seed ' || g, status,
+              (ARRAY['low', 'medium', 'high'])[1 + floor(random() * 3)::int], 'team',
+              CASE WHEN random() < 0.7 THEN created_at + (1 + floor(random() * 14)::int) * interval '1 day' END,
+              CASE WHEN status = 'completed' THEN created_at + random() * interval '10 days' END,
+              created_at
+       FROM (
+         SELECT m.user_id, m.team_id, g, NOW() - random() * %(days)s * interval '1 day' AS created_at,
+                (ARRAY['pending', 'in_progress', 'completed', 'completed'])[1 + floor(random() * 4)::int] AS status
+         FROM public.team_members m JOIN _seed_teams t ON t.id = m.team_id,
+              generate_series(1, %(tasks)s) g
+       ) s""",
+]
+
+
+def seed(conn, companies: int, employees: int, teams: int, days: int, tasks: int):
+    params = {'companies': companies, 'employees': employees, 'teams': teams, 'days': days, 'tasks': tasks}
+    with conn.transaction(), conn.cursor() as cur:
+        for stmt in SEED_STATEMENTS:
+            cur.execute(stmt, params)
+        cur.execute('ANALYZE')
+
+
+def pick_params(cur, days: int) -> dict:
+    """Elige el equipo más grande y su empresa como caso representativo."""
+    cur.execute("""
+        SELECT tm.team_id, t.company_id, array_agg(tm.user_id::text) AS members
+        FROM public.team_members tm JOIN public.teams t ON t.id = tm.team_id
+        GROUP BY tm.team_id, t.company_id
+        ORDER BY count(*) DESC, tm.team_id
+        LIMIT 1
+    """)
+    row = cur.fetchone()
+    if row is None:
+        raise RuntimeError('La base no tiene equipos: correr con --seed primero')
+    team_id, company_id, members = row
+    cur.execute("SELECT NOW() - %s * interval '1 day', NOW() - interval '30 days'", (days,))
+    since, recent = cur.fetchone()
+    cur.execute('SELECT array_agg(id::text) FROM public.teams WHERE company_id = %s', (company_id,))
+    return {
+        'team': str(team_id), 'teams': cur.fetchone()[0], 'members': members,
+        'user': members[0], 'since': since, 'recent': recent,
+    }
+
+
+def _nodes(plan: dict) -> list:
+    """Tipos de nodo del plan (con el índice usado, si hay)."""
+    label = plan['Node Type']
+    if 'Index Name' in plan:
+        label += f" ({plan['Index Name']})"
+    out = [label]
+    for child in plan.get('Plans', []):
+        out.extend(_nodes(child))
+    return out
+
+
+def explain(cur, query: dict, params: dict, repeat: int) -> dict:
+    if query.get('as_user'):
+        cur.execute('SET ROLE authenticated')
+        cur.execute("SELECT set_config('request.jwt.claims', %s, true)",
+                    (json.dumps({'sub': params['user'], 'role': 'authenticated'}),))
+    try:
+        timings = []
+        plan = None
+        for _ in range(repeat + 1):      # la primera corrida calienta caché
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query['sql']}", params)
+            plan = cur.fetchone()[0][0]
+            timings.append(plan['Execution Time'])
+    finally:
+        if query.get('as_user'):
+            cur.execute('RESET ROLE')
+    root = plan['Plan']
+    return {
+        'execution_ms': round(statistics.median(timings[1:]), 3),
+        'planning_ms': round(plan['Planning Time'], 3),
+        'rows': root['Actual Rows'],
+        'buffers': root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0),
+        'nodes': _nodes(root),
+    }
+
+
+def run_phase(conn, setup_sql: str, params: dict, repeat: int) -> dict:
+    """Aplica `setup_sql`, mide todas las queries y revierte el DDL."""
+    results = {}
+    with conn.transaction(force_rollback=True), conn.cursor() as cur:
+        cur.execute(setup_sql)
+        for q in QUERIES:
+            results[q['name']] = explain(cur, q, params, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Index Benchmark (EXPLAIN ANALYZE)')
+    parser.add_argument('--seed', action='store_true', help='Cargar datos sintéticos antes de medir')
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--employees', type=int, default=50, help='Empleados por empresa')
+    parser.add_argument('--teams', type=int, default=5, help='Equipos por empresa')
+    parser.add_argument('--days', type=int, default=180, help='Días de historial')
+    parser.add_argument('--tasks', type=int, default=30, help='Tareas por miembro')
+    parser.add_argument('--repeat', type=int, default=5, help='Corridas por query (se toma la mediana)')
+    parser.add_argument('--output', default='.tmp/index_benchmark.json', help='Reporte JSON')
+    args = parser.parse_args()
+
+    with connect(autocommit=True) as conn:
+        if args.seed:
+            t0 = time.perf_counter()
+            seed(conn, args.companies, args.employees, args.teams, args.days, args.tasks)
+            print(f"🌱 Seed cargado en {time.perf_counter() - t0:.1f}s")
+        with conn.cursor() as cur:
+            params = pick_params(cur, args.days)
+        before = run_phase(conn, BASELINE_SQL, params, args.repeat)
+        after = run_phase(conn, MIGRATION.read_text(encoding='utf-8'), params, args.repeat)
+
+    report = []
+    print(f"\n{'query':<24}{'antes ms':>10}{'después ms':>12}{'x':>8}{'buffers':>16}")
+    for q in QUERIES:
+        b, a = before[q['name']], after[q['name']]
+        speedup = b['execution_ms'] / a['execution_ms'] if a['execution_ms'] else float('inf')
+        print(f"{q['name']:<24}{b['execution_ms']:>10.2f}{a['execution_ms']:>12.2f}{speedup:>7.1f}x"
+              f"{b['buffers']:>8}→{a['buffers']:<7}")
+        print(f"   antes:   {' > '.join(b['nodes'])}")
+        print(f"   después: {' > '.join(a['nodes'])}")
+        report.append({'query': q['name'], 'description': q['desc'], 'before': b, 'after': a,
+                       'speedup': round(speedup, 2)})
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""
+ENEADISC KPI Engine
+Agregados incrementales de check-ins y tareas por persona, equipo y empresa (28_kpi_snapshots.sql)
+
+Consume kpi_events (imagen vieja/nueva de cada fila cambiada de checkins,
+tasks, team_members y de profiles.company_id) y aplica cada cambio como
+delta, sin releer el histórico:
+
+  Welford     media y M2 de energía, estrés y bienestar; una baja o una
+              edición resta la imagen vieja con la fórmula inversa
+  buckets     un acumulador por día UTC de los últimos 60 días; las
+              ventanas 7d / 30d / 30d previos son sumas de buckets
+  membresía   un equipo es la suma de sus miembros: un alta suma el
+              agregado completo de la persona (combinación de Chan) y una
+              baja lo resta. La empresa, igual, con profiles.company_id.
+
+Cada lote de la cola se reclama (drain_queue) y se aplica en la misma
+transacción que las filas de kpi_snapshots que tocó. Al cambiar el día,
+--roll (o el modo incremental) corre las ventanas de las filas con as_of
+viejo desde su estado guardado.
+
+Modo --backfill: arma todo desde las tablas. --simulate N: aplica N
+eventos sintéticos en memoria y compara contra un recálculo completo.
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import islice
+
+QUEUE = 'public.kpi_events'
+DEFAULT_BATCH = 2000
+HORIZON_DAYS = 60
+STATS = ('energy', 'stress', 'wellbeing')
+# bucket diario: [check-ins, Σ energía, Σ estrés, Σ bienestar, tareas completadas]
+CHECKINS, ENERGY, STRESS, WELLBEING, COMPLETED = range(5)
+SNAPSHOT_COLUMNS = (
+    'scope', 'scope_id', 'company_id', 'member_count', 'checkin_count',
+    'energy_mean', 'energy_var', 'stress_mean', 'stress_var', 'wellbeing_mean', 'wellbeing_var',
+    'checkins_7d', 'wellbeing_7d', 'checkins_30d', 'energy_30d', 'wellbeing_30d',
+    'checkins_prev_30d', 'energy_prev_30d', 'wellbeing_prev_30d',
+    'tasks_total', 'tasks_completed', 'completed_30d', 'completed_prev_30d', 'as_of', 'state',
+)
+
+
+def wellbeing(energy: int, stress: int) -> float:
+    """Mismo puntaje que trackingMocks: (energía + (6 − estrés)) / 2."""
+    return (energy + 6 - stress) / 2
+
+
+@lru_cache(maxsize=4096)
+def _iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _ordinal(day) -> int:
+    if day is None:
+        return None
+    if isinstance(day, date):
+        return day.toordinal()
+    return _parse_day(day)
+
+
+@lru_cache(maxsize=4096)
+def _parse_day(day: str) -> int:
+    return date.fromisoformat(day[:10]).toordinal()
+
+
+class Aggregate:
+    """Estado de un alcance. Todas las operaciones aceptan signo: +1 suma, −1 resta."""
+
+    __slots__ = ('n', 'mean', 'm2', 'tasks_total', 'tasks_completed', 'members', 'days')
+
+    def __init__(self, members: int = 0):
+        self.n = 0
+        self.mean = [0.0, 0.0, 0.0]
+        self.m2 = [0.0, 0.0, 0.0]
+        self.tasks_total = 0
+        self.tasks_completed = 0
+        self.members = members
+        self.days = {}
+
+    def _bucket(self, day: int, delta: list):
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = [0, 0, 0, 0.0, 0]
+        for i, d in enumerate(delta):
+            bucket[i] += d
+        if not any(bucket):
+            del self.days[day]
+
+    def checkin(self, day: int, energy: int, stress: int, sign: int, horizon: int):
+        values = (energy, stress, wellbeing(energy, stress))
+        if sign > 0:
+            self.n += 1
+            for i, x in enumerate(values):
+                d = x - self.mean[i]
+                self.mean[i] += d / self.n
+                self.m2[i] += d * (x - self.mean[i])
+        elif self.n <= 1:
+            self.n, self.mean, self.m2 = 0, [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+        else:
+            self.n -= 1
+            for i, x in enumerate(values):
+                d = x - self.mean[i]
+                self.mean[i] -= d / self.n
+                self.m2[i] = max(0.0, self.m2[i] - d * (x - self.mean[i]))
+        if day is not None and day >= horizon:
+            self._bucket(day, [sign, sign * energy, sign * stress, sign * values[2], 0])
+
+    def task(self, status: str, completed_day: int, sign: int, horizon: int):
+        self.tasks_total += sign
+        if status == 'completed':
+            self.tasks_completed += sign
+            if completed_day is not None and completed_day >= horizon:
+                self._bucket(completed_day, [0, 0, 0, 0.0, sign])
+
+    def merge(self, other: 'Aggregate', sign: int):
+        """Suma (o resta) otro agregado completo: combinación de Chan y su inversa."""
+        nb = other.n
+        if nb:
+            if sign > 0:
+                na, n = self.n, self.n + nb
+                for i in range(len(STATS)):
+                    delta = other.mean[i] - self.mean[i]
+                    self.mean[i] += delta * nb / n
+                    self.m2[i] += other.m2[i] + delta * delta * na * nb / n
+                self.n = n
+            elif self.n <= nb:
+                self.n, self.mean, self.m2 = 0, [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+            else:
+                n, na = self.n, self.n - nb
+                for i in range(len(STATS)):
+                    mean_a = (n * self.mean[i] - nb * other.mean[i]) / na
+                    delta = other.mean[i] - mean_a
+                    self.m2[i] = max(0.0, self.m2[i] - other.m2[i] - delta * delta * na * nb / n)
+                    self.mean[i] = mean_a
+                self.n = na
+        self.tasks_total += sign * other.tasks_total
+        self.tasks_completed += sign * other.tasks_completed
+        self.members += sign * other.members
+        for day, bucket in other.days.items():
+            self._bucket(day, [sign * b for b in bucket])
+
+    def prune(self, horizon: int):
+        for day in [d for d in self.days if d < horizon]:
+            del self.days[day]
+
+    # ── Serialización ───────────────────────────────────────
+
+    def state(self) -> dict:
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'tasks': [self.tasks_total, self.tasks_completed],
+                'members': self.members,
+                'days': {_iso(d): b for d, b in sorted(self.days.items())}}
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'Aggregate':
+        agg = cls(state['members'])
+        agg.n, agg.mean, agg.m2 = state['n'], list(state['mean']), list(state['m2'])
+        agg.tasks_total, agg.tasks_completed = state['tasks']
+        agg.days = {_ordinal(d): list(b) for d, b in state['days'].items()}
+        return agg
+
+    def snapshot(self, today: int) -> dict:
+        w7, w30, prev = [0] * 5, [0] * 5, [0] * 5
+        for day, b in self.days.items():
+            age = today - day
+            if age < 0 or age >= HORIZON_DAYS:
+                continue
+            target = w30 if age < 30 else prev
+            target[0] += b[0]; target[1] += b[1]; target[2] += b[2]; target[3] += b[3]; target[4] += b[4]
+            if age < 7:
+                w7[0] += b[0]; w7[1] += b[1]; w7[2] += b[2]; w7[3] += b[3]; w7[4] += b[4]
+
+        def mean(window, i):
+            return round(window[i] / window[CHECKINS], 3) if window[CHECKINS] else None
+
+        row = {'member_count': self.members, 'checkin_count': self.n,
+               'checkins_7d': w7[CHECKINS], 'wellbeing_7d': mean(w7, WELLBEING),
+               'checkins_30d': w30[CHECKINS], 'energy_30d': mean(w30, ENERGY), 'wellbeing_30d': mean(w30, WELLBEING),
+               'checkins_prev_30d': prev[CHECKINS], 'energy_prev_30d': mean(prev, ENERGY),
+               'wellbeing_prev_30d': mean(prev, WELLBEING),
+               'tasks_total': self.tasks_total, 'tasks_completed': self.tasks_completed,
+               'completed_30d': w30[COMPLETED], 'completed_prev_30d': prev[COMPLETED]}
+        for i, name in enumerate(STATS):
+            row[f'{name}_mean'] = round(self.mean[i], 4) if self.n else None
+            row[f'{name}_var'] = round(self.m2[i] / self.n, 4) if self.n else None
+        return row
+
+
+class KPIEngine:
+    """Aplica eventos sobre los agregados que toca; `store` carga y guarda el estado."""
+
+    def __init__(self, store, today: date):
+        self.store = store
+        self.today = today.toordinal()
+        self.horizon = self.today - HORIZON_DAYS + 1
+        self.aggs = {}           # (scope, id) → Aggregate
+        self.company = {}        # (scope, id) → company_id
+        self.teams = {}          # user_id → {team_id}, membresía ya aplicada
+        self.dirty = set()
+        self.membership = []     # (signo, team_id, user_id) pendientes de guardar
+
+    def _prepare(self, events: list):
+        """Carga en pocas consultas todo lo que el lote va a tocar."""
+        users, teams, companies = set(), set(), set()
+        for e in events:
+            for row in (e['old_row'], e['new_row']):
+                if row:
+                    users.add(row['user_id'])
+                    if e['source'] == 'member':
+                        teams.add(row['team_id'])
+                    elif e['source'] == 'profile' and row['company_id']:
+                        companies.add(row['company_id'])
+        new_users = users - self.teams.keys()
+        if new_users:
+            found = self.store.memberships(new_users)
+            for u in new_users:
+                self.teams[u] = found.get(u, set())
+        for u in users:
+            teams |= self.teams[u]
+        keys = [('user', u) for u in users] + [('team', t) for t in teams]
+        self._load(keys)
+        companies |= {self.company.get(('user', u)) for u in users} - {None}
+        self._load([('company', c) for c in companies])
+
+    def _load(self, keys: list):
+        missing = [k for k in keys if k not in self.aggs]
+        if not missing:
+            return
+        found = self.store.load(missing)
+        # La empresa de una persona nueva la fija su evento de profiles, no
+        # el valor actual; la de un equipo no cambia.
+        teams = [k for k in missing if k not in found and k[0] == 'team']
+        companies = self.store.companies(teams) if teams else {}
+        for key in missing:
+            company_id, state = found.get(key, (companies.get(key), None))
+            self.aggs[key] = (Aggregate.from_state(state) if state
+                              else Aggregate(members=1 if key[0] == 'user' else 0))
+            self.aggs[key].prune(self.horizon)
+            self.company[key] = key[1] if key[0] == 'company' else company_id
+
+    def _targets(self, user_id: str) -> list:
+        keys = [('user', user_id)] + [('team', t) for t in self.teams[user_id]]
+        company = self.company.get(('user', user_id))
+        return keys + [('company', company)] if company else keys
+
+    def apply(self, events: list) -> int:
+        self._prepare(events)
+        for e in events:
+            for row, sign in ((e['old_row'], -1), (e['new_row'], 1)):
+                if row:
+                    getattr(self, f"_{e['source']}")(row, sign)
+        return len(events)
+
+    def _checkin(self, row: dict, sign: int):
+        day = _ordinal(row['day'])
+        for key in self._targets(row['user_id']):
+            self.aggs[key].checkin(day, row['energy'], row['stress'], sign, self.horizon)
+            self.dirty.add(key)
+
+    def _task(self, row: dict, sign: int):
+        day = _ordinal(row.get('completed_day'))
+        for key in self._targets(row['user_id']):
+            self.aggs[key].task(row['status'], day, sign, self.horizon)
+            self.dirty.add(key)
+
+    def _member(self, row: dict, sign: int):
+        team, user = row['team_id'], row['user_id']
+        if (team in self.teams[user]) == (sign > 0):
+            return                   # ya aplicado (p. ej. alta repetida tras un backfill)
+        self.aggs[('team', team)].merge(self.aggs[('user', user)], sign)
+        (self.teams[user].add if sign > 0 else self.teams[user].discard)(team)
+        self.membership.append((sign, team, user))
+        self.dirty.add(('team', team))
+
+    def _profile(self, row: dict, sign: int):
+        key, company = ('user', row['user_id']), row['company_id']
+        if (self.company.get(key) == company) != (sign < 0):
+            return                   # ya aplicado
+        self.company[key] = company if sign > 0 else None
+        if company:
+            self.aggs[('company', company)].merge(self.aggs[key], sign)
+            self.dirty.add(('company', company))
+        self.dirty.add(key)
+
+    def rows(self, keys) -> list:
+        """Filas de kpi_snapshots (dicts) para las claves dadas."""
+        as_of = date.fromordinal(self.today)
+        out = []
+        for key in keys:
+            agg = self.aggs[key]
+            out.append({'scope': key[0], 'scope_id': key[1], 'company_id': self.company.get(key),
+                        **agg.snapshot(self.today), 'as_of': as_of, 'state': agg.state()})
+        return out
+
+    def flush(self) -> int:
+        """Guarda las filas tocadas y la membresía; devuelve filas escritas."""
+        rows = self.rows(sorted(self.dirty))
+        self.store.write(rows, self.membership)
+        self.dirty.clear()
+        self.membership = []
+        return len(rows)
+
+
+def build(checkins, tasks, members, user_company: dict, team_company: dict, today: date) -> KPIEngine:
+    """Arma el estado completo desde filas crudas (backfill y verificación)."""
+    engine = KPIEngine(None, today)
+    user = engine.aggs
+
+    def agg(u):
+        if ('user', u) not in user:
+            user[('user', u)] = Aggregate(members=1)
+            engine.company[('user', u)] = user_company.get(u)
+        return user[('user', u)]
+
+    for c in checkins:
+        agg(c['user_id']).checkin(_ordinal(c['day']), c['energy'], c['stress'], 1, engine.horizon)
+    for t in tasks:
+        agg(t['user_id']).task(t['status'], _ordinal(t['completed_day']), 1, engine.horizon)
+    for m in members:
+        engine.teams.setdefault(m['user_id'], set()).add(m['team_id'])
+    for u in list(user_company) + [u for _, u in user]:
+        engine.teams.setdefault(u, set())
+    for u in list(engine.teams):
+        a = agg(u)
+        for t in engine.teams[u]:
+            key = ('team', t)
+            if key not in engine.aggs:
+                engine.aggs[key] = Aggregate()
+                engine.company[key] = team_company.get(t)
+            engine.aggs[key].merge(a, 1)
+        company = engine.company[('user', u)]
+        if company:
+            key = ('company', company)
+            if key not in engine.aggs:
+                engine.aggs[key] = Aggregate()
+                engine.company[key] = company
+            engine.aggs[key].merge(a, 1)
+    engine.dirty = set(engine.aggs)
+    return engine
+
+
+# ── Postgres ────────────────────────────────────────────────
+
+class PgStore:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def memberships(self, users) -> dict:
+        with self.conn.cursor() as cur:
+            cur.execute('SELECT user_id::text, team_id::text FROM public.kpi_memberships WHERE user_id = ANY(%s::uuid[])',
+                        (list(users),))
+            found = {}
+            for user_id, team_id in cur.fetchall():
+                found.setdefault(user_id, set()).add(team_id)
+            return found
+
+    def load(self, keys) -> dict:
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.scope, s.scope_id::text, s.company_id::text, s.state
+                FROM unnest(%s::text[], %s::uuid[]) AS k(scope, scope_id)
+                JOIN public.kpi_snapshots s USING (scope, scope_id)
+            """, ([k[0] for k in keys], [k[1] for k in keys]))
+            return {(scope, sid): (company, state) for scope, sid, company, state in cur.fetchall()}
+
+    def companies(self, keys) -> dict:
+        users = [k[1] for k in keys if k[0] == 'user']
+        teams = [k[1] for k in keys if k[0] == 'team']
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT 'user', id::text, company_id::text FROM public.profiles WHERE id = ANY(%s::uuid[])
+                UNION ALL
+                SELECT 'team', id::text, company_id::text FROM public.teams WHERE id = ANY(%s::uuid[])
+            """, (users, teams))
+            return {(scope, sid): company for scope, sid, company in cur.fetchall()}
+
+    def write(self, rows: list, membership: list):
+        """COPY a una tabla temporal y upsert; los equipos y empresas sin miembros se borran."""
+        from psycopg.types.json import Jsonb
+
+        with self.conn.cursor() as cur:
+            cur.execute('CREATE TEMP TABLE IF NOT EXISTS _kpi_snapshots '
+                        '(LIKE public.kpi_snapshots INCLUDING DEFAULTS) ON COMMIT DELETE ROWS')
+            with cur.copy(f"COPY _kpi_snapshots ({', '.join(SNAPSHOT_COLUMNS)}) FROM STDIN") as copy:
+                for r in rows:
+                    copy.write_row([Jsonb(r[c]) if c == 'state' else r[c] for c in SNAPSHOT_COLUMNS])
+            updates = ', '.join(f'{c} = EXCLUDED.{c}' for c in SNAPSHOT_COLUMNS[2:])
+            cur.execute(f"""
+                INSERT INTO public.kpi_snapshots ({', '.join(SNAPSHOT_COLUMNS)}, refreshed_at)
+                SELECT {', '.join(SNAPSHOT_COLUMNS)}, NOW() FROM _kpi_snapshots
+                ON CONFLICT (scope, scope_id) DO UPDATE SET {updates}, refreshed_at = NOW()
+            """)
+            cur.execute("DELETE FROM public.kpi_snapshots WHERE scope <> 'user' AND member_count <= 0 "
+                        "AND (scope, scope_id) IN (SELECT scope, scope_id FROM _kpi_snapshots)")
+            added = [(t, u) for s, t, u in membership if s > 0]
+            removed = [(t, u) for s, t, u in membership if s < 0]
+            if removed:
+                cur.executemany('DELETE FROM public.kpi_memberships WHERE team_id = %s AND user_id = %s', removed)
+            if added:
+                cur.executemany('INSERT INTO public.kpi_memberships (team_id, user_id) VALUES (%s, %s) '
+                                'ON CONFLICT DO NOTHING', added)
+
+
+def refresh_incremental(conn, batch: int, today: date) -> dict:
+    from eneadisc_db import drain_queue
+
+    stats = {'events': 0, 'rows': 0}
+    for events in drain_queue(conn, QUEUE, 'id, source, old_row, new_row', batch):
+        # Entre lotes el lock se suelta y otro motor (o --roll) puede escribir:
+        # el estado se carga de nuevo dentro de la transacción de cada lote.
+        engine = KPIEngine(PgStore(conn), today)
+        stats['events'] += engine.apply(events)
+        stats['rows'] += engine.flush()
+    return stats
+
+
+def roll(conn, batch: int, today: date) -> int:
+    """Corre las ventanas de las filas con as_of < hoy (sin eventos desde entonces)."""
+    from eneadisc_db import connect, lock_queue, stream_keyset
+
+    rolled = 0
+    with connect() as reader:
+        for scope in ('user', 'team', 'company'):
+            sql = ("SELECT scope_id::text AS scope_id "
+                   "FROM public.kpi_snapshots WHERE {after} AND scope = %(scope)s AND as_of < %(today)s")
+            for rows in stream_keyset(reader, sql, {'scope': scope, 'today': today}, key='scope_id', chunk=batch):
+                with conn.cursor() as cur:
+                    lock_queue(cur, QUEUE)
+                # El estado se lee bajo el lock: un lote de eventos pudo
+                # escribir la fila después de que el reader la listara.
+                engine = KPIEngine(PgStore(conn), today)
+                engine._load([(scope, r['scope_id']) for r in rows])
+                engine.dirty.update(engine.aggs)
+                rolled += engine.flush()
+                conn.commit()
+    return rolled
+
+
+def backfill(conn, today: date) -> dict:
+    import psycopg
+    from eneadisc_db import hold_queue, stream_keyset
+
+    def stream(sql):
+        for rows in stream_keyset(conn, sql, chunk=20_000):
+            yield from rows
+
+    with hold_queue(conn, QUEUE):
+        # Una sola transacción REPEATABLE READ, con la foto tomada ya sin
+        # consumidores: los eventos que borra son justo los que ya están en
+        # lo que lee. Lo encolado después no es visible y queda para el
+        # modo incremental.
+        conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+        try:
+            with conn.cursor() as cur:
+                cur.execute('DELETE FROM public.kpi_events')
+                cur.execute('SELECT id::text, company_id::text FROM public.profiles')
+                user_company = dict(cur.fetchall())
+                cur.execute('SELECT id::text, company_id::text FROM public.teams')
+                team_company = dict(cur.fetchall())
+                cur.execute('SELECT team_id::text AS team_id, user_id::text AS user_id FROM public.team_members')
+                members = [{'team_id': t, 'user_id': u} for t, u in cur.fetchall()]
+
+            checkins = stream("SELECT id, user_id::text AS user_id, (date AT TIME ZONE 'UTC')::date AS day, "
+                              "energy, stress FROM public.checkins WHERE {after}")
+            tasks = stream("SELECT id, user_id::text AS user_id, status, "
+                           "(completed_at AT TIME ZONE 'UTC')::date AS completed_day FROM public.tasks "
+                           "WHERE {after} AND team_id IS NULL")
+            engine = build(checkins, tasks, members, user_company, team_company, today)
+
+            engine.store = PgStore(conn)
+            with conn.cursor() as cur:
+                cur.execute('TRUNCATE public.kpi_snapshots, public.kpi_memberships')
+                written = engine.flush()
+                cur.executemany('INSERT INTO public.kpi_memberships (team_id, user_id) VALUES (%s, %s)',
+                                [(m['team_id'], m['user_id']) for m in members])
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.isolation_level = None
+    return {'rows': written, 'memberships': len(members)}
+
+
+# ── Simulación en memoria ───────────────────────────────────
+
+class MemoryStore:
+    """Mismo contrato que PgStore; guarda el estado como JSON para ejercitar la serialización."""
+
+    def __init__(self, user_company: dict, team_company: dict):
+        self.user_company, self.team_company = user_company, team_company
+        self.snapshots, self.members = {}, {}
+
+    def memberships(self, users) -> dict:
+        return {u: set(self.members[u]) for u in users if self.members.get(u)}
+
+    def load(self, keys) -> dict:
+        return {k: (self.snapshots[k]['company_id'], json.loads(self.snapshots[k]['state']))
+                for k in keys if k in self.snapshots}
+
+    def companies(self, keys) -> dict:
+        return {k: (self.user_company if k[0] == 'user' else self.team_company).get(k[1]) for k in keys}
+
+    def write(self, rows: list, membership: list):
+        for r in rows:
+            key = (r['scope'], r['scope_id'])
+            if r['scope'] != 'user' and r['member_count'] <= 0:
+                self.snapshots.pop(key, None)
+            else:
+                self.snapshots[key] = {**r, 'state': json.dumps(r['state'])}
+        for sign, team, user in membership:
+            (self.members.setdefault(user, set()).add if sign > 0
+             else self.members.setdefault(user, set()).discard)(team)
+
+
+def simulate(args) -> dict:
+    """Eventos como los del trigger sobre tablas en memoria; al final, incremental == recálculo."""
+    rng = random.Random(args.seed)
+    today = date.today()
+    users = [f'u{i:05d}' for i in range(args.users)]
+    teams = [f't{i:04d}' for i in range(max(1, args.users // 8))]
+    companies = [f'c{i:03d}' for i in range(args.companies)]
+    user_company = {u: companies[i % len(companies)] for i, u in enumerate(users)}
+    team_company = {t: companies[i % len(companies)] for i, t in enumerate(teams)}
+    by_company = {}
+    for t in teams:
+        by_company.setdefault(team_company[t], []).append(t)
+
+    checkins, tasks, members, events = {}, {}, {}, []     # dicts: orden de inserción reproducible
+
+    def emit(source, old, new):
+        events.append({'id': len(events) + 1, 'source': source, 'old_row': old, 'new_row': new})
+
+    for u in users:
+        emit('profile', None, {'user_id': u, 'company_id': user_company[u]})
+
+    def checkin_row(u):
+        return {'user_id': u, 'day': (today - timedelta(days=rng.randrange(90))).isoformat(),
+                'energy': rng.randint(1, 5), 'stress': rng.randint(1, 5)}
+
+    def task_row(u, status):
+        done = (today - timedelta(days=rng.randrange(75))).isoformat() if status == 'completed' else None
+        return {'user_id': u, 'status': status, 'completed_day': done}
+
+    for i in range(args.simulate):
+        r = rng.random()
+        u = rng.choice(users)
+        if r < 0.45 or not checkins:
+            checkins[i] = checkin_row(u)
+            emit('checkin', None, checkins[i])
+        elif r < 0.55:
+            cid = rng.choice(list(islice(reversed(checkins), 64)))
+            new = {**checkins[cid], 'energy': rng.randint(1, 5), 'stress': rng.randint(1, 5)}
+            emit('checkin', checkins[cid], new)
+            checkins[cid] = new
+        elif r < 0.6:
+            cid = next(iter(checkins))
+            emit('checkin', checkins.pop(cid), None)
+        elif r < 0.75:
+            tasks[i] = task_row(u, rng.choice(('pending', 'in_progress')))
+            emit('task', None, tasks[i])
+        elif r < 0.85 and tasks:
+            tid = next((t for t in islice(reversed(tasks), 32) if tasks[t]['status'] != 'completed'), None)
+            if tid is not None:
+                new = task_row(tasks[tid]['user_id'], 'completed')
+                emit('task', tasks[tid], new)
+                tasks[tid] = new
+        elif r < 0.88 and tasks:
+            tid = next(iter(tasks))
+            emit('task', tasks.pop(tid), None)
+        elif r < 0.96:
+            pair = (rng.choice(by_company[user_company[u]]), u)
+            if pair not in members:
+                members[pair] = None
+                emit('member', None, {'team_id': pair[0], 'user_id': u})
+        elif r < 0.99 and members:
+            pair = next(iter(members))
+            del members[pair]
+            emit('member', {'team_id': pair[0], 'user_id': pair[1]}, None)
+        elif r >= 0.99:
+            # Cambio de empresa: sale de sus equipos y entra en la nueva.
+            new = rng.choice(companies)
+            if new != user_company[u]:
+                for pair in [p for p in members if p[1] == u]:
+                    del members[pair]
+                    emit('member', {'team_id': pair[0], 'user_id': u}, None)
+                emit('profile', {'user_id': u, 'company_id': user_company[u]}, {'user_id': u, 'company_id': new})
+                user_company[u] = new
+
+    store = MemoryStore(user_company, team_company)
+    t0 = time.perf_counter()
+    engine, written = None, 0
+    for start in range(0, len(events), args.batch):
+        # Motor nuevo cada N lotes: el estado tiene que sobrevivir al JSON guardado.
+        if engine is None or (start // args.batch) % args.reload_every == 0:
+            engine = KPIEngine(store, today)
+        engine.apply(events[start:start + args.batch])
+        written += engine.flush()
+    incremental_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    full = build(checkins.values(), tasks.values(), [{'team_id': t, 'user_id': u} for t, u in members],
+                 user_company, team_company, today)
+    expected = {(r['scope'], r['scope_id']): r for r in full.rows(sorted(full.aggs))
+                if r['scope'] == 'user' or r['member_count'] > 0}
+    rebuild_s = time.perf_counter() - t0
+
+    got = {k: v for k, v in store.snapshots.items()}
+    mismatches, max_diff = [], 0.0
+    for key in set(expected) | set(got):
+        e, g = expected.get(key), got.get(key)
+        if e is None or g is None:
+            if (e or g)['checkin_count'] or (e or g)['tasks_total'] or (e or g)['scope'] != 'user':
+                mismatches.append({'key': key, 'missing_in': 'incremental' if g is None else 'recálculo'})
+            continue
+        for col in SNAPSHOT_COLUMNS[3:-2]:
+            a, b = e[col], g[col]
+            if a is None or b is None:
+                if a != b:
+                    mismatches.append({'key': key, 'column': col, 'expected': a, 'got': b})
+                continue
+            diff = abs(a - b)
+            max_diff = max(max_diff, diff)
+            if diff > 1e-3:
+                mismatches.append({'key': key, 'column': col, 'expected': a, 'got': b})
+    return {
+        'events': len(events), 'users': len(users), 'teams': len(teams), 'companies': len(companies),
+        'final_rows': {'checkins': len(checkins), 'tasks': len(tasks), 'memberships': len(members)},
+        'snapshots': len(got), 'batch': args.batch, 'snapshot_writes': written,
+        'incremental_s': round(incremental_s, 3),
+        'events_per_s': round(len(events) / incremental_s) if incremental_s else None,
+        'full_rebuild_s': round(rebuild_s, 3), 'max_abs_diff': max_diff,
+        'mismatches': len(mismatches), 'mismatch_sample': mismatches[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC KPI Engine')
+    parser.add_argument('--backfill', action='store_true', help='Armar todos los snapshots desde las tablas')
+    parser.add_argument('--roll', action='store_true', help='Solo correr las ventanas de las filas viejas')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='Eventos por transacción')
+    parser.add_argument('--today', type=date.fromisoformat, default=None, help='Día UTC de las ventanas')
+    parser.add_argument('--simulate', type=int, metavar='N', help='N eventos sintéticos en memoria')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--companies', type=int, default=5)
+    parser.add_argument('--reload-every', type=int, default=5, help='Con --simulate: lotes por motor')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='.tmp/kpi_engine_simulation.json')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.simulate:
+        from pathlib import Path
+
+        report = simulate(args)
+        ok = report['mismatches'] == 0
+        print(f"🤖 {report['events']:,} eventos → {report['snapshots']:,} snapshots en {report['incremental_s']}s "
+              f"({report['events_per_s']:,} eventos/s, {report['snapshot_writes']:,} escrituras de fila)")
+        print(f"   recálculo completo de las tablas finales: {report['full_rebuild_s']}s")
+        print(f"{'✅' if ok else '⚠️'} incremental vs recálculo: {report['mismatches']} diferencias "
+              f"(máx |Δ| {report['max_abs_diff']:.2e})")
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+        print(f"✅ Reporte → {out}")
+        return
+
+    from datetime import datetime, timezone
+
+    from eneadisc_db import connect
+
+    today = args.today or datetime.now(timezone.utc).date()
+    with connect() as conn:
+        if args.backfill:
+            stats = backfill(conn, today)
+            print(f"✅ Backfill: {stats['rows']:,} snapshots, {stats['memberships']:,} membresías "
+                  f"en {time.perf_counter() - t0:.1f}s")
+            return
+        if not args.roll:
+            stats = refresh_incremental(conn, args.batch, today)
+            print(f"✅ {stats['events']:,} eventos aplicados: {stats['rows']:,} snapshots escritos")
+        rolled = roll(conn, args.batch, today)
+        print(f"✅ Ventanas corridas a {today}: {rolled:,} snapshots en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
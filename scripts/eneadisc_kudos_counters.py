@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Kudos Counters
+Backfill y reconciliación en lote de kudos_counters (31_kudos_counters.sql)
+
+El trigger trg_kudos_counters suma y resta kudo a kudo. Para el arranque
+(kudos anteriores a la migración) o después de cargas sin triggers, este
+job recorre las empresas por keyset y, por lote, llama a
+rebuild_kudos_counters(ids): agrega el histórico de kudos en una sola
+query por lote (histórico, semana y mes UTC; por categoría y total) y
+escribe solo las filas que difieren.
+
+rebuild toma un advisory lock exclusivo por empresa: los kudos que
+entran mientras tanto esperan a que termine el lote y se suman después.
+
+--dry-run corre lo mismo dentro de una transacción que se descarta: reporta
+el desvío sin tocar nada.
+"""
+
+import argparse
+import time
+
+from eneadisc_db import connect, stream_keyset
+
+DEFAULT_BATCH = 50
+
+COMPANIES_SQL = """
+SELECT id FROM public.companies
+WHERE {after} AND (%(company)s::uuid IS NULL OR id = %(company)s)
+"""
+
+
+def rebuild(conn, batch: int, company: str = None, dry_run: bool = False) -> dict:
+    stats = {'companies': 0, 'fixed': 0}
+    # Lectura con una conexión aparte: cada lote hace commit sin cortar el cursor.
+    with connect() as reader:
+        for rows in stream_keyset(reader, COMPANIES_SQL, {'company': company}, chunk=batch):
+            ids = [r['id'] for r in rows]
+            with conn.transaction(force_rollback=dry_run), conn.cursor() as cur:
+                cur.execute('SELECT public.rebuild_kudos_counters(%s::uuid[])', (ids,))
+                fixed = cur.fetchone()[0]
+            stats['companies'] += len(ids)
+            stats['fixed'] += fixed
+            if fixed:
+                print(f"   …{ids[-1]}: {fixed:,} filas de contadores desviadas")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Kudos Counters (backfill / reconciliación)')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='Empresas por transacción')
+    parser.add_argument('--company', help='Solo esta empresa (UUID)')
+    parser.add_argument('--dry-run', action='store_true', help='Reportar el desvío sin corregirlo')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with connect(autocommit=True) as conn:
+        stats = rebuild(conn, args.batch, args.company, args.dry_run)
+    verb = 'desviadas' if args.dry_run else 'corregidas'
+    print(f"✅ {stats['companies']:,} empresas revisadas: {stats['fixed']:,} filas de contadores {verb} "
+          f"en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Note Signals
+Pipeline NLP de texto libre: notas de check-in y diario → señales de estrés, energía y conflicto
+
+Implementa el "NLP Pipeline" de eneadisc_ai_engine_architect.py sin red ni
+modelos externos, como una cadena de generadores por lotes:
+
+  leer        lotes por keyset (stream_keyset) o desde note_signal_queue
+  limpiar     un solo pase por lote: minúsculas, sin tildes, tokens
+  featurizar  TF sublineal hasheado (2^18 columnas) con negación ("no estoy
+              cansado" → no_cansad), todo en numpy
+  clasificar  producto con una matriz léxica [features x 3] (estrés,
+              energía, conflicto) armada desde LEXICON y saturación tanh:
+              sin normalizar por largo, una queja no se diluye en una nota
+              larga
+  escribir    COPY a una tabla temporal + upsert en note_signals
+
+Modo incremental (default): reclama lotes de note_signal_queue
+(drain_queue, 27_note_signals.sql). --backfill recorre las tablas
+completas. --synthetic N corre solo limpiar/featurizar/clasificar sobre
+notas generadas con etiquetas conocidas y reporta notas/s y precisión.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+import unicodedata
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+MODEL = 'lexicon-tf-v2'
+QUEUE = 'public.note_signal_queue'
+N_FEATURES = 1 << 18
+DEFAULT_CHUNK = 20_000
+SIGNAL_THRESHOLD = 0.3
+NEGATION_SPAN = 2                       # palabras (sin stopwords) afectadas después de "no", "sin", ...
+NEGATED_WEIGHT = -0.3                   # "no estoy cansado" resta, pero no llega a señal
+STEM = 6
+SIGNALS = ('stress', 'energy', 'conflict')
+
+NEGATORS = {'no', 'sin', 'nunca', 'ni', 'tampoco', 'nada', 'ningun', 'ninguna'}
+STOPWORDS = set('''a al algo con de del el en es esta este esto la las le lo los me mi mis muy para
+    por que se su sus te un una y o e hoy dia semana equipo trabajo fue ya hay'''.split())
+
+# Raíz (6 letras, sin tildes) → (estrés, energía, conflicto). La energía es
+# con signo: positiva con energía, negativa agotado.
+LEXICON = {
+    'estres': (1.0, 0, 0), 'presion': (0.9, 0, 0), 'agobio': (1.0, 0, 0), 'agobiado': (1.0, 0, 0),
+    'ansiedad': (1.0, 0, 0), 'ansioso': (0.9, 0, 0), 'nervioso': (0.7, 0, 0),
+    'plazos': (0.6, 0, 0), 'deadline': (0.6, 0, 0), 'urgente': (0.6, 0, 0), 'sobrecarga': (1.0, -0.3, 0),
+    'acumulado': (0.6, 0, 0), 'limite': (0.8, -0.3, 0), 'abasto': (0.9, 0, 0), 'colapsado': (1.0, -0.5, 0),
+    'desconectar': (0.5, 0, 0), 'preocupado': (0.7, 0, 0), 'quemado': (0.9, -0.7, 0), 'burnout': (1.0, -0.7, 0),
+    'saturado': (0.9, -0.3, 0), 'insomnio': (0.6, -0.6, 0), 'ayuda': (0.4, 0, 0), 'frustrado': (0.6, 0, 0.3),
+    'cansado': (0.2, -1.0, 0), 'agotado': (0.3, -1.0, 0), 'exhausto': (0.3, -1.0, 0), 'fatiga': (0, -0.9, 0), 'sueño': (0, -0.7, 0), 'dormi': (0, -0.4, 0), 'desganado': (0, -0.9, 0),
+    'aburrido': (0, -0.6, 0), 'lento': (0, -0.4, 0), 'bajon': (0, -0.8, 0), 'energia': (0, 0.6, 0),
+    'motivado': (-0.2, 1.0, 0), 'motivo': (-0.2, 0.8, 0), 'entusiasmado': (-0.2, 1.0, 0), 'encanto': (-0.3, 0.9, 0),
+    'contento': (-0.4, 0.8, 0), 'feliz': (-0.4, 0.9, 0), 'descansado': (-0.3, 0.9, 0), 'productivo': (-0.2, 0.8, 0),
+    'tranquilo': (-0.6, 0.2, 0), 'celebramos': (-0.4, 0.8, 0), 'genial': (-0.3, 0.8, 0), 'buen': (-0.3, 0.4, 0),
+    'conflicto': (0.15, 0, 1.0), 'discusion': (0.15, 0, 1.0), 'discutimos': (0.15, 0, 1.0),
+    'pelea': (0.15, 0, 1.0), 'peleamos': (0.15, 0, 1.0), 'tension': (0.5, 0, 0.9), 'roces': (0.2, 0, 0.9),
+    'malentendido': (0.1, 0, 0.8), 'grito': (0.4, 0, 1.0), 'enojado': (0.3, 0, 0.8), 'enojo': (0.3, 0, 0.8),
+    'molesto': (0.2, 0, 0.7), 'respeto': (0, 0, -0.3), 'injusto': (0.2, 0, 0.8), 'choque': (0.2, 0, 0.8),
+    'desacuerdo': (0.1, 0, 0.8), 'critico': (0.2, 0, 0.6), 'ignoran': (0.2, 0, 0.8), 'ignoro': (0.2, 0, 0.8),
+    'escuchado': (-0.2, 0.3, -0.5), 'apoyo': (-0.3, 0.3, -0.4),
+}
+# Formas negadas que no son el opuesto atenuado ("no doy abasto", "sin energía").
+NEGATED_LEXICON = {'abasto': (0.9, 0, 0), 'energia': (0.1, -0.9, 0), 'escuchado': (0.2, 0, 0.6),
+                   'respeto': (0.2, 0, 0.8), 'dormi': (0.2, -0.7, 0)}
+
+
+# ── Limpieza y featurización ────────────────────────────────
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.lower())
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+
+def _feature(token: str) -> int:
+    # crc32 y no hash(): el índice tiene que ser el mismo en todos los procesos.
+    return zlib.crc32(token.encode()) & (N_FEATURES - 1)
+
+
+def _stem(word: str) -> str:
+    return _fold(word)[:STEM]
+
+
+class Featurizer:
+    """Texto → matriz TF hasheada (celdas no nulas en arrays de numpy)."""
+
+    TOKEN_RE = re.compile(r'\n|[a-z]+')
+
+    def __init__(self):
+        # Token → (feature, feature negada); -1 para stopwords. El vocabulario
+        # real de las notas es chico: hashear cada token una sola vez.
+        self._vocab = {'\n': (-2, -2)}
+
+    def _lookup(self, token: str) -> tuple:
+        ids = self._vocab.get(token)
+        if ids is None:
+            if token in STOPWORDS or len(token) < 2:
+                ids = (-1, -1)
+            else:
+                stem = token[:STEM]
+                ids = (_feature(stem), _feature('no_' + stem))
+            self._vocab[token] = ids
+        return ids
+
+    def transform(self, texts: list) -> tuple:
+        """(doc, feature, peso) de las celdas no nulas de la matriz TF."""
+        blob = _fold('\n'.join(t.replace('\n', ' ') for t in texts)) + '\n'
+        tokens = self.TOKEN_RE.findall(blob)
+        lookup = self._vocab.get
+        pairs = [lookup(t) or self._lookup(t) for t in tokens]
+        ids = np.fromiter((p[0] for p in pairs), dtype=np.int64, count=len(pairs))
+        neg_ids = np.fromiter((p[1] for p in pairs), dtype=np.int64, count=len(pairs))
+        is_newline = ids == -2
+        doc = np.cumsum(is_newline) - is_newline          # el '\n' cierra su propio documento
+        is_neg = np.fromiter((t in NEGATORS for t in tokens), dtype=bool, count=len(tokens))
+        # La ventana cuenta solo palabras con contenido: en "no me siento
+        # cansado" el "me" no consume un lugar y "cansado" queda negado.
+        words = np.flatnonzero(ids != -1)
+        w_neg, w_doc = is_neg[words], doc[words]
+        w_negated = np.zeros(len(words), dtype=bool)
+        for k in range(1, NEGATION_SPAN + 1):
+            w_negated[k:] |= w_neg[:-k] & (w_doc[k:] == w_doc[:-k])
+        negated = np.zeros(len(tokens), dtype=bool)
+        negated[words] = w_negated
+        feats = np.where(negated, neg_ids, ids)
+        keep = feats >= 0
+        keys = doc[keep] * N_FEATURES + feats[keep]
+        cells, counts = np.unique(keys, return_counts=True)
+        rows, cols = cells // N_FEATURES, cells % N_FEATURES
+        return rows, cols, 1.0 + np.log(counts), len(texts)
+
+
+def lexicon_weights() -> np.ndarray:
+    """Matriz [N_FEATURES x 3]: cada raíz suma su peso; su forma negada, el opuesto atenuado."""
+    stems = [_stem(w) for w in LEXICON]
+    if len(set(stems)) != len(stems):
+        raise ValueError('LEXICON tiene palabras con la misma raíz: una pisaría a la otra')
+    weights = np.zeros((N_FEATURES, len(SIGNALS)), dtype=np.float32)
+    for word, signal in LEXICON.items():
+        stem = _stem(word)
+        weights[_feature(stem)] = signal
+        weights[_feature('no_' + stem)] = NEGATED_LEXICON.get(word, np.asarray(signal) * NEGATED_WEIGHT)
+    return weights
+
+
+def classify(matrix: tuple, weights: np.ndarray) -> np.ndarray:
+    """Scores [docs x 3] = tanh(X · W), con X en formato (filas, columnas, valores)."""
+    rows, cols, values, n_docs = matrix
+    scores = np.empty((n_docs, len(SIGNALS)), dtype=np.float32)
+    for k in range(len(SIGNALS)):
+        scores[:, k] = np.bincount(rows, weights=values * weights[cols, k], minlength=n_docs)
+    np.tanh(scores, out=scores)
+    scores[:, 0] = np.clip(scores[:, 0], 0, 1)
+    scores[:, 1] = np.clip(scores[:, 1], -1, 1)
+    scores[:, 2] = np.clip(scores[:, 2], 0, 1)
+    return scores
+
+
+def signal_labels(scores: np.ndarray) -> list:
+    stress = scores[:, 0] >= SIGNAL_THRESHOLD
+    low = scores[:, 1] <= -SIGNAL_THRESHOLD
+    high = scores[:, 1] >= SIGNAL_THRESHOLD
+    conflict = scores[:, 2] >= SIGNAL_THRESHOLD
+    return [[name for name, on in (('stress', s), ('low_energy', l), ('high_energy', h), ('conflict', c)) if on]
+            for s, l, h, c in zip(stress.tolist(), low.tolist(), high.tolist(), conflict.tolist())]
+
+
+def analyze(batches, featurizer: Featurizer, weights: np.ndarray):
+    """Lotes de filas con 'text' → los mismos lotes con scores y señales."""
+    for rows in batches:
+        if not rows:
+            continue
+        scores = classify(featurizer.transform([r['text'] for r in rows]), weights)
+        for row, score, labels in zip(rows, scores.round(3).tolist(), signal_labels(scores)):
+            row['stress'], row['energy'], row['conflict'] = score
+            row['signals'] = labels
+        yield rows
+
+
+# ── Postgres ────────────────────────────────────────────────
+
+SOURCES = {
+    'checkin': ("SELECT id, user_id, (date AT TIME ZONE 'UTC')::date AS day, notes AS text "
+                "FROM public.checkins WHERE {after} AND btrim(COALESCE(notes, '')) <> ''"),
+    'journal': ("SELECT id, user_id, (created_at AT TIME ZONE 'UTC')::date AS day, content AS text "
+                "FROM public.journal_entries WHERE {after} AND btrim(content) <> ''"),
+}
+
+
+def write_signals(cur, source: str, rows: list) -> int:
+    """COPY a una tabla temporal y upsert: un round-trip por lote, no por nota."""
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS _note_signals
+          (source_id UUID, user_id UUID, day DATE, stress REAL, energy REAL, conflict REAL, signals TEXT[])
+          ON COMMIT DELETE ROWS
+    """)
+    with cur.copy('COPY _note_signals FROM STDIN') as copy:
+        for r in rows:
+            copy.write_row((r['id'], r['user_id'], r['day'], r['stress'], r['energy'], r['conflict'], r['signals']))
+    cur.execute("""
+        INSERT INTO public.note_signals AS s
+          (source, source_id, user_id, day, stress, energy, conflict, signals, model, processed_at)
+        SELECT %(source)s, source_id, user_id, day, stress, energy, conflict, signals, %(model)s, NOW()
+        FROM _note_signals
+        ON CONFLICT (source, source_id) DO UPDATE SET
+          stress = EXCLUDED.stress, energy = EXCLUDED.energy, conflict = EXCLUDED.conflict,
+          signals = EXCLUDED.signals, model = EXCLUDED.model, processed_at = EXCLUDED.processed_at
+    """, {'source': source, 'model': MODEL})
+    return cur.rowcount
+
+
+def backfill(conn, sources: list, chunk: int, featurizer: Featurizer, weights: np.ndarray) -> dict:
+    from eneadisc_db import connect, discard_queue, stream_keyset
+
+    stats = {s: 0 for s in sources}
+    # Lo encolado antes del backfill queda cubierto por él; lo de otras fuentes, no.
+    discard_queue(conn, QUEUE, 'source = ANY(%(sources)s)', {'sources': sources})
+    for source in sources:
+        with connect() as reader:
+            for rows in analyze(stream_keyset(reader, SOURCES[source], chunk=chunk), featurizer, weights):
+                with conn.cursor() as cur:
+                    stats[source] += write_signals(cur, source, rows)
+                conn.commit()
+                print(f"   {source}: {stats[source]:,} notas", end='\r')
+        print()
+    return stats
+
+
+def refresh_incremental(conn, chunk: int, featurizer: Featurizer, weights: np.ndarray) -> dict:
+    from eneadisc_db import drain_queue
+
+    stats = {'queue': 0, 'checkin': 0, 'journal': 0}
+    # Cada lote se borra de la cola en la misma transacción que sus señales.
+    for queued in drain_queue(conn, QUEUE, 'id, source, source_id', chunk):
+        with conn.cursor() as cur:
+            for source in SOURCES:
+                ids = list({q['source_id'] for q in queued if q['source'] == source})
+                if not ids:
+                    continue
+                # Se lee el texto actual: si la nota se editó dos veces, se procesa una.
+                cur.execute(SOURCES[source].format(after='id = ANY(%(ids)s)'), {'ids': ids})
+                names = [d.name for d in cur.description]
+                rows = [dict(zip(names, r)) for r in cur.fetchall()]
+                for analyzed in analyze([rows], featurizer, weights):
+                    stats[source] += write_signals(cur, source, analyzed)
+        stats['queue'] += len(queued)
+    return stats
+
+
+# ── Notas sintéticas ────────────────────────────────────────
+
+# (fragmento, señales esperadas). Las notas combinan 1 a 3 fragmentos.
+# Frases escritas aparte de las que se usaron para ajustar LEXICON: miden
+# cómo generaliza, no cuánto se memorizó.
+FRAGMENTS = [
+    ('llevo días con la cabeza a mil por las entregas', {'stress'}),
+    ('la presión del cierre de mes me tiene mal', {'stress'}),
+    ('ansioso por la auditoría del jueves', {'stress'}),
+    ('se me juntaron tres urgentes y no llego', {'stress'}),
+    ('estoy saturado de pendientes', {'stress'}),
+    ('hoy amanecí exhausto', {'low_energy'}),
+    ('sin ganas de nada, muy desganado', {'low_energy'}),
+    ('me estoy quedando dormido en las reuniones, cero energía', {'low_energy'}),
+    ('fatiga acumulada de toda la semana', {'low_energy'}),
+    ('súper entusiasmado con el lanzamiento', {'high_energy'}),
+    ('fue un día muy productivo', {'high_energy'}),
+    ('feliz con lo que logramos', {'high_energy'}),
+    ('roces con el área de ventas por el presupuesto', {'conflict'}),
+    ('me gritó delante de todos y fue muy injusto', {'conflict', 'stress'}),
+    ('nos peleamos por quién se quedaba con el cliente', {'conflict'}),
+    ('desacuerdo fuerte con mi jefa sobre el plan', {'conflict'}),
+    ('no me siento cansado para nada', set()),
+    ('nunca tuve una discusión con ellos', set()),
+    ('sin conflictos con el equipo', set()),
+    ('revisé los tickets pendientes', set()),
+    ('armé el informe mensual', set()),
+    ('capacitación por la tarde', set()),
+]
+
+
+def synthetic_notes(n: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(n):
+        parts = rng.sample(FRAGMENTS, rng.choice((1, 1, 2, 3)))
+        text = ', '.join(p for p, _ in parts)
+        if rng.random() < 0.3:
+            text = text.capitalize() + '.'
+        yield text, set().union(*(s for _, s in parts))
+
+
+def run_synthetic(args, featurizer: Featurizer, weights: np.ndarray) -> dict:
+    notes = list(synthetic_notes(args.synthetic, args.seed))
+    t0 = time.perf_counter()
+    batches = ([{'text': t} for t, _ in notes[i:i + args.chunk]] for i in range(0, len(notes), args.chunk))
+    predicted = [r['signals'] for rows in analyze(batches, featurizer, weights) for r in rows]
+    elapsed = time.perf_counter() - t0
+    per_signal = {}
+    for name in ('stress', 'low_energy', 'high_energy', 'conflict'):
+        tp = fp = fn = 0
+        for (_, expected), got in zip(notes, predicted):
+            e, g = name in expected, name in got
+            tp += e and g
+            fp += g and not e
+            fn += e and not g
+        per_signal[name] = {'precision': round(tp / (tp + fp), 3) if tp + fp else None,
+                            'recall': round(tp / (tp + fn), 3) if tp + fn else None}
+    return {'notes': len(notes), 'seconds': round(elapsed, 2), 'notes_per_s': round(len(notes) / elapsed),
+            'vocabulary': len(featurizer._vocab), 'signals': per_signal}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Note Signals')
+    parser.add_argument('--backfill', action='store_true', help='Procesar todas las notas existentes')
+    parser.add_argument('--source', choices=('checkin', 'journal', 'all'), default='all')
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help='Notas por lote')
+    parser.add_argument('--synthetic', type=int, metavar='N', help='Solo el pipeline en memoria con N notas generadas')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='.tmp/note_signals_synthetic.json')
+    args = parser.parse_args()
+
+    featurizer, weights = Featurizer(), lexicon_weights()
+    t0 = time.perf_counter()
+    if args.synthetic:
+        result = run_synthetic(args, featurizer, weights)
+        print(f"🤖 {result['notes']:,} notas en {result['seconds']:.1f}s "
+              f"({result['notes_per_s']:,} notas/s, 1 core) · vocabulario {result['vocabulary']:,}")
+        for name, m in result['signals'].items():
+            print(f"   {name:<12} precisión {m['precision']} · recall {m['recall']}")
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps({'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                                   'model': MODEL, 'params': vars(args), **result}, indent=2), encoding='utf-8')
+        print(f"✅ Reporte → {out}")
+        return
+
+    from eneadisc_db import connect
+
+    with connect() as conn:
+        if args.backfill:
+            sources = list(SOURCES) if args.source == 'all' else [args.source]
+            stats = backfill(conn, sources, args.chunk, featurizer, weights)
+            total = sum(stats.values())
+            print(f"✅ Backfill: {total:,} notas ({', '.join(f'{s} {n:,}' for s, n in stats.items())}) "
+                  f"en {time.perf_counter() - t0:.1f}s")
+        else:
+            stats = refresh_incremental(conn, args.chunk, featurizer, weights)
+            print(f"✅ {stats['queue']:,} cambios procesados: {stats['checkin']:,} check-ins, "
+                  f"{stats['journal']:,} entradas de diario en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Notify Dispatcher
+Despachador asíncrono del outbox de notificaciones (Slack/Discord)
+
+/api/notify ya no postea: encola en `notification_outbox`
+(21_notification_outbox.sql). Este proceso:
+  • Toma lotes con FOR UPDATE SKIP LOCKED y un lease (`locked_until`),
+    así varios despachadores pueden correr en paralelo y un crash no
+    pierde mensajes: vencido el lease, la fila vuelve a la cola.
+  • Agrupa los mensajes de cada empresa en un único post "digest"
+    (partido en varios si supera el límite de caracteres del destino).
+    Lo entregado de un mensaje repartido en varios posts queda en
+    `sent_chars`: si un post posterior falla, el reintento no repite lo
+    que ya llegó.
+  • Respeta el rate limit de cada webhook con un token bucket por URL;
+    ante un 429 pausa ese bucket el tiempo de `Retry-After`.
+  • Reintenta 5xx y errores de red con backoff exponencial + jitter
+    (persistido en `next_attempt_at`); los 4xx son permanentes.
+  • Reutiliza conexiones HTTP/1.1 keep-alive por host (pool sobre
+    asyncio streams, sin dependencias nuevas).
+
+`simulate` corre todo contra un webhook local que imita latencia, rate
+limit y fallas de Slack/Discord, y lo compara con el envío en línea.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import ssl
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Misma detección que api/notify.ts: Slack usa {text}; Discord usa {content}.
+DISCORD_RE = re.compile(r'discord(app)?\.com')
+MAX_CHARS = {'slack': 4000, 'discord': 2000}
+# (tokens por segundo, ráfaga) documentados por cada servicio para un webhook.
+WEBHOOK_LIMITS = {'slack': (1.0, 3), 'discord': (2.5, 5)}
+DIGEST_SEP = '\n\n'
+HEADER_ROOM = 64
+
+CLAIM_SQL = """
+WITH due AS (
+  SELECT o.id FROM public.notification_outbox o
+  WHERE o.status IN ('pending', 'sending') AND o.next_attempt_at <= NOW()
+    AND (o.status = 'pending' OR o.locked_until < NOW())
+  ORDER BY o.next_attempt_at, o.id
+  LIMIT %(limit)s
+  FOR UPDATE SKIP LOCKED
+)
+UPDATE public.notification_outbox o
+SET status = 'sending', attempts = o.attempts + 1,
+    locked_until = NOW() + make_interval(secs => %(lease)s)
+FROM due, public.companies c
+WHERE o.id = due.id AND c.id = o.company_id
+RETURNING o.id, o.company_id, o.kind, o.text, o.sent_chars, o.attempts, c.notify_webhook_url AS url
+"""
+SENT_SQL = """
+UPDATE public.notification_outbox
+SET status = 'sent', sent_at = NOW(), locked_until = NULL, last_error = NULL
+WHERE id = ANY(%s)
+"""
+RETRY_SQL = """
+UPDATE public.notification_outbox o
+SET status = 'pending', locked_until = NULL, last_error = r.err, sent_chars = r.sent_chars,
+    next_attempt_at = NOW() + make_interval(secs => r.delay)
+FROM unnest(%s::bigint[], %s::float8[], %s::text[], %s::int[]) AS r(id, delay, err, sent_chars)
+WHERE o.id = r.id
+"""
+FAILED_SQL = """
+UPDATE public.notification_outbox o
+SET status = 'failed', locked_until = NULL, last_error = r.err
+FROM unnest(%s::bigint[], %s::text[]) AS r(id, err)
+WHERE o.id = r.id
+"""
+
+
+def flavor(url: str) -> str:
+    return 'discord' if DISCORD_RE.search(url) else 'slack'
+
+
+def pack_digest(rows: list, limit: int) -> list:
+    """Arma los posts de una empresa: [(texto, ids entregados, {id: sent_chars})].
+
+    Un solo mensaje va tal cual. Varios van bajo un encabezado común; si no
+    entran en `limit` caracteres se reparten en varios posts y un mensaje
+    más largo que el límite se corta en pedazos (queda entregado con el
+    último). El tercer elemento dice hasta qué carácter llegó, con ese
+    post, cada mensaje que sigue en el próximo. Cada mensaje arranca
+    desde su `sent_chars` (lo entregado en intentos anteriores).
+    """
+    pending = [(row['id'], row['text'], row.get('sent_chars') or 0) for row in rows]
+    if len(pending) == 1 and len(pending[0][1]) - pending[0][2] <= limit:
+        row_id, text, start = pending[0]
+        return [(text[start:], [row_id], {})]
+    step = limit - HEADER_ROOM
+    buf = [f'🔔 *EneaTeams* · {len(rows)} notificaciones']
+    parts, size, done, partial = [], len(buf[0]), [], {}
+    for row_id, text, start in pending:
+        for i in range(start, len(text), step):
+            piece = text[i:i + step]
+            if buf and size + len(DIGEST_SEP) + len(piece) > limit:
+                parts.append((DIGEST_SEP.join(buf), done, partial))
+                buf, size, done, partial = [], -len(DIGEST_SEP), [], {}
+            buf.append(piece)
+            size += len(DIGEST_SEP) + len(piece)
+            partial[row_id] = i + len(piece)
+        partial.pop(row_id, None)
+        done.append(row_id)
+    if buf:
+        parts.append((DIGEST_SEP.join(buf), done, partial))
+    return parts
+
+
+def _retry_after(headers: dict, body: bytes) -> float:
+    """Segundos de espera de un 429: header Retry-After o `retry_after` (Discord)."""
+    try:
+        return min(60.0, float(headers['retry-after']))
+    except (KeyError, ValueError):
+        pass
+    try:
+        return min(60.0, float(json.loads(body)['retry_after']))
+    except (ValueError, KeyError, TypeError):
+        return 1.0
+
+
+# ── HTTP ────────────────────────────────────────────────────
+
+class HttpPool:
+    """Conexiones HTTP/1.1 keep-alive reutilizables, hasta `max_per_host` por origen."""
+
+    def __init__(self, max_per_host: int = 4, timeout: float = 10.0):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._ssl = ssl.create_default_context()
+        self._idle = defaultdict(list)
+        self._slots = {}
+        self.opened = 0
+        self.requests = 0
+
+    async def _open(self, origin):
+        scheme, host, port = origin
+        self.opened += 1
+        return await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self._ssl if scheme == 'https' else None), self.timeout)
+
+    @staticmethod
+    async def _exchange(conn, request: bytes):
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('el servidor cerró la conexión')
+        version, status = status_line.split(None, 2)[:2]
+        status = int(status)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            k, _, v = line.decode('latin-1').partition(':')
+            headers[k.strip().lower()] = v.strip()
+        keep = version == b'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if status in (204, 304) or status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while size := int((await reader.readline()).split(b';')[0], 16):
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body, keep = await reader.read(), False
+        return status, headers, body, keep
+
+    async def post_json(self, url: str, payload: dict):
+        """POST JSON → (status, headers en minúscula, cuerpo)."""
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        request = (f'POST {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+                   f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+                   f'User-Agent: EneaTeams-Notify\r\n\r\n').encode('latin-1') + body
+        slot = self._slots.setdefault(origin, asyncio.Semaphore(self.max_per_host))
+        async with slot:
+            idle = self._idle[origin]
+            while True:
+                reused = bool(idle)
+                conn = idle.pop() if reused else await self._open(origin)
+                try:
+                    status, headers, data, keep = await asyncio.wait_for(
+                        self._exchange(conn, request), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    if reused:          # la conexión ociosa ya estaba muerta: otra vez con una nueva
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+                self.requests += 1
+                if keep:
+                    idle.append(conn)
+                else:
+                    conn[1].close()
+                return status, headers, data
+
+    def close(self):
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+
+
+class TokenBucket:
+    """`rate` posts por segundo con ráfaga `burst`; los que esperan salen en orden."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def block(self, seconds: float):
+        """429: nada sale por este webhook hasta que pase `seconds`."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+# ── Outbox ──────────────────────────────────────────────────
+
+class PostgresOutbox:
+    """Cola sobre public.notification_outbox (service role)."""
+
+    def __init__(self, url: str = None, lease: float = 600.0):
+        from eneadisc_db import connect
+        self.conn = connect(url, autocommit=True)
+        self.lease = lease
+
+    def claim(self, limit: int) -> list:
+        with self.conn.cursor() as cur:
+            cur.execute(CLAIM_SQL, {'limit': limit, 'lease': self.lease})
+            cols = [d.name for d in cur.description]
+            return sorted((dict(zip(cols, row)) for row in cur.fetchall()), key=lambda r: r['id'])
+
+    def complete(self, outcome: dict):
+        with self.conn.transaction(), self.conn.cursor() as cur:
+            if outcome['sent']:
+                cur.execute(SENT_SQL, (outcome['sent'],))
+            if outcome['retry']:
+                ids, delays, errors, sent_chars = zip(*outcome['retry'])
+                cur.execute(RETRY_SQL, (list(ids), list(delays), list(errors), list(sent_chars)))
+            if outcome['failed']:
+                ids, errors = zip(*outcome['failed'])
+                cur.execute(FAILED_SQL, (list(ids), list(errors)))
+
+    def close(self):
+        self.conn.close()
+
+
+class MemoryOutbox:
+    """Misma semántica que PostgresOutbox, en memoria (para `simulate`)."""
+
+    def __init__(self, lease: float = 600.0):
+        self.lease = lease
+        self.rows = {}
+        self._next_id = 1
+
+    def enqueue(self, company_id, url: str, text: str, kind: str = 'manual') -> int:
+        row_id, self._next_id = self._next_id, self._next_id + 1
+        self.rows[row_id] = {'id': row_id, 'company_id': company_id, 'kind': kind, 'text': text, 'url': url,
+                             'status': 'pending', 'attempts': 0, 'sent_chars': 0, 'next_attempt_at': 0.0,
+                             'locked_until': None, 'last_error': None}
+        return row_id
+
+    def claim(self, limit: int) -> list:
+        now = time.time()
+        due = [r for r in self.rows.values()
+               if r['next_attempt_at'] <= now
+               and (r['status'] == 'pending' or (r['status'] == 'sending' and r['locked_until'] < now))]
+        due.sort(key=lambda r: (r['next_attempt_at'], r['id']))
+        claimed = []
+        for r in due[:limit]:
+            r.update(status='sending', attempts=r['attempts'] + 1, locked_until=now + self.lease)
+            claimed.append({k: r[k] for k in ('id', 'company_id', 'kind', 'text', 'sent_chars', 'attempts', 'url')})
+        return sorted(claimed, key=lambda r: r['id'])
+
+    def complete(self, outcome: dict):
+        now = time.time()
+        for row_id in outcome['sent']:
+            self.rows[row_id].update(status='sent', locked_until=None, last_error=None)
+        for row_id, delay, error, sent_chars in outcome['retry']:
+            self.rows[row_id].update(status='pending', locked_until=None, last_error=error,
+                                     sent_chars=sent_chars, next_attempt_at=now + delay)
+        for row_id, error in outcome['failed']:
+            self.rows[row_id].update(status='failed', locked_until=None, last_error=error)
+
+    def pending(self) -> int:
+        return sum(r['status'] in ('pending', 'sending') for r in self.rows.values())
+
+    def close(self):
+        pass
+
+
+# ── Despachador ─────────────────────────────────────────────
+
+class NotifyDispatcher:
+    """Lotes del outbox → un digest por empresa, con rate limit y reintentos."""
+
+    def __init__(self, outbox, pool: HttpPool = None, limits: dict = None, concurrency: int = 32,
+                 max_attempts: int = 8, backoff_base: float = 5.0, backoff_cap: float = 900.0,
+                 max_rate_limited: int = 5, seed: int = None):
+        self.outbox = outbox
+        self.pool = pool or HttpPool()
+        self.limits = limits or WEBHOOK_LIMITS
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_rate_limited = max_rate_limited
+        self.rng = random.Random(seed)
+        self.buckets = {}
+        self.stats = Counter()
+
+    def bucket(self, url: str) -> TokenBucket:
+        if url not in self.buckets:
+            self.buckets[url] = TokenBucket(*self.limits[flavor(url)])
+        return self.buckets[url]
+
+    def backoff(self, attempts: int) -> float:
+        # Exponencial con "full jitter": los reintentos de una ola no llegan juntos.
+        ceiling = min(self.backoff_cap, self.backoff_base * 2 ** (attempts - 1))
+        return self.rng.uniform(ceiling / 2, ceiling)
+
+    async def _post(self, url: str, payload: dict):
+        """(error, permanente); error None si el webhook aceptó el post."""
+        bucket = self.bucket(url)
+        for _ in range(self.max_rate_limited + 1):
+            await bucket.acquire()
+            try:
+                status, headers, body = await self.pool.post_json(url, payload)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                self.stats['network_errors'] += 1
+                return f'{type(e).__name__}: {e}', False
+            if status < 300:
+                self.stats['posts'] += 1
+                return None, False
+            if status == 429:
+                self.stats['rate_limited'] += 1
+                bucket.block(_retry_after(headers, body))
+                continue
+            self.stats[f'http_{status}'] += 1
+            error = f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}"
+            return error, 400 <= status < 500 and status != 408
+        return 'HTTP 429 persistente', False
+
+    async def _deliver(self, url: str, rows: list, outcome: dict):
+        if not url:
+            outcome['failed'] += [(r['id'], 'Webhook no configurado') for r in rows]
+            return
+        kind = flavor(url)
+        delivered = set()
+        progress = {r['id']: r.get('sent_chars') or 0 for r in rows}
+        for text, done, partial in pack_digest(rows, MAX_CHARS[kind]):
+            payload = {'content': text} if kind == 'discord' else {'text': text}
+            error, permanent = await self._post(url, payload)
+            if error:
+                for r in rows:
+                    if r['id'] in delivered:
+                        continue
+                    if permanent or r['attempts'] >= self.max_attempts:
+                        outcome['failed'].append((r['id'], error))
+                    else:
+                        outcome['retry'].append((r['id'], self.backoff(r['attempts']), error, progress[r['id']]))
+                        self.stats['retries'] += 1
+                return
+            outcome['sent'] += done
+            delivered.update(done)
+            progress.update(partial)
+
+    async def run_once(self, batch: int = 2000) -> int:
+        """Despacha un lote; devuelve cuántos mensajes tomó del outbox."""
+        rows = await asyncio.to_thread(self.outbox.claim, batch)
+        if not rows:
+            return 0
+        groups = defaultdict(list)
+        for r in rows:
+            groups[(r['company_id'], r['url'])].append(r)
+        outcome = {'sent': [], 'retry': [], 'failed': []}
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(url, items):
+            async with slots:
+                await self._deliver(url, items, outcome)
+
+        await asyncio.gather(*(deliver(url, items) for (_, url), items in groups.items()))
+        await asyncio.to_thread(self.outbox.complete, outcome)
+        self.stats['messages'] += len(outcome['sent'])
+        self.stats['failed'] += len(outcome['failed'])
+        self.stats['digests'] += len(groups)
+        return len(rows)
+
+    async def run(self, batch: int = 2000, interval: float = 2.0, once: bool = False):
+        while True:
+            taken = await self.run_once(batch)
+            if once:
+                return
+            if taken < batch:
+                await asyncio.sleep(interval)
+
+
+# ── Webhook local (stand-in de Slack/Discord) ───────────────
+
+class StandInWebhook:
+    """Imita un webhook: latencia, rate limit por URL (429 + Retry-After) y 5xx al azar.
+
+    Las URLs con `discord.com` en el path se comportan como Discord
+    ({content}, 2000 caracteres, `retry_after` en el cuerpo); el resto como
+    Slack ({text}). Guarda lo recibido por URL para verificar la entrega.
+    """
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0, limits: dict = None, seed: int = 42):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.limits = limits or WEBHOOK_LIMITS
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.received = defaultdict(list)
+        self.counts = Counter()
+
+    def _allow(self, path: str, kind: str) -> float:
+        """0 si el post entra en el límite; si no, segundos hasta el próximo token."""
+        rate, burst = self.limits[kind]
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(path, (float(burst), now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self.buckets[path] = (tokens, now)
+            return (1 - tokens) / rate
+        self.buckets[path] = (tokens - 1, now)
+        return 0.0
+
+    def handle(self, path: str, raw: bytes):
+        kind = flavor(path)
+        with self.lock:
+            self.counts['requests'] += 1
+            wait = self._allow(path, kind)
+            fail = self.rng.random() < self.error_rate
+        time.sleep(self.latency)
+        if wait:
+            with self.lock:
+                self.counts['429'] += 1
+            body = json.dumps({'retry_after': round(wait, 3)}).encode() if kind == 'discord' else b'rate_limited'
+            return 429, {'Retry-After': f'{wait:.3f}'}, body
+        if fail:
+            with self.lock:
+                self.counts['5xx'] += 1
+            return 503, {}, b'service_unavailable'
+        try:
+            text = json.loads(raw)['content' if kind == 'discord' else 'text']
+        except (ValueError, KeyError):
+            return 400, {}, b'invalid_payload'
+        if len(text) > MAX_CHARS[kind]:
+            return 400, {}, b'msg_too_long'
+        with self.lock:
+            self.counts['accepted'] += 1
+            self.received[path].append(text)
+        return (204, {}, b'') if kind == 'discord' else (200, {}, b'ok')
+
+    def serve(self, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+        hook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status, headers, body = hook.handle(self.path, raw)
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# ── Simulación ──────────────────────────────────────────────
+
+MARK_RE = re.compile(r'\[#(\d+)\]')
+
+
+def _wave(outbox: MemoryOutbox, base_url: str, companies: int, messages: int,
+          discord_share: float, seed: int) -> list:
+    """Ola de alertas de burnout: `messages` repartidos al azar entre empresas."""
+    rng = random.Random(seed)
+    urls = [f'{base_url}/discord.com/api/webhooks/{c}' if rng.random() < discord_share
+            else f'{base_url}/services/T{c:05d}' for c in range(companies)]
+    sent = []
+    for _ in range(messages):
+        c = rng.randrange(companies)
+        row_id = outbox._next_id
+        detail = ' · '.join(f'estrés {rng.randint(4, 5)}/5 hace {d} días' for d in range(rng.choice((1, 3, 60))))
+        outbox.enqueue(f'company-{c}', urls[c], f'[#{row_id}] ⚠️ Alerta de burnout — {detail}', 'burnout_alert')
+        sent.append((row_id, urls[c]))
+    return sent
+
+
+def _delivered(hook: StandInWebhook) -> Counter:
+    return Counter(int(m) for texts in hook.received.values() for t in texts for m in MARK_RE.findall(t))
+
+
+async def _inline(pool: HttpPool, wave: list, outbox: MemoryOutbox, concurrency: int):
+    """Como el /api/notify anterior: un post por mensaje, sin digest, límite ni reintento."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def post(row_id, url):
+        payload = {'content' if flavor(url) == 'discord' else 'text': outbox.rows[row_id]['text']}
+        async with slots:
+            try:
+                await pool.post_json(url, payload)
+            except (OSError, asyncio.TimeoutError):
+                pass
+
+    await asyncio.gather(*(post(row_id, url) for row_id, url in wave))
+
+
+async def _drain(dispatcher: NotifyDispatcher, outbox: MemoryOutbox, batch: int, interval: float):
+    while outbox.pending():
+        if await dispatcher.run_once(batch) < batch:
+            await asyncio.sleep(interval)
+
+
+async def _closing(pool: HttpPool, coro):
+    # Los transports se cierran dentro del loop que los creó.
+    try:
+        await coro
+    finally:
+        pool.close()
+
+
+def simulate(companies: int, messages: int, discord_share: float, latency: float, error_rate: float,
+             batch: int, concurrency: int, backoff_base: float, seed: int):
+    print(f"🔔 Ola de {messages:,} alertas sobre {companies:,} empresas "
+          f"(latencia {latency * 1000:.0f}ms, {error_rate:.0%} de 5xx)")
+    for label in ('en línea (anterior)', 'outbox + dispatcher'):
+        hook = StandInWebhook(latency=latency, error_rate=error_rate, seed=seed)
+        server = hook.serve()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        outbox = MemoryOutbox()
+        wave = _wave(outbox, base_url, companies, messages, discord_share, seed)
+        pool = HttpPool(max_per_host=concurrency)
+        t0 = time.perf_counter()
+        if label.startswith('en línea'):
+            asyncio.run(_closing(pool, _inline(pool, wave, outbox, concurrency)))
+            stats = Counter()
+        else:
+            dispatcher = NotifyDispatcher(outbox, pool, concurrency=concurrency,
+                                          backoff_base=backoff_base, seed=seed)
+            asyncio.run(_closing(pool, _drain(dispatcher, outbox, batch, backoff_base / 4)))
+            stats = dispatcher.stats
+        elapsed = time.perf_counter() - t0
+        server.shutdown()
+        got = _delivered(hook)
+        lost = sum(1 for row_id, _ in wave if not got[row_id])
+        dup = sum(n - 1 for n in got.values() if n > 1)
+        print(f"   {label:<22}{elapsed:>7.2f}s · posts aceptados={hook.counts['accepted']:,} "
+              f"429={hook.counts['429']:,} 5xx={hook.counts['5xx']:,} · conexiones={pool.opened:,}/{pool.requests:,} req "
+              f"· perdidos={lost:,} duplicados={dup:,}")
+        if stats:
+            print(f"   {'':<22}digests={stats['digests']:,} reintentos={stats['retries']:,} "
+                  f"fallidos={stats['failed']:,} · {messages / max(1, hook.counts['accepted']):.1f} mensajes/post")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Notify Dispatcher (outbox → Slack/Discord)')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_run = sub.add_parser('run', help='Despachar el outbox de Postgres')
+    p_run.add_argument('--batch', type=int, default=2000, help='Mensajes por lote')
+    p_run.add_argument('--interval', type=float, default=2.0, help='Segundos entre lotes con la cola vacía')
+    p_run.add_argument('--concurrency', type=int, default=32, help='Webhooks en paralelo')
+    p_run.add_argument('--max-attempts', type=int, default=8)
+    p_run.add_argument('--lease', type=float, default=600.0, help='Segundos antes de re-tomar un lote en vuelo')
+    p_run.add_argument('--once', action='store_true', help='Un solo lote y salir')
+    p_sim = sub.add_parser('simulate', help='Ola de alertas contra un webhook local')
+    p_sim.add_argument('--companies', type=int, default=200)
+    p_sim.add_argument('--messages', type=int, default=3000)
+    p_sim.add_argument('--discord-share', type=float, default=0.3, help='Fracción de webhooks Discord')
+    p_sim.add_argument('--latency-ms', type=float, default=50.0)
+    p_sim.add_argument('--error-rate', type=float, default=0.05, help='Probabilidad de 503 por post')
+    p_sim.add_argument('--batch', type=int, default=2000)
+    p_sim.add_argument('--concurrency', type=int, default=32)
+    p_sim.add_argument('--backoff-base', type=float, default=0.5)
+    p_sim.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.cmd == 'simulate':
+        simulate(args.companies, args.messages, args.discord_share, args.latency_ms / 1000, args.error_rate,
+                 args.batch, args.concurrency, args.backoff_base, args.seed)
+        return
+    outbox = PostgresOutbox(lease=args.lease)
+    dispatcher = NotifyDispatcher(outbox, concurrency=args.concurrency, max_attempts=args.max_attempts)
+    try:
+        asyncio.run(_closing(dispatcher.pool, dispatcher.run(args.batch, args.interval, args.once)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        outbox.close()
+        print(f"✅ {dict(dispatcher.stats)}")
+
+
+if __name__ == '__main__':
+    main()
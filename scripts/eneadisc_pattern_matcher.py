@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Pattern Matcher
+Distancia coseno entre perfiles de 9 dimensiones: parecidos, patrón más cercano y reemplazos
+
+Implementa el "Pattern Matching" de eneadisc_ai_engine_architect.py sobre
+los `scores` que ya deja calculateEnneagram (enneagram_result_<id>) o
+eneadisc_scoring_engine.py:
+
+  vectores  cada perfil se centra (resta su media) y se normaliza a norma 1.
+            Los puntajes son conteos positivos: sin centrar, todos los
+            perfiles quedan en el mismo octante y el coseno entre dos
+            cualesquiera supera 0.8. Centrado, el coseno es la correlación.
+  índice    una matriz float32 contigua (n x 9), ordenada por empresa: la
+            consulta de una empresa es un slice sin copia y un producto
+            matriz-vector. Los equipos se guardan como CSR (filas por equipo).
+  patrones  los 18 patrones tipo+ala (1w9, 1w2, ..., 9w1) con el mismo
+            centrado. Confianza = coseno del mejor menos el del mejor patrón
+            con otro eneatipo central.
+  top-k     argpartition + orden solo de los k elegidos.
+
+El índice se arma una vez (--index lo guarda en .npz) y responde
+--similar, --pattern y --replace; --benchmark N mide con perfiles sintéticos.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+N_TYPES = 9
+WING_WEIGHT = 0.5
+DEFAULT_TOP_K = 10
+NO_COMPANY = ''
+
+
+def _wing_patterns() -> tuple:
+    names, rows = [], []
+    for core in range(1, N_TYPES + 1):
+        for wing in (core - 1 or N_TYPES, core % N_TYPES + 1):
+            vec = np.zeros(N_TYPES)
+            vec[core - 1], vec[wing - 1] = 1.0, WING_WEIGHT
+            names.append(f'{core}w{wing}')
+            rows.append(vec)
+    return names, normalize(np.array(rows))
+
+
+def normalize(scores) -> np.ndarray:
+    """(n x 9) → float32 C-contigua, centrada y de norma 1. Un perfil plano queda en 0."""
+    mat = np.asarray(scores, dtype=np.float64).reshape(-1, N_TYPES)
+    mat = mat - mat.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    np.divide(mat, norms, out=mat, where=norms > 1e-9)
+    mat[norms[:, 0] <= 1e-9] = 0.0
+    return np.ascontiguousarray(mat, dtype=np.float32)
+
+
+PATTERN_NAMES, PATTERNS = _wing_patterns()
+PATTERN_CORE = np.array([int(name[0]) for name in PATTERN_NAMES])
+
+
+def scores_vector(scores) -> list:
+    """{"1": 3, ..., "9": 1} (o lista de 9) → lista en orden 1..9."""
+    if isinstance(scores, dict):
+        return [float(scores.get(str(t), scores.get(t, 0)) or 0) for t in range(1, N_TYPES + 1)]
+    return [float(s) for s in scores]
+
+
+def top_k(sims: np.ndarray, k: int) -> np.ndarray:
+    """Índices de las k similitudes mayores, ordenados (empate: índice menor)."""
+    k = min(k, sims.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < sims.size:
+        idx = np.argpartition(-sims, k - 1)[:k]
+    else:
+        idx = np.arange(sims.size)
+    return idx[np.lexsort((idx, -sims[idx]))]
+
+
+def match_patterns(vectors: np.ndarray) -> dict:
+    """Patrón más cercano de cada fila, vectorizado sobre toda la matriz."""
+    sims = vectors @ PATTERNS.T                                   # (n x 18)
+    best = sims.argmax(axis=1)
+    rows = np.arange(len(sims))
+    other_core = PATTERN_CORE[None, :] != PATTERN_CORE[best][:, None]
+    runner_up = np.where(other_core, sims, -np.inf).argmax(axis=1)
+    flat = ~vectors.any(axis=1)
+    return {
+        'pattern': best, 'similarity': sims[rows, best],
+        'runner_up': runner_up, 'confidence': np.where(flat, 0.0, sims[rows, best] - sims[rows, runner_up]),
+        'flat': flat,
+    }
+
+
+class ProfileIndex:
+    def __init__(self, user_ids, vectors, primary, companies, team_ids, team_offsets, team_rows):
+        self.user_ids = np.asarray(user_ids)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.primary = np.asarray(primary, dtype=np.int8)
+        self.companies = np.asarray(companies)
+        self.team_ids = np.asarray(team_ids)
+        self.team_offsets = np.asarray(team_offsets, dtype=np.int64)
+        self.team_rows = np.asarray(team_rows, dtype=np.int64)
+        self._row = {uid: i for i, uid in enumerate(self.user_ids.tolist())}
+        self._team = {tid: i for i, tid in enumerate(self.team_ids.tolist())}
+        # Filas ordenadas por empresa: cada empresa es un rango [start, stop).
+        names, starts = np.unique(self.companies, return_index=True)
+        stops = np.append(starts[1:], len(self.companies)) if len(starts) else starts
+        order = np.argsort(starts)
+        self._slices = {str(names[i]): (int(starts[i]), int(stops[i])) for i in order}
+        # Equipos de cada fila (para excluir al equipo propio en un reemplazo).
+        counts = np.diff(self.team_offsets)
+        self._row_teams = {}
+        for t, row in zip(np.repeat(np.arange(len(self.team_ids)), counts), self.team_rows):
+            self._row_teams.setdefault(int(row), []).append(int(t))
+
+    @classmethod
+    def from_records(cls, records: list) -> 'ProfileIndex':
+        """Registros {user_id, scores, company_id?, team_ids?}; sin scores o sin puntaje se descartan."""
+        kept = []
+        for r in records:
+            vec = scores_vector(r.get('scores') or [])
+            if len(vec) == N_TYPES and any(vec):
+                kept.append((str(r.get('company_id') or NO_COMPANY), str(r['user_id']), vec, r.get('team_ids') or []))
+        kept.sort(key=lambda k: (k[0], k[1]))
+        raw = np.array([k[2] for k in kept], dtype=np.float64).reshape(-1, N_TYPES)
+        # Igual que calculateEnneagram: ante empate gana el tipo de menor número.
+        primary = raw.argmax(axis=1) + 1 if len(raw) else np.empty(0, dtype=np.int64)
+        members = {}
+        for row, k in enumerate(kept):
+            for team in k[3]:
+                members.setdefault(str(team), []).append(row)
+        team_ids = sorted(members)
+        offsets = np.cumsum([0] + [len(members[t]) for t in team_ids])
+        rows = [row for t in team_ids for row in members[t]]
+        return cls([k[1] for k in kept], normalize(raw), primary, [k[0] for k in kept], team_ids, offsets, rows)
+
+    def save(self, path):
+        np.savez(path, user_ids=self.user_ids, vectors=self.vectors, primary=self.primary,
+                 companies=self.companies, team_ids=self.team_ids, team_offsets=self.team_offsets,
+                 team_rows=self.team_rows)
+
+    @classmethod
+    def load(cls, path) -> 'ProfileIndex':
+        with np.load(path) as data:
+            return cls(data['user_ids'], data['vectors'], data['primary'], data['companies'],
+                       data['team_ids'], data['team_offsets'], data['team_rows'])
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    # ── Consultas ───────────────────────────────────────────
+
+    def row(self, user_id: str) -> int:
+        if user_id not in self._row:
+            raise KeyError(f'{user_id} no tiene perfil en el índice')
+        return self._row[user_id]
+
+    def team_members(self, team_id: str) -> np.ndarray:
+        t = self._team.get(team_id)
+        if t is None:
+            return np.empty(0, dtype=np.int64)
+        return self.team_rows[self.team_offsets[t]:self.team_offsets[t + 1]]
+
+    def _scope(self, row: int, scope: str) -> tuple:
+        if scope == 'all':
+            return 0, len(self)
+        return self._slices[str(self.companies[row])]
+
+    def _ranked(self, row: int, scope: str, k: int, exclude=()) -> list:
+        start, stop = self._scope(row, scope)
+        sims = self.vectors[start:stop] @ self.vectors[row]
+        exclude = np.append(np.asarray(exclude, dtype=np.int64), row)
+        exclude = exclude[(exclude >= start) & (exclude < stop)]
+        sims[exclude - start] = -np.inf
+        idx = top_k(sims, k)
+        idx = idx[np.isfinite(sims[idx])]
+        return [{'user_id': str(self.user_ids[start + i]), 'similarity': round(float(sims[i]), 4),
+                 'primary_type': int(self.primary[start + i])} for i in idx]
+
+    def similar(self, user_id: str, k: int = DEFAULT_TOP_K, scope: str = 'company') -> list:
+        """Las k personas con el perfil más parecido (en su empresa, o en todo el índice)."""
+        return self._ranked(self.row(user_id), scope, k)
+
+    def replacement(self, user_id: str, k: int = DEFAULT_TOP_K, team_id: str = None) -> list:
+        """Candidatos de la misma empresa para cubrir a quien se va, fuera de su equipo.
+
+        Con `team_id` se excluye solo ese equipo; si no, todos los equipos de la persona.
+        """
+        row = self.row(user_id)
+        teams = [team_id] if team_id else [str(self.team_ids[t]) for t in self._row_teams.get(row, [])]
+        exclude = [self.team_members(t) for t in teams]
+        return self._ranked(row, 'company', k, np.concatenate(exclude) if exclude else ())
+
+    def patterns(self, user_ids=None) -> list:
+        rows = np.arange(len(self)) if user_ids is None else np.array([self.row(u) for u in user_ids], dtype=np.int64)
+        m = match_patterns(self.vectors[rows])
+        return [{'user_id': str(self.user_ids[r]), 'primary_type': int(self.primary[r]),
+                 'pattern': None if flat else PATTERN_NAMES[p],
+                 'similarity': round(float(s), 4), 'runner_up': None if flat else PATTERN_NAMES[ru],
+                 'confidence': round(float(c), 4)}
+                for r, p, s, ru, c, flat in zip(rows, m['pattern'], m['similarity'], m['runner_up'],
+                                                m['confidence'], m['flat'])]
+
+
+# ── Benchmark ───────────────────────────────────────────────
+
+def synthetic_records(n: int, companies: int, team_size: int, answers: int, seed: int) -> tuple:
+    """Perfiles con núcleo y ala conocidos: `answers` respuestas multinomiales sesgadas."""
+    rng = np.random.default_rng(seed)
+    core = rng.integers(1, N_TYPES + 1, size=n)
+    wing = np.where(rng.random(n) < 0.5, (core - 2) % N_TYPES + 1, core % N_TYPES + 1)
+    probs = np.full((n, N_TYPES), 0.4)
+    probs[np.arange(n), core - 1] = 3.0
+    probs[np.arange(n), wing - 1] = 1.4
+    probs /= probs.sum(axis=1, keepdims=True)
+    scores = np.array([rng.multinomial(answers, p) for p in probs])
+    company = rng.integers(0, companies, size=n)
+    records = [{'user_id': f'u{i:07d}', 'scores': scores[i].tolist(), 'company_id': f'c{company[i]:04d}',
+                'team_ids': [f'c{company[i]:04d}-t{i // team_size:06d}']} for i in range(n)]
+    return records, core
+
+
+def _benchmark(args) -> dict:
+    records, core = synthetic_records(args.benchmark, args.companies, args.team_size, args.answers, args.seed)
+    t0 = time.perf_counter()
+    index = ProfileIndex.from_records(records)
+    build_s = time.perf_counter() - t0
+
+    rng = np.random.default_rng(args.seed + 1)
+    queries = [str(index.user_ids[i]) for i in rng.integers(0, len(index), size=args.queries)]
+    timings = {}
+    for name, fn in (('similar', lambda u: index.similar(u, args.top_k)),
+                     ('replace', lambda u: index.replacement(u, args.top_k)),
+                     ('pattern', lambda u: index.patterns([u]))):
+        lat = []
+        for uid in queries:
+            s = time.perf_counter()
+            fn(uid)
+            lat.append((time.perf_counter() - s) * 1000)
+        timings[name] = {'p50_ms': round(float(np.percentile(lat, 50)), 3),
+                         'p99_ms': round(float(np.percentile(lat, 99)), 3)}
+
+    t0 = time.perf_counter()
+    m = match_patterns(index.vectors)
+    batch_s = time.perf_counter() - t0
+    truth = core[[int(u[1:]) for u in index.user_ids.tolist()]]
+    pattern_core = PATTERN_CORE[m['pattern']]
+    return {
+        'profiles': len(index), 'companies': len(index._slices), 'teams': len(index.team_ids),
+        'largest_company': max(stop - start for start, stop in index._slices.values()),
+        'build_s': round(build_s, 3), 'index_mb': round(index.vectors.nbytes / 1e6, 2),
+        'queries': args.queries, 'top_k': args.top_k, 'latency': timings,
+        'batch_patterns_s': round(batch_s, 4),
+        'pattern_core_accuracy': round(float((pattern_core == truth).mean()), 4),
+        'argmax_accuracy': round(float((index.primary == truth).mean()), 4),
+        'low_confidence_share': round(float((m['confidence'] < 0.1).mean()), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Pattern Matcher')
+    parser.add_argument('--input', help='JSONL {user_id, scores, company_id?, team_ids?} (p. ej. salida del scoring engine)')
+    parser.add_argument('--index', help='Índice .npz: se guarda si hay --input, se carga si no')
+    parser.add_argument('--similar', metavar='USER_ID', help='Perfiles más parecidos')
+    parser.add_argument('--scope', choices=('company', 'all'), default='company')
+    parser.add_argument('--pattern', metavar='USER_ID', nargs='*', help='Patrón más cercano (sin ids: todos)')
+    parser.add_argument('--replace', metavar='USER_ID', help='Reemplazos para quien deja su equipo')
+    parser.add_argument('--team', help='Con --replace: equipo que queda incompleto')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K)
+    parser.add_argument('--benchmark', type=int, default=0, help='Perfiles sintéticos')
+    parser.add_argument('--companies', type=int, default=1)
+    parser.add_argument('--team-size', type=int, default=8)
+    parser.add_argument('--answers', type=int, default=36, help='Respuestas por perfil sintético')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='.tmp/pattern_matcher.json')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        report = _benchmark(args)
+        print(f"🤖 {report['profiles']:,} perfiles · empresa más grande {report['largest_company']:,} · "
+              f"índice {report['index_mb']} MB armado en {report['build_s']}s")
+        for name, lat in report['latency'].items():
+            print(f"   {name:<8} p50 {lat['p50_ms']:.3f} ms · p99 {lat['p99_ms']:.3f} ms")
+        print(f"   patrones de todo el índice en {report['batch_patterns_s'] * 1000:.1f} ms · "
+              f"núcleo correcto {report['pattern_core_accuracy']:.1%} (argmax {report['argmax_accuracy']:.1%})")
+        result = report
+    else:
+        if args.input:
+            with open(args.input, encoding='utf-8') as fh:
+                index = ProfileIndex.from_records([json.loads(line) for line in fh if line.strip()])
+            if args.index:
+                index.save(args.index)
+                print(f"✅ Índice de {len(index):,} perfiles → {args.index}")
+        elif args.index:
+            index = ProfileIndex.load(args.index)
+        else:
+            parser.error('--input o --index es requerido (o usar --benchmark)')
+        result = {}
+        if args.similar:
+            result['similar'] = index.similar(args.similar, args.top_k, args.scope)
+        if args.replace:
+            result['replace'] = index.replacement(args.replace, args.top_k, args.team)
+        if args.pattern is not None:
+            result['patterns'] = index.patterns(args.pattern or None)
+        if not result:
+            return
+        print(json.dumps(result, ensure_ascii=False, indent=2)[:2000])
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
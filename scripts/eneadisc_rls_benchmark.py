@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+ENEADISC RLS Benchmark
+Costo de las policies antes/después de 29_jwt_claims.sql (claims en el JWT)
+
+Corre contra un Postgres local con el esquema de supabase_migration/
+(`supabase start` + migraciones 01..28, sin la 29). Cada query se corre
+como `authenticated` con los claims de una persona (admin, supervisor,
+empleado) en tres fases:
+
+  before → policies actuales (lookup en profiles/teams por fila)
+  claims → 29 aplicada; claims que devuelve custom_access_token_hook
+  stale  → 29 aplicada; token sin claims_version (camino de fallback)
+
+La 29 se aplica dentro de una transacción que se revierte al final, así
+que la base queda como estaba. Las filas visibles deben coincidir en las
+tres fases: una diferencia es un cambio de semántica de la RLS.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from eneadisc_db import connect
+from eneadisc_index_benchmark import seed
+
+MIGRATION = Path(__file__).resolve().parent.parent / 'supabase_migration' / '29_jwt_claims.sql'
+
+# El seed de eneadisc_index_benchmark no tiene supervisores: el primer
+# miembro de cada equipo pasa a liderarlo.
+SUPERVISOR_SQL = """
+UPDATE public.teams t SET lead_id = s.user_id
+FROM (SELECT DISTINCT ON (team_id) team_id, user_id FROM public.team_members
+      ORDER BY team_id, user_id) s
+WHERE t.id = s.team_id AND t.lead_id IS NULL;
+UPDATE public.profiles p SET role = 'supervisor'
+FROM public.teams t WHERE t.lead_id = p.id AND p.role = 'employee';
+"""
+
+QUERIES = [
+    {
+        'name': 'admin_checkins',
+        'desc': 'Check-ins visibles para el admin (checkins_admin_read por fila)',
+        'sql': 'SELECT id, energy FROM public.checkins',
+        'as': 'admin',
+    },
+    {
+        'name': 'admin_checkins_window',
+        'desc': 'Bienestar por persona, últimos N días (dashboard del admin)',
+        'sql': """SELECT user_id, avg(energy), avg(stress) FROM public.checkins
+                  WHERE date >= %(since)s GROUP BY user_id""",
+        'as': 'admin',
+    },
+    {
+        'name': 'admin_tasks',
+        'desc': 'Tareas de los equipos de la empresa (tasks_select)',
+        'sql': 'SELECT id, status FROM public.tasks',
+        'as': 'admin',
+    },
+    {
+        'name': 'admin_profiles',
+        'desc': 'Perfiles de la empresa (profiles_admin_read)',
+        'sql': 'SELECT id, full_name, role FROM public.profiles',
+        'as': 'admin',
+    },
+    {
+        'name': 'supervisor_tasks',
+        'desc': 'Tareas de la gente que superviso (tasks_supervisor_select)',
+        'sql': 'SELECT id, status, user_id FROM public.tasks',
+        'as': 'supervisor',
+    },
+    {
+        'name': 'employee_tasks',
+        'desc': 'Tareas propias y de mis equipos (tasks_select)',
+        'sql': 'SELECT id, status FROM public.tasks',
+        'as': 'employee',
+    },
+    {
+        'name': 'employee_team_members',
+        'desc': 'Miembros de los equipos de mi empresa (team_members_select)',
+        'sql': 'SELECT team_id, user_id FROM public.team_members',
+        'as': 'employee',
+    },
+]
+
+
+def pick_personas(cur) -> dict:
+    """Admin, supervisor y empleado de la empresa con más check-ins."""
+    cur.execute("""
+        SELECT p.company_id FROM public.checkins c JOIN public.profiles p ON p.id = c.user_id
+        WHERE p.company_id IS NOT NULL
+        GROUP BY p.company_id ORDER BY count(*) DESC, p.company_id LIMIT 1
+    """)
+    row = cur.fetchone()
+    if row is None:
+        raise RuntimeError('La base no tiene check-ins: correr con --seed primero')
+    company = row[0]
+    personas = {}
+    for persona, role in (('admin', 'company_admin'), ('supervisor', 'supervisor'), ('employee', 'employee')):
+        cur.execute("""SELECT p.id::text FROM public.profiles p
+                       WHERE p.company_id = %s AND p.role = %s
+                         AND (p.role = 'company_admin' OR EXISTS (
+                               SELECT 1 FROM public.team_members tm WHERE tm.user_id = p.id))
+                       ORDER BY p.id LIMIT 1""", (company, role))
+        row = cur.fetchone()
+        if row is None:
+            raise RuntimeError(f'La empresa {company} no tiene {role}: correr con --seed')
+        personas[persona] = row[0]
+    return personas
+
+
+def _nodes(plan: dict) -> list:
+    """Tipos de nodo del plan, marcando InitPlan/SubPlan."""
+    label = plan['Node Type']
+    if 'Index Name' in plan:
+        label += f" ({plan['Index Name']})"
+    if 'Subplan Name' in plan:
+        label = f"{plan['Subplan Name'].split(' (')[0]}: {label}"
+    out = [label]
+    for child in plan.get('Plans', []):
+        out.extend(_nodes(child))
+    return out
+
+
+def claims_for(cur, user_id: str, phase: str) -> dict:
+    base = {'sub': user_id, 'role': 'authenticated'}
+    if phase != 'claims':
+        return base
+    cur.execute("SELECT public.custom_access_token_hook(jsonb_build_object('user_id', %s::uuid, 'claims', %s::jsonb))",
+                (user_id, json.dumps(base)))
+    return cur.fetchone()[0]['claims']
+
+
+def explain(cur, query: dict, params: dict, claims: dict, repeat: int) -> dict:
+    cur.execute('SET ROLE authenticated')
+    cur.execute("SELECT set_config('request.jwt.claims', %s, true)", (json.dumps(claims),))
+    try:
+        timings = []
+        plan = None
+        for _ in range(repeat + 1):      # la primera corrida calienta caché
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query['sql']}", params)
+            plan = cur.fetchone()[0][0]
+            timings.append(plan['Execution Time'])
+    finally:
+        cur.execute('RESET ROLE')
+    root = plan['Plan']
+    return {
+        'execution_ms': round(statistics.median(timings[1:]), 3),
+        'rows': root['Actual Rows'],
+        'buffers': root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0),
+        'nodes': _nodes(root),
+    }
+
+
+def run_phase(conn, phase: str, personas: dict, params: dict, repeat: int) -> dict:
+    results = {}
+    with conn.transaction(force_rollback=True), conn.cursor() as cur:
+        if phase != 'before':
+            cur.execute(MIGRATION.read_text(encoding='utf-8'))
+        claims = {p: claims_for(cur, uid, phase) for p, uid in personas.items()}
+        for q in QUERIES:
+            results[q['name']] = explain(cur, q, params, claims[q['as']], repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC RLS Benchmark (policies con claims JWT)')
+    parser.add_argument('--seed', action='store_true', help='Cargar datos sintéticos antes de medir')
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--employees', type=int, default=50, help='Empleados por empresa')
+    parser.add_argument('--teams', type=int, default=5, help='Equipos por empresa')
+    parser.add_argument('--days', type=int, default=180, help='Días de historial')
+    parser.add_argument('--tasks', type=int, default=30, help='Tareas por miembro')
+    parser.add_argument('--repeat', type=int, default=5, help='Corridas por query (se toma la mediana)')
+    parser.add_argument('--output', default='.tmp/rls_benchmark.json', help='Reporte JSON')
+    args = parser.parse_args()
+
+    with connect(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regprocedure('public.custom_access_token_hook(jsonb)') IS NOT NULL")
+            if cur.fetchone()[0]:
+                raise RuntimeError('La base ya tiene 29_jwt_claims.sql: medir sobre una base 01..28')
+        if args.seed:
+            t0 = time.perf_counter()
+            seed(conn, args.companies, args.employees, args.teams, args.days, args.tasks)
+            with conn.transaction(), conn.cursor() as cur:
+                cur.execute(SUPERVISOR_SQL)
+                cur.execute('ANALYZE')
+            print(f"🌱 Seed cargado en {time.perf_counter() - t0:.1f}s")
+        with conn.cursor() as cur:
+            personas = pick_personas(cur)
+            cur.execute("SELECT NOW() - interval '30 days'")
+            params = {'since': cur.fetchone()[0]}
+        phases = {phase: run_phase(conn, phase, personas, params, args.repeat)
+                  for phase in ('before', 'claims', 'stale')}
+
+    report = []
+    mismatches = 0
+    print(f"\n{'query':<24}{'antes ms':>10}{'claims ms':>11}{'x':>8}{'stale ms':>10}{'filas':>9}")
+    for q in QUERIES:
+        b, c, s = (phases[p][q['name']] for p in ('before', 'claims', 'stale'))
+        speedup = b['execution_ms'] / c['execution_ms'] if c['execution_ms'] else float('inf')
+        same = b['rows'] == c['rows'] == s['rows']
+        mismatches += not same
+        print(f"{q['name']:<24}{b['execution_ms']:>10.2f}{c['execution_ms']:>11.2f}{speedup:>7.1f}x"
+              f"{s['execution_ms']:>10.2f}{b['rows']:>9}{'' if same else '  ⚠️ filas distintas'}")
+        print(f"   antes:  {' > '.join(b['nodes'])}")
+        print(f"   claims: {' > '.join(c['nodes'])}")
+        report.append({'query': q['name'], 'description': q['desc'], 'as': q['as'],
+                       'before': b, 'claims': c, 'stale': s,
+                       'speedup': round(speedup, 2), 'same_rows': same})
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    if mismatches:
+        print(f"\n⚠️ {mismatches} queries ven filas distintas entre fases")
+    print(f"\n✅ Reporte → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Scoring Engine (batch)
+Puntúa lotes completos de cuestionarios como una matriz NumPy (n_usuarios x 9)
+
+Réplica vectorizada de `calculateEnneagram` (src/utils/calculateEnneagram.ts):
+  • Suma ponderada por eneatipo (peso default 1.0).
+  • Desempate DETERMINÍSTICO: diferencias <= 0.001 cuentan como empate
+    y gana el tipo de menor número.
+  • `ambiguous` si el 2º está dentro del 12% del líder.
+"""
+
+import argparse
+import json
+import re
+import time
+from functools import cmp_to_key
+from pathlib import Path
+
+import numpy as np
+
+N_TYPES = 9
+TIE_EPSILON = 0.001
+AMBIGUOUS_MARGIN = 0.12
+DEFAULT_BANK = Path(__file__).resolve().parent.parent / 'eneadisc' / 'src' / 'data' / 'questionnaireData.ts'
+TESTS = ('quick', 'deep')
+
+
+def load_question_bank(ts_path=DEFAULT_BANK) -> dict:
+    """Lee questionnaireData.ts y devuelve {test: {question_id: {'weight', 'types'}}}
+
+    `types` es la lista de eneatipos de las opciones en el orden mostrado.
+    """
+    source = Path(ts_path).read_text(encoding='utf-8')
+    bank = {}
+    for test, const in (('quick', 'QUICK_QUESTIONS'), ('deep', 'DEEP_QUESTIONS')):
+        start = source.find(f'export const {const}')
+        if start < 0:
+            continue
+        end = source.find('\n];', start)
+        block = source[start:end]
+        questions = {}
+        for chunk in re.split(r'\n\s{4}\{\n', block)[1:]:
+            qid = re.search(r'\bid:\s*(\d+)', chunk)
+            weight = re.search(r'\bweight:\s*([\d.]+)', chunk)
+            if not qid:
+                continue
+            questions[int(qid.group(1))] = {
+                'weight': float(weight.group(1)) if weight else 1.0,
+                'types': [int(t) for t in re.findall(r'\btype:\s*(\d)', chunk)],
+                'is_core_fear': 'isCoreFear: true' in chunk,
+            }
+        bank[test] = questions
+    return bank
+
+
+def _ts_order(row) -> np.ndarray:
+    """Índices 0..8 en el orden de `ranking.sort` de calculateEnneagram.ts."""
+    def compare(a, b):
+        diff = row[b] - row[a]
+        if abs(diff) > TIE_EPSILON:
+            return 1 if diff > 0 else -1
+        return a - b
+    return np.array(sorted(range(N_TYPES), key=cmp_to_key(compare)), dtype=np.int64)
+
+
+class BatchScoringEngine:
+    def __init__(self, bank: dict = None, weight_overrides: dict = None):
+        """`weight_overrides`: {test: {question_id: peso}} aplicado sobre el banco."""
+        self.bank = bank if bank is not None else load_question_bank()
+        self.weights = {}
+        for test in TESTS:
+            questions = self.bank.get(test, {})
+            size = max(questions, default=0) + 1
+            table = np.ones(size, dtype=np.float64)
+            for qid, q in questions.items():
+                table[qid] = q['weight']
+            for qid, w in (weight_overrides or {}).get(test, {}).items():
+                qid = int(qid)
+                if qid >= table.size:
+                    table = np.concatenate([table, np.ones(qid + 1 - table.size)])
+                table[qid] = float(w)
+            self.weights[test] = table
+
+    def weight_matrix(self, user_idx, question_ids, selected_types, n_users: int,
+                      test: str = 'quick', weights=None) -> np.ndarray:
+        """Construye la matriz (n_users x 9) de puntajes en una sola pasada.
+
+        Las respuestas vienen "aplanadas" (una fila por respuesta). Si se pasa
+        `weights` se usa tal cual (peso explícito de cada respuesta); si no,
+        se toma el peso vigente de la pregunta en el banco.
+        """
+        user_idx = np.asarray(user_idx, dtype=np.int64)
+        selected = np.asarray(selected_types, dtype=np.int64)
+        if test not in self.weights:
+            raise ValueError(f'test desconocido: {test!r} (válidos: {", ".join(TESTS)})')
+        if weights is None:
+            table = self.weights[test]
+            qids = np.asarray(question_ids, dtype=np.int64)
+            if (qids < 0).any():
+                raise ValueError(f'questionId negativo: {int(qids.min())}')
+            w = np.ones(qids.size, dtype=np.float64)
+            known = qids < table.size
+            w[known] = table[qids[known]]
+        else:
+            w = np.asarray(weights, dtype=np.float64)
+        # Igual que el TS: respuestas con tipo fuera de 1..9 se ignoran.
+        valid = (selected >= 1) & (selected <= N_TYPES)
+        flat = user_idx[valid] * N_TYPES + (selected[valid] - 1)
+        return np.bincount(flat, weights=w[valid], minlength=n_users * N_TYPES).reshape(n_users, N_TYPES)
+
+    @staticmethod
+    def rank(scores: np.ndarray) -> dict:
+        """Ranking, tipo principal y bandera `ambiguous` para toda la matriz.
+
+        Mismo comparador que el TS: |diferencia| <= 0.001 es empate y decide
+        el menor número. Si todas las diferencias entre puntajes distintos
+        superan la tolerancia, ese comparador es un orden total y alcanza un
+        argsort estable. Las filas con diferencias en (0, 0.001] (el
+        comparador deja de ser transitivo) se ordenan con el mismo
+        comparador y el mismo TimSort que Array.prototype.sort.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        # argsort estable sobre -puntaje: ante empate exacto conserva el orden 1..9.
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranked = np.take_along_axis(scores, order, axis=1)
+        gaps = ranked[:, :-1] - ranked[:, 1:]
+        for row in np.flatnonzero(((gaps > 0) & (gaps <= TIE_EPSILON)).any(axis=1)):
+            order[row] = _ts_order(scores[row])
+            ranked[row] = scores[row, order[row]]
+        top, second = ranked[:, 0], ranked[:, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            margin = np.where(top > 0, (top - second) / top, 0.0)
+        return {
+            'primary_type': order[:, 0] + 1,
+            'ranking': order + 1,
+            'ranked_scores': ranked,
+            'margin': margin,
+            'ambiguous': (top > 0) & (margin < AMBIGUOUS_MARGIN),
+        }
+
+    def score_records(self, records: list) -> list:
+        """Puntúa registros {user_id, test?, responses:[{questionId, selectedType, weight?}]}"""
+        for n, rec in enumerate(records):
+            if rec.get('test', 'quick') not in TESTS:
+                raise ValueError(f"registro {n}: test desconocido {rec.get('test')!r}")
+            for resp in rec.get('responses', []):
+                if resp.get('questionId', 0) < 0:
+                    raise ValueError(f"registro {n}: questionId negativo {resp['questionId']}")
+        results = [None] * len(records)
+        for test in TESTS:
+            idx = [i for i, r in enumerate(records) if r.get('test', 'quick') == test]
+            if not idx:
+                continue
+            users, qids, types, weights = [], [], [], []
+            explicit = False
+            for local, i in enumerate(idx):
+                for resp in records[i].get('responses', []):
+                    users.append(local)
+                    qids.append(resp.get('questionId', 0))
+                    types.append(resp.get('selectedType', 0))
+                    weights.append(resp.get('weight'))
+                    explicit = explicit or resp.get('weight') is not None
+            if explicit:
+                table = self.weights[test]
+                weights = [w if w is not None else (table[q] if q < table.size else 1.0)
+                           for w, q in zip(weights, qids)]
+            else:
+                weights = None
+            matrix = self.weight_matrix(users, qids, types, len(idx), test, weights)
+            ranked = self.rank(matrix)
+            for local, i in enumerate(idx):
+                results[i] = {
+                    'user_id': records[i].get('user_id'),
+                    'primaryType': int(ranked['primary_type'][local]),
+                    'ranking': [{'type': int(t), 'score': float(s)} for t, s in
+                                zip(ranked['ranking'][local], ranked['ranked_scores'][local])],
+                    'scores': {str(t + 1): float(matrix[local, t]) for t in range(N_TYPES)},
+                    'ambiguous': bool(ranked['ambiguous'][local]),
+                }
+        return results
+
+
+def _benchmark(engine: BatchScoringEngine, n_users: int, seed: int):
+    rng = np.random.default_rng(seed)
+    n_questions = len(engine.bank.get('quick', {})) or 10
+    users = np.repeat(np.arange(n_users), n_questions)
+    qids = np.tile(np.arange(1, n_questions + 1), n_users)
+    types = rng.integers(1, N_TYPES + 1, size=users.size)
+    start = time.perf_counter()
+    ranked = engine.rank(engine.weight_matrix(users, qids, types, n_users))
+    elapsed = time.perf_counter() - start
+    print(f"⏱️  {n_users:,} evaluaciones puntuadas en {elapsed:.3f}s "
+          f"({int(ranked['ambiguous'].sum()):,} ambiguas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Batch Scoring Engine')
+    parser.add_argument('--input', help='JSONL con {user_id, test, responses}')
+    parser.add_argument('--output', default='.tmp/enneagram_scores.jsonl', help='JSONL de resultados')
+    parser.add_argument('--weights', help='JSON con pesos a sobrescribir {test: {question_id: peso}}')
+    parser.add_argument('--bank', default=str(DEFAULT_BANK), help='Ruta a questionnaireData.ts')
+    parser.add_argument('--benchmark', type=int, default=0, help='Puntuar N evaluaciones sintéticas')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    overrides = json.loads(Path(args.weights).read_text(encoding='utf-8')) if args.weights else None
+    engine = BatchScoringEngine(load_question_bank(args.bank), overrides)
+
+    if args.benchmark:
+        _benchmark(engine, args.benchmark, args.seed)
+        return
+    if not args.input:
+        parser.error('--input es requerido (o usar --benchmark)')
+
+    with open(args.input, encoding='utf-8') as fh:
+        records = [json.loads(line) for line in fh if line.strip()]
+    try:
+        results = engine.score_records(records)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open('w', encoding='utf-8') as fh:
+        for res in results:
+            fh.write(json.dumps(res, ensure_ascii=False) + '\n')
+    print(f"✅ {len(results):,} evaluaciones puntuadas → {out}")
+
+
+if __name__ == '__main__':
+    main()
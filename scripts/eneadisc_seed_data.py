@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Seed Data
+Genera un dataset sintético multi-empresa en un Postgres local (esquema 01..19)
+
+Determinístico: cada empresa usa su propio generador numpy derivado de
+(--seed, número de empresa), así que el mismo --seed y --anchor producen
+exactamente los mismos UUIDs, fechas y textos, sin importar el tamaño de
+lote. Se generan N empresas por lote y cada tabla se carga con
+COPY ... FROM STDIN (una transacción por lote).
+
+Escala por defecto: 1.000 empresas × 100 empleados = 100k perfiles,
+~6M check-ins, ~2M tareas, ~3M mensajes de chat.
+"""
+
+import argparse
+import json
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from eneadisc_db import connect
+
+DAY = 86400
+
+MOODS = ('excellent', 'good', 'neutral', 'bad', 'terrible')
+MOOD_P = (0.18, 0.34, 0.28, 0.13, 0.07)
+PRIORITIES = ('low', 'medium', 'high')
+PRIORITY_P = (0.3, 0.5, 0.2)
+KUDOS_CATEGORIES = ('general', 'colaboracion', 'creatividad', 'liderazgo', 'apoyo', 'esfuerzo')
+PLANS = ('free', 'starter', 'growth', 'enterprise')
+PLAN_LIMITS = {'free': 3, 'starter': 25, 'growth': 100, 'enterprise': 1000}
+INDUSTRIES = ('Tecnología', 'Salud', 'Retail', 'Educación', 'Finanzas', 'Manufactura', 'Logística')
+SIZES = ('1-10', '11-50', '51-200', '201-500', '500+')
+COUNTRIES = ('Argentina', 'Chile', 'Uruguay', 'México', 'Colombia', 'España', 'Perú')
+
+FIRST_NAMES = ('Ana', 'Bruno', 'Camila', 'Diego', 'Elena', 'Facundo', 'Gabriela', 'Hernán', 'Inés',
+               'Joaquín', 'Julieta', 'Lucas', 'Martina', 'Nicolás', 'Paula', 'Rodrigo', 'Sofía', 'Tomás',
+               'Valentina', 'Ximena')
+LAST_NAMES = ('Álvarez', 'Benítez', 'Castro', 'Díaz', 'Fernández', 'García', 'Gómez', 'López',
+              'Martínez', 'Pérez', 'Ramírez', 'Rodríguez', 'Romero', 'Sánchez', 'Torres', 'Vázquez')
+TEAM_NAMES = ('Producto', 'Ventas', 'Operaciones', 'Marketing', 'Soporte', 'Finanzas', 'Datos',
+              'Diseño', 'Plataforma', 'Recursos Humanos', 'Logística', 'Calidad')
+
+CHECKIN_NOTES = (
+    'Mucho trabajo acumulado esta semana, me cuesta desconectar',
+    'Buen día, terminamos la entrega a tiempo',
+    'Reuniones todo el día, poco tiempo para trabajo profundo',
+    'Me sentí escuchado en la reunión de equipo',
+    'Cansado, dormí mal y el cliente cambió los requerimientos',
+    'Muy motivado con el nuevo proyecto',
+    'Hay tensión con otro equipo por las prioridades',
+    'Tranquilo, día normal',
+    'Estoy al límite con los plazos, necesito ayuda',
+    'Me encantó la sesión de feedback con mi líder',
+    'No tengo claro qué se espera de mí en este proyecto',
+    'Celebramos el cierre del trimestre con el equipo',
+)
+TASK_TITLES = (
+    'Preparar informe semanal', 'Revisar propuesta del cliente', 'Actualizar documentación',
+    'Reunión de planificación', 'Corregir incidencias reportadas', 'Preparar presentación',
+    'Analizar métricas del mes', 'Capacitación interna', 'Entrevistar candidatos',
+    'Cerrar pendientes del sprint', 'Revisar presupuesto', 'Diseñar encuesta de clima',
+)
+MESSAGES = (
+    '¿Tenés un minuto para revisar esto?', 'Listo, ya lo subí', 'Gracias por la ayuda 🙌',
+    '¿Movemos la reunión a las 15?', 'Dale, lo vemos mañana', 'Te paso el link del documento',
+    'Buenísimo, avancemos así', '¿Alguien sabe cómo quedó lo del cliente?', 'Estoy con eso, en un rato te aviso',
+    'Perfecto 👍', 'Necesito feedback antes del viernes', 'Subí los cambios que pidieron',
+)
+JOURNAL_PROMPTS = ('¿Qué aprendiste hoy?', '¿Qué te dio energía esta semana?', '¿Qué harías distinto?')
+JOURNAL_CONTENT = (
+    'Me di cuenta de que evito los conflictos aunque después me pesa',
+    'Delegar me costó pero salió mejor de lo que esperaba',
+    'Necesito poner límites a las reuniones para poder concentrarme',
+    'Recibir reconocimiento del equipo me motivó muchísimo',
+    'Quiero trabajar en escuchar antes de proponer soluciones',
+    'Me frustró no tener información clara para decidir',
+)
+KUDOS_MESSAGES = (
+    'Gracias por bancar al equipo en el cierre', 'Gran presentación, muy clara',
+    'Siempre dispuesto a ayudar', 'Excelente idea para resolver el problema del cliente',
+    'Qué buena coordinación esta semana',
+)
+GOAL_TITLES = ('Mejorar mi comunicación en reuniones', 'Aprender a delegar', 'Terminar curso de liderazgo',
+               'Dar feedback semanal a mi equipo', 'Reducir horas extra')
+GOAL_AREAS = ('comunicacion', 'liderazgo', 'bienestar', 'tecnico')
+ONE_ON_ONE_NOTES = ('Conversamos sobre carga de trabajo', 'Objetivos del trimestre acordados',
+                    'Pidió más autonomía en sus proyectos', 'Seguimiento de bienestar, mejoró el estrés')
+EVENT_TITLES = ('Reunión de equipo', 'Planificación trimestral', 'Retrospectiva', 'All hands',
+                'Taller de eneagrama', 'Revisión de objetivos', '1-on-1')
+
+# Orden de carga (respeta FKs) y columnas de cada tabla.
+COLUMNS = {
+    'auth.users': ('id', 'email', 'raw_user_meta_data'),
+    'public.companies': ('id', 'name', 'industry', 'size', 'country', 'invite_code', 'owner_id', 'created_at'),
+    '_seed_profiles': ('id', 'role', 'company_id', 'full_name', 'email', 'enneagram_type',
+                       'questionnaire_completed', 'ics_token', 'created_at'),
+    'public.subscriptions': ('id', 'company_id', 'plan', 'status', 'employee_limit', 'current_period_end'),
+    'public.teams': ('id', 'company_id', 'name', 'owner_id', 'lead_id', 'created_at'),
+    'public.team_members': ('team_id', 'user_id', 'joined_at'),
+    'public.checkins': ('id', 'user_id', 'date', 'mood', 'energy', 'stress', 'notes', 'created_at'),
+    'public.tasks': ('id', 'user_id', 'team_id', 'title', 'status', 'priority', 'category', 'assigned_by',
+                     'due_date', 'completed_at', 'created_at'),
+    'public.kudos': ('id', 'company_id', 'from_user', 'to_user', 'category', 'message', 'created_at'),
+    'public.goals': ('id', 'user_id', 'title', 'area', 'status', 'created_at', 'completed_at'),
+    'public.journal_entries': ('id', 'user_id', 'prompt', 'content', 'created_at'),
+    'public.one_on_one_notes': ('id', 'company_id', 'employee_id', 'author_id', 'note', 'created_at'),
+    'public.events': ('id', 'company_id', 'team_id', 'created_by', 'title', 'location', 'start_at', 'end_at'),
+    'public.conversations': ('id', 'company_id', 'type', 'dm_key', 'title', 'team_id', 'created_by',
+                             'created_at', 'updated_at'),
+    'public.conversation_participants': ('conversation_id', 'user_id', 'last_read_at'),
+    'public.messages': ('id', 'conversation_id', 'sender_id', 'body', 'kind', 'created_at'),
+    'public.join_requests': ('id', 'company_id', 'user_id', 'full_name', 'email', 'status', 'created_at'),
+}
+
+# Los perfiles los crea el trigger on_auth_user_created (03_triggers.sql) con
+# lo mínimo; se completan desde una tabla staging. Con --replica (sin
+# triggers) el mismo upsert los inserta.
+PROFILES_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS _seed_profiles
+  (LIKE public.profiles INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+"""
+PROFILES_UPSERT_SQL = """
+INSERT INTO public.profiles (id, role, company_id, full_name, email, enneagram_type,
+                             questionnaire_completed, ics_token, created_at)
+SELECT id, role, company_id, full_name, email, enneagram_type, questionnaire_completed, ics_token, created_at
+FROM _seed_profiles
+ON CONFLICT (id) DO UPDATE SET
+  role = EXCLUDED.role, company_id = EXCLUDED.company_id, full_name = EXCLUDED.full_name,
+  email = EXCLUDED.email, enneagram_type = EXCLUDED.enneagram_type,
+  questionnaire_completed = EXCLUDED.questionnaire_completed, ics_token = EXCLUDED.ics_token,
+  created_at = EXCLUDED.created_at
+"""
+
+
+def _uuids(rng, n: int) -> list:
+    """n UUID v4 determinísticos a partir del generador."""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    h = raw.tobytes().hex()
+    return [f'{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}'
+            for i in range(0, 32 * n, 32)]
+
+
+def _ts(seconds) -> list:
+    """Epoch (segundos, array) → timestamps ISO UTC para COPY."""
+    arr = np.asarray(seconds, dtype=np.int64).astype('datetime64[s]')
+    return np.datetime_as_string(arr, unit='s', timezone='UTC').tolist()
+
+
+def _pick(rng, pool: tuple, n: int, p=None) -> list:
+    return [pool[i] for i in rng.choice(len(pool), size=n, p=p)]
+
+
+def _maybe(rng, values: list, prob: float) -> list:
+    keep = rng.random(len(values)) < prob
+    return [v if k else None for v, k in zip(values, keep)]
+
+
+def company_rows(seed: int, company_no: int, p: dict, anchor: int) -> dict:
+    """Todas las filas de una empresa, por tabla (tuplas de str | None)."""
+    rng = np.random.default_rng([seed, company_no])
+    out = {t: [] for t in COLUMNS}
+    E, T, D = p['employees'], p['teams'], p['days']
+    start = anchor - D * DAY
+
+    # ── Empresa, usuarios y perfiles ──
+    ids = _uuids(rng, 1 + E + p['join_requests'])
+    admin, emp, pending = ids[0], ids[1:E + 1], ids[E + 1:]
+    company_id = _uuids(rng, 1)[0]
+    names = [f'{FIRST_NAMES[a]} {LAST_NAMES[b]}' for a, b in
+             zip(rng.integers(0, len(FIRST_NAMES), len(ids)), rng.integers(0, len(LAST_NAMES), len(ids)))]
+    emails = [f'u{company_no}.{i}@seed.eneadisc.local' for i in range(len(ids))]
+    created = start - int(rng.integers(30, 365)) * DAY
+    user_ts = _ts(created + rng.integers(0, 30 * DAY, len(ids)))
+    types = rng.integers(1, 10, len(ids))
+    completed = rng.random(len(ids)) < 0.9
+    ics = _maybe(rng, _uuids(rng, len(ids)), 0.3)
+    for i, uid in enumerate(ids):
+        role = 'company_admin' if i == 0 else 'supervisor' if i <= T else 'employee'
+        company = company_id if i <= E else None
+        meta = json.dumps({'role': role, 'full_name': names[i]}, ensure_ascii=False)
+        out['auth.users'].append((uid, emails[i], meta))
+        out['_seed_profiles'].append((uid, role, company, names[i], emails[i],
+                                      str(types[i]) if completed[i] else None,
+                                      't' if completed[i] else 'f', ics[i], user_ts[i]))
+    out['public.companies'].append((
+        company_id, f'Empresa {company_no}', INDUSTRIES[company_no % len(INDUSTRIES)],
+        SIZES[min(E // 50, len(SIZES) - 1)], COUNTRIES[company_no % len(COUNTRIES)],
+        f'SEED{company_no:06d}', admin, _ts([created])[0]))
+    plan = PLANS[int(rng.integers(0, len(PLANS)))]
+    out['public.subscriptions'].append((_uuids(rng, 1)[0], company_id, plan, 'active',
+                                        str(PLAN_LIMITS[plan]), _ts([anchor + 30 * DAY])[0]))
+
+    # ── Equipos: el supervisor i lidera el equipo i ──
+    team_ids = _uuids(rng, T)
+    team_of = rng.integers(0, T, E)
+    team_of[:T] = np.arange(T)
+    second = np.where(rng.random(E) < 0.1, rng.integers(0, T, E), -1)
+    team_names = [TEAM_NAMES[t % len(TEAM_NAMES)] + (f' {t // len(TEAM_NAMES) + 1}' if t >= len(TEAM_NAMES) else '')
+                  for t in range(T)]
+    for t, tid in enumerate(team_ids):
+        out['public.teams'].append((tid, company_id, team_names[t], admin, emp[t], _ts([created + DAY])[0]))
+    members = [set() for _ in range(T)]
+    joined = _ts(created + DAY + rng.integers(0, 60 * DAY, E))
+    for i in range(E):
+        for t in {int(team_of[i]), int(second[i])} - {-1}:
+            members[t].add(i)
+            out['public.team_members'].append((team_ids[t], emp[i], joined[i]))
+
+    # ── Check-ins: tasa propia por empleado, 1 por día como máximo ──
+    rate = np.clip(rng.normal(p['checkin_rate'], 0.15, E), 0.05, 1.0)
+    ei, di = np.nonzero(rng.random((E, D)) < rate[:, None])
+    n = len(ei)
+    when = _ts(start + di * DAY + 8 * 3600 + rng.integers(0, 10 * 3600, n))
+    mood = rng.choice(len(MOODS), size=n, p=MOOD_P)
+    energy = np.clip(5 - mood + rng.integers(-1, 2, n), 1, 5)
+    stress = np.clip(1 + mood + rng.integers(-1, 2, n), 1, 5)
+    notes = _maybe(rng, _pick(rng, CHECKIN_NOTES, n), 0.25)
+    for cid, i, ts, m, en, st, note in zip(_uuids(rng, n), ei, when, mood, energy, stress, notes):
+        out['public.checkins'].append((cid, emp[i], ts, MOODS[m], str(en), str(st), note, ts))
+
+    # ── Tareas: el estado depende de la antigüedad ──
+    owner = np.repeat(np.arange(E), rng.poisson(p['tasks'], E))
+    n = len(owner)
+    c_at = start + (rng.random(n) * D * DAY).astype(np.int64)
+    age = (anchor - c_at) / DAY
+    r = rng.random(n)
+    p_done = np.clip(age / 10, 0.1, 0.85)
+    status = np.where(r < p_done, 'completed', np.where(r < p_done + 0.1, 'in_progress', 'pending'))
+    is_team = rng.random(n) < 0.75
+    due = np.where(rng.random(n) < 0.7, c_at + rng.integers(1, 15, n) * DAY, -1)
+    done_at = np.minimum(c_at + (rng.random(n) * np.minimum(age, 10) * DAY).astype(np.int64), anchor)
+    assigned = is_team & (rng.random(n) < 0.4)
+    titles = _pick(rng, TASK_TITLES, n)
+    priority = _pick(rng, PRIORITIES, n, PRIORITY_P)
+    personal_cat = _pick(rng, ('personal', 'development'), n)
+    c_ts, due_ts, done_ts = _ts(c_at), _ts(np.maximum(due, 0)), _ts(done_at)
+    for k, (tid, i) in enumerate(zip(_uuids(rng, n), owner)):
+        team = int(team_of[i])
+        out['public.tasks'].append((
+            tid, emp[i], team_ids[team] if is_team[k] else None, titles[k], str(status[k]), priority[k],
+            'team' if is_team[k] else personal_cat[k], emp[team] if assigned[k] else None,
+            due_ts[k] if due[k] >= 0 else None, done_ts[k] if status[k] == 'completed' else None, c_ts[k]))
+
+    # ── Kudos, metas, diario y notas 1-on-1 ──
+    if E > 1:
+        giver = np.repeat(np.arange(E), rng.poisson(p['kudos'], E))
+        n = len(giver)
+        receiver = (giver + 1 + rng.integers(0, E - 1, n)) % E
+        when = _ts(start + rng.integers(0, D * DAY, n))
+        cats, msgs = _pick(rng, KUDOS_CATEGORIES, n), _pick(rng, KUDOS_MESSAGES, n)
+        for k, (kid, g, rcv) in enumerate(zip(_uuids(rng, n), giver, receiver)):
+            out['public.kudos'].append((kid, company_id, emp[g], emp[rcv], cats[k], msgs[k], when[k]))
+
+    owner = np.repeat(np.arange(E), rng.poisson(1.5, E))
+    n = len(owner)
+    g_at = start + rng.integers(0, D * DAY, n)
+    g_done = rng.random(n) < 0.4
+    titles, areas = _pick(rng, GOAL_TITLES, n), _pick(rng, GOAL_AREAS, n)
+    g_ts, g_done_ts = _ts(g_at), _ts(np.minimum(g_at + 30 * DAY, anchor))
+    for k, (gid, i) in enumerate(zip(_uuids(rng, n), owner)):
+        out['public.goals'].append((gid, emp[i], titles[k], areas[k], 'done' if g_done[k] else 'active',
+                                    g_ts[k], g_done_ts[k] if g_done[k] else None))
+
+    owner = np.repeat(np.arange(E), rng.poisson(p['journal'], E))
+    n = len(owner)
+    prompts, contents = _pick(rng, JOURNAL_PROMPTS, n), _pick(rng, JOURNAL_CONTENT, n)
+    when = _ts(start + rng.integers(0, D * DAY, n))
+    for k, (jid, i) in enumerate(zip(_uuids(rng, n), owner)):
+        out['public.journal_entries'].append((jid, emp[i], prompts[k], contents[k], when[k]))
+
+    owner = np.repeat(np.arange(E), rng.poisson(1, E))
+    n = len(owner)
+    texts, when = _pick(rng, ONE_ON_ONE_NOTES, n), _ts(start + rng.integers(0, D * DAY, n))
+    for k, (nid, i) in enumerate(zip(_uuids(rng, n), owner)):
+        out['public.one_on_one_notes'].append((nid, company_id, emp[i], admin, texts[k], when[k]))
+
+    # ── Eventos: historial + próximos 30 días ──
+    n = p['events']
+    ev_at = start + rng.integers(0, (D + 30) * DAY, n)
+    ev_team = np.where(rng.random(n) < 0.5, rng.integers(0, T, n), -1)
+    ev_end = ev_at + rng.choice((1800, 3600, 5400), n)
+    titles = _pick(rng, EVENT_TITLES, n)
+    locs = _maybe(rng, _pick(rng, ('Sala 1', 'Sala 2', 'Google Meet', 'Zoom'), n), 0.6)
+    ev_ts, end_ts = _ts(ev_at), _ts(ev_end)
+    for k, eid in enumerate(_uuids(rng, n)):
+        out['public.events'].append((eid, company_id, team_ids[ev_team[k]] if ev_team[k] >= 0 else None,
+                                     admin, titles[k], locs[k], ev_ts[k], end_ts[k]))
+
+    # ── Chat: un canal por equipo + DMs entre compañeros ──
+    convs = [('group', None, team_names[t], tid, emp[t], sorted(members[t]))
+             for t, tid in enumerate(team_ids)]
+    pairs = set()
+    if E > 1:
+        a = np.repeat(np.arange(E), p['dms'])
+        b = (a + 1 + rng.integers(0, E - 1, len(a))) % E
+        pairs = {(min(x, y), max(x, y)) for x, y in zip(a.tolist(), b.tolist())}
+    for x, y in sorted(pairs):
+        ux, uy = emp[x], emp[y]
+        convs.append(('direct', f'{min(ux, uy)}:{max(ux, uy)}', None, None, ux, [x, y]))
+    conv_ids = _uuids(rng, len(convs))
+    for cid, (kind, dm_key, title, team_id, creator, parts) in zip(conv_ids, convs):
+        scale = 3 if kind == 'group' else 1
+        n = int(rng.poisson(p['messages'] * scale))
+        c_at = start + int(rng.integers(0, DAY * 7))
+        m_at = np.sort(c_at + rng.integers(0, max(anchor - c_at, 1), n))
+        senders = [parts[j] for j in rng.integers(0, len(parts), n)]
+        bodies = _pick(rng, MESSAGES, n)
+        m_ts = _ts(m_at)
+        last = int(m_at[-1]) if n else c_at
+        out['public.conversations'].append((cid, company_id, kind, dm_key, title, team_id, creator,
+                                            _ts([c_at])[0], _ts([last])[0]))
+        read_all = rng.random(len(parts)) < 0.7
+        read_at = _ts(np.where(read_all, last, c_at + (rng.random(len(parts)) * (last - c_at)).astype(np.int64)))
+        for j, i in enumerate(parts):
+            out['public.conversation_participants'].append((cid, emp[i], read_at[j]))
+        for mid, s, body, ts in zip(_uuids(rng, n), senders, bodies, m_ts):
+            out['public.messages'].append((mid, cid, emp[s], body, 'text', ts))
+
+    # ── Solicitudes de ingreso pendientes ──
+    for j, (rid, uid) in enumerate(zip(_uuids(rng, len(pending)), pending)):
+        k = E + 1 + j
+        out['public.join_requests'].append((rid, company_id, uid, names[k], emails[k], 'pending', user_ts[k]))
+    return out
+
+
+def _copy(cur, table: str, rows: list):
+    if not rows:
+        return
+    cols = ', '.join(COLUMNS[table])
+    with cur.copy(f'COPY {table} ({cols}) FROM STDIN') as copy:
+        for start in range(0, len(rows), 10000):
+            lines = ['\t'.join('\\N' if v is None else v for v in r) for r in rows[start:start + 10000]]
+            copy.write('\n'.join(lines) + '\n')
+
+
+def load_chunk(conn, chunks: list) -> dict:
+    """Carga en una transacción las filas de varias empresas."""
+    counts = {}
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute(PROFILES_STAGING_SQL)
+        for table in COLUMNS:
+            rows = [r for c in chunks for r in c[table]]
+            _copy(cur, table, rows)
+            if table == '_seed_profiles':
+                cur.execute(PROFILES_UPSERT_SQL)
+            counts[table] = len(rows)
+    return counts
+
+
+def generate(conn, p: dict, seed: int, anchor: int, batch: int, replica: bool) -> dict:
+    totals = {t: 0 for t in COLUMNS}
+    if replica:
+        # Sin triggers ni FKs durante la carga (requiere superusuario). Los
+        # rollups de 18_daily_rollups.sql quedan para --backfill.
+        conn.execute("SET session_replication_role = 'replica'")
+    t0 = time.perf_counter()
+    for first in range(1, p['companies'] + 1, batch):
+        nums = range(first, min(first + batch, p['companies'] + 1))
+        counts = load_chunk(conn, [company_rows(seed, c, p, anchor) for c in nums])
+        for t, n in counts.items():
+            totals[t] += n
+        done = nums[-1]
+        rate = totals['public.checkins'] / (time.perf_counter() - t0)
+        print(f"   {done:,}/{p['companies']:,} empresas · {totals['public.checkins']:,} check-ins "
+              f"({rate:,.0f}/s)")
+    if replica:
+        conn.execute("SET session_replication_role = 'origin'")
+    conn.execute('ANALYZE')
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Seed Data (multi-empresa, COPY)')
+    parser.add_argument('--companies', type=int, default=1000)
+    parser.add_argument('--employees', type=int, default=100, help='Empleados por empresa')
+    parser.add_argument('--teams', type=int, default=8, help='Equipos por empresa')
+    parser.add_argument('--days', type=int, default=90, help='Días de historial')
+    parser.add_argument('--checkin-rate', type=float, default=0.7, help='Probabilidad diaria de check-in')
+    parser.add_argument('--tasks', type=float, default=20, help='Tareas promedio por empleado')
+    parser.add_argument('--kudos', type=float, default=3)
+    parser.add_argument('--journal', type=float, default=2)
+    parser.add_argument('--events', type=int, default=40, help='Eventos por empresa')
+    parser.add_argument('--dms', type=int, default=3, help='DMs iniciados por empleado')
+    parser.add_argument('--messages', type=float, default=10, help='Mensajes promedio por DM (x3 en canales)')
+    parser.add_argument('--join-requests', type=int, default=2, help='Solicitudes pendientes por empresa')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--anchor', type=date.fromisoformat, default=date.today(),
+                        help='Fecha "hoy" del dataset (fijarla para reproducir exacto)')
+    parser.add_argument('--batch', type=int, default=10, help='Empresas por transacción')
+    parser.add_argument('--replica', action='store_true',
+                        help='Desactivar triggers durante la carga (superusuario)')
+    args = parser.parse_args()
+    if args.teams < 1 or args.employees < args.teams:
+        parser.error('--employees debe ser >= --teams (cada equipo tiene un supervisor)')
+
+    p = {k: getattr(args, k) for k in ('companies', 'employees', 'teams', 'days', 'checkin_rate', 'tasks',
+                                       'kudos', 'journal', 'events', 'dms', 'messages', 'join_requests')}
+    anchor = int(datetime(args.anchor.year, args.anchor.month, args.anchor.day, tzinfo=timezone.utc).timestamp())
+    t0 = time.perf_counter()
+    with connect(autocommit=True) as conn:
+        totals = generate(conn, p, args.seed, anchor, args.batch, args.replica)
+    print(f"\n✅ Dataset seed={args.seed} anchor={args.anchor} en {time.perf_counter() - t0:.1f}s")
+    for table, n in totals.items():
+        if not table.startswith('_'):
+            print(f"   {table:<36}{n:>12,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Supervision
+Verificación y reparación masiva de la tabla supervision (30_supervision.sql)
+
+supervision guarda los pares (líder, persona) que salen de teams.lead_id
++ team_members, y la mantienen triggers fila a fila. Este script la
+compara contra ese join y, con --repair, aplica solo la diferencia
+(borra lo que sobra, inserta lo que falta) en una transacción.
+
+Durante la reparación teams y team_members quedan en SHARE MODE: los
+cambios concurrentes esperan a que termine, así que ningún trigger
+escribe sobre un estado a medio reparar. Sirve después de cargas que
+deshabilitan triggers (restores, COPY masivos) o para auditar en cron.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from eneadisc_db import connect
+
+EXPECTED = """
+    SELECT DISTINCT t.lead_id AS supervisor_id, tm.user_id AS employee_id
+    FROM public.teams t JOIN public.team_members tm ON tm.team_id = t.id
+    WHERE t.lead_id IS NOT NULL
+"""
+
+DIFF_SQL = f"""
+    WITH expected AS ({EXPECTED})
+    SELECT 'missing' AS kind, e.supervisor_id, e.employee_id FROM expected e
+    WHERE NOT EXISTS (SELECT 1 FROM public.supervision s
+                      WHERE s.supervisor_id = e.supervisor_id AND s.employee_id = e.employee_id)
+    UNION ALL
+    SELECT 'extra', s.supervisor_id, s.employee_id FROM public.supervision s
+    WHERE NOT EXISTS (SELECT 1 FROM public.teams t JOIN public.team_members tm ON tm.team_id = t.id
+                      WHERE t.lead_id = s.supervisor_id AND tm.user_id = s.employee_id)
+"""
+
+
+def diff(cur, sample: int) -> dict:
+    """Conteo de pares faltantes y sobrantes, con una muestra de cada uno."""
+    cur.execute(f"""
+        SELECT kind, count(*),
+               (array_agg(jsonb_build_object('supervisor_id', supervisor_id, 'employee_id', employee_id)))[1:%s]
+        FROM ({DIFF_SQL}) d GROUP BY kind
+    """, (sample,))
+    out = {'missing': 0, 'extra': 0, 'sample': {'missing': [], 'extra': []}}
+    for kind, count, rows in cur.fetchall():
+        out[kind] = count
+        out['sample'][kind] = rows or []
+    cur.execute('SELECT count(*) FROM public.supervision')
+    out['rows'] = cur.fetchone()[0]
+    return out
+
+
+def repair(conn) -> tuple:
+    """Aplica la diferencia en una transacción; devuelve (borradas, insertadas)."""
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute('LOCK TABLE public.teams, public.team_members IN SHARE MODE')
+        cur.execute("""
+            DELETE FROM public.supervision s
+            WHERE NOT EXISTS (SELECT 1 FROM public.teams t JOIN public.team_members tm ON tm.team_id = t.id
+                              WHERE t.lead_id = s.supervisor_id AND tm.user_id = s.employee_id)
+        """)
+        deleted = cur.rowcount
+        cur.execute(f'INSERT INTO public.supervision (supervisor_id, employee_id) {EXPECTED} ON CONFLICT DO NOTHING')
+        return deleted, cur.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Supervision (verificar / reparar supervision)')
+    parser.add_argument('--repair', action='store_true', help='Aplicar la diferencia (si no, solo verifica)')
+    parser.add_argument('--sample', type=int, default=20, help='Pares de ejemplo por tipo en el reporte')
+    parser.add_argument('--output', default='.tmp/supervision_check.json', help='Reporte JSON')
+    args = parser.parse_args()
+
+    with connect(autocommit=True) as conn:
+        t0 = time.perf_counter()
+        with conn.cursor() as cur:
+            before = diff(cur, args.sample)
+        print(f"🤖 supervision: {before['rows']} filas, {before['missing']} faltantes, "
+              f"{before['extra']} sobrantes ({time.perf_counter() - t0:.1f}s)")
+        report = {'before': before}
+        final = before
+
+        if args.repair and (before['missing'] or before['extra']):
+            t0 = time.perf_counter()
+            deleted, inserted = repair(conn)
+            with conn.cursor() as cur:
+                after = diff(cur, args.sample)
+            print(f"✅ Reparada: -{deleted} +{inserted} ({time.perf_counter() - t0:.1f}s)")
+            report.update(deleted=deleted, inserted=inserted, after=after)
+            final = after
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+    print(f"✅ Reporte → {out}")
+    if final['missing'] or final['extra']:
+        print('⚠️ supervision no coincide con teams + team_members' + ('' if args.repair else ' (usar --repair)'))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+ENEADISC Team Partitioner
+Reparte N personas en k equipos maximizando compatibilidad + cobertura de tríadas
+
+Reemplazo de `suggestTeams` (src/utils/teamSuggester.ts), que reparte en
+round-robin por tríada sin mirar la compatibilidad entre pares:
+  • Objetivo = Σ compatibilidad de los pares dentro de cada equipo
+               + peso_tríada × Σ tríadas cubiertas por equipo.
+  • Siembra greedy (cada persona al equipo con mayor ganancia marginal).
+  • Búsqueda local con swaps y movimientos; el delta de cada movimiento se
+    calcula en O(1) desde los histogramas de tipos (G = H·C).
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from eneadisc_compatibility import COMPATIBILITY, N_TYPES
+
+TRIADS = {'cuerpo': (8, 9, 1), 'corazon': (2, 3, 4), 'cabeza': (5, 6, 7)}
+TRIAD_NAMES = list(TRIADS)
+# Índice de tríada por eneatipo. El tipo desconocido (índice 0) cae en
+# cabeza, como en triadOf del TS: el optimizador y la cobertura reportada
+# cuentan lo mismo.
+TRIAD_OF = np.full(N_TYPES + 1, TRIAD_NAMES.index('cabeza'), dtype=np.int64)
+for _idx, _types in enumerate(TRIADS.values()):
+    TRIAD_OF[list(_types)] = _idx
+
+DEFAULT_TRIAD_WEIGHT = 200.0
+# Presupuesto por defecto: la búsqueda local se corta para responder en < 1 s.
+DEFAULT_TIME_BUDGET = 0.8
+_C = COMPATIBILITY.astype(np.float64)
+_DIAG = np.diag(_C)
+
+
+def triad_of(etype: int) -> str:
+    """Igual que triadOf del TS: cualquier tipo fuera de cuerpo/corazón cae en cabeza."""
+    return TRIAD_NAMES[TRIAD_OF[_type_index(etype)]]
+
+
+def _type_index(etype) -> int:
+    return int(etype) if isinstance(etype, (int, np.integer)) and 1 <= etype <= N_TYPES else 0
+
+
+def _histograms(assignment: np.ndarray, types: np.ndarray, k: int) -> np.ndarray:
+    H = np.zeros((k, N_TYPES + 1), dtype=np.int64)
+    np.add.at(H, (assignment, types), 1)
+    return H
+
+
+def objective(H: np.ndarray, triad_weight: float = DEFAULT_TRIAD_WEIGHT) -> float:
+    """Σ compatibilidad de pares por equipo + peso × tríadas cubiertas."""
+    H = np.asarray(H, dtype=np.float64)
+    pair_sum = (np.einsum('ta,ab,tb->t', H, _C, H) - H @ _DIAG) / 2
+    T = np.zeros((len(H), len(TRIADS)))
+    np.add.at(T.T, TRIAD_OF, H.T)
+    return float(pair_sum.sum() + triad_weight * (T > 0).sum())
+
+
+def round_robin(types: np.ndarray, k: int) -> np.ndarray:
+    """Asignación de suggestTeams: por tríada (cuerpo, corazón, cabeza) en round-robin."""
+    triads = TRIAD_OF[types]
+    order = np.concatenate([np.flatnonzero(triads == i) for i in range(3)])
+    assignment = np.empty(len(types), dtype=np.int64)
+    assignment[order] = np.arange(len(types)) % k
+    return assignment
+
+
+class TeamPartitioner:
+    def __init__(self, types, k: int, min_size: int = None, max_size: int = None,
+                 triad_weight: float = DEFAULT_TRIAD_WEIGHT, seed: int = 42):
+        self.types = np.array([_type_index(t) for t in types], dtype=np.int64)
+        self.n = len(self.types)
+        self.k = max(1, int(k))
+        # Por defecto: equipos parejos (tamaños n//k o n//k + 1).
+        self.min_size = self.n // self.k if min_size is None else min_size
+        self.max_size = -(-self.n // self.k) if max_size is None else max_size
+        if self.min_size * self.k > self.n or self.max_size * self.k < self.n:
+            raise ValueError(f'No se pueden repartir {self.n} personas en {self.k} equipos '
+                             f'de {self.min_size}-{self.max_size} integrantes')
+        self.triad_weight = float(triad_weight)
+        self.rng = np.random.default_rng(seed)
+
+    # ── Siembra greedy ───────────────────────────────────────
+    def _seed(self):
+        k, w = self.k, self.triad_weight
+        H = np.zeros((self.k, N_TYPES + 1), dtype=np.int64)
+        T = np.zeros((self.k, len(TRIADS)), dtype=np.int64)
+        sizes = np.zeros(k, dtype=np.int64)
+        assignment = np.empty(self.n, dtype=np.int64)
+        # Primero los tipos escasos: son los que definen la cobertura de tríadas.
+        counts = np.bincount(self.types, minlength=N_TYPES + 1)
+        order = np.lexsort((self.rng.random(self.n), counts[self.types]))
+        remaining = self.n
+        for p in order:
+            t = self.types[p]
+            tr = TRIAD_OF[t]
+            gain = H @ _C[t] + w * (T[:, tr] == 0)
+            # Reservar lugares para que todos los equipos lleguen al mínimo.
+            deficit = np.maximum(self.min_size - sizes, 0).sum()
+            must_fill = deficit >= remaining
+            allowed = (sizes < self.max_size) & (~must_fill | (sizes < self.min_size))
+            gain = np.where(allowed, gain - 1e-9 * sizes, -np.inf)
+            i = int(np.argmax(gain))
+            assignment[p] = i
+            H[i, t] += 1
+            T[i, tr] += 1
+            sizes[i] += 1
+            remaining -= 1
+        return assignment
+
+    # ── Búsqueda local ───────────────────────────────────────
+    def _improve(self, H: np.ndarray, deadline: float, max_passes: int, candidates: int) -> int:
+        k, w = self.k, self.triad_weight
+        H = H.astype(np.float64)
+        G = H @ _C                                      # G[i, t] = Σ_b C[t, b]·H[i, b]
+        T = np.zeros((k, len(TRIADS)))
+        np.add.at(T.T, TRIAD_OF, H.T)
+        sizes = H.sum(axis=1)
+        tri_a = TRIAD_OF[:, None]
+        tri_b = TRIAD_OF[None, :]
+        off_diag = ~np.eye(N_TYPES + 1, dtype=bool)[None]
+        moves = 0
+        for _ in range(max_passes):
+            improved = False
+            for i in self.rng.permutation(k):
+                if deadline and time.perf_counter() > deadline:
+                    return moves
+                # Con muchos equipos se evalúa una muestra de destinos por paso.
+                if k - 1 > candidates:
+                    cand = self.rng.choice(k - 1, size=candidates, replace=False)
+                    cand[cand >= i] += 1
+                else:
+                    cand = np.delete(np.arange(k), i)
+                Gc, Hc, Tc = G[cand], H[cand], T[cand]
+                # Swap: a (de i) ↔ b (de j).  Δ por equipo sin re-evaluar pares.
+                d_i = (G[i, None, :] - G[i, :, None]) + _DIAG[:, None] - _C
+                d_j = (Gc[:, :, None] - Gc[:, None, :]) + _DIAG[None, None, :] - _C[None]
+                cov_i = self._coverage_delta(T[i], tri_a, tri_b)
+                cov_j = self._coverage_delta(Tc, tri_b, tri_a)
+                delta = d_i[None] + d_j + w * (cov_i[None] + cov_j)
+                valid = (H[i, :, None] > 0)[None] & (Hc[:, None, :] > 0) & off_diag
+                delta = np.where(valid, delta, -np.inf)
+                # Movimiento simple de a: i → j, si los tamaños lo permiten.
+                move = (Gc - G[i][None, :]) + _DIAG[None, :] + w * self._move_coverage(T[i], Tc)
+                can_move = ((H[i] > 0)[None] & (sizes[cand, None] < self.max_size)
+                            & (sizes[i] > self.min_size))
+                move = np.where(can_move, move, -np.inf)
+
+                best_swap = np.unravel_index(np.argmax(delta), delta.shape)
+                best_move = np.unravel_index(np.argmax(move), move.shape)
+                if max(delta[best_swap], move[best_move]) <= 1e-9:
+                    continue
+                if delta[best_swap] >= move[best_move]:
+                    jj, a, b = (int(x) for x in best_swap)
+                    j = int(cand[jj])
+                    self._apply(H, G, T, i, j, a)
+                    self._apply(H, G, T, j, i, b)
+                    self._transfers.append((i, j, a, b))
+                else:
+                    jj, a = (int(x) for x in best_move)
+                    j = int(cand[jj])
+                    self._apply(H, G, T, i, j, a)
+                    sizes[i] -= 1
+                    sizes[j] += 1
+                    self._transfers.append((i, j, a))
+                moves += 1
+                improved = True
+            if not improved:
+                break
+        return moves
+
+    @staticmethod
+    def _coverage_delta(T, tri_out, tri_in):
+        """Cambio de tríadas cubiertas al sacar un tipo (tri_out) y meter otro (tri_in)."""
+        single = np.ndim(T) == 1
+        T = np.atleast_2d(T)
+        lose = np.take(T, np.broadcast_to(tri_out, (N_TYPES + 1, N_TYPES + 1)), axis=1) == 1
+        gain = np.take(T, np.broadcast_to(tri_in, (N_TYPES + 1, N_TYPES + 1)), axis=1) == 0
+        same = np.broadcast_to(tri_out == tri_in, lose.shape[1:])
+        delta = gain.astype(np.float64) - lose
+        delta[:, same] = 0.0
+        return delta[0] if single else delta
+
+    @staticmethod
+    def _move_coverage(T_i, T):
+        """Cambio de cobertura (origen + destino) al mover un tipo del equipo i a cada equipo j."""
+        lose = T_i[TRIAD_OF] == 1
+        gain = T[:, TRIAD_OF] == 0
+        return gain.astype(np.float64) - lose[None]
+
+    @staticmethod
+    def _apply(H, G, T, src, dst, t):
+        H[src, t] -= 1
+        H[dst, t] += 1
+        G[src] -= _C[t]
+        G[dst] += _C[t]
+        T[src, TRIAD_OF[t]] -= 1
+        T[dst, TRIAD_OF[t]] += 1
+
+    def solve(self, time_budget: float = DEFAULT_TIME_BUDGET, max_passes: int = 50, candidates: int = 32) -> dict:
+        """Devuelve la asignación persona → equipo y el objetivo vs round-robin.
+
+        La búsqueda local arranca de la mejor entre la siembra greedy y el
+        round-robin (si respeta los tamaños), así nunca queda por debajo de
+        suggestTeams. `time_budget=None` corre hasta el óptimo local.
+        """
+        start = time.perf_counter()
+        deadline = start + time_budget if time_budget else None
+        rr = round_robin(self.types, self.k)
+        rr_H = _histograms(rr, self.types, self.k)
+        baseline = objective(rr_H, self.triad_weight)
+        if self.k == 1:
+            # Un solo equipo: no hay nada que repartir (suggestTeams también admite k = 1).
+            return {
+                'assignment': rr, 'objective': baseline, 'seed_objective': baseline,
+                'round_robin_objective': baseline, 'improvement_pct': 0.0, 'moves': 0,
+                'elapsed_s': time.perf_counter() - start,
+            }
+
+        assignment = self._seed()
+        H = _histograms(assignment, self.types, self.k)
+        seeded = objective(H, self.triad_weight)
+        rr_sizes = rr_H.sum(axis=1)
+        if baseline > seeded and rr_sizes.min() >= self.min_size and rr_sizes.max() <= self.max_size:
+            assignment, H, seeded = rr, rr_H, baseline
+
+        self._transfers = []
+        moves = self._improve(H, deadline, max_passes, candidates)
+        # Los movimientos se hicieron sobre histogramas: se reasignan personas concretas.
+        pools = {}
+        for p, team in enumerate(assignment):
+            pools.setdefault((int(team), int(self.types[p])), []).append(p)
+        for tr in self._transfers:
+            i, j, a = tr[:3]
+            person = pools[(i, a)].pop()
+            pools.setdefault((j, a), []).append(person)
+            assignment[person] = j
+            if len(tr) == 4:
+                b = tr[3]
+                other = pools[(j, b)].pop()
+                pools.setdefault((i, b), []).append(other)
+                assignment[other] = i
+
+        achieved = objective(_histograms(assignment, self.types, self.k), self.triad_weight)
+        return {
+            'assignment': assignment,
+            'objective': achieved,
+            'seed_objective': seeded,
+            'round_robin_objective': baseline,
+            'improvement_pct': (achieved - baseline) / abs(baseline) * 100 if baseline else 0.0,
+            'moves': moves,
+            'elapsed_s': time.perf_counter() - start,
+        }
+
+
+def suggest_teams(people: list, num_teams: int, **kwargs) -> dict:
+    """Versión con el mismo shape que `SuggestedTeam[]` de teamSuggester.ts."""
+    time_budget = kwargs.pop('time_budget', DEFAULT_TIME_BUDGET)
+    partitioner = TeamPartitioner([p.get('enneagramType') for p in people], num_teams, **kwargs)
+    result = partitioner.solve(time_budget)
+    teams = [[] for _ in range(partitioner.k)]
+    for person, team in zip(people, result['assignment']):
+        teams[team].append(person)
+    suggested = []
+    for members in teams:
+        coverage = list(dict.fromkeys(triad_of(m.get('enneagramType')) for m in members))
+        suggested.append({
+            'members': members,
+            'triadCoverage': coverage,
+            'balance': int(np.floor(len(coverage) / 3 * 100 + 0.5)),
+        })
+    return {'teams': suggested, **{k: v for k, v in result.items() if k != 'assignment'}}
+
+
+def _self_check(seed: int):
+    """Casos borde: tamaños respetados y nunca peor que round-robin."""
+    rng = np.random.default_rng(seed)
+    cases = [(0, 1), (1, 1), (7, 1), (7, 7), (12, 2), (40, 3), (200, 9)]
+    for n, k in cases:
+        types = [int(t) if rng.random() > 0.1 else None for t in rng.integers(1, N_TYPES + 1, size=n)]
+        partitioner = TeamPartitioner(types, k, seed=seed)
+        result = partitioner.solve(None)
+        sizes = np.bincount(result['assignment'], minlength=partitioner.k)
+        assert len(result['assignment']) == n, (n, k)
+        assert sizes.min() >= partitioner.min_size and sizes.max() <= partitioner.max_size, (n, k)
+        assert result['objective'] >= result['round_robin_objective'] - 1e-9, (n, k)
+    people = [{'id': f'p{i}', 'enneagramType': (i % N_TYPES) + 1} for i in range(5)]
+    assert [len(t['members']) for t in suggest_teams(people, 1)['teams']] == [5]
+    print(f"✅ Self-check: {len(cases) + 1} casos OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ENEADISC Team Partitioner')
+    parser.add_argument('--input', help='JSON [{id, name, enneagramType}]')
+    parser.add_argument('--teams', type=int, default=2, help='Cantidad de equipos (k)')
+    parser.add_argument('--min-size', type=int)
+    parser.add_argument('--max-size', type=int)
+    parser.add_argument('--triad-weight', type=float, default=DEFAULT_TRIAD_WEIGHT)
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help='Segundos máximos (0 = hasta el óptimo local)')
+    parser.add_argument('--output', default='.tmp/suggested_teams.json')
+    parser.add_argument('--benchmark', type=int, default=0, help='Personas sintéticas')
+    parser.add_argument('--check', action='store_true', help='Correr los casos borde y salir')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.check:
+        _self_check(args.seed)
+        return
+    if args.benchmark:
+        rng = np.random.default_rng(args.seed)
+        # Distribución sesgada de tríadas: el caso donde round-robin desbalancea.
+        types = rng.choice(np.arange(1, N_TYPES + 1), size=args.benchmark,
+                           p=np.array([3, 1, 3, 1, 1, 3, 1, 3, 2]) / 18)
+        result = TeamPartitioner(types, args.teams, args.min_size, args.max_size,
+                                 args.triad_weight, args.seed).solve(args.time_budget or None)
+        print(f"⏱️  {args.benchmark:,} personas en {args.teams} equipos: {result['elapsed_s']:.3f}s, "
+              f"{result['moves']} movimientos")
+        print(f"📈 Objetivo {result['objective']:,.0f} vs round-robin "
+              f"{result['round_robin_objective']:,.0f} ({result['improvement_pct']:+.2f}%)")
+        return
+    if not args.input:
+        parser.error('--input es requerido (o usar --benchmark / --check)')
+
+    people = json.loads(Path(args.input).read_text(encoding='utf-8'))
+    result = suggest_teams(people, args.teams, min_size=args.min_size, max_size=args.max_size,
+                           triad_weight=args.triad_weight, seed=args.seed,
+                           time_budget=args.time_budget or None)
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ {len(people):,} personas en {args.teams} equipos "
+          f"({result['improvement_pct']:+.2f}% vs round-robin) → {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+-- ============================================================
+-- ENEATEAMS — ROLLUPS DIARIOS (bienestar y tareas por equipo)
+-- ============================================================
+-- Los dashboards (generateMoodTrend, generateProductivityTrend)
+-- reconstruyen buckets por día desde las filas crudas de checkins/tasks
+-- en cada request. Estas tablas guardan esos buckets ya agregados por
+-- (equipo, día UTC). El historial mensual por persona
+-- (getMonthlyWellbeingHistory) no cabe en un rollup por equipo: se
+-- agrega en la base con get_monthly_wellbeing.
+--
+-- Mantenimiento: los triggers NO agregan en línea; solo encolan qué
+-- (equipo|usuario, día) cambió en rollup_queue. El refresher
+-- scripts/eneadisc_daily_rollups.py reclama la cola por lotes
+-- (DELETE ... RETURNING) y recalcula solo esos días. Modo --backfill
+-- para el histórico.
+-- ============================================================
+
+-- ── Bienestar diario por equipo ─────────────────────────────
+-- Se guardan conteos por mood (no un score) para que cada pantalla
+-- aplique su propia escala.
+CREATE TABLE IF NOT EXISTS public.daily_team_wellbeing (
+  team_id        UUID NOT NULL REFERENCES public.teams(id) ON DELETE CASCADE,
+  day            DATE NOT NULL,
+  company_id     UUID NOT NULL REFERENCES public.companies(id) ON DELETE CASCADE,
+  checkin_count  INTEGER NOT NULL DEFAULT 0,
+  energy_sum     INTEGER NOT NULL DEFAULT 0,
+  stress_sum     INTEGER NOT NULL DEFAULT 0,
+  mood_excellent INTEGER NOT NULL DEFAULT 0,
+  mood_good      INTEGER NOT NULL DEFAULT 0,
+  mood_neutral   INTEGER NOT NULL DEFAULT 0,
+  mood_bad       INTEGER NOT NULL DEFAULT 0,
+  mood_terrible  INTEGER NOT NULL DEFAULT 0,
+  refreshed_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (team_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_dtw_company_day ON public.daily_team_wellbeing(company_id, day);
+
+-- ── Throughput diario de tareas por equipo ──────────────────
+-- created_count cuenta por día de created_at; el resto por día de completed_at.
+CREATE TABLE IF NOT EXISTS public.daily_team_tasks (
+  team_id              UUID NOT NULL REFERENCES public.teams(id) ON DELETE CASCADE,
+  day                  DATE NOT NULL,
+  company_id           UUID NOT NULL REFERENCES public.companies(id) ON DELETE CASCADE,
+  created_count        INTEGER NOT NULL DEFAULT 0,
+  completed_count      INTEGER NOT NULL DEFAULT 0,
+  completion_days_sum  INTEGER NOT NULL DEFAULT 0,
+  high_completed       INTEGER NOT NULL DEFAULT 0,
+  medium_completed     INTEGER NOT NULL DEFAULT 0,
+  low_completed        INTEGER NOT NULL DEFAULT 0,
+  refreshed_at         TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (team_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_dtt_company_day ON public.daily_team_tasks(company_id, day);
+
+ALTER TABLE public.daily_team_wellbeing ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.daily_team_tasks     ENABLE ROW LEVEL SECURITY;
+
+-- Lectura: el admin de la empresa y los miembros del equipo.
+DROP POLICY IF EXISTS "dtw_read" ON public.daily_team_wellbeing;
+CREATE POLICY "dtw_read" ON public.daily_team_wellbeing FOR SELECT
+  USING (
+    (company_id = public.my_company_id() AND public.my_role() = 'company_admin')
+    OR EXISTS (SELECT 1 FROM public.team_members tm
+               WHERE tm.team_id = daily_team_wellbeing.team_id AND tm.user_id = auth.uid())
+  );
+
+DROP POLICY IF EXISTS "dtt_read" ON public.daily_team_tasks;
+CREATE POLICY "dtt_read" ON public.daily_team_tasks FOR SELECT
+  USING (
+    (company_id = public.my_company_id() AND public.my_role() = 'company_admin')
+    OR EXISTS (SELECT 1 FROM public.team_members tm
+               WHERE tm.team_id = daily_team_tasks.team_id AND tm.user_id = auth.uid())
+  );
+
+-- ── Cola de días "sucios" ───────────────────────────────────
+-- kind: 'checkin' (user_id, day) | 'task' (team_id, day)
+--       'member'  (team_id, user_id, day NULL = todos los días del usuario)
+CREATE TABLE IF NOT EXISTS public.rollup_queue (
+  id        BIGSERIAL PRIMARY KEY,
+  kind      TEXT NOT NULL CHECK (kind IN ('checkin', 'task', 'member')),
+  team_id   UUID,
+  user_id   UUID,
+  day       DATE,
+  queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE public.rollup_queue ENABLE ROW LEVEL SECURITY;  -- sin políticas: solo service role
+
+-- ── Triggers de encolado (baratos: 1-2 INSERT por fila) ─────
+CREATE OR REPLACE FUNCTION public.enqueue_checkin_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO public.rollup_queue (kind, user_id, day)
+      VALUES ('checkin', OLD.user_id, (OLD.date AT TIME ZONE 'UTC')::date);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO public.rollup_queue (kind, user_id, day)
+      VALUES ('checkin', NEW.user_id, (NEW.date AT TIME ZONE 'UTC')::date);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_checkin_rollup ON public.checkins;
+CREATE TRIGGER trg_checkin_rollup AFTER INSERT OR UPDATE OR DELETE ON public.checkins
+  FOR EACH ROW EXECUTE FUNCTION public.enqueue_checkin_rollup();
+
+CREATE OR REPLACE FUNCTION public.enqueue_task_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.team_id IS NOT NULL THEN
+    INSERT INTO public.rollup_queue (kind, team_id, day)
+      SELECT 'task', OLD.team_id, d FROM (VALUES
+        ((OLD.created_at AT TIME ZONE 'UTC')::date),
+        ((OLD.completed_at AT TIME ZONE 'UTC')::date)) v(d)
+      WHERE d IS NOT NULL;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.team_id IS NOT NULL THEN
+    INSERT INTO public.rollup_queue (kind, team_id, day)
+      SELECT 'task', NEW.team_id, d FROM (VALUES
+        ((NEW.created_at AT TIME ZONE 'UTC')::date),
+        ((NEW.completed_at AT TIME ZONE 'UTC')::date)) v(d)
+      WHERE d IS NOT NULL;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_task_rollup ON public.tasks;
+CREATE TRIGGER trg_task_rollup AFTER INSERT OR UPDATE OR DELETE ON public.tasks
+  FOR EACH ROW EXECUTE FUNCTION public.enqueue_task_rollup();
+
+-- Cambiar la membresía cambia qué check-ins cuentan para el equipo.
+CREATE OR REPLACE FUNCTION public.enqueue_member_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO public.rollup_queue (kind, team_id, user_id) VALUES ('member', OLD.team_id, OLD.user_id);
+  ELSE
+    INSERT INTO public.rollup_queue (kind, team_id, user_id) VALUES ('member', NEW.team_id, NEW.user_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_member_rollup ON public.team_members;
+CREATE TRIGGER trg_member_rollup AFTER INSERT OR DELETE ON public.team_members
+  FOR EACH ROW EXECUTE FUNCTION public.enqueue_member_rollup();
+
+-- ── Recalcular un conjunto de (equipo, día) ────────────────
+-- Recalcula desde las filas crudas SOLO las claves recibidas: borra esas
+-- claves y reinserta las que todavía tienen datos. Idempotente.
+CREATE OR REPLACE FUNCTION public.refresh_team_wellbeing_days(p_teams UUID[], p_days DATE[])
+RETURNS INTEGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE v_rows INTEGER;
+BEGIN
+  CREATE TEMP TABLE IF NOT EXISTS _rollup_keys (team_id UUID, day DATE) ON COMMIT DROP;
+  TRUNCATE _rollup_keys;
+  INSERT INTO _rollup_keys SELECT DISTINCT * FROM unnest(p_teams, p_days);
+
+  DELETE FROM public.daily_team_wellbeing w USING _rollup_keys k
+    WHERE w.team_id = k.team_id AND w.day = k.day;
+
+  INSERT INTO public.daily_team_wellbeing (
+    team_id, day, company_id, checkin_count, energy_sum, stress_sum,
+    mood_excellent, mood_good, mood_neutral, mood_bad, mood_terrible, refreshed_at)
+  SELECT k.team_id, k.day, t.company_id, COUNT(*), SUM(c.energy), SUM(c.stress),
+         COUNT(*) FILTER (WHERE c.mood = 'excellent'),
+         COUNT(*) FILTER (WHERE c.mood = 'good'),
+         COUNT(*) FILTER (WHERE c.mood = 'neutral'),
+         COUNT(*) FILTER (WHERE c.mood = 'bad'),
+         COUNT(*) FILTER (WHERE c.mood = 'terrible'),
+         NOW()
+  FROM _rollup_keys k
+  JOIN public.teams t         ON t.id = k.team_id
+  JOIN public.team_members tm ON tm.team_id = k.team_id
+  JOIN public.checkins c      ON c.user_id = tm.user_id
+                             AND c.date >= k.day::timestamp AT TIME ZONE 'UTC'
+                             AND c.date <  (k.day + 1)::timestamp AT TIME ZONE 'UTC'
+  GROUP BY k.team_id, k.day, t.company_id;
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.refresh_team_task_days(p_teams UUID[], p_days DATE[])
+RETURNS INTEGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE v_rows INTEGER;
+BEGIN
+  CREATE TEMP TABLE IF NOT EXISTS _rollup_keys (team_id UUID, day DATE) ON COMMIT DROP;
+  TRUNCATE _rollup_keys;
+  INSERT INTO _rollup_keys SELECT DISTINCT * FROM unnest(p_teams, p_days);
+
+  DELETE FROM public.daily_team_tasks d USING _rollup_keys k
+    WHERE d.team_id = k.team_id AND d.day = k.day;
+
+  INSERT INTO public.daily_team_tasks (
+    team_id, day, company_id, created_count, completed_count, completion_days_sum,
+    high_completed, medium_completed, low_completed, refreshed_at)
+  SELECT k.team_id, k.day, t.company_id,
+         COALESCE(cr.n, 0),
+         COALESCE(dn.n, 0), COALESCE(dn.days, 0),
+         COALESCE(dn.high, 0), COALESCE(dn.medium, 0), COALESCE(dn.low, 0),
+         NOW()
+  FROM _rollup_keys k
+  JOIN public.teams t ON t.id = k.team_id
+  LEFT JOIN LATERAL (
+    SELECT COUNT(*) AS n FROM public.tasks x
+    WHERE x.team_id = k.team_id
+      AND x.created_at >= k.day::timestamp AT TIME ZONE 'UTC'
+      AND x.created_at <  (k.day + 1)::timestamp AT TIME ZONE 'UTC'
+  ) cr ON TRUE
+  LEFT JOIN LATERAL (
+    -- Días de completación = ceil(|completed_at − created_at|) como getDaysBetween.
+    SELECT COUNT(*) AS n,
+           SUM(CEIL(ABS(EXTRACT(EPOCH FROM (x.completed_at - x.created_at))) / 86400))::INTEGER AS days,
+           COUNT(*) FILTER (WHERE x.priority = 'high')   AS high,
+           COUNT(*) FILTER (WHERE x.priority = 'medium') AS medium,
+           COUNT(*) FILTER (WHERE x.priority = 'low')    AS low
+    FROM public.tasks x
+    WHERE x.team_id = k.team_id AND x.status = 'completed'
+      AND x.completed_at >= k.day::timestamp AT TIME ZONE 'UTC'
+      AND x.completed_at <  (k.day + 1)::timestamp AT TIME ZONE 'UTC'
+  ) dn ON TRUE
+  WHERE COALESCE(cr.n, 0) + COALESCE(dn.n, 0) > 0;
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$;
+
+-- Solo el refresher (service role) recalcula.
+REVOKE EXECUTE ON FUNCTION public.refresh_team_wellbeing_days(UUID[], DATE[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.refresh_team_task_days(UUID[], DATE[]) FROM PUBLIC, anon, authenticated;
+
+-- ── Historial mensual de un conjunto de personas ────────────
+-- Cada check-in cuenta una vez, aunque su autor esté en varios equipos
+-- (el rollup por equipo lo contaría una vez por equipo). Mes UTC. Sin
+-- SECURITY DEFINER: corre con el RLS de checkins de quien llama.
+CREATE OR REPLACE FUNCTION public.get_monthly_wellbeing(p_user_ids UUID[], p_since TIMESTAMPTZ)
+RETURNS TABLE (month DATE, checkins BIGINT, energy_sum BIGINT, stress_sum BIGINT)
+LANGUAGE sql STABLE SET search_path = public
+AS $$
+  SELECT date_trunc('month', c.date AT TIME ZONE 'UTC')::date, COUNT(*), SUM(c.energy), SUM(c.stress)
+  FROM public.checkins c
+  WHERE c.user_id = ANY (p_user_ids) AND c.date >= p_since
+  GROUP BY 1
+  ORDER BY 1;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_monthly_wellbeing(UUID[], TIMESTAMPTZ) TO authenticated;
@@ -0,0 +1,72 @@
+-- ============================================================
+-- ENEATEAMS — ÍNDICES COMPUESTOS / CUBRIENTES / PARCIALES
+-- ============================================================
+-- 01_schema.sql solo crea índices de una columna. Las queries más
+-- calientes filtran por dos columnas a la vez:
+--   • checkins: user_id IN (...) AND date >= corte ORDER BY date DESC
+--     (getCheckInsFromLastDays, getCheckInsForUsers,
+--      getMonthlyWellbeingHistory, analytics de equipos)
+--   • tasks:    team_id = X (+ created_at del período, + status)
+--   • policies: team_members / conversation_participants por user_id
+--     en CADA fila evaluada (02_rls.sql, 04_rls_fix.sql, 12_chat.sql)
+--
+-- Los índices nuevos tienen como prefijo la columna del índice viejo,
+-- así que los viejos quedan redundantes y se borran (menos costo de
+-- escritura por INSERT). Benchmark antes/después:
+--   python scripts/eneadisc_index_benchmark.py
+--
+-- En tablas grandes en producción conviene crear cada índice con
+-- CREATE INDEX CONCURRENTLY desde psql (el SQL Editor corre todo en
+-- una transacción y CONCURRENTLY no se permite ahí).
+-- ============================================================
+
+-- ── checkins ────────────────────────────────────────────────
+-- Cubre (user_id, rango de fecha, orden DESC) y las columnas que leen
+-- los gráficos de bienestar: index-only scan, sin tocar el heap.
+CREATE INDEX IF NOT EXISTS idx_checkins_user_date
+  ON public.checkins(user_id, date DESC) INCLUDE (mood, energy, stress);
+DROP INDEX IF EXISTS public.idx_checkins_user_id;
+
+-- ── tasks ───────────────────────────────────────────────────
+-- Tareas de un equipo en un período (getTeamTasks, analytics, rollups).
+-- INCLUDE con lo que agrega calculateTeamAnalytics.
+CREATE INDEX IF NOT EXISTS idx_tasks_team_created
+  ON public.tasks(team_id, created_at) INCLUDE (status, priority, completed_at);
+DROP INDEX IF EXISTS public.idx_tasks_team_id;
+
+-- Vencidas: solo tareas abiertas con fecha. Es una fracción chica de la
+-- tabla y es lo único que miran los chequeos de atraso.
+CREATE INDEX IF NOT EXISTS idx_tasks_open_due
+  ON public.tasks(team_id, due_date)
+  WHERE status <> 'completed' AND due_date IS NOT NULL;
+
+-- Calendario / feed ICS: tareas propias con vencimiento (getMyDueTasks).
+CREATE INDEX IF NOT EXISTS idx_tasks_user_due
+  ON public.tasks(user_id, due_date) WHERE due_date IS NOT NULL;
+
+-- status tiene 3 valores: el planner casi nunca lo usa y cada UPDATE de
+-- estado lo mantiene. Los casos útiles los cubre idx_tasks_open_due.
+DROP INDEX IF EXISTS public.idx_tasks_status;
+
+-- ── Lookups de membresía de las policies ────────────────────
+-- "¿en qué equipos estoy?" (user_id → team_id) como index-only scan.
+-- La PK (team_id, user_id) ya cubre el EXISTS por (team_id, auth.uid()).
+CREATE INDEX IF NOT EXISTS idx_team_members_user_team
+  ON public.team_members(user_id, team_id);
+DROP INDEX IF EXISTS public.idx_team_members_user_id;
+
+-- Mismo patrón para las conversaciones del usuario (lista de chats).
+CREATE INDEX IF NOT EXISTS idx_cp_user_conv
+  ON public.conversation_participants(user_id, conversation_id);
+DROP INDEX IF EXISTS public.idx_cp_user;
+
+-- Admins de una empresa (policies "… AND role = 'company_admin'").
+CREATE INDEX IF NOT EXISTS idx_profiles_company_admin
+  ON public.profiles(company_id) WHERE role = 'company_admin';
+
+-- ── Estadísticas ────────────────────────────────────────────
+ANALYZE public.checkins;
+ANALYZE public.tasks;
+ANALYZE public.team_members;
+ANALYZE public.conversation_participants;
+ANALYZE public.profiles;
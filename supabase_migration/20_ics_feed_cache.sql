@@ -0,0 +1,134 @@
+-- ============================================================
+-- ENEATEAMS — VERSIONES DEL FEED .ICS (cache + 304)
+-- ============================================================
+-- Google/Outlook re-consultan los feeds suscriptos cada pocos minutos,
+-- por cada empleado. /api/calendar reconstruía el .ics completo en
+-- cada poll aunque nada hubiera cambiado.
+--
+-- Cada feed depende de dos cosas:
+--   • las tareas con due_date del usuario  → versión por usuario
+--   • los eventos de su empresa            → versión por empresa
+-- Los triggers suben la versión SOLO cuando cambia algo que el feed
+-- muestra. get_ics_feed_state(token) devuelve la versión combinada y
+-- la fecha del último cambio: con eso se responde 304 sin leer tareas
+-- ni eventos, y el cache (scripts/eneadisc_ics_feed.py) sabe cuándo
+-- re-renderizar.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.ics_user_versions (
+  user_id    UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  version    BIGINT NOT NULL DEFAULT 1,
+  changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS public.ics_company_versions (
+  company_id UUID PRIMARY KEY REFERENCES public.companies(id) ON DELETE CASCADE,
+  version    BIGINT NOT NULL DEFAULT 1,
+  changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Solo las leen funciones SECURITY DEFINER / el service role.
+ALTER TABLE public.ics_user_versions    ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.ics_company_versions ENABLE ROW LEVEL SECURITY;
+
+-- ── Bump de versiones ───────────────────────────────────────
+CREATE OR REPLACE FUNCTION public.bump_ics_user(p_user UUID)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER SET search_path = public
+AS $$
+  INSERT INTO public.ics_user_versions AS v (user_id) VALUES (p_user)
+  ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1, changed_at = NOW();
+$$;
+
+CREATE OR REPLACE FUNCTION public.bump_ics_company(p_company UUID)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER SET search_path = public
+AS $$
+  INSERT INTO public.ics_company_versions AS v (company_id) VALUES (p_company)
+  ON CONFLICT (company_id) DO UPDATE SET version = v.version + 1, changed_at = NOW();
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.bump_ics_user(UUID)    FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.bump_ics_company(UUID) FROM PUBLIC, anon, authenticated;
+
+-- ── Tareas: solo las que tienen (o tenían) due_date ─────────
+CREATE OR REPLACE FUNCTION public.ics_task_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' THEN
+    -- Cambios que el feed no muestra (status, priority, review…) no invalidan.
+    IF NEW.title IS NOT DISTINCT FROM OLD.title
+       AND NEW.due_date IS NOT DISTINCT FROM OLD.due_date
+       AND NEW.user_id = OLD.user_id THEN
+      RETURN NULL;
+    END IF;
+  END IF;
+  IF TG_OP <> 'INSERT' AND OLD.due_date IS NOT NULL THEN
+    PERFORM public.bump_ics_user(OLD.user_id);
+  END IF;
+  IF TG_OP <> 'DELETE' AND NEW.due_date IS NOT NULL
+     AND (TG_OP = 'INSERT' OR OLD.due_date IS NULL OR NEW.user_id <> OLD.user_id) THEN
+    PERFORM public.bump_ics_user(NEW.user_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_ics_task ON public.tasks;
+CREATE TRIGGER trg_ics_task AFTER INSERT OR UPDATE OR DELETE ON public.tasks
+  FOR EACH ROW EXECUTE FUNCTION public.ics_task_changed();
+
+-- ── Eventos: invalidan el feed de toda la empresa ───────────
+CREATE OR REPLACE FUNCTION public.ics_event_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    PERFORM public.bump_ics_company(OLD.company_id);
+  END IF;
+  IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.company_id <> OLD.company_id) THEN
+    PERFORM public.bump_ics_company(NEW.company_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_ics_event ON public.events;
+CREATE TRIGGER trg_ics_event AFTER INSERT OR UPDATE OR DELETE ON public.events
+  FOR EACH ROW EXECUTE FUNCTION public.ics_event_changed();
+
+-- ── Perfil: cambiar de empresa cambia los eventos del feed ──
+CREATE OR REPLACE FUNCTION public.ics_profile_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF NEW.company_id IS DISTINCT FROM OLD.company_id THEN
+    PERFORM public.bump_ics_user(NEW.id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_ics_profile ON public.profiles;
+CREATE TRIGGER trg_ics_profile AFTER UPDATE OF company_id ON public.profiles
+  FOR EACH ROW EXECUTE FUNCTION public.ics_profile_changed();
+
+-- ── Estado del feed por token (sin leer tareas ni eventos) ──
+-- version: "<usuario>.<empresa>"; sirve como ETag débil y como clave
+-- del cache. last_modified: último cambio de cualquiera de las dos.
+CREATE OR REPLACE FUNCTION public.get_ics_feed_state(p_token UUID)
+RETURNS TABLE (user_id UUID, company_id UUID, version TEXT, last_modified TIMESTAMPTZ)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT p.id, p.company_id,
+         COALESCE(uv.version, 0) || '.' || COALESCE(cv.version, 0),
+         GREATEST(COALESCE(uv.changed_at, p.created_at), COALESCE(cv.changed_at, p.created_at))
+  FROM public.profiles p
+  LEFT JOIN public.ics_user_versions uv ON uv.user_id = p.id
+  LEFT JOIN public.ics_company_versions cv ON cv.company_id = p.company_id
+  WHERE p.ics_token = p_token;
+$$;
+-- Solo la función serverless (service role) resuelve tokens.
+REVOKE EXECUTE ON FUNCTION public.get_ics_feed_state(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_ics_feed_state(UUID) TO service_role;
@@ -0,0 +1,84 @@
+-- ============================================================
+-- ENEATEAMS — OUTBOX DE NOTIFICACIONES (Slack/Discord)
+-- ============================================================
+-- /api/notify posteaba al webhook en línea, un mensaje por request:
+-- una ola de alertas o el resumen semanal de toda la empresa quedaba
+-- esperando la latencia de Slack/Discord y, ante su rate limit (429),
+-- el mensaje se perdía.
+--
+-- Ahora /api/notify solo encola (RPC enqueue_notification con el JWT
+-- del admin). El despachador
+-- (scripts/eneadisc_notify_dispatcher.py) toma lotes con SKIP LOCKED,
+-- agrupa por empresa en un único post "digest", respeta el límite de
+-- cada webhook y reintenta con backoff. La URL sigue sin tocar el
+-- cliente: la tabla no tiene policies, solo se accede vía funciones
+-- SECURITY DEFINER o el service role.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.notification_outbox (
+  id              BIGSERIAL PRIMARY KEY,
+  company_id      UUID NOT NULL REFERENCES public.companies(id) ON DELETE CASCADE,
+  kind            TEXT NOT NULL DEFAULT 'manual'
+                  CHECK (kind IN ('manual', 'weekly_summary', 'burnout_alert')),
+  text            TEXT NOT NULL CHECK (length(text) BETWEEN 1 AND 4000),
+  status          TEXT NOT NULL DEFAULT 'pending'
+                  CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+  attempts        INT NOT NULL DEFAULT 0,
+  -- Caracteres de `text` ya entregados: un mensaje largo se reparte en
+  -- varios posts del digest y, si uno falla, el reintento sigue desde acá.
+  sent_chars      INT NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  locked_until    TIMESTAMPTZ,
+  last_error      TEXT,
+  created_by      UUID REFERENCES auth.users(id) ON DELETE SET NULL,
+  created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  sent_at         TIMESTAMPTZ
+);
+
+-- Cola: solo lo pendiente o en vuelo (lo enviado no engorda el índice).
+CREATE INDEX IF NOT EXISTS idx_outbox_due
+  ON public.notification_outbox (next_attempt_at, id)
+  WHERE status IN ('pending', 'sending');
+CREATE INDEX IF NOT EXISTS idx_outbox_company
+  ON public.notification_outbox (company_id, created_at DESC);
+
+ALTER TABLE public.notification_outbox ENABLE ROW LEVEL SECURITY;
+
+-- ── Encolar (admin de la empresa, vía /api/notify) ──────────
+CREATE OR REPLACE FUNCTION public.enqueue_notification(p_text TEXT, p_kind TEXT DEFAULT 'manual')
+RETURNS BIGINT
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_company UUID;
+  v_id BIGINT;
+BEGIN
+  SELECT company_id INTO v_company FROM public.profiles
+    WHERE id = auth.uid() AND role = 'company_admin';
+  IF v_company IS NULL THEN RAISE EXCEPTION 'No autorizado'; END IF;
+  -- Las alertas de burnout solo las encolan los jobs.
+  IF p_kind NOT IN ('manual', 'weekly_summary') THEN RAISE EXCEPTION 'Tipo inválido'; END IF;
+  IF NOT EXISTS (SELECT 1 FROM public.companies
+                 WHERE id = v_company AND notify_webhook_url IS NOT NULL) THEN
+    RAISE EXCEPTION 'Webhook no configurado';
+  END IF;
+  INSERT INTO public.notification_outbox (company_id, kind, text, created_by)
+  VALUES (v_company, p_kind, p_text, auth.uid())
+  RETURNING id INTO v_id;
+  RETURN v_id;
+END;
+$$;
+GRANT EXECUTE ON FUNCTION public.enqueue_notification(TEXT, TEXT) TO authenticated;
+
+-- ── Encolar desde jobs (alertas de burnout, resumen semanal) ─
+CREATE OR REPLACE FUNCTION public.enqueue_company_notification(p_company UUID, p_text TEXT, p_kind TEXT)
+RETURNS BIGINT
+LANGUAGE sql SECURITY DEFINER SET search_path = public
+AS $$
+  INSERT INTO public.notification_outbox (company_id, kind, text)
+  SELECT c.id, p_kind, p_text FROM public.companies c
+  WHERE c.id = p_company AND c.notify_webhook_url IS NOT NULL
+  RETURNING id;
+$$;
+REVOKE EXECUTE ON FUNCTION public.enqueue_company_notification(UUID, TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.enqueue_company_notification(UUID, TEXT, TEXT) TO service_role;
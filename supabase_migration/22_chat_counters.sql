@@ -0,0 +1,139 @@
+-- ============================================================
+-- ENEATEAMS — CONTADORES DE NO LEÍDOS + ÚLTIMO MENSAJE (chat)
+-- ============================================================
+-- get_my_conversations() contaba los no leídos con un COUNT(*) sobre
+-- messages y buscaba el último mensaje con otra subconsulta, por cada
+-- conversación y en cada carga de la bandeja. Con canales de 100k+
+-- mensajes la bandeja escaneaba el historial entero.
+--
+-- Ahora el trigger bump_conversation mantiene:
+--   • conversation_participants.unread_count (+1 a todos menos al autor)
+--   • conversations.last_message_* (snapshot del último mensaje)
+-- mark_conversation_read pone el contador en 0. La bandeja pasa a ser
+-- una lectura por índice. scripts/eneadisc_chat_counters.py repara en
+-- lote cualquier desvío (seed con --replica, borrados en cascada).
+-- Correrlo una vez después de aplicar esta migración.
+-- ============================================================
+
+ALTER TABLE public.conversation_participants
+  ADD COLUMN IF NOT EXISTS unread_count INT NOT NULL DEFAULT 0;
+
+ALTER TABLE public.conversations
+  ADD COLUMN IF NOT EXISTS last_message_id UUID,
+  ADD COLUMN IF NOT EXISTS last_sender_id  UUID,
+  ADD COLUMN IF NOT EXISTS last_body       TEXT,
+  ADD COLUMN IF NOT EXISTS last_kind       TEXT;
+
+-- Cada mensaje actualiza estas filas: espacio libre en la página para
+-- updates HOT (ninguna de las columnas tocadas está indexada).
+ALTER TABLE public.conversations             SET (fillfactor = 80);
+ALTER TABLE public.conversation_participants SET (fillfactor = 80);
+
+-- ── Trigger: snapshot + contadores con cada mensaje ─────────
+CREATE OR REPLACE FUNCTION public.bump_conversation()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  UPDATE public.conversations
+    SET updated_at = NOW(), last_message_id = NEW.id, last_sender_id = NEW.sender_id,
+        last_body = NEW.body, last_kind = NEW.kind
+    WHERE id = NEW.conversation_id;
+  UPDATE public.conversation_participants
+    SET unread_count = unread_count + 1
+    WHERE conversation_id = NEW.conversation_id AND user_id <> NEW.sender_id;
+  RETURN NEW;
+END;
+$$;
+
+-- ── Marcar como leída: también resetea el contador ──────────
+CREATE OR REPLACE FUNCTION public.mark_conversation_read(p_conv UUID)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER SET search_path = public
+AS $$
+  UPDATE public.conversation_participants SET last_read_at = NOW(), unread_count = 0
+  WHERE conversation_id = p_conv AND user_id = auth.uid();
+$$;
+GRANT EXECUTE ON FUNCTION public.mark_conversation_read(UUID) TO authenticated;
+
+-- ── Bandeja: sin COUNT(*) ni subconsulta del último mensaje ─
+CREATE OR REPLACE FUNCTION public.get_my_conversations()
+RETURNS TABLE (
+  conversation_id UUID, other_id UUID, other_name TEXT, other_role TEXT,
+  other_enneagram INTEGER, last_body TEXT, last_kind TEXT, last_at TIMESTAMPTZ,
+  unread BIGINT, is_group BOOLEAN
+)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT
+    c.id,
+    CASE WHEN c.type = 'group' THEN NULL ELSE o.id END,
+    CASE WHEN c.type = 'group' THEN c.title ELSE o.full_name END,
+    CASE WHEN c.type = 'group' THEN 'group' ELSE o.role END,
+    CASE WHEN c.type = 'group' THEN NULL ELSE o.enneagram_type END,
+    c.last_body, c.last_kind, c.updated_at,
+    myp.unread_count::BIGINT,
+    (c.type = 'group')
+  FROM public.conversation_participants myp
+  JOIN public.conversations c ON c.id = myp.conversation_id
+  LEFT JOIN LATERAL (
+    SELECT p.id, p.full_name, p.role, p.enneagram_type
+    FROM public.conversation_participants op
+    JOIN public.profiles p ON p.id = op.user_id
+    WHERE op.conversation_id = c.id AND op.user_id <> auth.uid()
+    LIMIT 1
+  ) o ON c.type <> 'group'
+  WHERE myp.user_id = auth.uid()
+  ORDER BY c.updated_at DESC;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_my_conversations() TO authenticated;
+
+-- ── Reconciliación de un lote de conversaciones ─────────────
+-- Recalcula desde messages y escribe solo las filas que difieren.
+-- Bloquea primero las conversaciones: un mensaje concurrente espera
+-- (su trigger actualiza esa fila) y suma su +1 sobre el valor corregido.
+-- Un mark_conversation_read concurrente cambia last_read_at y la fila
+-- se saltea en vez de pisar su 0.
+CREATE OR REPLACE FUNCTION public.reconcile_chat_counters(p_convs UUID[])
+RETURNS TABLE (unread_fixed INTEGER, last_fixed INTEGER)
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE v_unread INTEGER; v_last INTEGER;
+BEGIN
+  PERFORM 1 FROM public.conversations WHERE id = ANY(p_convs) ORDER BY id FOR UPDATE;
+
+  UPDATE public.conversation_participants cp
+    SET unread_count = a.n
+  FROM (
+    SELECT p.conversation_id, p.user_id, p.last_read_at,
+           (SELECT COUNT(*) FROM public.messages m
+             WHERE m.conversation_id = p.conversation_id AND m.sender_id <> p.user_id
+               AND m.created_at > COALESCE(p.last_read_at, 'epoch'::timestamptz))::INT AS n
+    FROM public.conversation_participants p
+    WHERE p.conversation_id = ANY(p_convs)
+  ) a
+  WHERE cp.conversation_id = a.conversation_id AND cp.user_id = a.user_id
+    AND cp.last_read_at IS NOT DISTINCT FROM a.last_read_at
+    AND cp.unread_count <> a.n;
+  GET DIAGNOSTICS v_unread = ROW_COUNT;
+
+  UPDATE public.conversations c
+    SET last_message_id = lm.id, last_sender_id = lm.sender_id,
+        last_body = lm.body, last_kind = lm.kind
+  FROM unnest(p_convs) AS x(id)
+  LEFT JOIN LATERAL (
+    SELECT m.id, m.sender_id, m.body, m.kind FROM public.messages m
+    WHERE m.conversation_id = x.id ORDER BY m.created_at DESC, m.id DESC LIMIT 1
+  ) lm ON TRUE
+  WHERE c.id = x.id
+    AND (c.last_message_id IS DISTINCT FROM lm.id
+         OR c.last_body IS DISTINCT FROM lm.body
+         OR c.last_kind IS DISTINCT FROM lm.kind
+         OR c.last_sender_id IS DISTINCT FROM lm.sender_id);
+  GET DIAGNOSTICS v_last = ROW_COUNT;
+
+  RETURN QUERY SELECT v_unread, v_last;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.reconcile_chat_counters(UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reconcile_chat_counters(UUID[]) TO service_role;
@@ -0,0 +1,61 @@
+-- ============================================================
+-- ENEATEAMS — HISTORIAL DEL CHAT PAGINADO (keyset)
+-- ============================================================
+-- getMessages traía el historial completo de la conversación en cada
+-- apertura. Los canales de equipo (13_team_chat.sql) crecen sin tope:
+-- abrir uno era cada semana más lento.
+--
+-- get_messages_page pagina por keyset sobre (created_at, id):
+--   • sin cursor        → la ventana inicial (los N más recientes)
+--   • p_before_*        → página anterior ("cargar anteriores")
+--   • p_after_*         → lo posterior a un mensaje (reconexión)
+-- Cada página es un rango del índice, cueste lo mismo en el mensaje 50
+-- que en el 500.000 (OFFSET recorre todo lo saltado).
+-- `id` desempata mensajes con el mismo created_at (mismo statement).
+-- Benchmark: python scripts/eneadisc_chat_history_benchmark.py
+-- ============================================================
+
+-- (conversation_id, created_at) + id: orden total para el cursor.
+-- Reemplaza a idx_msg_conv (12_chat.sql), que queda como prefijo.
+CREATE INDEX IF NOT EXISTS idx_msg_conv_keyset
+  ON public.messages(conversation_id, created_at, id);
+DROP INDEX IF EXISTS public.idx_msg_conv;
+
+CREATE OR REPLACE FUNCTION public.get_messages_page(
+  p_conv UUID,
+  p_before_at TIMESTAMPTZ DEFAULT NULL, p_before_id UUID DEFAULT NULL,
+  p_after_at TIMESTAMPTZ DEFAULT NULL, p_after_id UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 50
+)
+RETURNS SETOF public.messages
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF NOT public.is_conversation_participant(p_conv) THEN RAISE EXCEPTION 'No autorizado'; END IF;
+  p_limit := LEAST(GREATEST(COALESCE(p_limit, 50), 1), 500);
+
+  -- Una rama por forma de cursor: cada una es un único rango del índice.
+  IF p_after_at IS NOT NULL THEN
+    RETURN QUERY
+      SELECT * FROM public.messages m
+      WHERE m.conversation_id = p_conv
+        AND (m.created_at, m.id) > (p_after_at, COALESCE(p_after_id, '00000000-0000-0000-0000-000000000000'))
+      ORDER BY m.created_at, m.id
+      LIMIT p_limit;
+  ELSIF p_before_at IS NOT NULL THEN
+    RETURN QUERY
+      SELECT * FROM public.messages m
+      WHERE m.conversation_id = p_conv
+        AND (m.created_at, m.id) < (p_before_at, COALESCE(p_before_id, 'ffffffff-ffff-ffff-ffff-ffffffffffff'))
+      ORDER BY m.created_at DESC, m.id DESC
+      LIMIT p_limit;
+  ELSE
+    RETURN QUERY
+      SELECT * FROM public.messages m
+      WHERE m.conversation_id = p_conv
+      ORDER BY m.created_at DESC, m.id DESC
+      LIMIT p_limit;
+  END IF;
+END;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_messages_page(UUID, TIMESTAMPTZ, UUID, TIMESTAMPTZ, UUID, INTEGER) TO authenticated;
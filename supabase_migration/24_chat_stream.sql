@@ -0,0 +1,128 @@
+-- ============================================================
+-- ENEATEAMS — STREAM DE CHAT POR USUARIO (un canal, deltas)
+-- ============================================================
+-- El cliente abría un canal postgres_changes por conversación, otro
+-- global sobre messages (y el sidebar otro más) y el de presencia. Por
+-- cada mensaje Realtime evaluaba la RLS de messages para CADA
+-- suscriptor, y el canal global disparaba getConversations() completo.
+--
+-- Ahora cada usuario escucha un único canal privado `user:<id>`:
+--   • 'message' → el mensaje + su contador de no leídos en esa conversación
+--   • 'read'    → la conversación quedó leída (otras pestañas, sidebar)
+-- Los eventos los emite la base (Broadcast desde la DB), ya dirigidos a
+-- cada participante: Realtime no evalúa RLS por mensaje. El cliente
+-- aplica los deltas sin recargar. La presencia sigue en
+-- `presence:company:<id>` (necesita la vida del socket), ahora privada.
+--
+-- Sin el esquema `realtime` (Postgres local) los eventos salen por
+-- NOTIFY chat_stream: es lo que usa el simulador
+-- scripts/eneadisc_chat_stream_sim.py.
+-- ============================================================
+
+-- ── Envío a un topic (Realtime o NOTIFY) ────────────────────
+CREATE OR REPLACE FUNCTION public.chat_stream_send(p_topic TEXT, p_event TEXT, p_payload JSONB)
+RETURNS VOID
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF to_regprocedure('realtime.send(jsonb,text,text,boolean)') IS NOT NULL THEN
+    PERFORM realtime.send(p_payload, p_event, p_topic, TRUE);
+  ELSE
+    PERFORM pg_notify('chat_stream',
+      jsonb_build_object('topic', p_topic, 'event', p_event, 'payload', p_payload)::text);
+  END IF;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.chat_stream_send(TEXT, TEXT, JSONB) FROM PUBLIC, anon, authenticated;
+
+-- ── Fan-out de cada mensaje a sus participantes ─────────────
+-- Corre después de trg_bump_conversation (orden alfabético), así que
+-- unread_count ya incluye este mensaje. Por Realtime va el mensaje
+-- completo. NOTIFY admite 8000 bytes y un payload más largo hace fallar
+-- el INSERT: si no entra, el mensaje viaja sin `body` ni `meta` y con
+-- `truncated`, y el cliente lo trae entero por id.
+CREATE OR REPLACE FUNCTION public.chat_stream_message()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_msg JSONB := to_jsonb(NEW);
+  r RECORD;
+BEGIN
+  -- 7000: deja lugar al sobre {topic, event, payload: {message, unread}}.
+  IF to_regprocedure('realtime.send(jsonb,text,text,boolean)') IS NULL
+     AND octet_length(v_msg::text) > 7000 THEN
+    v_msg := v_msg - 'body' - 'meta' || jsonb_build_object('truncated', TRUE);
+  END IF;
+  FOR r IN
+    SELECT user_id, unread_count FROM public.conversation_participants
+    WHERE conversation_id = NEW.conversation_id
+  LOOP
+    PERFORM public.chat_stream_send('user:' || r.user_id, 'message',
+      jsonb_build_object('message', v_msg, 'unread', r.unread_count));
+  END LOOP;
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_chat_stream ON public.messages;
+CREATE TRIGGER trg_chat_stream AFTER INSERT ON public.messages
+  FOR EACH ROW EXECUTE FUNCTION public.chat_stream_message();
+
+-- ── Leída: resetea el contador y avisa a las otras pestañas ─
+CREATE OR REPLACE FUNCTION public.mark_conversation_read(p_conv UUID)
+RETURNS VOID
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  UPDATE public.conversation_participants SET last_read_at = NOW(), unread_count = 0
+  WHERE conversation_id = p_conv AND user_id = auth.uid();
+  IF FOUND THEN
+    PERFORM public.chat_stream_send('user:' || auth.uid(), 'read',
+      jsonb_build_object('conversation_id', p_conv, 'unread', 0));
+  END IF;
+END;
+$$;
+GRANT EXECUTE ON FUNCTION public.mark_conversation_read(UUID) TO authenticated;
+
+-- ── Estado inicial del badge: no leídos por conversación ────
+CREATE OR REPLACE FUNCTION public.get_my_unread_counts()
+RETURNS TABLE (conversation_id UUID, unread INTEGER)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT cp.conversation_id, cp.unread_count
+  FROM public.conversation_participants cp
+  WHERE cp.user_id = auth.uid() AND cp.unread_count > 0;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_my_unread_counts() TO authenticated;
+
+-- ── Realtime: canales privados ──────────────────────────────
+DO $$
+BEGIN
+  IF to_regclass('realtime.messages') IS NOT NULL THEN
+    -- Mi stream: solo yo lo escucho; nadie publica desde el cliente.
+    DROP POLICY IF EXISTS chat_stream_select ON realtime.messages;
+    CREATE POLICY chat_stream_select ON realtime.messages FOR SELECT TO authenticated
+      USING (realtime.messages.extension = 'broadcast'
+             AND realtime.topic() = 'user:' || auth.uid()::text);
+
+    -- Presencia: solo gente de la misma empresa.
+    DROP POLICY IF EXISTS company_presence_select ON realtime.messages;
+    CREATE POLICY company_presence_select ON realtime.messages FOR SELECT TO authenticated
+      USING (realtime.messages.extension = 'presence'
+             AND realtime.topic() = 'presence:company:' ||
+                 (SELECT company_id::text FROM public.profiles WHERE id = auth.uid()));
+    DROP POLICY IF EXISTS company_presence_insert ON realtime.messages;
+    CREATE POLICY company_presence_insert ON realtime.messages FOR INSERT TO authenticated
+      WITH CHECK (realtime.messages.extension = 'presence'
+                  AND realtime.topic() = 'presence:company:' ||
+                      (SELECT company_id::text FROM public.profiles WHERE id = auth.uid()));
+  END IF;
+
+  -- Nadie usa ya postgres_changes sobre messages: menos WAL que decodificar.
+  IF EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'messages'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime DROP TABLE public.messages;
+  END IF;
+END $$;
@@ -0,0 +1,144 @@
+-- ============================================================
+-- ENEATEAMS — FEED .ICS ACOTADO (ventana móvil + relevancia)
+-- ============================================================
+-- api/calendar.ts leía TODOS los eventos de la empresa y TODAS las
+-- tareas con fecha del usuario: el feed crecía sin tope y cada
+-- suscriptor de una empresa grande bajaba el calendario entero.
+--
+-- get_ics_feed_items(user) arma el feed del lado del servidor:
+--   • ventana móvil: de hoy - 30 días a hoy + 180 días (UTC)
+--   • relevancia: tareas propias; eventos de toda la empresa
+--     (team_id NULL), de mis equipos (miembro o líder) o creados por
+--     mí. company_admin ve todos los de la empresa.
+--   • tope de ítems: se quedan los más cercanos a hoy
+-- Rangos de índices ya existentes: idx_events_company
+-- (company_id, start_at, 14_calendar.sql) e idx_tasks_user_due
+-- (user_id, due_date, 19_analytics_indexes.sql).
+--
+-- La ventana se mueve una vez por día: get_ics_feed_state suma el día
+-- a la versión para que el 304/cache no sirva la ventana de ayer.
+-- Benchmark: python scripts/eneadisc_ics_window_benchmark.py
+-- ============================================================
+
+-- ── Ítems del feed ──────────────────────────────────────────
+CREATE OR REPLACE FUNCTION public.get_ics_feed_items(
+  p_user UUID,
+  p_past_days INTEGER DEFAULT 30,
+  p_future_days INTEGER DEFAULT 180,
+  p_limit INTEGER DEFAULT 1000
+)
+RETURNS TABLE (kind TEXT, id UUID, title TEXT, description TEXT, location TEXT,
+               start_at TIMESTAMPTZ, end_at TIMESTAMPTZ)
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  -- Anclada al día (no a NOW()): mismo contenido durante todo el día.
+  v_today   TIMESTAMPTZ := date_trunc('day', NOW() AT TIME ZONE 'utc') AT TIME ZONE 'utc';
+  v_from    TIMESTAMPTZ;
+  v_to      TIMESTAMPTZ;
+  v_company UUID;
+  v_admin   BOOLEAN;
+  v_teams   UUID[];
+BEGIN
+  v_from  := v_today - make_interval(days => LEAST(GREATEST(COALESCE(p_past_days, 30), 0), 365));
+  v_to    := v_today + make_interval(days => LEAST(GREATEST(COALESCE(p_future_days, 180), 1), 730));
+  p_limit := LEAST(GREATEST(COALESCE(p_limit, 1000), 1), 5000);
+
+  SELECT pr.company_id, pr.role = 'company_admin' INTO v_company, v_admin
+  FROM public.profiles pr WHERE pr.id = p_user;
+  SELECT array_agg(s.team_id) INTO v_teams FROM (
+    SELECT tm.team_id FROM public.team_members tm WHERE tm.user_id = p_user
+    UNION
+    SELECT te.id FROM public.teams te WHERE te.lead_id = p_user
+  ) s;
+
+  RETURN QUERY
+  SELECT f.* FROM (
+    SELECT 'task'::TEXT, t.id, t.title, NULL::TEXT, NULL::TEXT, t.due_date, NULL::TIMESTAMPTZ
+    FROM public.tasks t
+    WHERE t.user_id = p_user AND t.due_date >= v_from AND t.due_date < v_to
+    UNION ALL
+    SELECT 'event'::TEXT, e.id, e.title, left(e.description, 1000), left(e.location, 200), e.start_at, e.end_at
+    FROM public.events e
+    WHERE e.company_id = v_company AND e.start_at >= v_from AND e.start_at < v_to
+      AND (v_admin OR e.team_id IS NULL OR e.team_id = ANY(v_teams) OR e.created_by = p_user)
+  ) f (kind, id, title, description, location, start_at, end_at)
+  -- Sobre el tope, lo más cercano a hoy; a igual distancia, orden estable.
+  ORDER BY abs(extract(epoch FROM f.start_at - v_today)), f.kind, f.id
+  LIMIT p_limit;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.get_ics_feed_items(UUID, INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_ics_feed_items(UUID, INTEGER, INTEGER, INTEGER) TO service_role;
+
+-- ── Versión: + día de la ventana ────────────────────────────
+-- version: "<usuario>.<empresa>.<AAAAMMDD>"; last_modified no es
+-- anterior al inicio del día (la ventana cambió a las 00:00 UTC).
+CREATE OR REPLACE FUNCTION public.get_ics_feed_state(p_token UUID)
+RETURNS TABLE (user_id UUID, company_id UUID, version TEXT, last_modified TIMESTAMPTZ)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT p.id, p.company_id,
+         COALESCE(uv.version, 0) || '.' || COALESCE(cv.version, 0) || '.' ||
+           to_char(NOW() AT TIME ZONE 'utc', 'YYYYMMDD'),
+         GREATEST(COALESCE(uv.changed_at, p.created_at), COALESCE(cv.changed_at, p.created_at),
+                  date_trunc('day', NOW() AT TIME ZONE 'utc') AT TIME ZONE 'utc')
+  FROM public.profiles p
+  LEFT JOIN public.ics_user_versions uv ON uv.user_id = p.id
+  LEFT JOIN public.ics_company_versions cv ON cv.company_id = p.company_id
+  WHERE p.ics_token = p_token;
+$$;
+REVOKE EXECUTE ON FUNCTION public.get_ics_feed_state(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_ics_feed_state(UUID) TO service_role;
+
+-- ── Invalidación: lo que cambia la relevancia ───────────────
+-- Entrar o salir de un equipo cambia qué eventos de equipo se ven.
+CREATE OR REPLACE FUNCTION public.ics_membership_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    PERFORM public.bump_ics_user(OLD.user_id);
+  END IF;
+  IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.user_id <> OLD.user_id) THEN
+    PERFORM public.bump_ics_user(NEW.user_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_ics_membership ON public.team_members;
+CREATE TRIGGER trg_ics_membership AFTER INSERT OR UPDATE OR DELETE ON public.team_members
+  FOR EACH ROW EXECUTE FUNCTION public.ics_membership_changed();
+
+CREATE OR REPLACE FUNCTION public.ics_team_lead_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF NEW.lead_id IS DISTINCT FROM OLD.lead_id THEN
+    IF OLD.lead_id IS NOT NULL THEN PERFORM public.bump_ics_user(OLD.lead_id); END IF;
+    IF NEW.lead_id IS NOT NULL THEN PERFORM public.bump_ics_user(NEW.lead_id); END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_ics_team_lead ON public.teams;
+CREATE TRIGGER trg_ics_team_lead AFTER UPDATE OF lead_id ON public.teams
+  FOR EACH ROW EXECUTE FUNCTION public.ics_team_lead_changed();
+
+-- Pasar a (o dejar de ser) company_admin cambia el alcance de eventos.
+CREATE OR REPLACE FUNCTION public.ics_profile_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF NEW.company_id IS DISTINCT FROM OLD.company_id OR NEW.role IS DISTINCT FROM OLD.role THEN
+    PERFORM public.bump_ics_user(NEW.id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_ics_profile ON public.profiles;
+CREATE TRIGGER trg_ics_profile AFTER UPDATE OF company_id, role ON public.profiles
+  FOR EACH ROW EXECUTE FUNCTION public.ics_profile_changed();
@@ -0,0 +1,99 @@
+-- ============================================================
+-- ENEATEAMS — VERSIÓN DE ANALYTICS POR EMPRESA (cache de contexto IA)
+-- ============================================================
+-- El asistente (AIAssistant.tsx) recalculaba calculateCompanyAnalytics
+-- y el texto de generateAnalyticsContext en CADA mensaje. El cliente
+-- ahora lo cachea por empresa/período y solo lo rehace cuando cambia
+-- esta versión.
+--
+-- La versión sube cuando cambian los datos que el contexto resume:
+--   • los rollups diarios (18_daily_rollups.sql) — una vez por
+--     sentencia del refresher, no por check-in ni por tarea
+--   • los equipos (alta, baja, nombre)
+-- Los datos crudos llegan a la versión con el retraso del refresher;
+-- el cliente además vence el cache por tiempo.
+-- Harness: python scripts/eneadisc_ai_context_harness.py
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.analytics_versions (
+  company_id UUID PRIMARY KEY REFERENCES public.companies(id) ON DELETE CASCADE,
+  version    BIGINT NOT NULL DEFAULT 1,
+  changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+-- Solo la leen funciones SECURITY DEFINER / el service role.
+ALTER TABLE public.analytics_versions ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.bump_analytics_versions(p_companies UUID[])
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER SET search_path = public
+AS $$
+  INSERT INTO public.analytics_versions AS v (company_id)
+  SELECT DISTINCT c FROM unnest(p_companies) c WHERE c IS NOT NULL
+  ORDER BY 1                                   -- orden fijo: sin deadlocks entre lotes
+  ON CONFLICT (company_id) DO UPDATE SET version = v.version + 1, changed_at = NOW();
+$$;
+REVOKE EXECUTE ON FUNCTION public.bump_analytics_versions(UUID[]) FROM PUBLIC, anon, authenticated;
+
+-- ── Rollups: un bump por sentencia (tablas de transición) ───
+CREATE OR REPLACE FUNCTION public.analytics_rollup_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM public.bump_analytics_versions(ARRAY(SELECT DISTINCT company_id FROM old_rows));
+  ELSE
+    PERFORM public.bump_analytics_versions(ARRAY(SELECT DISTINCT company_id FROM new_rows));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_analytics_dtw_ins ON public.daily_team_wellbeing;
+CREATE TRIGGER trg_analytics_dtw_ins AFTER INSERT ON public.daily_team_wellbeing
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.analytics_rollup_changed();
+DROP TRIGGER IF EXISTS trg_analytics_dtw_del ON public.daily_team_wellbeing;
+CREATE TRIGGER trg_analytics_dtw_del AFTER DELETE ON public.daily_team_wellbeing
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.analytics_rollup_changed();
+
+DROP TRIGGER IF EXISTS trg_analytics_dtt_ins ON public.daily_team_tasks;
+CREATE TRIGGER trg_analytics_dtt_ins AFTER INSERT ON public.daily_team_tasks
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.analytics_rollup_changed();
+DROP TRIGGER IF EXISTS trg_analytics_dtt_del ON public.daily_team_tasks;
+CREATE TRIGGER trg_analytics_dtt_del AFTER DELETE ON public.daily_team_tasks
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.analytics_rollup_changed();
+
+-- ── Equipos: el contexto lista cada equipo por nombre ───────
+CREATE OR REPLACE FUNCTION public.analytics_team_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND NEW.name IS NOT DISTINCT FROM OLD.name THEN
+    RETURN NULL;
+  END IF;
+  PERFORM public.bump_analytics_versions(ARRAY[
+    CASE WHEN TG_OP <> 'INSERT' THEN OLD.company_id END,
+    CASE WHEN TG_OP <> 'DELETE' THEN NEW.company_id END]);
+  RETURN NULL;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_analytics_team ON public.teams;
+CREATE TRIGGER trg_analytics_team AFTER INSERT OR UPDATE OF name OR DELETE ON public.teams
+  FOR EACH ROW EXECUTE FUNCTION public.analytics_team_changed();
+
+-- ── Versión de mi empresa ───────────────────────────────────
+CREATE OR REPLACE FUNCTION public.get_analytics_version()
+RETURNS TABLE (version BIGINT, changed_at TIMESTAMPTZ)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT COALESCE(v.version, 0), v.changed_at
+  FROM (SELECT public.my_company_id() AS company_id) me
+  LEFT JOIN public.analytics_versions v ON v.company_id = me.company_id
+  WHERE me.company_id IS NOT NULL;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_analytics_version() TO authenticated;
@@ -0,0 +1,96 @@
+-- ============================================================
+-- ENEATEAMS — SEÑALES DE TEXTO LIBRE (notas de check-in y diario)
+-- ============================================================
+-- checkins.notes y journal_entries.content se acumulaban sin
+-- analizar. El pipeline scripts/eneadisc_note_signals.py los
+-- clasifica en señales de estrés, energía y conflicto y guarda un
+-- resultado por nota en note_signals.
+--
+-- Mantenimiento: igual que los rollups (18_daily_rollups.sql), los
+-- triggers solo encolan qué nota cambió; el pipeline reclama la cola
+-- por lotes (DELETE ... RETURNING, ver eneadisc_db.drain_queue).
+-- Modo --backfill para el histórico.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.note_signals (
+  source       TEXT NOT NULL CHECK (source IN ('checkin', 'journal')),
+  source_id    UUID NOT NULL,
+  user_id      UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  day          DATE NOT NULL,
+  stress       REAL NOT NULL,            -- 0..1
+  energy       REAL NOT NULL,            -- -1 (agotado) .. 1 (con energía)
+  conflict     REAL NOT NULL,            -- 0..1
+  signals      TEXT[] NOT NULL DEFAULT '{}',   -- stress | low_energy | high_energy | conflict
+  model        TEXT NOT NULL,            -- versión del clasificador
+  processed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (source, source_id)
+);
+CREATE INDEX IF NOT EXISTS idx_note_signals_user_day ON public.note_signals(user_id, day);
+
+ALTER TABLE public.note_signals ENABLE ROW LEVEL SECURITY;
+
+-- Cada usuario ve las señales de sus notas.
+DROP POLICY IF EXISTS "note_signals_own" ON public.note_signals;
+CREATE POLICY "note_signals_own" ON public.note_signals FOR SELECT
+  USING (user_id = auth.uid());
+
+-- El admin ve las de check-ins de su empresa (como checkins_select_admin).
+-- El diario es privado: sus señales no salen del usuario.
+DROP POLICY IF EXISTS "note_signals_admin" ON public.note_signals;
+CREATE POLICY "note_signals_admin" ON public.note_signals FOR SELECT
+  USING (
+    source = 'checkin'
+    AND public.my_role() = 'company_admin'
+    AND EXISTS (
+      SELECT 1 FROM public.profiles
+      WHERE id = note_signals.user_id
+        AND company_id = public.my_company_id()
+    )
+  );
+
+-- ── Cola de notas cambiadas ─────────────────────────────────
+CREATE TABLE IF NOT EXISTS public.note_signal_queue (
+  id        BIGSERIAL PRIMARY KEY,
+  source    TEXT NOT NULL CHECK (source IN ('checkin', 'journal')),
+  source_id UUID NOT NULL,
+  queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE public.note_signal_queue ENABLE ROW LEVEL SECURITY;  -- sin políticas: solo service role
+
+-- Solo se encola si hay texto nuevo: un check-in sin nota no cuesta nada.
+-- Al borrar la nota (o la fila) se borra la señal en el momento.
+CREATE OR REPLACE FUNCTION public.enqueue_note_signal()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_source TEXT := CASE TG_TABLE_NAME WHEN 'checkins' THEN 'checkin' ELSE 'journal' END;
+  v_old    TEXT;
+  v_new    TEXT;
+BEGIN
+  IF TG_TABLE_NAME = 'checkins' THEN
+    v_old := CASE WHEN TG_OP <> 'INSERT' THEN OLD.notes END;
+    v_new := CASE WHEN TG_OP <> 'DELETE' THEN NEW.notes END;
+  ELSE
+    v_old := CASE WHEN TG_OP <> 'INSERT' THEN OLD.content END;
+    v_new := CASE WHEN TG_OP <> 'DELETE' THEN NEW.content END;
+  END IF;
+
+  IF COALESCE(btrim(v_new), '') = '' THEN
+    IF TG_OP <> 'INSERT' THEN
+      DELETE FROM public.note_signals WHERE source = v_source AND source_id = OLD.id;
+    END IF;
+  ELSIF v_new IS DISTINCT FROM v_old THEN
+    INSERT INTO public.note_signal_queue (source, source_id) VALUES (v_source, NEW.id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_checkin_note_signal ON public.checkins;
+CREATE TRIGGER trg_checkin_note_signal AFTER INSERT OR UPDATE OF notes OR DELETE ON public.checkins
+  FOR EACH ROW EXECUTE FUNCTION public.enqueue_note_signal();
+
+DROP TRIGGER IF EXISTS trg_journal_note_signal ON public.journal_entries;
+CREATE TRIGGER trg_journal_note_signal AFTER INSERT OR UPDATE OF content OR DELETE ON public.journal_entries
+  FOR EACH ROW EXECUTE FUNCTION public.enqueue_note_signal();
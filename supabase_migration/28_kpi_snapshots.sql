@@ -0,0 +1,179 @@
+-- ============================================================
+-- ENEATEAMS — SNAPSHOTS DE KPIs (seguimiento y evolución)
+-- ============================================================
+-- CompanyTracking (TrackingKPIs, EvolutionMatrix, StressRadar) pedía
+-- tareas y check-ins de cada empleado y recalculaba todo en el cliente.
+-- kpi_snapshots guarda una fila por persona, equipo y empresa con los
+-- agregados ya calculados: el dashboard lee O(1) filas.
+--
+-- Mantenimiento: los triggers encolan la imagen vieja y nueva de cada
+-- fila cambiada de checkins, tasks, team_members y profiles (empresa)
+-- en kpi_events. El motor scripts/eneadisc_kpi_engine.py reclama la
+-- cola por lotes (eneadisc_db.drain_queue) y aplica los deltas sin
+-- releer el histórico.
+-- Modo --backfill para el arranque.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.kpi_snapshots (
+  scope              TEXT NOT NULL CHECK (scope IN ('user', 'team', 'company')),
+  scope_id           UUID NOT NULL,
+  company_id         UUID,
+  member_count       INTEGER NOT NULL DEFAULT 0,
+  -- Histórico completo (Welford): media y varianza por check-in.
+  checkin_count      INTEGER NOT NULL DEFAULT 0,
+  energy_mean        REAL,
+  energy_var         REAL,
+  stress_mean        REAL,
+  stress_var         REAL,
+  wellbeing_mean     REAL,                 -- (energía + 6 − estrés) / 2, como trackingMocks
+  wellbeing_var      REAL,
+  -- Ventanas móviles (días UTC, hasta as_of inclusive).
+  checkins_7d        INTEGER NOT NULL DEFAULT 0,
+  wellbeing_7d       REAL,
+  checkins_30d       INTEGER NOT NULL DEFAULT 0,
+  energy_30d         REAL,
+  wellbeing_30d      REAL,
+  checkins_prev_30d  INTEGER NOT NULL DEFAULT 0,
+  energy_prev_30d    REAL,
+  wellbeing_prev_30d REAL,
+  -- Tareas: estado actual y completadas por ventana.
+  tasks_total        INTEGER NOT NULL DEFAULT 0,
+  tasks_completed    INTEGER NOT NULL DEFAULT 0,
+  completed_30d      INTEGER NOT NULL DEFAULT 0,
+  completed_prev_30d INTEGER NOT NULL DEFAULT 0,
+  as_of              DATE NOT NULL,
+  state              JSONB NOT NULL,       -- estado interno del motor (M2, buckets diarios)
+  refreshed_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (scope, scope_id)
+);
+CREATE INDEX IF NOT EXISTS idx_kpi_snapshots_company ON public.kpi_snapshots(company_id, scope);
+CREATE INDEX IF NOT EXISTS idx_kpi_snapshots_as_of   ON public.kpi_snapshots(as_of);
+
+ALTER TABLE public.kpi_snapshots ENABLE ROW LEVEL SECURITY;
+
+-- Cada usuario ve su propia fila; el admin, todas las de su empresa;
+-- los miembros de un equipo, la del equipo.
+DROP POLICY IF EXISTS "kpi_snapshots_read" ON public.kpi_snapshots;
+CREATE POLICY "kpi_snapshots_read" ON public.kpi_snapshots FOR SELECT
+  USING (
+    (scope = 'user' AND scope_id = auth.uid())
+    OR (company_id = public.my_company_id() AND public.my_role() = 'company_admin')
+    OR (scope = 'team' AND EXISTS (SELECT 1 FROM public.team_members tm
+                                   WHERE tm.team_id = kpi_snapshots.scope_id AND tm.user_id = auth.uid()))
+  );
+
+-- Membresía tal como la ve el motor (la ya aplicada, no la actual): un
+-- check-in encolado antes de un alta no debe sumarse dos veces al equipo.
+CREATE TABLE IF NOT EXISTS public.kpi_memberships (
+  team_id UUID NOT NULL,
+  user_id UUID NOT NULL,
+  PRIMARY KEY (team_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_kpi_memberships_user ON public.kpi_memberships(user_id);
+ALTER TABLE public.kpi_memberships ENABLE ROW LEVEL SECURITY;  -- sin políticas: solo service role
+
+-- ── Cola de cambios (imagen vieja / nueva) ──────────────────
+CREATE TABLE IF NOT EXISTS public.kpi_events (
+  id        BIGSERIAL PRIMARY KEY,
+  source    TEXT NOT NULL CHECK (source IN ('checkin', 'task', 'member', 'profile')),
+  old_row   JSONB,
+  new_row   JSONB,
+  queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE public.kpi_events ENABLE ROW LEVEL SECURITY;  -- sin políticas: solo service role
+
+-- Solo las columnas que el motor usa: el evento pesa ~100 bytes.
+CREATE OR REPLACE FUNCTION public.enqueue_kpi_event()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_old JSONB;
+  v_new JSONB;
+BEGIN
+  IF TG_TABLE_NAME = 'checkins' THEN
+    IF TG_OP <> 'INSERT' THEN
+      v_old := jsonb_build_object('user_id', OLD.user_id, 'day', (OLD.date AT TIME ZONE 'UTC')::date,
+                                  'energy', OLD.energy, 'stress', OLD.stress);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+      v_new := jsonb_build_object('user_id', NEW.user_id, 'day', (NEW.date AT TIME ZONE 'UTC')::date,
+                                  'energy', NEW.energy, 'stress', NEW.stress);
+    END IF;
+  ELSIF TG_TABLE_NAME = 'tasks' THEN
+    -- Solo tareas personales (team_id NULL), como getTasks en el panel:
+    -- pasar una tarea a un equipo es una baja para el motor.
+    IF TG_OP <> 'INSERT' AND OLD.team_id IS NULL THEN
+      v_old := jsonb_build_object('user_id', OLD.user_id, 'status', OLD.status,
+                                  'completed_day', (OLD.completed_at AT TIME ZONE 'UTC')::date);
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.team_id IS NULL THEN
+      v_new := jsonb_build_object('user_id', NEW.user_id, 'status', NEW.status,
+                                  'completed_day', (NEW.completed_at AT TIME ZONE 'UTC')::date);
+    END IF;
+  ELSIF TG_TABLE_NAME = 'profiles' THEN
+    IF TG_OP <> 'INSERT' THEN
+      v_old := jsonb_build_object('user_id', OLD.id, 'company_id', OLD.company_id);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+      v_new := jsonb_build_object('user_id', NEW.id, 'company_id', NEW.company_id);
+    END IF;
+  ELSE
+    IF TG_OP <> 'INSERT' THEN
+      v_old := jsonb_build_object('team_id', OLD.team_id, 'user_id', OLD.user_id);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+      v_new := jsonb_build_object('team_id', NEW.team_id, 'user_id', NEW.user_id);
+    END IF;
+  END IF;
+
+  IF v_old IS DISTINCT FROM v_new THEN
+    INSERT INTO public.kpi_events (source, old_row, new_row)
+      VALUES (CASE TG_TABLE_NAME WHEN 'checkins' THEN 'checkin' WHEN 'tasks' THEN 'task'
+                                 WHEN 'profiles' THEN 'profile' ELSE 'member' END,
+              v_old, v_new);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Editar solo la nota de un check-in o el título de una tarea no encola nada.
+DROP TRIGGER IF EXISTS trg_checkin_kpi ON public.checkins;
+CREATE TRIGGER trg_checkin_kpi AFTER INSERT OR UPDATE OF user_id, date, energy, stress OR DELETE
+  ON public.checkins FOR EACH ROW EXECUTE FUNCTION public.enqueue_kpi_event();
+
+DROP TRIGGER IF EXISTS trg_task_kpi ON public.tasks;
+CREATE TRIGGER trg_task_kpi AFTER INSERT OR UPDATE OF user_id, team_id, status, completed_at OR DELETE
+  ON public.tasks FOR EACH ROW EXECUTE FUNCTION public.enqueue_kpi_event();
+
+DROP TRIGGER IF EXISTS trg_member_kpi ON public.team_members;
+CREATE TRIGGER trg_member_kpi AFTER INSERT OR DELETE
+  ON public.team_members FOR EACH ROW EXECUTE FUNCTION public.enqueue_kpi_event();
+
+-- La empresa suma a las personas con su company_id: unirse o irse de
+-- una empresa mueve el agregado completo de la persona.
+DROP TRIGGER IF EXISTS trg_profile_kpi ON public.profiles;
+CREATE TRIGGER trg_profile_kpi AFTER INSERT OR UPDATE OF company_id OR DELETE
+  ON public.profiles FOR EACH ROW EXECUTE FUNCTION public.enqueue_kpi_event();
+
+-- ── Últimos check-ins por persona ───────────────────────────
+-- El estado de la matriz y el "Bienestar Promedio" salen de los últimos
+-- 5 check-ins de cada persona, igual que generateTrackingData sin
+-- snapshots; una ventana de días no da lo mismo para quien registra poco.
+-- Un LIMIT por persona sobre idx_checkins_user_date (index-only). Sin
+-- SECURITY DEFINER: corre con el RLS de checkins de quien llama.
+CREATE OR REPLACE FUNCTION public.get_recent_checkin_scores(p_user_ids UUID[], p_limit INTEGER DEFAULT 5)
+RETURNS TABLE (user_id UUID, checkins BIGINT, energy_sum BIGINT, score NUMERIC)
+LANGUAGE sql STABLE SET search_path = public
+AS $$
+  SELECT u.id, COUNT(*), SUM(c.energy), ROUND(AVG(c.energy + 6 - c.stress) / 2, 3)
+  FROM unnest(p_user_ids) AS u(id)
+  CROSS JOIN LATERAL (
+    SELECT energy, stress FROM public.checkins
+    WHERE checkins.user_id = u.id
+    ORDER BY date DESC
+    LIMIT LEAST(GREATEST(p_limit, 1), 30)
+  ) c
+  GROUP BY u.id;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_recent_checkin_scores(UUID[], INTEGER) TO authenticated;
@@ -0,0 +1,303 @@
+-- ============================================================
+-- ENEATEAMS — CLAIMS EN EL JWT (empresa, rol, equipos que lidero)
+-- ============================================================
+-- Las policies resolvían empresa y rol del caller con un lookup en
+-- profiles. En las correlacionadas (EXISTS por fila en team_members,
+-- tasks, checkins) o llamando a funciones (is_supervisor_of, y las
+-- my_company_id()/my_role() de 18/27/28) Postgres lo repetía por cada
+-- fila candidata: en scans grandes de checkins/tasks era el costo
+-- dominante.
+--
+-- Ahora el Auth Hook custom_access_token_hook stampa en el token:
+--   company_id, user_role, lead_team_ids y claims_version
+-- ('role' no se toca: es el rol de Postgres que usa PostgREST).
+-- Los helpers leen auth.jwt() y las policies los envuelven en
+-- (SELECT ...): un InitPlan por query, no una llamada por fila.
+--
+-- Frescura: cambiar rol, empresa o líder de equipo (admin_set_role,
+-- admin_set_team_lead, solicitudes de ingreso, ...) sube la versión
+-- de claims de los afectados. Un token con versión vieja cae al
+-- lookup en profiles/teams hasta que el cliente refresca la sesión
+-- (AuthContext lo hace al detectar el cambio): una degradación rige
+-- en la próxima query, no cuando expira el token.
+--
+-- Habilitar en Dashboard → Authentication → Hooks → Customize Access
+-- Token (JWT) Claims → public.custom_access_token_hook.
+-- Benchmark: scripts/eneadisc_rls_benchmark.py.
+-- ============================================================
+
+-- ── 1. Versión de claims por usuario ───────────────────────
+-- Sin fila = versión 0.
+CREATE TABLE IF NOT EXISTS public.claims_versions (
+  user_id    UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  version    BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE public.claims_versions ENABLE ROW LEVEL SECURITY;  -- sin políticas: solo helpers
+
+CREATE OR REPLACE FUNCTION public.bump_claims_version(p_users UUID[])
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER SET search_path = public
+AS $$
+  INSERT INTO public.claims_versions (user_id, version)
+  SELECT DISTINCT u, 1 FROM unnest(p_users) u
+  WHERE u IS NOT NULL AND EXISTS (SELECT 1 FROM auth.users WHERE id = u)
+  ON CONFLICT (user_id) DO UPDATE
+    SET version = claims_versions.version + 1, updated_at = NOW();
+$$;
+REVOKE EXECUTE ON FUNCTION public.bump_claims_version(UUID[]) FROM PUBLIC, anon, authenticated;
+
+-- ── 2. Auth Hook: claims del access token ──────────────────
+CREATE OR REPLACE FUNCTION public.custom_access_token_hook(event JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_user   UUID := (event ->> 'user_id')::uuid;
+  v_claims JSONB := COALESCE(event -> 'claims', '{}'::jsonb);
+BEGIN
+  -- Versión y claims en una sola sentencia (una sola foto). Con la versión
+  -- leída después del perfil, un cambio que hiciera commit entre las dos
+  -- lecturas dejaría el rol viejo con la versión nueva, y
+  -- jwt_claims_fresh() lo daría por bueno hasta que expire el token.
+  SELECT v_claims || jsonb_build_object(
+           'claims_version', COALESCE(cv.version, 0),
+           'company_id',     p.company_id,
+           'user_role',      p.role,
+           'lead_team_ids',  COALESCE((SELECT jsonb_agg(t.id ORDER BY t.id)
+                                       FROM public.teams t WHERE t.lead_id = v_user), '[]'::jsonb))
+    INTO v_claims
+  FROM (SELECT v_user AS id) u
+  LEFT JOIN public.claims_versions cv ON cv.user_id = u.id
+  LEFT JOIN public.profiles p ON p.id = u.id;
+
+  RETURN jsonb_set(event, '{claims}', v_claims);
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.custom_access_token_hook(JSONB) FROM PUBLIC, anon, authenticated;
+
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'supabase_auth_admin') THEN
+    GRANT EXECUTE ON FUNCTION public.custom_access_token_hook(JSONB) TO supabase_auth_admin;
+  END IF;
+END $$;
+
+-- ── 3. Helpers: claims si están al día, lookup si no ───────
+-- Tokens emitidos antes de habilitar el hook no traen claims_version
+-- y también caen al lookup.
+CREATE OR REPLACE FUNCTION public.jwt_claims_fresh()
+RETURNS BOOLEAN
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT COALESCE((auth.jwt() ->> 'claims_version')::bigint
+                  >= COALESCE((SELECT version FROM public.claims_versions
+                               WHERE user_id = auth.uid()), 0), FALSE);
+$$;
+
+CREATE OR REPLACE FUNCTION public.my_company_id()
+RETURNS UUID
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT CASE WHEN public.jwt_claims_fresh()
+              THEN (auth.jwt() ->> 'company_id')::uuid
+              ELSE (SELECT company_id FROM public.profiles WHERE id = auth.uid()) END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.my_role()
+RETURNS TEXT
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT CASE WHEN public.jwt_claims_fresh()
+              THEN auth.jwt() ->> 'user_role'
+              ELSE (SELECT role FROM public.profiles WHERE id = auth.uid()) END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.my_lead_teams()
+RETURNS UUID[]
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT CASE WHEN public.jwt_claims_fresh()
+              THEN ARRAY(SELECT jsonb_array_elements_text(auth.jwt() -> 'lead_team_ids')::uuid)
+              ELSE ARRAY(SELECT id FROM public.teams WHERE lead_id = auth.uid()) END;
+$$;
+
+-- La membresía no va en el token (cambia seguido y puede ser grande):
+-- se lee una vez por query desde los equipos que lidero.
+CREATE OR REPLACE FUNCTION public.my_supervised_ids()
+RETURNS UUID[]
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT ARRAY(SELECT DISTINCT tm.user_id FROM public.team_members tm
+               WHERE tm.team_id = ANY (public.my_lead_teams()));
+$$;
+
+-- Misma firma que en 11_hierarchy.sql (la usan RPCs como 12_chat.sql).
+CREATE OR REPLACE FUNCTION public.is_supervisor_of(p_employee UUID)
+RETURNS BOOLEAN
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT p_employee = ANY (public.my_supervised_ids());
+$$;
+
+GRANT EXECUTE ON FUNCTION public.my_company_id()     TO authenticated;
+GRANT EXECUTE ON FUNCTION public.my_role()           TO authenticated;
+GRANT EXECUTE ON FUNCTION public.my_lead_teams()     TO authenticated;
+GRANT EXECUTE ON FUNCTION public.my_supervised_ids() TO authenticated;
+
+-- ── 4. Invalidación: cambios que alteran los claims ────────
+CREATE OR REPLACE FUNCTION public.bump_claims_on_change()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'profiles' THEN
+    PERFORM public.bump_claims_version(ARRAY[NEW.id]);
+  ELSIF TG_OP = 'INSERT' THEN
+    PERFORM public.bump_claims_version(ARRAY[NEW.lead_id]);
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.bump_claims_version(ARRAY[OLD.lead_id]);
+  ELSE
+    PERFORM public.bump_claims_version(ARRAY[OLD.lead_id, NEW.lead_id]);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- admin_set_role (rol y, al degradar, lead_id) y admin_set_team_lead
+-- pasan por estos triggers; también approve_join_request (company_id).
+DROP TRIGGER IF EXISTS trg_profile_claims ON public.profiles;
+CREATE TRIGGER trg_profile_claims AFTER UPDATE OF role, company_id ON public.profiles
+  FOR EACH ROW WHEN (OLD.role IS DISTINCT FROM NEW.role OR OLD.company_id IS DISTINCT FROM NEW.company_id)
+  EXECUTE FUNCTION public.bump_claims_on_change();
+
+DROP TRIGGER IF EXISTS trg_team_lead_claims ON public.teams;
+CREATE TRIGGER trg_team_lead_claims AFTER UPDATE OF lead_id ON public.teams
+  FOR EACH ROW WHEN (OLD.lead_id IS DISTINCT FROM NEW.lead_id)
+  EXECUTE FUNCTION public.bump_claims_on_change();
+
+DROP TRIGGER IF EXISTS trg_team_lead_claims_ins_del ON public.teams;
+CREATE TRIGGER trg_team_lead_claims_ins_del AFTER INSERT OR DELETE ON public.teams
+  FOR EACH ROW EXECUTE FUNCTION public.bump_claims_on_change();
+
+-- ============================================================
+-- POLICIES (mismos nombres que 04_rls_fix.sql / 11_hierarchy.sql)
+-- ============================================================
+
+-- ── PROFILES ────────────────────────────────────────────────
+DROP POLICY IF EXISTS "profiles_admin_read" ON public.profiles;
+CREATE POLICY "profiles_admin_read" ON public.profiles FOR SELECT
+  USING (
+    company_id = (SELECT public.my_company_id())
+    AND (SELECT public.my_role()) = 'company_admin'
+  );
+
+DROP POLICY IF EXISTS "profiles_supervisor_read" ON public.profiles;
+CREATE POLICY "profiles_supervisor_read" ON public.profiles FOR SELECT
+  USING (id = ANY ((SELECT public.my_supervised_ids())));
+
+-- ── COMPANIES / TEAMS ───────────────────────────────────────
+DROP POLICY IF EXISTS "companies_member_select" ON public.companies;
+CREATE POLICY "companies_member_select" ON public.companies FOR SELECT
+  USING (id = (SELECT public.my_company_id()));
+
+DROP POLICY IF EXISTS "teams_all" ON public.teams;
+CREATE POLICY "teams_all" ON public.teams
+  USING (company_id = (SELECT public.my_company_id()))
+  WITH CHECK (company_id = (SELECT public.my_company_id()));
+
+-- ── TEAM MEMBERS ────────────────────────────────────────────
+-- Subquery sin correlación: se resuelve una vez (hashed SubPlan).
+DROP POLICY IF EXISTS "team_members_select" ON public.team_members;
+CREATE POLICY "team_members_select" ON public.team_members FOR SELECT
+  USING (team_id IN (SELECT t.id FROM public.teams t
+                     WHERE t.company_id = (SELECT public.my_company_id())));
+
+DROP POLICY IF EXISTS "team_members_insert" ON public.team_members;
+CREATE POLICY "team_members_insert" ON public.team_members FOR INSERT
+  WITH CHECK (team_id IN (SELECT t.id FROM public.teams t
+                          WHERE t.company_id = (SELECT public.my_company_id())));
+
+DROP POLICY IF EXISTS "team_members_delete" ON public.team_members;
+CREATE POLICY "team_members_delete" ON public.team_members FOR DELETE
+  USING (
+    user_id = (SELECT auth.uid())
+    OR ((SELECT public.my_role()) = 'company_admin'
+        AND team_id IN (SELECT t.id FROM public.teams t
+                        WHERE t.company_id = (SELECT public.my_company_id())))
+  );
+
+-- ── TASKS ───────────────────────────────────────────────────
+DROP POLICY IF EXISTS "tasks_select" ON public.tasks;
+CREATE POLICY "tasks_select" ON public.tasks FOR SELECT
+  USING (
+    user_id = (SELECT auth.uid())
+    OR team_id IN (SELECT tm.team_id FROM public.team_members tm
+                   WHERE tm.user_id = (SELECT auth.uid()))
+    OR ((SELECT public.my_role()) = 'company_admin'
+        AND team_id IN (SELECT t.id FROM public.teams t
+                        WHERE t.company_id = (SELECT public.my_company_id())))
+  );
+
+DROP POLICY IF EXISTS "tasks_supervisor_select" ON public.tasks;
+CREATE POLICY "tasks_supervisor_select" ON public.tasks FOR SELECT
+  USING (user_id = ANY ((SELECT public.my_supervised_ids())));
+
+DROP POLICY IF EXISTS "tasks_supervisor_update" ON public.tasks;
+CREATE POLICY "tasks_supervisor_update" ON public.tasks FOR UPDATE
+  USING (user_id = ANY ((SELECT public.my_supervised_ids())));
+
+DROP POLICY IF EXISTS "tasks_supervisor_insert" ON public.tasks;
+CREATE POLICY "tasks_supervisor_insert" ON public.tasks FOR INSERT
+  WITH CHECK (user_id = ANY ((SELECT public.my_supervised_ids())) OR user_id = (SELECT auth.uid()));
+
+-- ── CHECKINS ────────────────────────────────────────────────
+DROP POLICY IF EXISTS "checkins_admin_read" ON public.checkins;
+CREATE POLICY "checkins_admin_read" ON public.checkins FOR SELECT
+  USING (
+    (SELECT public.my_role()) = 'company_admin'
+    AND user_id IN (SELECT p.id FROM public.profiles p
+                    WHERE p.company_id = (SELECT public.my_company_id()))
+  );
+
+-- ── Tablas posteriores que llamaban a los helpers por fila ──
+DROP POLICY IF EXISTS events_select ON public.events;
+CREATE POLICY events_select ON public.events FOR SELECT
+  USING (company_id = (SELECT public.my_company_id()));
+
+DROP POLICY IF EXISTS events_insert ON public.events;
+CREATE POLICY events_insert ON public.events FOR INSERT
+  WITH CHECK (created_by = (SELECT auth.uid())
+    AND company_id = (SELECT public.my_company_id()));
+
+DROP POLICY IF EXISTS "dtw_read" ON public.daily_team_wellbeing;
+CREATE POLICY "dtw_read" ON public.daily_team_wellbeing FOR SELECT
+  USING (
+    (company_id = (SELECT public.my_company_id()) AND (SELECT public.my_role()) = 'company_admin')
+    OR team_id IN (SELECT tm.team_id FROM public.team_members tm WHERE tm.user_id = (SELECT auth.uid()))
+  );
+
+DROP POLICY IF EXISTS "dtt_read" ON public.daily_team_tasks;
+CREATE POLICY "dtt_read" ON public.daily_team_tasks FOR SELECT
+  USING (
+    (company_id = (SELECT public.my_company_id()) AND (SELECT public.my_role()) = 'company_admin')
+    OR team_id IN (SELECT tm.team_id FROM public.team_members tm WHERE tm.user_id = (SELECT auth.uid()))
+  );
+
+DROP POLICY IF EXISTS "note_signals_admin" ON public.note_signals;
+CREATE POLICY "note_signals_admin" ON public.note_signals FOR SELECT
+  USING (
+    source = 'checkin'
+    AND (SELECT public.my_role()) = 'company_admin'
+    AND user_id IN (SELECT p.id FROM public.profiles p
+                    WHERE p.company_id = (SELECT public.my_company_id()))
+  );
+
+DROP POLICY IF EXISTS "kpi_snapshots_read" ON public.kpi_snapshots;
+CREATE POLICY "kpi_snapshots_read" ON public.kpi_snapshots FOR SELECT
+  USING (
+    (scope = 'user' AND scope_id = (SELECT auth.uid()))
+    OR (company_id = (SELECT public.my_company_id()) AND (SELECT public.my_role()) = 'company_admin')
+    OR (scope = 'team' AND scope_id IN (SELECT tm.team_id FROM public.team_members tm
+                                        WHERE tm.user_id = (SELECT auth.uid())))
+  );
@@ -0,0 +1,201 @@
+-- ============================================================
+-- ENEATEAMS — TABLA DE SUPERVISIÓN (líder → persona, precalculada)
+-- ============================================================
+-- is_supervisor_of(), get_supervised_people() y get_supervised_mood()
+-- derivaban "mi gente" con un join teams (lead_id) → team_members en
+-- cada llamada. supervision guarda ese conjunto ya resuelto: cada
+-- chequeo es un probe por PK (supervisor_id, employee_id) y listar mi
+-- gente es un range scan de la PK.
+--
+-- Semántica igual a 11_hierarchy.sql: supervisar = liderar un equipo
+-- que contiene a la persona (no transitivo). Una persona en varios
+-- equipos del mismo líder es una sola fila.
+--
+-- Mantenimiento en línea con triggers sobre teams.lead_id y
+-- team_members: cada cambio recalcula solo los pares afectados, así
+-- que aplicar el mismo cambio dos veces no deja la tabla desfasada.
+-- Reparación masiva y verificación: scripts/eneadisc_supervision.py.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.supervision (
+  supervisor_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  employee_id   UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  PRIMARY KEY (supervisor_id, employee_id)
+);
+CREATE INDEX IF NOT EXISTS idx_supervision_employee ON public.supervision(employee_id);
+
+ALTER TABLE public.supervision ENABLE ROW LEVEL SECURITY;
+
+-- El supervisor ve sus filas (las usan las policies de abajo).
+DROP POLICY IF EXISTS "supervision_self_read" ON public.supervision;
+CREATE POLICY "supervision_self_read" ON public.supervision FOR SELECT
+  USING (supervisor_id = (SELECT auth.uid()));
+
+-- ── Recalcular pares ────────────────────────────────────────
+-- Deja en supervision exactamente los pares (líder, persona) que hoy
+-- salen de teams + team_members, para los líderes y personas dados.
+-- p_employees NULL = todas las personas de esos líderes.
+CREATE OR REPLACE FUNCTION public.sync_supervision(p_supervisors UUID[], p_employees UUID[] DEFAULT NULL)
+RETURNS VOID
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  -- Un lock por líder, en orden fijo (sin deadlocks entre dos syncs).
+  -- Dos transacciones que tocan al mismo líder (p. ej. altas en dos de
+  -- sus equipos) se serializan: la segunda ve el commit de la primera y
+  -- no borra un par que la otra acaba de crear ni deja uno de más.
+  PERFORM pg_advisory_xact_lock(hashtext('supervision:' || l::text))
+  FROM (SELECT DISTINCT l FROM unnest(p_supervisors) l WHERE l IS NOT NULL ORDER BY l) ids;
+
+  DELETE FROM public.supervision s
+  WHERE s.supervisor_id = ANY (p_supervisors)
+    AND (p_employees IS NULL OR s.employee_id = ANY (p_employees))
+    AND NOT EXISTS (
+      SELECT 1 FROM public.teams t JOIN public.team_members tm ON tm.team_id = t.id
+      WHERE t.lead_id = s.supervisor_id AND tm.user_id = s.employee_id
+    );
+
+  INSERT INTO public.supervision (supervisor_id, employee_id)
+  SELECT DISTINCT t.lead_id, tm.user_id
+  FROM public.teams t JOIN public.team_members tm ON tm.team_id = t.id
+  WHERE t.lead_id = ANY (p_supervisors)
+    AND (p_employees IS NULL OR tm.user_id = ANY (p_employees))
+  ON CONFLICT DO NOTHING;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.sync_supervision(UUID[], UUID[]) FROM PUBLIC, anon, authenticated;
+
+-- ── Triggers ────────────────────────────────────────────────
+-- Cambio de líder (o alta/baja de un equipo con líder): se recalcula
+-- todo el conjunto del líder viejo y del nuevo.
+CREATE OR REPLACE FUNCTION public.supervision_on_team()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  PERFORM public.sync_supervision(ARRAY_REMOVE(ARRAY[
+    CASE WHEN TG_OP <> 'INSERT' THEN OLD.lead_id END,
+    CASE WHEN TG_OP <> 'DELETE' THEN NEW.lead_id END
+  ], NULL));
+  RETURN NULL;
+END;
+$$;
+
+-- Alta/baja de una persona: solo sus pares con los líderes del equipo.
+-- El equipo borrado en cascada ya no está en teams: su líder se
+-- recalcula desde el trigger de teams.
+CREATE OR REPLACE FUNCTION public.supervision_on_member()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_leads UUID[];
+BEGIN
+  SELECT array_agg(DISTINCT t.lead_id) INTO v_leads
+  FROM public.teams t
+  WHERE t.lead_id IS NOT NULL
+    AND t.id IN (CASE WHEN TG_OP <> 'INSERT' THEN OLD.team_id END,
+                 CASE WHEN TG_OP <> 'DELETE' THEN NEW.team_id END);
+  IF v_leads IS NOT NULL THEN
+    PERFORM public.sync_supervision(v_leads, ARRAY_REMOVE(ARRAY[
+      CASE WHEN TG_OP <> 'INSERT' THEN OLD.user_id END,
+      CASE WHEN TG_OP <> 'DELETE' THEN NEW.user_id END
+    ], NULL));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_team_supervision ON public.teams;
+CREATE TRIGGER trg_team_supervision AFTER UPDATE OF lead_id ON public.teams
+  FOR EACH ROW WHEN (OLD.lead_id IS DISTINCT FROM NEW.lead_id)
+  EXECUTE FUNCTION public.supervision_on_team();
+
+DROP TRIGGER IF EXISTS trg_team_supervision_ins_del ON public.teams;
+CREATE TRIGGER trg_team_supervision_ins_del AFTER INSERT OR DELETE ON public.teams
+  FOR EACH ROW EXECUTE FUNCTION public.supervision_on_team();
+
+DROP TRIGGER IF EXISTS trg_member_supervision ON public.team_members;
+CREATE TRIGGER trg_member_supervision AFTER INSERT OR UPDATE OR DELETE ON public.team_members
+  FOR EACH ROW EXECUTE FUNCTION public.supervision_on_member();
+
+-- ── Carga inicial ───────────────────────────────────────────
+INSERT INTO public.supervision (supervisor_id, employee_id)
+SELECT DISTINCT t.lead_id, tm.user_id
+FROM public.teams t JOIN public.team_members tm ON tm.team_id = t.id
+WHERE t.lead_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+-- ── Helpers sobre supervision ───────────────────────────────
+CREATE OR REPLACE FUNCTION public.is_supervisor_of(p_employee UUID)
+RETURNS BOOLEAN
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT EXISTS (SELECT 1 FROM public.supervision
+                 WHERE supervisor_id = auth.uid() AND employee_id = p_employee);
+$$;
+
+CREATE OR REPLACE FUNCTION public.my_supervised_ids()
+RETURNS UUID[]
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT ARRAY(SELECT employee_id FROM public.supervision WHERE supervisor_id = auth.uid());
+$$;
+
+-- ── Policies del supervisor: probe por PK ───────────────────
+DROP POLICY IF EXISTS "profiles_supervisor_read" ON public.profiles;
+CREATE POLICY "profiles_supervisor_read" ON public.profiles FOR SELECT
+  USING (EXISTS (SELECT 1 FROM public.supervision s
+                 WHERE s.supervisor_id = (SELECT auth.uid()) AND s.employee_id = profiles.id));
+
+DROP POLICY IF EXISTS "tasks_supervisor_select" ON public.tasks;
+CREATE POLICY "tasks_supervisor_select" ON public.tasks FOR SELECT
+  USING (EXISTS (SELECT 1 FROM public.supervision s
+                 WHERE s.supervisor_id = (SELECT auth.uid()) AND s.employee_id = tasks.user_id));
+
+DROP POLICY IF EXISTS "tasks_supervisor_update" ON public.tasks;
+CREATE POLICY "tasks_supervisor_update" ON public.tasks FOR UPDATE
+  USING (EXISTS (SELECT 1 FROM public.supervision s
+                 WHERE s.supervisor_id = (SELECT auth.uid()) AND s.employee_id = tasks.user_id));
+
+DROP POLICY IF EXISTS "tasks_supervisor_insert" ON public.tasks;
+CREATE POLICY "tasks_supervisor_insert" ON public.tasks FOR INSERT
+  WITH CHECK (user_id = (SELECT auth.uid())
+    OR EXISTS (SELECT 1 FROM public.supervision s
+               WHERE s.supervisor_id = (SELECT auth.uid()) AND s.employee_id = tasks.user_id));
+
+-- ── RPCs de 11_hierarchy.sql sobre supervision ──────────────
+CREATE OR REPLACE FUNCTION public.get_supervised_people()
+RETURNS TABLE (
+  id UUID, full_name TEXT, enneagram_type INTEGER, questionnaire_completed BOOLEAN,
+  avg_energy NUMERIC, avg_stress NUMERIC, checkin_count BIGINT
+)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT
+    p.id, p.full_name, p.enneagram_type, p.questionnaire_completed,
+    COALESCE(ROUND(AVG(c.energy), 1), 0),
+    COALESCE(ROUND(AVG(c.stress), 1), 0),
+    COUNT(c.id)
+  FROM public.supervision s
+  JOIN public.profiles p ON p.id = s.employee_id
+  LEFT JOIN public.checkins c ON c.user_id = p.id AND c.date >= NOW() - INTERVAL '14 days'
+  WHERE s.supervisor_id = auth.uid()
+  GROUP BY p.id, p.full_name, p.enneagram_type, p.questionnaire_completed;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_supervised_people() TO authenticated;
+
+CREATE OR REPLACE FUNCTION public.get_supervised_mood()
+RETURNS TABLE (avg_energy NUMERIC, avg_stress NUMERIC, checkin_count BIGINT, people_count BIGINT)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT
+    COALESCE(ROUND(AVG(c.energy), 1), 0),
+    COALESCE(ROUND(AVG(c.stress), 1), 0),
+    COUNT(c.id),
+    (SELECT COUNT(*) FROM public.supervision WHERE supervisor_id = auth.uid())
+  FROM public.checkins c
+  WHERE c.user_id IN (SELECT employee_id FROM public.supervision WHERE supervisor_id = auth.uid())
+    AND c.date >= NOW() - INTERVAL '7 days';
+$$;
+GRANT EXECUTE ON FUNCTION public.get_supervised_mood() TO authenticated;
@@ -0,0 +1,163 @@
+-- ============================================================
+-- ENEATEAMS — CONTADORES DE KUDOS Y LEADERBOARD
+-- ============================================================
+-- getKudosRanking (adminFeatures.ts) bajaba hasta 500 kudos y los
+-- contaba en el navegador: lento, y pasado ese número el ranking era
+-- incorrecto. kudos_counters guarda cuántos reconocimientos recibió
+-- cada persona por empresa, período (histórico, semana, mes UTC) y
+-- categoría ('*' = todas). get_kudos_leaderboard devuelve el top-N
+-- leyendo el índice en orden: no cuenta nada.
+--
+-- Mantenimiento: un trigger sobre kudos suma/resta en línea. La
+-- reconstrucción masiva desde el histórico (arranque o desvío) la hace
+-- scripts/eneadisc_kudos_counters.py vía rebuild_kudos_counters().
+-- Ambos toman un advisory lock por empresa (compartido el trigger,
+-- exclusivo el rebuild): un kudo no se cuenta dos veces ni se pierde
+-- mientras se reconstruye.
+-- ============================================================
+
+-- Sin FKs: al borrar una empresa o un usuario, la cascada sobre kudos
+-- descuenta hasta 0 y el trigger borra las filas.
+CREATE TABLE IF NOT EXISTS public.kudos_counters (
+  company_id  UUID NOT NULL,
+  period      TEXT NOT NULL CHECK (period IN ('all', 'week', 'month')),
+  bucket      DATE NOT NULL,              -- lunes / día 1 del mes; 1970-01-01 para 'all'
+  category    TEXT NOT NULL,              -- categoría de kudos o '*'
+  to_user     UUID NOT NULL,
+  kudos_count INTEGER NOT NULL,
+  PRIMARY KEY (company_id, period, bucket, category, to_user)
+);
+CREATE INDEX IF NOT EXISTS idx_kudos_counters_top
+  ON public.kudos_counters(company_id, period, bucket, category, kudos_count DESC, to_user);
+
+ALTER TABLE public.kudos_counters ENABLE ROW LEVEL SECURITY;
+
+-- Los kudos son visibles para toda la empresa; sus conteos también.
+DROP POLICY IF EXISTS "kudos_counters_read" ON public.kudos_counters;
+CREATE POLICY "kudos_counters_read" ON public.kudos_counters FOR SELECT
+  USING (company_id = (SELECT public.my_company_id()));
+
+-- ── Buckets de un instante (UTC) ───────────────────────────
+CREATE OR REPLACE FUNCTION public.kudos_buckets(p_at TIMESTAMPTZ)
+RETURNS TABLE (period TEXT, bucket DATE)
+LANGUAGE sql IMMUTABLE
+AS $$
+  VALUES ('all',   DATE '1970-01-01'),
+         ('week',  date_trunc('week',  p_at AT TIME ZONE 'UTC')::date),
+         ('month', date_trunc('month', p_at AT TIME ZONE 'UTC')::date);
+$$;
+
+-- ── Aplicar un kudo (+1) o su baja (−1) ────────────────────
+CREATE OR REPLACE FUNCTION public.apply_kudos_delta(
+  p_company UUID, p_to UUID, p_category TEXT, p_at TIMESTAMPTZ, p_delta INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  PERFORM pg_advisory_xact_lock_shared(hashtext('kudos_counters:' || p_company::text));
+
+  IF p_delta > 0 THEN
+    INSERT INTO public.kudos_counters (company_id, period, bucket, category, to_user, kudos_count)
+    SELECT p_company, b.period, b.bucket, c.category, p_to, p_delta
+    FROM public.kudos_buckets(p_at) b, (VALUES ('*'), (p_category)) c(category)
+    ON CONFLICT (company_id, period, bucket, category, to_user)
+    DO UPDATE SET kudos_count = kudos_counters.kudos_count + EXCLUDED.kudos_count;
+  ELSE
+    UPDATE public.kudos_counters k SET kudos_count = k.kudos_count + p_delta
+    FROM public.kudos_buckets(p_at) b, (VALUES ('*'), (p_category)) c(category)
+    WHERE k.company_id = p_company AND k.period = b.period AND k.bucket = b.bucket
+      AND k.category = c.category AND k.to_user = p_to;
+    DELETE FROM public.kudos_counters
+    WHERE company_id = p_company AND to_user = p_to AND kudos_count <= 0;
+  END IF;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.apply_kudos_delta(UUID, UUID, TEXT, TIMESTAMPTZ, INTEGER)
+  FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION public.bump_kudos_counters()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    PERFORM public.apply_kudos_delta(OLD.company_id, OLD.to_user, OLD.category, OLD.created_at, -1);
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    PERFORM public.apply_kudos_delta(NEW.company_id, NEW.to_user, NEW.category, NEW.created_at, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Editar el mensaje de un kudo no toca los contadores.
+DROP TRIGGER IF EXISTS trg_kudos_counters ON public.kudos;
+CREATE TRIGGER trg_kudos_counters
+  AFTER INSERT OR UPDATE OF company_id, to_user, category, created_at OR DELETE
+  ON public.kudos FOR EACH ROW EXECUTE FUNCTION public.bump_kudos_counters();
+
+-- ── Reconstrucción desde kudos (por lote de empresas) ──────
+-- Escribe solo lo que difiere; devuelve cuántas filas corrigió.
+CREATE OR REPLACE FUNCTION public.rebuild_kudos_counters(p_companies UUID[])
+RETURNS INTEGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_company UUID;
+  v_deleted INTEGER;
+  v_upserted INTEGER;
+BEGIN
+  -- Orden fijo: dos rebuilds con lotes solapados no se bloquean en cruz.
+  FOR v_company IN SELECT DISTINCT c FROM unnest(p_companies) c ORDER BY c LOOP
+    PERFORM pg_advisory_xact_lock(hashtext('kudos_counters:' || v_company::text));
+  END LOOP;
+
+  DELETE FROM public.kudos_counters k
+  WHERE k.company_id = ANY (p_companies)
+    AND NOT EXISTS (
+      SELECT 1 FROM public.kudos x, public.kudos_buckets(x.created_at) b
+      WHERE x.company_id = k.company_id AND x.to_user = k.to_user
+        AND b.period = k.period AND b.bucket = k.bucket
+        AND (k.category = '*' OR x.category = k.category)
+    );
+  GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+  INSERT INTO public.kudos_counters (company_id, period, bucket, category, to_user, kudos_count)
+  SELECT x.company_id, b.period, b.bucket, COALESCE(x.category, '*'), x.to_user, count(*)
+  FROM public.kudos x, public.kudos_buckets(x.created_at) b
+  WHERE x.company_id = ANY (p_companies)
+  GROUP BY GROUPING SETS ((x.company_id, b.period, b.bucket, x.to_user, x.category),
+                          (x.company_id, b.period, b.bucket, x.to_user))
+  ON CONFLICT (company_id, period, bucket, category, to_user)
+  DO UPDATE SET kudos_count = EXCLUDED.kudos_count
+  WHERE kudos_counters.kudos_count <> EXCLUDED.kudos_count;
+  GET DIAGNOSTICS v_upserted = ROW_COUNT;
+
+  RETURN v_deleted + v_upserted;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.rebuild_kudos_counters(UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_kudos_counters(UUID[]) TO service_role;
+
+-- ── RPC: top-N de mi empresa ────────────────────────────────
+-- p_period: 'all' | 'week' | 'month' (el que contiene p_at).
+-- p_category NULL = todas.
+CREATE OR REPLACE FUNCTION public.get_kudos_leaderboard(
+  p_period TEXT DEFAULT 'all', p_category TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 10, p_at TIMESTAMPTZ DEFAULT NOW()
+)
+RETURNS TABLE (user_id UUID, full_name TEXT, kudos_count INTEGER)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT k.to_user, COALESCE(p.full_name, 'Sin nombre'), k.kudos_count
+  FROM public.kudos_counters k
+  LEFT JOIN public.profiles p ON p.id = k.to_user
+  WHERE k.company_id = public.my_company_id()
+    AND k.period = p_period
+    AND k.bucket = (SELECT b.bucket FROM public.kudos_buckets(p_at) b WHERE b.period = p_period)
+    AND k.category = COALESCE(p_category, '*')
+  ORDER BY k.kudos_count DESC, k.to_user
+  LIMIT LEAST(GREATEST(p_limit, 1), 100);
+$$;
+GRANT EXECUTE ON FUNCTION public.get_kudos_leaderboard(TEXT, TEXT, INTEGER, TIMESTAMPTZ) TO authenticated;
@@ -0,0 +1,325 @@
+-- ============================================================
+-- ENEATEAMS — RESUMEN POR EMPLEADO + OVERVIEW PAGINADO
+-- ============================================================
+-- get_employees_overview() (11_hierarchy.sql) agrega check-ins de cada
+-- persona en cada llamada y devuelve a toda la empresa de una vez;
+-- AdminPeople y suggestAdminActions filtran y cuentan en el cliente.
+-- Con 5.000 empleados son varios MB y una query lenta.
+--
+-- employee_summaries guarda una fila por empleado/supervisor con lo que
+-- muestra la lista: último check-in, promedios de 14 días, tareas
+-- abiertas/vencidas y banderas de riesgo. get_employees_page() pagina
+-- por keyset (nombre, riesgo o último check-in) con filtros por equipo,
+-- tipo, nivel de riesgo y bandera; get_employees_stats() da los conteos
+-- de las alertas sin bajar filas.
+--
+-- Mantenimiento: triggers encolan el user_id en summary_queue;
+-- process_employee_summaries() reclama la cola por lotes y recalcula
+-- esas personas. Lo corre pg_cron cada minuto (se agenda al final de
+-- este archivo); scripts/eneadisc_employee_summaries.py hace lo mismo
+-- fuera de la base y el --backfill. Cada fila sabe cuándo cambia sola
+-- con el paso del tiempo (next_change_at: sale un check-in de la
+-- ventana o vence una tarea) y se recalcula entonces.
+-- La migración siembra la tabla con todos los empleados y supervisores
+-- después de crear los triggers: la lista está completa desde el primer
+-- minuto, sin esperar un --backfill, y lo que cambie durante la siembra
+-- ya está en la cola.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.employee_summaries (
+  user_id                 UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  company_id              UUID NOT NULL,
+  full_name               TEXT,
+  email                   TEXT,
+  role                    TEXT NOT NULL,
+  enneagram_type          INTEGER,
+  questionnaire_completed BOOLEAN NOT NULL DEFAULT FALSE,
+  team_ids                UUID[] NOT NULL DEFAULT '{}',
+  last_checkin            TIMESTAMPTZ,              -- último de todos, no solo de la ventana
+  checkin_count_14d       INTEGER NOT NULL DEFAULT 0,
+  avg_energy_14d          NUMERIC,                  -- ROUND(…, 1), como get_employees_overview
+  avg_stress_14d          NUMERIC,
+  open_tasks              INTEGER NOT NULL DEFAULT 0,
+  overdue_tasks           INTEGER NOT NULL DEFAULT 0,
+  risk                    TEXT NOT NULL CHECK (risk IN ('ok', 'watch', 'high')),
+  risk_flags              TEXT[] NOT NULL DEFAULT '{}',
+  risk_score              REAL NOT NULL,            -- nivel * 10 + estrés: orden "más en riesgo primero"
+  next_change_at          TIMESTAMPTZ,
+  refreshed_at            TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+-- Un índice por orden de get_employees_page (empresa + clave + user_id).
+CREATE INDEX IF NOT EXISTS idx_es_company_name
+  ON public.employee_summaries(company_id, COALESCE(lower(full_name), ''), user_id);
+CREATE INDEX IF NOT EXISTS idx_es_company_risk
+  ON public.employee_summaries(company_id, risk_score DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_es_company_last_checkin
+  ON public.employee_summaries(company_id, COALESCE(last_checkin, '-infinity'::timestamptz) DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_es_teams ON public.employee_summaries USING GIN (team_ids);
+CREATE INDEX IF NOT EXISTS idx_es_next_change
+  ON public.employee_summaries(next_change_at) WHERE next_change_at IS NOT NULL;
+
+ALTER TABLE public.employee_summaries ENABLE ROW LEVEL SECURITY;  -- sin políticas: se lee por RPC
+
+-- ── Cola de personas "sucias" ───────────────────────────────
+CREATE TABLE IF NOT EXISTS public.summary_queue (
+  id        BIGSERIAL PRIMARY KEY,
+  user_id   UUID NOT NULL,
+  queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE public.summary_queue ENABLE ROW LEVEL SECURITY;  -- sin políticas: solo service role
+
+CREATE OR REPLACE FUNCTION public.enqueue_employee_summary()
+RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'profiles' THEN
+    INSERT INTO public.summary_queue (user_id) VALUES (NEW.id);
+    RETURN NULL;
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    INSERT INTO public.summary_queue (user_id) VALUES (OLD.user_id);
+  END IF;
+  IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.user_id IS DISTINCT FROM OLD.user_id) THEN
+    INSERT INTO public.summary_queue (user_id) VALUES (NEW.user_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_checkin_summary ON public.checkins;
+CREATE TRIGGER trg_checkin_summary AFTER INSERT OR UPDATE OF user_id, date, energy, stress OR DELETE
+  ON public.checkins FOR EACH ROW EXECUTE FUNCTION public.enqueue_employee_summary();
+
+DROP TRIGGER IF EXISTS trg_task_summary ON public.tasks;
+CREATE TRIGGER trg_task_summary AFTER INSERT OR UPDATE OF user_id, status, due_date OR DELETE
+  ON public.tasks FOR EACH ROW EXECUTE FUNCTION public.enqueue_employee_summary();
+
+DROP TRIGGER IF EXISTS trg_member_summary ON public.team_members;
+CREATE TRIGGER trg_member_summary AFTER INSERT OR DELETE
+  ON public.team_members FOR EACH ROW EXECUTE FUNCTION public.enqueue_employee_summary();
+
+-- El borrado del perfil lo cubre la cascada desde auth.users.
+DROP TRIGGER IF EXISTS trg_profile_summary ON public.profiles;
+CREATE TRIGGER trg_profile_summary
+  AFTER INSERT OR UPDATE OF full_name, email, role, enneagram_type, questionnaire_completed, company_id
+  ON public.profiles FOR EACH ROW EXECUTE FUNCTION public.enqueue_employee_summary();
+
+-- ── Riesgo (antes computeRisk en el cliente; ahora solo acá) ──
+CREATE OR REPLACE FUNCTION public.employee_risk(p_stress NUMERIC, p_energy NUMERIC, p_checkins INTEGER)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN COALESCE(p_checkins, 0) = 0 THEN 'ok'
+    WHEN p_stress >= 4 OR p_energy <= 2 THEN 'high'
+    WHEN p_stress >= 3.3 OR p_energy <= 2.6 THEN 'watch'
+    ELSE 'ok'
+  END;
+$$;
+
+-- ── Resumen calculado desde las filas crudas ─────────────────
+-- Mismas columnas que employee_summaries.
+CREATE OR REPLACE FUNCTION public.employee_summary_rows(p_users UUID[])
+RETURNS SETOF public.employee_summaries
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT
+    p.id, p.company_id, p.full_name, p.email, p.role, p.enneagram_type, COALESCE(p.questionnaire_completed, FALSE),
+    ARRAY(SELECT tm.team_id FROM public.team_members tm WHERE tm.user_id = p.id ORDER BY tm.team_id),
+    c.last_checkin, c.n, c.energy, c.stress,
+    t.open, t.overdue,
+    r.risk,
+    ARRAY_REMOVE(ARRAY[
+      CASE WHEN c.stress >= 4 THEN 'high_stress' END,
+      CASE WHEN c.energy <= 2 THEN 'low_energy' END,
+      CASE WHEN t.overdue > 0 THEN 'overdue_tasks' END,
+      CASE WHEN p.questionnaire_completed AND c.n = 0 THEN 'no_checkins' END,
+      CASE WHEN NOT COALESCE(p.questionnaire_completed, FALSE) THEN 'pending_test' END
+    ], NULL),
+    ((CASE r.risk WHEN 'high' THEN 20 WHEN 'watch' THEN 10 ELSE 0 END) + COALESCE(c.stress, 0))::real,
+    -- Próximo cambio sin eventos: el check-in más viejo sale de la
+    -- ventana o la próxima tarea abierta vence.
+    LEAST(c.oldest + INTERVAL '14 days', t.next_due),
+    NOW()
+  FROM public.profiles p
+  CROSS JOIN LATERAL (
+    SELECT MAX(ch.date) AS last_checkin,
+           COUNT(*) FILTER (WHERE ch.date >= NOW() - INTERVAL '14 days')::int AS n,
+           ROUND(AVG(ch.energy) FILTER (WHERE ch.date >= NOW() - INTERVAL '14 days'), 1) AS energy,
+           ROUND(AVG(ch.stress) FILTER (WHERE ch.date >= NOW() - INTERVAL '14 days'), 1) AS stress,
+           MIN(ch.date) FILTER (WHERE ch.date >= NOW() - INTERVAL '14 days') AS oldest
+    FROM public.checkins ch WHERE ch.user_id = p.id
+  ) c
+  CROSS JOIN LATERAL (
+    SELECT COUNT(*) FILTER (WHERE tk.status <> 'completed')::int AS open,
+           COUNT(*) FILTER (WHERE tk.status <> 'completed' AND tk.due_date < NOW())::int AS overdue,
+           MIN(tk.due_date) FILTER (WHERE tk.status <> 'completed' AND tk.due_date >= NOW()) AS next_due
+    FROM public.tasks tk WHERE tk.user_id = p.id
+  ) t
+  CROSS JOIN LATERAL (SELECT public.employee_risk(c.stress, c.energy, c.n) AS risk) r
+  WHERE p.id = ANY (p_users) AND p.company_id IS NOT NULL AND p.role IN ('employee', 'supervisor');
+$$;
+REVOKE EXECUTE ON FUNCTION public.employee_summary_rows(UUID[]) FROM PUBLIC, anon, authenticated;
+
+-- ── Recalcular un conjunto de personas ──────────────────────
+-- Idempotente: borra a quien ya no es empleado/supervisor de una
+-- empresa y reescribe al resto desde las filas crudas.
+CREATE OR REPLACE FUNCTION public.refresh_employee_summaries(p_users UUID[])
+RETURNS INTEGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_rows INTEGER;
+BEGIN
+  DELETE FROM public.employee_summaries s
+  WHERE s.user_id = ANY (p_users)
+    AND NOT EXISTS (SELECT 1 FROM public.profiles p
+                    WHERE p.id = s.user_id AND p.company_id IS NOT NULL
+                      AND p.role IN ('employee', 'supervisor'));
+
+  INSERT INTO public.employee_summaries AS s
+  SELECT * FROM public.employee_summary_rows(p_users)
+  ON CONFLICT (user_id) DO UPDATE SET
+    company_id = EXCLUDED.company_id, full_name = EXCLUDED.full_name, email = EXCLUDED.email,
+    role = EXCLUDED.role, enneagram_type = EXCLUDED.enneagram_type,
+    questionnaire_completed = EXCLUDED.questionnaire_completed, team_ids = EXCLUDED.team_ids,
+    last_checkin = EXCLUDED.last_checkin, checkin_count_14d = EXCLUDED.checkin_count_14d,
+    avg_energy_14d = EXCLUDED.avg_energy_14d, avg_stress_14d = EXCLUDED.avg_stress_14d,
+    open_tasks = EXCLUDED.open_tasks, overdue_tasks = EXCLUDED.overdue_tasks,
+    risk = EXCLUDED.risk, risk_flags = EXCLUDED.risk_flags, risk_score = EXCLUDED.risk_score,
+    next_change_at = EXCLUDED.next_change_at, refreshed_at = EXCLUDED.refreshed_at;
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.refresh_employee_summaries(UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.refresh_employee_summaries(UUID[]) TO service_role;
+
+-- Siembra: todos los empleados y supervisores actuales. Lo que cambie
+-- después ya pasa por los triggers de arriba.
+SELECT public.refresh_employee_summaries(ARRAY(
+  SELECT id FROM public.profiles WHERE company_id IS NOT NULL AND role IN ('employee', 'supervisor')));
+
+-- ── Procesar la cola y los vencidos (pg_cron) ───────────────
+-- Mismo reclamo que eneadisc_db.drain_queue, con el mismo advisory lock:
+-- nunca corre a la vez que el worker de Python. Las entradas de
+-- transacciones sin commit no son visibles y quedan para la próxima.
+CREATE OR REPLACE FUNCTION public.process_employee_summaries(p_limit INTEGER DEFAULT 5000)
+RETURNS INTEGER
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_users UUID[];
+  v_rows  INTEGER := 0;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('queue:public.summary_queue'));
+
+  WITH claimed AS (
+    DELETE FROM public.summary_queue WHERE id IN (
+      SELECT id FROM public.summary_queue ORDER BY id LIMIT p_limit FOR UPDATE SKIP LOCKED)
+    RETURNING user_id
+  )
+  SELECT ARRAY(SELECT DISTINCT user_id FROM claimed) INTO v_users;
+  IF cardinality(v_users) > 0 THEN
+    v_rows := public.refresh_employee_summaries(v_users);
+  END IF;
+
+  v_users := ARRAY(SELECT user_id FROM public.employee_summaries
+                   WHERE next_change_at <= NOW() ORDER BY next_change_at LIMIT p_limit);
+  IF cardinality(v_users) > 0 THEN
+    v_rows := v_rows + public.refresh_employee_summaries(v_users);
+  END IF;
+  RETURN v_rows;
+END;
+$$;
+REVOKE EXECUTE ON FUNCTION public.process_employee_summaries(INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- ── RPC: una página del overview ────────────────────────────
+-- p_sort: 'name' (A→Z) | 'risk' (más en riesgo primero) | 'last_checkin'
+-- (más reciente primero). Cursor: (sort_value, user_id) de la última
+-- fila de la página anterior; NULL = primera página.
+CREATE OR REPLACE FUNCTION public.get_employees_page(
+  p_team UUID DEFAULT NULL, p_type INTEGER DEFAULT NULL, p_risk TEXT DEFAULT NULL,
+  p_flag TEXT DEFAULT NULL, p_search TEXT DEFAULT NULL, p_sort TEXT DEFAULT 'name',
+  p_after_value TEXT DEFAULT NULL, p_after_id UUID DEFAULT NULL, p_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+  id UUID, full_name TEXT, email TEXT, role TEXT, enneagram_type INTEGER,
+  questionnaire_completed BOOLEAN, team_ids UUID[], last_checkin TIMESTAMPTZ,
+  checkin_count INTEGER, avg_energy NUMERIC, avg_stress NUMERIC,
+  open_tasks INTEGER, overdue_tasks INTEGER, risk TEXT, risk_flags TEXT[], sort_value TEXT
+)
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+DECLARE
+  v_company UUID := public.my_company_id();
+  v_key     TEXT;
+  v_type    TEXT;
+  v_desc    BOOLEAN := p_sort <> 'name';
+BEGIN
+  IF public.my_role() IS DISTINCT FROM 'company_admin' THEN
+    RAISE EXCEPTION 'No autorizado';
+  END IF;
+  CASE p_sort
+    WHEN 'name'         THEN v_key := 'COALESCE(lower(s.full_name), '''')';                     v_type := 'text';
+    WHEN 'risk'         THEN v_key := 's.risk_score';                                           v_type := 'real';
+    WHEN 'last_checkin' THEN v_key := 'COALESCE(s.last_checkin, ''-infinity''::timestamptz)';   v_type := 'timestamptz';
+    ELSE RAISE EXCEPTION 'Orden inválido: %', p_sort;
+  END CASE;
+
+  -- Solo se interpolan fragmentos de la lista de arriba; los filtros van por USING.
+  RETURN QUERY EXECUTE format($q$
+    SELECT s.user_id, s.full_name, s.email, s.role, s.enneagram_type, s.questionnaire_completed,
+           s.team_ids, s.last_checkin, s.checkin_count_14d, s.avg_energy_14d, s.avg_stress_14d,
+           s.open_tasks, s.overdue_tasks, s.risk, s.risk_flags, (%1$s)::text
+    FROM public.employee_summaries s
+    WHERE s.company_id = $1
+      AND ($2::uuid IS NULL OR s.team_ids @> ARRAY[$2::uuid])
+      AND ($3::int  IS NULL OR s.enneagram_type = $3)
+      AND ($4::text IS NULL OR s.risk = $4)
+      AND ($5::text IS NULL OR s.risk_flags @> ARRAY[$5::text])
+      AND ($6::text IS NULL OR s.full_name ILIKE '%%' || $6 || '%%')
+      AND ($8::uuid IS NULL OR %1$s %2$s $7::%3$s OR (%1$s = $7::%3$s AND s.user_id > $8))
+    ORDER BY %1$s %4$s, s.user_id
+    LIMIT $9
+  $q$, v_key, CASE WHEN v_desc THEN '<' ELSE '>' END, v_type, CASE WHEN v_desc THEN 'DESC' ELSE 'ASC' END)
+  USING v_company, p_team, p_type, p_risk, p_flag, NULLIF(btrim(p_search), ''),
+        p_after_value, p_after_id, LEAST(GREATEST(p_limit, 1), 200);
+END;
+$$;
+GRANT EXECUTE ON FUNCTION public.get_employees_page(UUID, INTEGER, TEXT, TEXT, TEXT, TEXT, TEXT, UUID, INTEGER)
+  TO authenticated;
+
+-- ── RPC: conteos de las alertas (panel y "Qué hacer hoy") ────
+CREATE OR REPLACE FUNCTION public.get_employees_stats()
+RETURNS TABLE (
+  total BIGINT, supervisors BIGINT, pending_test BIGINT, no_checkins BIGINT,
+  risk_high BIGINT, risk_watch BIGINT, high_risk_names TEXT[]
+)
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+  SELECT
+    COUNT(*),
+    COUNT(*) FILTER (WHERE s.role = 'supervisor'),
+    COUNT(*) FILTER (WHERE NOT s.questionnaire_completed),
+    COUNT(*) FILTER (WHERE s.questionnaire_completed AND s.checkin_count_14d = 0),
+    COUNT(*) FILTER (WHERE s.risk = 'high'),
+    COUNT(*) FILTER (WHERE s.risk = 'watch'),
+    (ARRAY_AGG(COALESCE(s.full_name, 'Sin nombre') ORDER BY s.risk_score DESC, s.user_id)
+       FILTER (WHERE s.risk = 'high'))[1:3]
+  FROM public.employee_summaries s
+  WHERE s.company_id = public.my_company_id() AND public.my_role() = 'company_admin';
+$$;
+GRANT EXECUTE ON FUNCTION public.get_employees_stats() TO authenticated;
+
+-- ── Agenda: pg_cron cada minuto ─────────────────────────────
+-- Sin pg_cron (Postgres local, plan sin la extensión) la migración sigue
+-- y el worker de Python se corre por cron del sistema.
+DO $$
+BEGIN
+  CREATE EXTENSION IF NOT EXISTS pg_cron;
+  PERFORM cron.schedule('employee-summaries', '* * * * *', 'SELECT public.process_employee_summaries()');
+EXCEPTION WHEN OTHERS THEN
+  RAISE NOTICE 'pg_cron no disponible (%): agendar scripts/eneadisc_employee_summaries.py', SQLERRM;
+END $$;